@@ -1,6 +1,7 @@
 # app/__init__.py
 from flask import Flask, send_from_directory, request
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
 from dotenv import load_dotenv
 from .extensions import db, migrate, mail
@@ -14,6 +15,12 @@ load_dotenv()
 
 def create_app():
     app = Flask(__name__)
+
+    # Behind nginx/a load balancer request.remote_addr is the proxy; trust that many
+    # X-Forwarded-* hops so per-IP rate limits see the real client (0 = not proxied)
+    proxy_hops = int(os.environ.get('PROXY_FIX_X_FOR', 0))
+    if proxy_hops > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_hops, x_proto=proxy_hops, x_host=proxy_hops)
     
     # Configure CORS with proper origins
     frontend_origins_str = os.environ.get('FRONTEND_ORIGINS', 'http://98.86.84.2,http://localhost:3000,http://localhost:3002')
@@ -1,4 +1,5 @@
 import json
+import os
 import re
 import time
 import uuid # Add uuid import
@@ -10,16 +11,18 @@ from app.controllers.response_controller import ResponseController  # Alias to a
 from app.controllers.survey_controller import SurveyController
 from app.controllers.ai_usage_analytics_controller import AIUsageAnalyticsController
 from app.utils.openai_cost_calculator import OpenAICostCalculator
+from app.utils.ai_insight_cache import AI_INSIGHT_CACHE_PARTIAL_TTL_SECONDS, ai_insight_cache, insight_cache_key
+from app.services.insight_recovery_service import recover_missing_insights
+from app.utils.prompt_budget import count_tokens, fit_to_budget, predicted_cost
 
 def estimate_openai_cost(input_text, output_text, model='gpt-4o'):
     """
-    Estimate OpenAI cost based on input/output text length.
-    This is an approximation since assistants API doesn't provide exact token counts.
+    Estimate OpenAI cost by tokenizing the input/output text.
+    Prefer the usage reported for the run (AIResult) when it is available.
     """
     try:
-        # Rough estimation: 1 token ≈ 4 characters for English text
-        input_tokens = len(input_text) // 4 if input_text else 0
-        output_tokens = len(output_text) // 4 if output_text else 0
+        input_tokens = count_tokens(input_text, model)
+        output_tokens = count_tokens(output_text, model)
         
         cost = OpenAICostCalculator.calculate_cost(model, input_tokens, output_tokens)
         
@@ -54,13 +57,18 @@ from app.openai_client_setup import (
     guided_survey_gen_asst_id,
     initialize_openai_client,
     openai_client,
+    poll_run,
     quick_survey_gen_asst_id,
+    run_assistant,
     survey_update_asst_id,
 )
 
 MAX_QUESTIONS = 10  # Max questions for interactive chat generation
 MAX_POLL_TIME = 150 # Increased timeout for potentially longer analytics runs
-POLL_INTERVAL = 2
+# Bump when the insights/summary prompts or output handling change so cached AI output is not reused
+INSIGHTS_PROMPT_VERSION = "insights-v2"
+SUMMARY_PROMPT_VERSION = "summary-v1"
+AI_INSIGHTS_MODEL = os.getenv("AI_INSIGHTS_MODEL", "gpt-4o")  # model of the analytics assistant, for token counting
 # Sample Size Thresholds
 OPEN_ENDED_MIN_SAMPLE, OPEN_ENDED_CAUTION_SAMPLE = 30, 100
 QUANTITATIVE_MIN_SAMPLE, QUANTITATIVE_CAUTION_SAMPLE = 50, 200
@@ -197,76 +205,14 @@ Adhere STRICTLY to these rules for any generated or modified questions:
 
 def wait_for_run_completion(thread_id, run_id):
     """Waits for an OpenAI Assistant run to complete, handling errors and timeouts."""
-    from app.openai_client_setup import get_openai_client
-    
-    # Get the dynamic client
-    openai_client = get_openai_client()
-    if openai_client is None:
-        raise Exception("Failed to get OpenAI client - API key may be missing")
-        
-    start_time = time.time()
-    while True:
-        try:
-            run = openai_client.beta.threads.runs.retrieve(
-                thread_id=thread_id, run_id=run_id
-            )
-            current_app.logger.debug(f"Run {run_id} status: {run.status}")  # Added logging
-            if run.status == "completed":
-                return run
-            # Handle terminal states
-            if run.status in [
-                "failed",
-                "cancelled",
-                "expired",
-                "requires_action",
-            ]:  # Added requires_action
-                # Log error details if available
-                error_details = (
-                    run.last_error
-                    if hasattr(run, "last_error") and run.last_error
-                    else "No details provided."
-                )
-                current_app.logger.error(
-                    f"[AI ERROR] Run {run_id} ended with status: {run.status}. Details: {error_details}"
-                )
-                # Handle 'requires_action' if using function calling later
-                if run.status == "requires_action":
-                    raise Exception(
-                        f"Run requires action (Tool Call): {run.id}. Action details: {run.required_action}"
-                    )  # Include details
-                raise Exception(
-                    f"Run ended with status: {run.status}. Details: {error_details}"
-                )
-
-            # Check for timeout
-            if time.time() - start_time > MAX_POLL_TIME:
-                current_app.logger.error(
-                    f"[AI ERROR] Run {run_id} timed out after {MAX_POLL_TIME} seconds."
-                )
-                # Attempt to cancel the run
-                try:
-                    openai_client.beta.threads.runs.cancel(
-                        thread_id=thread_id, run_id=run_id
-                    )
-                    current_app.logger.warning(
-                        f"[AI WARN] Attempted to cancel timed-out run {run_id}"
-                    )
-                except Exception as cancel_err:
-                    current_app.logger.warning(
-                        f"[AI WARN] Could not cancel timed-out run {run_id}: {cancel_err}"
-                    )
-                raise TimeoutError(
-                    f"Run timed out after {MAX_POLL_TIME} seconds"
-                )  # Use specific error
-
-            time.sleep(POLL_INTERVAL)
-        except Exception as e:
-            # Log any exception during polling and re-raise
-            current_app.logger.error(
-                f"[AI ERROR] Error during run retrieval/polling for {run_id}: {e}",
-                exc_info=True,
-            )
-            raise e  # Re-raise to signal failure
+    try:
+        return poll_run(thread_id, run_id, timeout=MAX_POLL_TIME)
+    except Exception as e:
+        current_app.logger.error(
+            f"[AI ERROR] Error during run retrieval/polling for {run_id}: {e}",
+            exc_info=True,
+        )
+        raise
 
 
 # --- Helper to get or create generic chat thread ---
@@ -408,43 +354,20 @@ def chat_controller(data):
             "Do NOT generate survey questions. Do NOT provide explanations, summaries, or conversational filler. "
             "Respond ONLY with the single question text."
         )
-        run = openai_client.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=follow_up_question_asst_id,
+        result = run_assistant(
+            thread_id,
+            follow_up_question_asst_id,
             instructions=instructions,
+            timeout=MAX_POLL_TIME,
         )
 
-        run = wait_for_run_completion(thread_id, run.id)
-
-        # Fetch the latest message, which should be the assistant's response
-        updated_msgs = openai_client.beta.threads.messages.list(
-            thread_id=thread_id, order="desc", limit=1
-        )
-        if not updated_msgs.data or updated_msgs.data[0].role != "assistant":
+        text_value = result.text
+        if not text_value:
             current_app.logger.error("[AI ERROR] No assistant message found after chat run.")
-            # Consider deleting the last user message if the run failed before assistant reply?
             return {"error": "AI assistant did not respond."}, 500
 
-        asst_msg_content = updated_msgs.data[0].content
-        if (
-            not asst_msg_content
-            or not hasattr(asst_msg_content[0], "text")
-            or not asst_msg_content[0].text.value
-        ):
-            current_app.logger.error(
-                "[AI ERROR] Assistant message content is empty or invalid."
-            )
-            return {"error": "AI assistant provided an empty response."}, 500
-
-        text_value = asst_msg_content[0].text.value
-
-        # Recalculate assistant message count after successful run
-        final_asst_msgs = [
-            m
-            for m in openai_client.beta.threads.messages.list(thread_id=thread_id).data
-            if m.role == "assistant"
-        ]
-        return {"response": text_value, "question_count": len(final_asst_msgs)}, 200
+        # The completed run added exactly one assistant message
+        return {"response": text_value, "question_count": len(asst_msgs) + 1}, 200
 
     except TimeoutError as e:
         current_app.logger.error(
@@ -494,32 +417,22 @@ def quick_generate_survey_ai(prompt, business_id=None):
         )
 
         current_app.logger.info("[AI QUICK GEN] Creating run...")
-        run = openai_client.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=quick_survey_gen_asst_id,
+        result = run_assistant(
+            thread_id,
+            quick_survey_gen_asst_id,
             instructions=instructions,
+            timeout=MAX_POLL_TIME,
         )
-        run = wait_for_run_completion(thread_id, run.id)
-        current_app.logger.info(f"[AI QUICK GEN] Run completed: {run.status}")
-
-        # Fetch the latest message (assistant's response)
-        msgs = openai_client.beta.threads.messages.list(
-            thread_id=thread_id, order="desc", limit=1
+        current_app.logger.info(
+            f"[AI QUICK GEN] Run {result.call_id} completed in {result.latency:.2f}s via {result.mode}"
         )
-        if not msgs.data or msgs.data[0].role != "assistant":
-            raise ValueError("No assistant message found after quick generation run.")
 
-        asst_msg_content = msgs.data[0].content
-        if (
-            not asst_msg_content
-            or not hasattr(asst_msg_content[0], "text")
-            or not asst_msg_content[0].text.value
-        ):
+        if not result.text:
             raise ValueError(
                 "Assistant message content is empty or invalid after quick generation run."
             )
 
-        raw_response = asst_msg_content[0].text.value
+        raw_response = result.text
         current_app.logger.debug(f"[AI QUICK GEN] Raw Response: {raw_response[:500]}...")
 
         survey_json = _parse_json_from_response(raw_response)
@@ -699,31 +612,22 @@ def guided_generate_survey_ai(industry, goal, description, tone_length, business
         instructions = f"Generate a tailored survey JSON based ONLY on the latest user message inputs. {specific_rules}"
 
         current_app.logger.info("[AI GUIDED GEN] Creating run...")
-        run = openai_client.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=guided_survey_gen_asst_id,
+        result = run_assistant(
+            thread_id,
+            guided_survey_gen_asst_id,
             instructions=instructions,
+            timeout=MAX_POLL_TIME,
         )
-        run = wait_for_run_completion(thread_id, run.id)
-        current_app.logger.info(f"[AI GUIDED GEN] Run completed: {run.status}")
-
-        msgs = openai_client.beta.threads.messages.list(
-            thread_id=thread_id, order="desc", limit=1
+        current_app.logger.info(
+            f"[AI GUIDED GEN] Run {result.call_id} completed in {result.latency:.2f}s via {result.mode}"
         )
-        if not msgs.data or msgs.data[0].role != "assistant":
-            raise ValueError("No assistant message found after guided generation run.")
 
-        asst_msg_content = msgs.data[0].content
-        if (
-            not asst_msg_content
-            or not hasattr(asst_msg_content[0], "text")
-            or not asst_msg_content[0].text.value
-        ):
+        if not result.text:
             raise ValueError(
                 "Assistant message content is empty or invalid after guided generation run."
             )
 
-        raw_response = asst_msg_content[0].text.value
+        raw_response = result.text
         current_app.logger.debug(f"[AI GUIDED GEN] Raw Response: {raw_response[:500]}...")
 
         survey_json = _parse_json_from_response(raw_response)
@@ -836,11 +740,33 @@ def guided_generate_survey_ai(industry, goal, description, tone_length, business
 
 # --- generate_ai_report_insights (Generate report from response data) ---
 
+def _ai_output_cache_key(kind, template_version, survey_id, question_ids=None, filters=None, comparison_settings=None):
+    """Cache digest of an AI insights/summary output, or None when the request cannot be keyed."""
+    try:
+        return insight_cache_key(kind, template_version, survey_id, question_ids, filters, comparison_settings)
+    except Exception as e:
+        current_app.logger.warning(f"[AI CACHE] Could not build {kind} cache key for survey {survey_id}: {e}")
+        return None
+
+
+def get_cached_report_insights(survey_id, selected_question_ids, filters, comparison_settings):
+    """
+    The cached report for an unchanged survey/questions/filters/comparison, or None.
+    Lets the route answer repeated report opens without a task or an AI points charge.
+    """
+    cache_key = _ai_output_cache_key(
+        "insights", INSIGHTS_PROMPT_VERSION, survey_id, selected_question_ids, filters, comparison_settings
+    )
+    entry = ai_insight_cache.get(cache_key) if cache_key else None
+    return entry["value"] if entry else None
+
+
 def generate_ai_report_insights(
     survey_id, selected_question_ids, filters, comparison_settings
 ):
     """
     Generates AI-driven insights with detailed analytics and trend analysis.
+    Reports are cached by content (see app/utils/ai_insight_cache.py).
     """
     if not survey_id or not selected_question_ids:
         return {"error": "Survey ID and selected question IDs are required"}, 400
@@ -849,6 +775,32 @@ def generate_ai_report_insights(
     start_time = time.time()
     usage_log_id = None
 
+    cache_key = _ai_output_cache_key(
+        "insights", INSIGHTS_PROMPT_VERSION, survey_id, selected_question_ids, filters, comparison_settings
+    )
+    cached_entry = ai_insight_cache.get(cache_key) if cache_key else None
+    if cached_entry:
+        current_app.logger.info(f"[AI INSIGHTS] Serving cached report for survey {survey_id} (created {cached_entry.get('created_at')})")
+        AIUsageAnalyticsController.log_ai_operation(
+            operation_type='analytics_report',
+            operation_subtype='insights',
+            survey_id=survey_id,
+            points_cost=0,
+            processing_time=time.time() - start_time,
+            success=True,
+            metadata={
+                'cache_hit': True,
+                'questions_analyzed': len(selected_question_ids),
+                'saved_openai_cost_usd': (cached_entry.get('cost_info') or {}).get('openai_cost_usd')
+            },
+            estimated_tokens=0,
+            openai_cost_usd=0,
+            input_tokens=0,
+            output_tokens=0
+        )
+        db.session.commit()
+        return cached_entry["value"], 200
+
     try:
         print("\n=== AI INSIGHTS START ===")
         print(f"Survey ID: {survey_id}")
@@ -1198,13 +1150,12 @@ def generate_ai_report_insights(
         # Helpful maps for later reconciliation and fallbacks
         ai_questions_map = {str(q.get("question_id")): q for q in ai_questions}
 
-        # Convert to JSON string for the prompt
-        ai_input_json_str = json.dumps(ai_input_json, indent=2, default=str)
         print("\nAI Input JSON Structure:")
         print(json.dumps(ai_input_json, indent=2, default=str))
         
         # Create a more robust prompt
-        final_prompt = f"""Analyze the following survey data and provide comprehensive insights.
+        def render_insights_prompt(ai_input_json_str):
+            return f"""Analyze the following survey data and provide comprehensive insights.
 
 IMPORTANT GUIDELINES:
 - Use professional, business-appropriate language only
@@ -1261,11 +1212,23 @@ REQUIRED OUTPUT FORMAT (return valid JSON only):
 
 Return ONLY the JSON object, no additional text."""
 
-        print(f"\n=== Sending to OpenAI ===")
-        print(f"Prompt length: {len(final_prompt)} characters")
+        # Serialize compactly and shrink the data until the prompt fits the model's token budget
+        prompt_plan = fit_to_budget(ai_input_json, render_insights_prompt, model=AI_INSIGHTS_MODEL)
+        final_prompt = prompt_plan.prompt
+        if prompt_plan.dropped_question_ids:
+            current_app.logger.warning(
+                f"[AI INSIGHTS] Questions {prompt_plan.dropped_question_ids} did not fit the {prompt_plan.budget} token budget; "
+                "they go through missing-insight recovery"
+            )
+
+        current_app.logger.info(
+            f"[AI INSIGHTS] Prompt length: {len(final_prompt)} characters, {prompt_plan.input_tokens} tokens "
+            f"(budget {prompt_plan.budget}, compaction level {prompt_plan.level})"
+        )
 
         # Make the API call to OpenAI
-        ai_generated_report = _generate_report_via_openai(final_prompt, survey_id)
+        run_usage = {}
+        ai_generated_report = _generate_report_via_openai(final_prompt, survey_id, usage_out=run_usage)
         
         if not ai_generated_report:
             print("ERROR: No report received from OpenAI")
@@ -1284,7 +1247,9 @@ Return ONLY the JSON object, no additional text."""
             }
         }
 
-        # Ensure we cover all selected questions deterministically: synthesize missing insights without extra AI calls
+        # Ensure we cover all selected questions: recover missing insights in batches, else synthesize them from backend analytics
+        recovery_usage = {}
+        synthesized_qids = []
         try:
             returned_q_insights = final_report["advanced_report"].get("question_insights", []) or []
             # Normalize mapping by question_id (as string)
@@ -1343,36 +1308,30 @@ Return ONLY the JSON object, no additional text."""
                     "chart_data": chart
                 }
 
+            # Recover missing questions in concurrent, token-budgeted batches (bounded by a deadline)
+            recovered_insights = {}
+            missing_qids = [qid for qid in expected_qids if qid not in insights_by_qid]
+            if missing_qids:
+                try:
+                    from app.openai_client_setup import get_openai_client
+                    recovered_insights, recovery_usage = recover_missing_insights(
+                        get_openai_client(),
+                        survey.title or "Survey Analysis",
+                        total_filtered_responses,
+                        [(qid, ai_questions_map.get(qid, {})) for qid in missing_qids],
+                    )
+                    current_app.logger.info(f"[AI INSIGHTS] Recovery stage: {recovery_usage}")
+                except Exception as recovery_err:
+                    current_app.logger.warning(f"[AI INSIGHTS] Missing-insight recovery failed: {recovery_err}")
+
             # Rebuild ordered insights list to cover all expected questions
             ordered_full_insights = []
             for qid in expected_qids:
                 ins = insights_by_qid.get(qid)
                 if not ins:
-                    # Try to get AI insight for this single question with a compact prompt
-                    try:
-                        q_payload = ai_questions_map.get(qid, {})
-                        compact = {
-                            "survey_title": survey.title or "Survey Analysis",
-                            "global_sample_size": total_filtered_responses,
-                            "question": q_payload,
-                        }
-                        compact_str = json.dumps(compact, indent=2, default=str)
-                        single_prompt = (
-                            "Analyze this single survey question and return ONLY a JSON object with the fields: "
-                            "question_id, question_text, headline, summary, sample_size, "
-                            "statistics { primary_metric, trend_direction, confidence_level }, "
-                            "insights (array of strings), and chart_data { type, data[{category,value,percentage?}], title }.\n\n"
-                            f"DATA:\n{compact_str}\n\n"
-                            "Return ONLY the JSON object for this question."
-                        )
-                        single_resp = _generate_report_via_openai(single_prompt, survey_id)
-                        candidate = None
-                        if isinstance(single_resp, dict):
-                            if "question_id" in single_resp:
-                                candidate = single_resp
-                            elif "question_insights" in single_resp and isinstance(single_resp["question_insights"], list) and single_resp["question_insights"]:
-                                candidate = single_resp["question_insights"][0]
-                        if candidate:
+                    candidate = recovered_insights.get(qid)
+                    if candidate:
+                        try:
                             # Enrich with backend chart/statistics
                             qid_int = int(qid)
                             q_obj = survey_questions_map.get(qid_int)
@@ -1385,9 +1344,10 @@ Return ONLY the JSON object, no additional text."""
                                 candidate["sample_size"] = ai_questions_map.get(qid, {}).get("sample_size", 0)
                             ordered_full_insights.append(candidate)
                             continue
-                    except Exception as single_err:
-                        current_app.logger.warning(f"[AI INSIGHTS] Single-question AI generation failed for Q{qid}: {single_err}")
+                        except Exception as enrich_err:
+                            current_app.logger.warning(f"[AI INSIGHTS] Could not use recovered insight for Q{qid}: {enrich_err}")
                     # Fallback to minimal synthesized insight
+                    synthesized_qids.append(qid)
                     ordered_full_insights.append(build_minimal_insight(qid))
                 else:
                     # Enrich existing insight if missing chart/statistics
@@ -1413,11 +1373,12 @@ Return ONLY the JSON object, no additional text."""
             print(f"[AI INSIGHTS] Reconciliation error: {reconcile_err}")
 
         # Ensure we have some content
-        if not any([
+        is_placeholder_report = not any([
             final_report["advanced_report"]["executive_summary"],
             final_report["advanced_report"]["question_insights"], 
             final_report["advanced_report"]["insights"]
-        ]):
+        ])
+        if is_placeholder_report:
             print("WARNING: Generated report appears to be empty")
             # Provide a fallback report
             final_report["advanced_report"] = {
@@ -1458,9 +1419,35 @@ Return ONLY the JSON object, no additional text."""
         print("Report Structure:")
         print(json.dumps(final_report, indent=2, default=str))
         
-        # Estimate OpenAI cost using final_report as proxy for response
-        output_text = json.dumps(final_report, default=str)
-        cost_info = estimate_openai_cost(final_prompt, output_text)
+        # Cost from the token usage OpenAI reported for the run (plus recovery batches);
+        # the tokenizer counts are the fallback and are logged as the prediction
+        predicted_output_tokens = count_tokens(json.dumps(ai_generated_report, default=str), AI_INSIGHTS_MODEL)
+        input_tokens = run_usage.get('input_tokens') or prompt_plan.input_tokens
+        output_tokens = run_usage.get('output_tokens') or predicted_output_tokens
+        cost_info = predicted_cost(
+            AI_INSIGHTS_MODEL,
+            input_tokens + recovery_usage.get('input_tokens', 0),
+            output_tokens + recovery_usage.get('output_tokens', 0)
+        )
+        current_app.logger.info(
+            f"[AI INSIGHTS] Tokens predicted in/out {prompt_plan.input_tokens}/{predicted_output_tokens}, "
+            f"actual {run_usage.get('input_tokens')}/{run_usage.get('output_tokens')}, "
+            f"recovery {recovery_usage.get('input_tokens', 0)}/{recovery_usage.get('output_tokens', 0)}"
+        )
+
+        # Placeholder reports are not cached so the next open retries the AI; reports with
+        # synthesized insights or failed recovery batches are only kept briefly
+        if cache_key and not is_placeholder_report:
+            is_degraded_report = bool(synthesized_qids) or recovery_usage.get('failed_batches', 0) > 0
+            if is_degraded_report:
+                current_app.logger.info(
+                    f"[AI INSIGHTS] Caching degraded report for {AI_INSIGHT_CACHE_PARTIAL_TTL_SECONDS}s "
+                    f"(synthesized {synthesized_qids}, failed recovery batches {recovery_usage.get('failed_batches', 0)})"
+                )
+            ai_insight_cache.set(
+                cache_key, final_report, cost_info,
+                ttl_seconds=AI_INSIGHT_CACHE_PARTIAL_TTL_SECONDS if is_degraded_report else None
+            )
         
         # Log successful analytics operation
         processing_time = time.time() - start_time
@@ -1475,7 +1462,11 @@ Return ONLY the JSON object, no additional text."""
                 'questions_analyzed': len(selected_question_ids),
                 'has_comparison': is_comparison,
                 'filters_applied': bool(filters),
-                'insights_generated': len(final_report.get('advanced_report', {}).get('question_insights', []))
+                'insights_generated': len(final_report.get('advanced_report', {}).get('question_insights', [])),
+                'predicted_input_tokens': prompt_plan.input_tokens,
+                'actual_input_tokens': run_usage.get('input_tokens'),
+                'prompt_compaction_level': prompt_plan.level,
+                'recovery_batches': recovery_usage.get('batches', 0)
             },
             estimated_tokens=cost_info['estimated_tokens'],
             openai_cost_usd=cost_info['openai_cost_usd'],
@@ -1873,8 +1864,11 @@ def _calculate_percentage(value, analytics_data):
 
 
 # --- Helper function to generate report via OpenAI ---
-def _generate_report_via_openai(prompt, survey_id):
-    """Generate AI report via OpenAI API call."""
+def _generate_report_via_openai(prompt, survey_id, usage_out=None):
+    """
+    Generate AI report via OpenAI API call.
+    ``usage_out`` (dict) receives the run's input_tokens/output_tokens/latency when given.
+    """
     try:
         current_app.logger.info("[AI INSIGHTS] Calling OpenAI Assistant...")
         from app.openai_client_setup import get_openai_client
@@ -1940,35 +1934,28 @@ def _generate_report_via_openai(prompt, survey_id):
 
         # Create and run assistant
         try:
-            run = openai_client.beta.threads.runs.create(
-                thread_id=thread_id,
-                assistant_id=analytics_asst_id,
-                instructions="You are an expert data analyst. Generate comprehensive insights based on the survey data provided."
+            result = run_assistant(
+                thread_id,
+                analytics_asst_id,
+                instructions="You are an expert data analyst. Generate comprehensive insights based on the survey data provided.",
+                timeout=MAX_POLL_TIME,
             )
-            current_app.logger.info(f"[AI INSIGHTS] Created run {run.id}")
-            
-            run = wait_for_run_completion(thread_id, run.id)
-            current_app.logger.info(f"[AI INSIGHTS] Run completed with status: {run.status}")
+            current_app.logger.info(
+                f"[AI INSIGHTS] Run {result.call_id} completed in {result.latency:.2f}s via {result.mode}"
+            )
+            if usage_out is not None:
+                usage_out.update(input_tokens=result.input_tokens, output_tokens=result.output_tokens, latency=result.latency)
         except Exception as run_err:
             current_app.logger.error(f"[AI INSIGHTS] Failed to create or complete run: {run_err}")
             return None
 
         # Get response
         try:
-            msgs = openai_client.beta.threads.messages.list(
-                thread_id=thread_id, order="desc", limit=1
-            )
-            
-            if not msgs.data or msgs.data[0].role != "assistant":
+            if not result.text:
                 current_app.logger.error("[AI INSIGHTS] No assistant message found after insights generation run.")
                 return None
 
-            asst_msg_content = msgs.data[0].content
-            if not asst_msg_content or not hasattr(asst_msg_content[0], "text") or not asst_msg_content[0].text.value:
-                current_app.logger.error("[AI INSIGHTS] Assistant message content is empty or invalid.")
-                return None
-
-            raw_response = asst_msg_content[0].text.value
+            raw_response = result.text
             current_app.logger.info(f"[AI INSIGHTS] Received AI response, length: {len(raw_response)} characters")
             current_app.logger.info(f"[AI INSIGHTS] COMPLETE RAW AI RESPONSE:")
             current_app.logger.info("=" * 80)
@@ -2164,35 +2151,23 @@ def ai_edit_question_controller(data):
         )
 
         # Create and wait for run
-        run = openai_client.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=survey_update_asst_id,
+        result = run_assistant(
+            thread_id,
+            survey_update_asst_id,
             instructions=instructions,
+            timeout=MAX_POLL_TIME,
         )
-        current_app.logger.debug(f"[AI EDIT Q] Run created with ID {run.id}, waiting for completion")
-        run = wait_for_run_completion(thread_id, run.id)
-        current_app.logger.debug(f"[AI EDIT Q] Run completed with status: {run.status}")
-
-        # Get the response
-        msgs = openai_client.beta.threads.messages.list(
-            thread_id=thread_id, order="desc", limit=1
+        current_app.logger.info(
+            f"[AI EDIT Q] Run {result.call_id} completed in {result.latency:.2f}s via {result.mode}"
         )
-        if not msgs.data or msgs.data[0].role != "assistant":
-            current_app.logger.error("[AI EDIT Q] No assistant messages found after edit run")
-            return {"error": "AI assistant did not respond."}, 500
 
-        asst_msg_content = msgs.data[0].content
-        if (
-            not asst_msg_content
-            or not hasattr(asst_msg_content[0], "text")
-            or not asst_msg_content[0].text.value
-        ):
+        if not result.text:
             current_app.logger.error(
                 "[AI EDIT Q] Assistant message content is empty or invalid."
             )
             return {"error": "AI assistant provided an empty response."}, 500
 
-        raw_response = asst_msg_content[0].text.value
+        raw_response = result.text
         current_app.logger.debug(f"[AI EDIT Q] Raw assistant response: {raw_response[:500]}...")
 
         # Parse the JSON response
@@ -2389,37 +2364,23 @@ def edit_survey_ai_controller(data):
             f"[AI EDIT SURVEY] Added edit instructions to thread {thread_id}"
         )
 
-        run = openai_client.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=survey_update_asst_id,
+        result = run_assistant(
+            thread_id,
+            survey_update_asst_id,
             instructions=instructions,
+            timeout=MAX_POLL_TIME,
         )
-        current_app.logger.info(f"[AI EDIT SURVEY] Run created ({run.id}), waiting for completion...")
-        run = wait_for_run_completion(thread_id, run.id)
         current_app.logger.info(
-            f"[AI EDIT SURVEY] Run {run.id} completed with status: {run.status}"
+            f"[AI EDIT SURVEY] Run {result.call_id} completed in {result.latency:.2f}s via {result.mode}"
         )
 
-        # Get the assistant's response
-        msgs = openai_client.beta.threads.messages.list(
-            thread_id=thread_id, order="desc", limit=1
-        )
-        if not msgs.data or msgs.data[0].role != "assistant":
-            current_app.logger.error("[AI EDIT SURVEY] No assistant message found after edit run.")
-            return {"error": "AI assistant did not respond to the edit request."}, 500
-
-        asst_msg_content = msgs.data[0].content
-        if (
-            not asst_msg_content
-            or not hasattr(asst_msg_content[0], "text")
-            or not asst_msg_content[0].text.value
-        ):
+        if not result.text:
             current_app.logger.error(
                 "[AI EDIT SURVEY] Assistant message content is empty or invalid."
             )
             return {"error": "AI assistant provided an empty response."}, 500
 
-        raw_response = asst_msg_content[0].text.value
+        raw_response = result.text
         current_app.logger.debug(f"[AI EDIT SURVEY] Raw response: {raw_response[:500]}...")
 
         # Parse the full survey JSON from the response
@@ -2566,39 +2527,23 @@ Your response MUST be ONLY the complete, new survey JSON object, including all s
             f"[AI REGEN] Added regeneration request to thread {thread_id}"
         )
 
-        run = openai_client.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=survey_update_asst_id,  # Using update assistant ID, suitable for generation/modification
+        result = run_assistant(
+            thread_id,
+            survey_update_asst_id,  # Using update assistant ID, suitable for generation/modification
             instructions=instructions,
+            timeout=MAX_POLL_TIME,
         )
-        current_app.logger.info(f"[AI REGEN] Run created ({run.id}), waiting for completion...")
-        run = wait_for_run_completion(thread_id, run.id)
         current_app.logger.info(
-            f"[AI REGEN] Run {run.id} completed with status: {run.status}"
+            f"[AI REGEN] Run {result.call_id} completed in {result.latency:.2f}s via {result.mode}"
         )
 
-        # Get response
-        msgs = openai_client.beta.threads.messages.list(
-            thread_id=thread_id, order="desc", limit=1
-        )
-        if not msgs.data or msgs.data[0].role != "assistant":
-            current_app.logger.error("[AI REGEN] No assistant message found after regeneration run.")
-            return {
-                "error": "AI assistant did not respond to the regeneration request."
-            }, 500
-
-        asst_msg_content = msgs.data[0].content
-        if (
-            not asst_msg_content
-            or not hasattr(asst_msg_content[0], "text")
-            or not asst_msg_content[0].text.value
-        ):
+        if not result.text:
             current_app.logger.error(
                 "[AI REGEN] Assistant message content is empty or invalid."
             )
             return {"error": "AI assistant provided an empty response."}, 500
 
-        response_text = asst_msg_content[0].text.value
+        response_text = result.text
         current_app.logger.debug(f"[AI REGEN] Raw response: {response_text[:500]}...")
 
         # Parse the full regenerated survey JSON
@@ -2776,37 +2721,23 @@ Format: Ensure the survey_updates JSON object, if present, is valid and correctl
         )
         current_app.logger.info(f"[AI CONVO] Added user request to thread {thread_id}")
 
-        run = openai_client.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=survey_update_asst_id,
+        result = run_assistant(
+            thread_id,
+            survey_update_asst_id,
             instructions=instructions,
+            timeout=MAX_POLL_TIME,
         )
-        current_app.logger.info(f"[AI CONVO] Run created ({run.id}), waiting for completion...")
-        run = wait_for_run_completion(thread_id, run.id)
         current_app.logger.info(
-            f"[AI CONVO] Run {run.id} completed with status: {run.status}"
+            f"[AI CONVO] Run {result.call_id} completed in {result.latency:.2f}s via {result.mode}"
         )
 
-        # Get response
-        msgs = openai_client.beta.threads.messages.list(
-            thread_id=thread_id, order="desc", limit=1
-        )
-        if not msgs.data or msgs.data[0].role != "assistant":
-            current_app.logger.error("[AI CONVO] No assistant message found.")
-            return {"error": "AI assistant did not respond."}, 500
-
-        asst_msg_content = msgs.data[0].content
-        if (
-            not asst_msg_content
-            or not hasattr(asst_msg_content[0], "text")
-            or not asst_msg_content[0].text.value
-        ):
+        if not result.text:
             current_app.logger.error(
                 "[AI CONVO] Assistant message content is empty or invalid."
             )
             return {"error": "AI assistant provided an empty response."}, 500
 
-        response_text = asst_msg_content[0].text.value
+        response_text = result.text
         current_app.logger.debug(f"[AI CONVO] Raw response: {response_text[:500]}...")
 
         # --- Parse Response: Separate Conversational Text and JSON Updates ---
@@ -2970,6 +2901,16 @@ def get_ai_summary_controller(survey_id):
         return {"error": "survey_id query parameter required"}, 400
     current_app.logger.info(f"[AI SUMMARY] Requesting AI summary for survey {survey_id}")
 
+    # Unchanged survey responses -> reuse the previous summary instead of another run
+    summary_cache_key = _ai_output_cache_key("summary", SUMMARY_PROMPT_VERSION, survey_id)
+    cached_entry = ai_insight_cache.get(summary_cache_key) if summary_cache_key else None
+    if cached_entry:
+        current_app.logger.info(f"[AI SUMMARY] Serving cached summary for survey {survey_id}")
+        raw_summary_data, status = ResponseController.get_report_summary(survey_id)
+        if status != 200:
+            raw_summary_data = {"warning": "Failed to fetch latest raw summary data."}
+        return {"raw_summary": raw_summary_data, "ai_summary": cached_entry["value"], "cached": True}, 200
+
     # --- Thread Management & Context ---
     thread_id = None
     try:
@@ -3029,37 +2970,23 @@ def get_ai_summary_controller(survey_id):
             f"[AI SUMMARY] Added summary request to thread {thread_id}"
         )
 
-        run = openai_client.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=analytics_asst_id,
+        result = run_assistant(
+            thread_id,
+            analytics_asst_id,
             instructions=instructions,
+            timeout=MAX_POLL_TIME,
         )
-        current_app.logger.info(f"[AI SUMMARY] Run created ({run.id}), waiting for completion...")
-        run = wait_for_run_completion(thread_id, run.id)
         current_app.logger.info(
-            f"[AI SUMMARY] Run {run.id} completed with status: {run.status}"
-        )
-
-        # Get response
-        msgs = openai_client.beta.threads.messages.list(
-            thread_id=thread_id, order="desc", limit=1
+            f"[AI SUMMARY] Run {result.call_id} completed in {result.latency:.2f}s via {result.mode}"
         )
-        if not msgs.data or msgs.data[0].role != "assistant":
-            current_app.logger.error("[AI SUMMARY] No assistant message found after summary run.")
-            return {"error": "AI assistant did not generate a summary."}, 500
 
-        asst_msg_content = msgs.data[0].content
-        if (
-            not asst_msg_content
-            or not hasattr(asst_msg_content[0], "text")
-            or not asst_msg_content[0].text.value
-        ):
+        if not result.text:
             current_app.logger.error(
                 "[AI SUMMARY] Assistant message content is empty or invalid."
             )
             return {"error": "AI assistant provided an empty response."}, 500
 
-        ai_summary_text = asst_msg_content[0].text.value
+        ai_summary_text = result.text
         current_app.logger.info(
             f"[AI SUMMARY] Successfully generated AI summary for survey {survey_id}."
         )
@@ -3067,6 +2994,14 @@ def get_ai_summary_controller(survey_id):
             f"[AI SUMMARY] AI Summary Text (first 200 chars): {ai_summary_text[:200]}..."
         )
 
+        if summary_cache_key:
+            ai_insight_cache.set(summary_cache_key, ai_summary_text, {
+                "input_tokens": result.input_tokens,
+                "output_tokens": result.output_tokens,
+                "model_used": result.model,
+                "latency_seconds": round(result.latency, 2),
+            })
+
         # Return both the latest raw data and the AI-generated summary text
         return {"raw_summary": raw_summary_data, "ai_summary": ai_summary_text}, 200
 
@@ -3140,37 +3075,23 @@ def converse_ai_summary_controller(data):
             f"[AI CONVERSE] Added user question to thread {thread_id}"
         )
 
-        run = openai_client.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=analytics_asst_id,
+        result = run_assistant(
+            thread_id,
+            analytics_asst_id,
             instructions=instructions,
+            timeout=MAX_POLL_TIME,
         )
-        current_app.logger.info(f"[AI CONVERSE] Run created ({run.id}), waiting for completion...")
-        run = wait_for_run_completion(thread_id, run.id)
         current_app.logger.info(
-            f"[AI CONVERSE] Run {run.id} completed with status: {run.status}"
-        )
-
-        # Get response
-        msgs = openai_client.beta.threads.messages.list(
-            thread_id=thread_id, order="desc", limit=1
+            f"[AI CONVERSE] Run {result.call_id} completed in {result.latency:.2f}s via {result.mode}"
         )
-        if not msgs.data or msgs.data[0].role != "assistant":
-            current_app.logger.error("[AI CONVERSE] No assistant message found.")
-            return {"error": "AI assistant did not respond."}, 500
 
-        asst_msg_content = msgs.data[0].content
-        if (
-            not asst_msg_content
-            or not hasattr(asst_msg_content[0], "text")
-            or not asst_msg_content[0].text.value
-        ):
+        if not result.text:
             current_app.logger.error(
                 "[AI CONVERSE] Assistant message content is empty or invalid."
             )
             return {"error": "AI assistant provided an empty response."}, 500
 
-        conversation_response_text = asst_msg_content[0].text.value
+        conversation_response_text = result.text
         current_app.logger.info(
             f"[AI CONVERSE] Successfully generated conversational response for survey {survey_id}."
         )
@@ -3195,12 +3116,24 @@ def converse_ai_summary_controller(data):
         return {"error": f"AI conversation failed: {str(e)}"}, 500
 
 # --- NEW FUNCTION: auto_generate_survey_responses_ai ---
-def auto_generate_survey_responses_ai(survey_id, num_responses_to_generate):
+def auto_generate_survey_responses_ai(survey_id, num_responses_to_generate, progress_callback=None):
+    """
+    Generate synthetic respondents for a survey and store them as AI-generated submissions.
+
+    Each respondent is one JSON-mode completion answering the whole survey;
+    respondents are generated concurrently (AI_RESPONSE_GENERATION_CONCURRENCY)
+    and the results are bulk-inserted by ResponseController.create_generated_submissions.
+    """
+    from app.services.respondent_generation_service import (
+        RESPONSE_GENERATION_MODEL,
+        build_question_plan,
+        generate_respondents,
+    )
+
     current_app.logger.info(f"[AI AUTO-RESPONSE] Starting generation for survey_id: {survey_id}, num_responses: {num_responses_to_generate}")
 
     # Start timing for analytics
     start_time = time.time()
-    usage_log_id = None
 
     # Check OpenAI client availability first
     from app.openai_client_setup import get_openai_client
@@ -3214,295 +3147,46 @@ def auto_generate_survey_responses_ai(survey_id, num_responses_to_generate):
     if status != 200:
         current_app.logger.error(f"[AI AUTO-RESPONSE] Survey {survey_id} not found.")
         return {"error": f"Survey {survey_id} not found"}, 404
-    
+
     survey_questions = survey_data.get("questions", [])
     if not survey_questions:
         current_app.logger.warning(f"[AI AUTO-RESPONSE] Survey {survey_id} has no questions.")
         return {"error": "Survey has no questions to respond to"}, 400
 
-    try:
-        thread_id = _get_or_create_generic_thread() 
-    except Exception as e:
-        current_app.logger.error(f"[AI AUTO-RESPONSE] Could not get/create OpenAI thread: {e}", exc_info=True)
-        return {"error": "Failed to initialize AI context"}, 500
+    # 2. Generate all respondents concurrently
+    plan = build_question_plan(survey_questions)
+    results = generate_respondents(
+        openai_client, plan, num_responses_to_generate, progress_callback=progress_callback
+    )
+    generated = [r for r in results if r["respondent"] is not None]
+    current_app.logger.info(
+        f"[AI AUTO-RESPONSE] Generated {len(generated)}/{num_responses_to_generate} respondents for survey {survey_id} "
+        f"in {time.time() - start_time:.1f}s"
+    )
 
-    assistant_id_for_answers = survey_update_asst_id 
+    # 3. Bulk-insert the generated submissions
+    submission_ids = []
+    insert_error = None
+    if generated:
+        insert_result, insert_status = ResponseController.create_generated_submissions(
+            survey_id, [r["respondent"] for r in generated]
+        )
+        submission_ids = insert_result.get("submission_ids", [])
+        if insert_status != 201:
+            insert_error = insert_result.get("error", "Unknown submission error")
 
-    successful_submissions = 0
-    failed_submissions = 0
+    submission_ids_by_index = {r["index"]: sid for r, sid in zip(generated, submission_ids)}
     submission_details = []
-
-    for i in range(num_responses_to_generate):
-        current_app.logger.info(f"[AI AUTO-RESPONSE] Generating response set {i+1}/{num_responses_to_generate} for survey {survey_id}")
-        
-        responses_for_submission = {}
-        all_answers_generated_for_this_submission = True
-
-        persona_prompt_addition = (
-            f" You are simulating survey respondent #{i+1}. "
-            f"Try to provide varied and realistic answers as if you are a different person from previous responses. "
-            f"If choices are available, pick randomly or based on a plausible persona. "
-        )
-
-        for q_idx, question in enumerate(survey_questions):
-            seq_num_str = str(question.get("sequence_number", q_idx + 1))
-            q_type = question.get("question_type") # Corrected from question.get("type") to question.get("question_type")
-            q_text = question.get("question_text", "N/A") # Corrected from question.get("text", "N/A")
-            q_options = question.get("options", []) 
-            q_image_options = question.get("image_options", []) 
-            q_ranking_items = question.get("ranking_items", []) 
-            
-            if q_type in ["content-text", "content-media"]:
-                current_app.logger.info(f"[AI AUTO-RESPONSE] Skipping content block (Q {seq_num_str}): {q_type}")
-                continue
-
-            gpt_prompt_for_question = (
-                f"You are an AI simulating a survey respondent answering a single question. "
-                f"{persona_prompt_addition}"
-                f"The question is: '{q_text}'. "
-                f"The question type is: '{q_type}'. "
-            )
-
-            expected_json_output = False
-            
-            if q_type == "single-choice" or q_type == "dropdown":
-                options_texts = [opt.get("text") if isinstance(opt, dict) else str(opt) for opt in q_options if (opt.get("text") if isinstance(opt, dict) else str(opt))]
-                if not options_texts: 
-                    responses_for_submission[seq_num_str] = "AI: No options provided"
-                    continue
-                gpt_prompt_for_question += f"Available options: {json.dumps(options_texts)}. Choose one. Return ONLY the chosen option text as a simple string."
-            
-            elif q_type == "multi-choice" or q_type == "checkbox":
-                options_texts = [opt.get("text") if isinstance(opt, dict) else str(opt) for opt in q_options if (opt.get("text") if isinstance(opt, dict) else str(opt))]
-                if not options_texts:
-                    responses_for_submission[seq_num_str] = json.dumps([]) 
-                    continue
-                gpt_prompt_for_question += f"Available options: {json.dumps(options_texts)}. Choose one or more. Return your choices as a JSON array of strings. E.g., [\"Option A\", \"Option B\"]. If no choice, return []."
-                expected_json_output = True 
-
-            elif q_type == "open-ended":
-                gpt_prompt_for_question += "Provide a brief, realistic text answer. Return ONLY the text string."
-
-            elif q_type == "rating" or q_type == "nps" or q_type == "star-rating":
-                min_val = question.get("rating_start", 0 if q_type == "nps" else 1)
-                max_val = question.get("rating_end", 10 if q_type == "nps" else 5)
-                gpt_prompt_for_question += f"Provide a rating between {min_val} and {max_val}. Return ONLY the number as a string or integer."
-
-            elif q_type == "numerical-input":
-                min_val = question.get("min_value", "-infinity")
-                max_val = question.get("max_value", "+infinity")
-                gpt_prompt_for_question += f"Provide a numerical answer. Min: {min_val}, Max: {max_val}. Return ONLY the number as a string or integer."
-            
-            elif q_type == "email-input":
-                gpt_prompt_for_question += f"Provide a realistic but fake email address (e.g., user{random.randint(100,999)}@example.com). Return ONLY the email string."
-
-            elif q_type == "date-picker":
-                gpt_prompt_for_question += "Provide a realistic date in YYYY-MM-DD format. Return ONLY the date string."
-            
-            elif q_type == "single-image-select":
-                options_hidden_labels = [opt.get("hidden_label") for opt in q_image_options if isinstance(opt, dict) and opt.get("hidden_label")]
-                options_visible_labels = [opt.get("label", opt.get("hidden_label")) for opt in q_image_options if isinstance(opt, dict) and opt.get("hidden_label")]
-                if not options_hidden_labels:
-                    responses_for_submission[seq_num_str] = "AI: No image options"
-                    continue
-                gpt_prompt_for_question += f"Image options (visible labels): {json.dumps(options_visible_labels)}. Corresponding hidden internal IDs are: {json.dumps(options_hidden_labels)}. Choose one image option based on the visible labels. Return ONLY the chosen image's *hidden internal ID* as a simple string."
-
-            elif q_type == "multiple-image-select":
-                options_hidden_labels = [opt.get("hidden_label") for opt in q_image_options if isinstance(opt, dict) and opt.get("hidden_label")]
-                options_visible_labels = [opt.get("label", opt.get("hidden_label")) for opt in q_image_options if isinstance(opt, dict) and opt.get("hidden_label")]
-                if not options_hidden_labels:
-                    responses_for_submission[seq_num_str] = json.dumps([])
-                    continue
-                gpt_prompt_for_question += f"Image options (visible labels): {json.dumps(options_visible_labels)}. Corresponding hidden internal IDs are: {json.dumps(options_hidden_labels)}. Choose one or more image options based on the visible labels. Return ONLY the chosen images' *hidden internal IDs* as a JSON array of strings. E.g., [\"imgopt_abc123\", \"imgopt_def456\"]."
-                expected_json_output = True
-
-            elif q_type == "interactive-ranking":
-                item_texts = [item.get("text") for item in q_ranking_items if isinstance(item, dict) and item.get("text")]
-                if not item_texts:
-                    responses_for_submission[seq_num_str] = json.dumps({})
-                    continue
-                gpt_prompt_for_question += (
-                    f"The items to rank are: {json.dumps(item_texts)}. "
-                    f"Please rank all of them from 1 (most preferred) to {len(item_texts)} (least preferred). "
-                    f"Return your ranking as a JSON object where keys are the item texts and values are their integer ranks. "
-                    f"Example: {json.dumps({item_texts[0]: 1, item_texts[1]: 2})} if there were two items."
-                )
-                expected_json_output = True
-
-            elif q_type == "scale": 
-                scale_points_texts = question.get("scale_points", [])
-                if not scale_points_texts:
-                     responses_for_submission[seq_num_str] = "AI: No scale points provided"
-                     continue
-                gpt_prompt_for_question += f"Available scale points: {json.dumps(scale_points_texts)}. Choose one. Return ONLY the chosen scale point text as a simple string."
-            
-            elif q_type == "radio-grid":
-                row_labels = [row.get("text") for row in question.get("grid_rows", []) if isinstance(row, dict) and row.get("text")]
-                col_labels = [col.get("text") for col in question.get("grid_columns", []) if isinstance(col, dict) and col.get("text")]
-                if not row_labels or not col_labels:
-                    responses_for_submission[seq_num_str] = json.dumps({})
-                    continue
-                gpt_prompt_for_question += (
-                    f"This is a radio grid. Rows: {json.dumps(row_labels)}. Columns: {json.dumps(col_labels)}. "
-                    f"For each row, choose one column. "
-                    f"Return your answers as a JSON object where keys are row labels and values are the chosen column labels. "
-                    f"Example: {json.dumps({row_labels[0]: col_labels[0], row_labels[1]: col_labels[1]})} if there were two rows."
-                )
-                expected_json_output = True
-
-            elif q_type == "checkbox-grid":
-                row_labels = [row.get("text") for row in question.get("grid_rows", []) if isinstance(row, dict) and row.get("text")]
-                col_labels = [col.get("text") for col in question.get("grid_columns", []) if isinstance(col, dict) and col.get("text")]
-                if not row_labels or not col_labels:
-                    responses_for_submission[seq_num_str] = json.dumps({})
-                    continue
-                gpt_prompt_for_question += (
-                    f"This is a checkbox grid. Rows: {json.dumps(row_labels)}. Columns: {json.dumps(col_labels)}. "
-                    f"For each row, choose one or more columns. "
-                    f"Return your answers as a JSON object where keys are row labels and values are JSON arrays of chosen column labels. "
-                    f"Example: {json.dumps({row_labels[0]: [col_labels[0], col_labels[1]], row_labels[1]: [col_labels[0]]})}."
-                )
-                expected_json_output = True
-            
-            elif q_type == "star-rating-grid":
-                row_labels = [row.get("text") for row in question.get("grid_rows", []) if isinstance(row, dict) and row.get("text")]
-                if not row_labels:
-                    responses_for_submission[seq_num_str] = json.dumps({})
-                    continue
-                
-                rating_col_label = "Rating" 
-                
-                gpt_prompt_for_question += (
-                    f"This is a star rating grid. Rows: {json.dumps(row_labels)}. "
-                    f"For each row, provide a star rating (e.g., from 1 to 5, or 'N/A' if not applicable). "
-                    f"Return your answers as a JSON object. Keys are row labels. Values are *another* JSON object with a single key '{rating_col_label}' and its value being the star rating (number) or 'N/A' (string). "
-                    f"Example: {json.dumps({row_labels[0]: {rating_col_label: 4}, row_labels[1]: {rating_col_label: 'N/A'}})} if 2 rows."
-                )
-                expected_json_output = True
-
-            elif q_type == "signature":
-                random_name = f"AI User {random.randint(100,999)}"
-                random_font = random.choice(["Dancing Script", "Great Vibes", "Pacifico", "Satisfy", "Sacramento", "Allura"])
-                signature_obj = {"type": "typed", "name": random_name, "font": random_font}
-                responses_for_submission[seq_num_str] = json.dumps(signature_obj)
-                current_app.logger.info(f"[AI AUTO-RESPONSE] Generated signature for Q {seq_num_str}: {responses_for_submission[seq_num_str]}")
-                continue 
-
-            elif q_type == "document-upload":
-                num_docs = random.randint(1, min(2, question.get("max_files", 1) or 1) )
-                docs_metadata = []
-                allowed_exts = question.get("allowed_types", ["pdf", "doc", "png"]) 
-                if isinstance(allowed_exts, str): allowed_exts = [ext.strip() for ext in allowed_exts.split(',')]
-                
-                for d_idx in range(num_docs):
-                    ext = random.choice(allowed_exts) if allowed_exts else "dat"
-                    mime_map = {"pdf": "application/pdf", "doc": "application/msword", "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document", 
-                                "png": "image/png", "jpg": "image/jpeg", "txt": "text/plain"}
-                    docs_metadata.append({
-                        "name": f"ai_gen_doc_{d_idx+1}.{ext}",
-                        "url": f"placeholder/uploads/ai_gen_doc_{d_idx+1}_{uuid.uuid4().hex[:8]}.{ext}", 
-                        "type": mime_map.get(ext, "application/octet-stream"),
-                        "size": random.randint(50000, 5000000) 
-                    })
-                responses_for_submission[seq_num_str] = json.dumps(docs_metadata)
-                current_app.logger.info(f"[AI AUTO-RESPONSE] Generated doc metadata for Q {seq_num_str}: {responses_for_submission[seq_num_str]}")
-                continue 
-
-            else:
-                current_app.logger.warning(f"[AI AUTO-RESPONSE] Question type '{q_type}' (Q {seq_num_str}) not fully handled for AI generation. Using generic prompt.")
-                gpt_prompt_for_question += "Provide a plausible answer. Return as a simple string."
-
-            try:
-                from app.openai_client_setup import get_openai_client
-                
-                # Get the dynamic client for each question
-                openai_client = get_openai_client()
-                if openai_client is None:
-                    current_app.logger.error(f"[AI AUTO-RESPONSE] Failed to get OpenAI client for Q {seq_num_str}")
-                    responses_for_submission[seq_num_str] = "AI_ERROR: No OpenAI client"
-                    all_answers_generated_for_this_submission = False
-                    continue
-                    
-                openai_client.beta.threads.messages.create(
-                    thread_id=thread_id, role="user", content=gpt_prompt_for_question
-                )
-                run_instructions = (
-                    "You are an AI answering a single survey question. "
-                    "Follow the user's prompt precisely regarding the expected output format. "
-                    "Return ONLY the answer in the specified format. Do not add any conversational text, explanations, or markdown."
-                )
-                run = openai_client.beta.threads.runs.create(
-                    thread_id=thread_id,
-                    assistant_id=assistant_id_for_answers, 
-                    instructions=run_instructions
-                )
-                run = wait_for_run_completion(thread_id, run.id) 
-                
-                msgs = openai_client.beta.threads.messages.list(thread_id=thread_id, order="desc", limit=1)
-                if not msgs.data or msgs.data[0].role != "assistant" or not msgs.data[0].content or not hasattr(msgs.data[0].content[0], 'text'):
-                    current_app.logger.error(f"[AI AUTO-RESPONSE] No valid assistant response for Q {seq_num_str}.")
-                    responses_for_submission[seq_num_str] = "AI_ERROR: No response"
-                    all_answers_generated_for_this_submission = False
-                    continue
-
-                ai_answer_raw = msgs.data[0].content[0].text.value
-                current_app.logger.debug(f"[AI AUTO-RESPONSE] Raw AI answer for Q {seq_num_str} ({q_type}): '{ai_answer_raw}'")
-
-                if expected_json_output:
-                    try:
-                        json.loads(ai_answer_raw) 
-                        responses_for_submission[seq_num_str] = ai_answer_raw
-                    except json.JSONDecodeError:
-                        current_app.logger.error(f"[AI AUTO-RESPONSE] Q {seq_num_str}: AI returned invalid JSON: '{ai_answer_raw}'. Storing as raw string.")
-                        responses_for_submission[seq_num_str] = ai_answer_raw 
-                else:
-                    responses_for_submission[seq_num_str] = ai_answer_raw.strip("\"'") 
-
-            except TimeoutError:
-                current_app.logger.error(f"[AI AUTO-RESPONSE] Timeout generating answer for Q {seq_num_str}.")
-                responses_for_submission[seq_num_str] = "AI_ERROR: Timeout"
-                all_answers_generated_for_this_submission = False
-            except Exception as e_gpt:
-                current_app.logger.error(f"[AI AUTO-RESPONSE] Error generating answer for Q {seq_num_str}: {e_gpt}", exc_info=True)
-                responses_for_submission[seq_num_str] = f"AI_ERROR: {str(e_gpt)[:50]}"
-                all_answers_generated_for_this_submission = False
-            
-            current_app.logger.info(f"[AI AUTO-RESPONSE] Generated answer for Q {seq_num_str}: {str(responses_for_submission.get(seq_num_str, 'N/A'))[:100]}")
-
-        submission_payload = {
-            "survey_id": survey_id,
-            "responses": responses_for_submission,
-            "duration": random.randint(60, 600),  
-            "survey_link_id": None, 
-            "user_id": None, 
-            "is_ai_generated": True, # Flag this as an AI-generated response
-            "user_agent": {"userAgent": "AI Bot Survey Filler", "deviceType": "Desktop", "browserInfo": "Chrome"},
-            "response_times": {seq: random.randint(5,30) for seq in responses_for_submission.keys()} 
-        }
-
-        current_app.logger.debug(f"[AI AUTO-RESPONSE] Payload for submission {i+1}: {json.dumps(submission_payload, indent=2, default=str)}")
-
-        if all_answers_generated_for_this_submission:
-            try:
-                submit_result, submit_status = ResponseController.submit_responses(submission_payload)
-                if submit_status == 201:
-                    successful_submissions += 1
-                    submission_details.append({"submission_index": i+1, "status": "success", "submission_id": submit_result.get("submission_id")})
-                    current_app.logger.info(f"[AI AUTO-RESPONSE] Successfully submitted response set {i+1}. Submission ID: {submit_result.get('submission_id')}")
-                else:
-                    failed_submissions += 1
-                    submission_details.append({"submission_index": i+1, "status": "failed", "error": submit_result.get("error", "Unknown submission error"), "details": submit_result.get("details")})
-                    current_app.logger.error(f"[AI AUTO-RESPONSE] Failed to submit response set {i+1}. Status: {submit_status}, Error: {submit_result}")
-            except Exception as e_submit:
-                failed_submissions += 1
-                submission_details.append({"submission_index": i+1, "status": "exception_on_submit", "error": str(e_submit)})
-                current_app.logger.error(f"[AI AUTO-RESPONSE] Exception during submission of response set {i+1}: {e_submit}", exc_info=True)
+    for r in results:
+        if r["respondent"] is None:
+            submission_details.append({"submission_index": r["index"], "status": "failed_generation", "error": r["error"]})
+        elif r["index"] in submission_ids_by_index:
+            submission_details.append({"submission_index": r["index"], "status": "success", "submission_id": submission_ids_by_index[r["index"]]})
         else:
-            failed_submissions +=1
-            submission_details.append({"submission_index": i+1, "status": "failed_generation", "error": "One or more answers failed to generate."})
-            current_app.logger.warning(f"[AI AUTO-RESPONSE] Skipped submission for set {i+1} due to answer generation errors.")
-        
-        time.sleep(random.uniform(0.5, 2.0))
+            submission_details.append({"submission_index": r["index"], "status": "failed", "error": insert_error})
+
+    successful_submissions = len(submission_ids)
+    failed_submissions = num_responses_to_generate - successful_submissions
 
     final_message = (
         f"AI response generation complete. "
@@ -3510,26 +3194,34 @@ def auto_generate_survey_responses_ai(survey_id, num_responses_to_generate):
         f"Failed submissions: {failed_submissions}."
     )
     current_app.logger.info(f"[AI AUTO-RESPONSE] {final_message}")
-    
+
     # Log the operation
     processing_time = time.time() - start_time
-    success = successful_submissions > 0
+    input_tokens = sum(r["usage"]["input_tokens"] for r in generated)
+    output_tokens = sum(r["usage"]["output_tokens"] for r in generated)
+    latencies = [r["latency"] for r in generated]
     AIUsageAnalyticsController.log_ai_operation(
         operation_type='response_generation',
         operation_subtype='auto_responses',
         survey_id=survey_id,
         points_cost=getattr(g, 'points_needed', 0),
         processing_time=processing_time,
-        success=success,
+        success=successful_submissions > 0,
         metadata={
             'requested_responses': num_responses_to_generate,
             'successful_submissions': successful_submissions,
             'failed_submissions': failed_submissions,
-            'questions_processed': len(survey_questions)
-        }
+            'questions_processed': len(survey_questions),
+            'avg_respondent_latency': round(sum(latencies) / len(latencies), 2) if latencies else None
+        },
+        estimated_tokens=input_tokens + output_tokens,
+        openai_cost_usd=OpenAICostCalculator.calculate_cost(RESPONSE_GENERATION_MODEL, input_tokens, output_tokens),
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        model_used=RESPONSE_GENERATION_MODEL
     )
     db.session.commit()
-    
+
     return {
         "message": final_message,
         "successful_submissions": successful_submissions,
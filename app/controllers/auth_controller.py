@@ -17,6 +17,7 @@ from datetime import datetime, timedelta
 from flask_mail import Message
 from ..extensions import mail
 from ..utils.captcha_utils import verify_recaptcha, is_captcha_required, validate_captcha_token_format
+from ..utils.principal_cache import principal_cache
 # Assume pyotp is available; if not, this part needs manual installation
 try:
     import pyotp
@@ -52,9 +53,7 @@ def token_required(f):
             data = jwt.decode(token, secret_key, algorithms=['HS256'])
 
             if 'admin_id' in data:
-                admin_id = data['admin_id']
-                from ..models import Admin
-                admin = Admin.query.get(admin_id)
+                admin = principal_cache.resolve('admin', data['admin_id'])
                 if admin:
                     g.current_user = admin
                     g.current_admin = admin
@@ -63,9 +62,7 @@ def token_required(f):
                     return jsonify({'message': 'Invalid admin token - user not found!'}), 401
 
             elif 'user_id' in data:
-                user_id = data['user_id']
-                from ..models import User
-                user = User.query.get(user_id)
+                user = principal_cache.resolve('user', data['user_id'])
                 if user:
                     g.current_user = user
                     g.user_role = user.role
@@ -106,13 +103,13 @@ def token_optional(f):
                 data = jwt.decode(token, secret_key, algorithms=['HS256'])
 
                 if 'admin_id' in data:
-                    admin = Admin.query.get(data['admin_id'])
+                    admin = principal_cache.resolve('admin', data['admin_id'])
                     if admin:
                         g.current_user = admin
                         g.current_admin = admin
                         g.user_role = 'super_admin'
                 elif 'user_id' in data:
-                    user = User.query.get(data['user_id'])
+                    user = principal_cache.resolve('user', data['user_id'])
                     if user:
                         g.current_user = user
                         g.user_role = user.role
@@ -5,18 +5,20 @@ from app.models import (
 )
 from app.services import discord_service
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime
 import re
 import logging
 
 # Function moved from auth_controller.py
-def _check_audience_rules(user_obj, audience_settings_obj, entity_type="Business"):
+def _check_audience_rules(user_obj, audience_settings_obj, entity_type="Business", discord_access_cache=None):
     """
     Helper to check audience rules.
     user_obj: The current user object (from g.current_user).
     audience_settings_obj: Instance of BusinessAudience or SurveyAudience.
     entity_type: "Business" or "Survey" for logging.
+    discord_access_cache: Optional dict {business_id: (is_member, reason)} shared across
+        a batch of checks for the same user, so the Discord API is called once per business.
     """
     if not user_obj: # Anonymous user
         current_app.logger.debug(f"[{entity_type.upper()}_AUDIENCE] Anonymous user attempting access.")
@@ -67,7 +69,12 @@ def _check_audience_rules(user_obj, audience_settings_obj, entity_type="Business
         
         if business and business.discord_server:
             from app.services.discord_service import check_user_discord_access
-            is_member, reason = check_user_discord_access(user_obj, business)
+            if discord_access_cache is not None and business.id in discord_access_cache:
+                is_member, reason = discord_access_cache[business.id]
+            else:
+                is_member, reason = check_user_discord_access(user_obj, business)
+                if discord_access_cache is not None:
+                    discord_access_cache[business.id] = (is_member, reason)
             if not is_member:
                 current_app.logger.info(f"[{entity_type.upper()}_AUDIENCE] User {user_discord_id} access DENIED - {reason}")
                 return False
@@ -267,7 +274,7 @@ class BusinessController:
             return {"error": "Failed to retrieve businesses", "details": str(e)}, 500
 
     @staticmethod
-    def check_user_access(user, business_id):
+    def check_user_access(user, business_id, discord_access_cache=None):
         """Check if a user has access to a business - admins get complete bypass"""
         business = Business.query.get(business_id)
         if not business:
@@ -293,10 +300,10 @@ class BusinessController:
             return True
             
         # For restricted business, use the _check_audience_rules helper
-        return _check_audience_rules(user, business.audience_settings, "Business")
+        return _check_audience_rules(user, business.audience_settings, "Business", discord_access_cache)
 
     @staticmethod
-    def check_survey_access(user, survey_id):
+    def check_survey_access(user, survey_id, discord_access_cache=None):
         """
         Checks if a user has access to a survey based on its restrictions and audience settings.
         Returns a tuple (bool, str) where bool indicates access and str provides the reason.
@@ -329,13 +336,13 @@ class BusinessController:
         # Unlinked survey - if restricted, apply its specific rules directly
         if not survey.business:
             if survey.audience_settings and survey.audience_settings.access_type == 'SPECIFIC_RULES':
-                has_access = _check_audience_rules(user, survey.audience_settings, "Survey (unlinked)")
+                has_access = _check_audience_rules(user, survey.audience_settings, "Survey (unlinked)", discord_access_cache)
                 return has_access, "Checked against specific rules for unlinked survey."
             # If restricted without valid rules, deny access
             return False, "Unlinked survey is restricted with no applicable rules."
             
         # For business surveys, first check business access
-        if not BusinessController.check_user_access(user, survey.business_id):
+        if not BusinessController.check_user_access(user, survey.business_id, discord_access_cache):
             return False, f"You do not have access to the business that owns this survey."
 
         # Check survey-specific audience settings
@@ -369,12 +376,39 @@ class BusinessController:
 
         # Check specific rules if applicable
         if survey_audience.access_type == 'SPECIFIC_RULES':
-            has_access = _check_audience_rules(user, survey_audience, "Survey")
+            has_access = _check_audience_rules(user, survey_audience, "Survey", discord_access_cache)
             return has_access, "Checked against specific survey rules."
 
         # Default deny if no rule matched
         return False, "No applicable audience rule was met."
 
+    @staticmethod
+    def preload_survey_access(survey_ids):
+        """
+        Loads surveys with everything the access rules read (survey audience, business,
+        business audience) in a constant number of queries. Later Survey/Business
+        lookups by id in check_survey_access are then served from the session.
+        """
+        if not survey_ids:
+            return []
+        return Survey.query.options(
+            selectinload(Survey.audience_settings),
+            selectinload(Survey.business).selectinload(Business.audience_settings)
+        ).filter(Survey.id.in_(list(survey_ids))).all()
+
+    @staticmethod
+    def check_survey_access_batch(user, survey_ids):
+        """
+        Batch form of check_survey_access for one user and many surveys.
+        Returns {survey_id: (bool, reason)}; Discord membership is checked once per business.
+        """
+        BusinessController.preload_survey_access(survey_ids)
+        discord_access_cache = {}
+        return {
+            survey_id: BusinessController.check_survey_access(user, survey_id, discord_access_cache)
+            for survey_id in survey_ids
+        }
+
     @staticmethod
     def check_public_access(business_id):
         """Check if a business is public and active"""
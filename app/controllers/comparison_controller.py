@@ -1,42 +1,57 @@
 from collections import defaultdict
-from app.models import Survey, Response
+from sqlalchemy import func
+from app.models import Survey, Submission, Response, db
+from app.utils.submission_dimensions import COMPARISON_DIMENSIONS
 
 class ComparisonController:
     @staticmethod
     def get_comparison(survey_id, group_by):
         """
-        For each question in the survey, group responses by the specified field from the associated Submission.
-        For simplicity, we assume each Submission object has an attribute named as group_by;
-        if missing, the value defaults to "Unknown".
+        For each question in the survey, count responses per answer and per value of
+        the Submission column named by group_by (missing values count as "Unknown").
+        group_by must be one of COMPARISON_DIMENSIONS.
+
+        All counts come from a single Response JOIN Submission aggregate grouped by
+        (question, answer, group value).
         """
+        if group_by not in COMPARISON_DIMENSIONS:
+            return {
+                "error": f"Invalid group_by '{group_by}'",
+                "allowed_group_by": COMPARISON_DIMENSIONS
+            }, 400
+
         survey = Survey.query.get(survey_id)
         if not survey:
             return {"error": "Survey not found"}, 404
 
+        group_column = getattr(Submission, group_by)
+        counts = db.session.query(
+            Response.question_id,
+            Response.response_text,
+            group_column,
+            func.count(Response.id)
+        ).join(Submission, Response.submission_id == Submission.id).filter(
+            Submission.survey_id == survey_id
+        ).group_by(
+            Response.question_id, Response.response_text, group_column
+        ).order_by(Response.question_id, Response.response_text)
+
+        options_by_question = defaultdict(dict)
+        for question_id, answer, group_value, count in counts:
+            if group_value is None:
+                group_value = "Unknown"
+            answer_counts = options_by_question[question_id].setdefault(answer, {})
+            answer_counts[group_value] = answer_counts.get(group_value, 0) + count
+
         comparison = {
             "survey_id": survey.id,
             "group_by": group_by,
             "questions": []
         }
         for question in survey.questions:
-            q_data = {
+            comparison["questions"].append({
                 "question_id": question.id,
                 "question_text": question.question_text,
-                "options": {}  # Will map each answer option to counts per group.
-            }
-            responses = Response.query.filter_by(question_id=question.id).all()
-            for r in responses:
-                # Assume the related Submission has the attribute (e.g. gender, department, etc.)
-                submission = r.submission
-                group_value = getattr(submission, group_by, None)
-                if group_value is None:
-                    group_value = "Unknown"
-                answer = r.response_text
-                if answer not in q_data["options"]:
-                    q_data["options"][answer] = defaultdict(int)
-                q_data["options"][answer][group_value] += 1
-            # Convert inner defaultdicts to dicts.
-            for ans in q_data["options"]:
-                q_data["options"][ans] = dict(q_data["options"][ans])
-            comparison["questions"].append(q_data)
+                "options": options_by_question.get(question.id, {})  # answer -> {group value: count}
+            })
         return comparison, 200
@@ -3,6 +3,7 @@ from datetime import datetime
 from app.models import Survey, Submission, Response, db, User
 from sqlalchemy import func
 from app.controllers.response_controller import map_age_to_group
+from app.controllers.response_aggregate_controller import ResponseAggregateController
 
 class EnforcementController:
     @staticmethod
@@ -88,6 +89,7 @@ class EnforcementController:
             else:
                 processed_responses[key] = value
 
+        question_responses = []
         for question in survey.questions:
             seq = question.sequence_number
             # Accept response under string or integer key
@@ -105,7 +107,11 @@ class EnforcementController:
                     response_time=response_times.get(str(seq))
                 )
                 db.session.add(response)
+                question_responses.append((question, response))
                 print(f"Added response for question {question.id}, seq {seq}")  # Debug logging
+
+        # Keep the pre-aggregated analytics in step with this submission (same transaction)
+        ResponseAggregateController.record_submission_no_commit(submission, question_responses)
         
         try:
             db.session.commit()
@@ -8,7 +8,8 @@ import logging
 from flask import current_app
 from app.models import db, User, Badge
 from app.models.leaderboard_models import LeaderboardCache, LeaderboardSettings
-from app.jobs.leaderboard_job import get_user_highest_badge, update_leaderboard_cache_job
+from app.jobs.leaderboard_job import get_user_highest_badge, get_highest_badges, update_leaderboard_cache_job
+from app.utils import live_leaderboard
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -47,6 +48,11 @@ class LeaderboardController:
             timeframe = settings.active_timeframe
             limit = settings.display_count
             
+            # Live Redis leaderboard first; the SQL cache below is the fallback
+            live_result = LeaderboardController._get_live_leaderboard(settings, current_user_id)
+            if live_result is not None:
+                return live_result
+            
             # Get top users from cache
             top_users_query = LeaderboardCache.query.filter_by(
                 timeframe=timeframe
@@ -60,6 +66,14 @@ class LeaderboardController:
                 try:
                     refresh_success = update_leaderboard_cache_job(current_app._get_current_object())
                     
+                    if refresh_success is None:
+                        # Another request or the scheduled job is already rebuilding it
+                        return {
+                            'error': 'Leaderboard data is being updated. Please try again in a moment.',
+                            'timeframe': timeframe,
+                            'cache_status': 'refresh_in_progress'
+                        }
+                    
                     if refresh_success:
                         logger.info("Leaderboard cache refreshed successfully")
                         
@@ -100,47 +114,21 @@ class LeaderboardController:
                         'cache_status': 'refresh_error'
                     }
             
-            # Format top users with badge information
-            formatted_top_users = []
-            for entry in top_users_query:
-                if entry.user:  # Ensure user still exists
-                    # Get user's highest badge
-                    highest_badge = get_user_highest_badge(entry.user_id)
-                    
-                    user_data = {
-                        "rank": entry.rank,
-                        "user": {
-                            "id": entry.user.id,
-                            "username": entry.user.username,
-                            "name": entry.user.name,
-                            "profile_image_url": entry.user.profile_image_url,
-                            "highest_badge": highest_badge
-                        },
-                        "total_xp": entry.total_xp
-                    }
-                    formatted_top_users.append(user_data)
-            
             # Get current user's rank if provided
-            current_user_rank = None
+            current_entry = None
             if current_user_id:
                 current_user_entry = LeaderboardCache.query.filter_by(
                     timeframe=timeframe, 
                     user_id=current_user_id
                 ).first()
-                
-                if current_user_entry and current_user_entry.user:
-                    highest_badge = get_user_highest_badge(current_user_id)
-                    current_user_rank = {
-                        "rank": current_user_entry.rank,
-                        "user": {
-                            "id": current_user_entry.user.id,
-                            "username": current_user_entry.user.username,
-                            "name": current_user_entry.user.name,
-                            "profile_image_url": current_user_entry.user.profile_image_url,
-                            "highest_badge": highest_badge
-                        },
-                        "total_xp": current_user_entry.total_xp
-                    }
+                if current_user_entry:
+                    current_entry = (current_user_entry.rank, current_user_entry.user_id, current_user_entry.total_xp)
+            
+            # Format top users with badge information
+            formatted_top_users, current_user_rank = LeaderboardController._format_ranked_entries(
+                [(entry.rank, entry.user_id, entry.total_xp) for entry in top_users_query],
+                current_entry
+            )
             
             return {
                 "timeframe": timeframe,
@@ -158,6 +146,68 @@ class LeaderboardController:
                 'details': str(e) if current_app.debug else None
             }
     
+    @staticmethod
+    def _format_user(user, highest_badge):
+        return {
+            "id": user.id,
+            "username": user.username,
+            "name": user.name,
+            "profile_image_url": user.profile_image_url,
+            "highest_badge": highest_badge
+        }
+    
+    @staticmethod
+    def _format_ranked_entries(entries, current_entry=None):
+        """
+        Format (rank, user_id, total_xp) tuples, loading the users for the whole page in
+        one query; highest badges come from the cached badge threshold table.
+        
+        Returns:
+            tuple: (formatted top users, formatted current user rank or None)
+        """
+        user_ids = {user_id for _, user_id, _ in entries}
+        if current_entry:
+            user_ids.add(current_entry[1])
+        users = {user.id: user for user in User.query.filter(User.id.in_(user_ids)).all()} if user_ids else {}
+        badges = get_highest_badges(users.values())
+        
+        def format_entry(rank, user_id, total_xp):
+            user = users.get(user_id)
+            if not user:  # Ensure user still exists
+                return None
+            return {
+                "rank": rank,
+                "user": LeaderboardController._format_user(user, badges.get(user_id)),
+                "total_xp": total_xp
+            }
+        
+        formatted = [item for item in (format_entry(*entry) for entry in entries) if item]
+        return formatted, format_entry(*current_entry) if current_entry else None
+    
+    @staticmethod
+    def _get_live_leaderboard(settings, current_user_id=None):
+        """Leaderboard payload from the live Redis sorted sets, or None to use the SQL cache."""
+        timeframe = settings.active_timeframe
+        entries = live_leaderboard.top_entries(timeframe, settings.display_count)
+        if entries is None:
+            return None
+        
+        current_entry = None
+        if current_user_id:
+            rank_info = live_leaderboard.user_rank(current_user_id, timeframe)
+            if rank_info and rank_info[0]:
+                current_entry = (rank_info[0], int(current_user_id), rank_info[1])
+        
+        formatted_top_users, current_user_rank = LeaderboardController._format_ranked_entries(entries, current_entry)
+        return {
+            "timeframe": timeframe,
+            "top_users": formatted_top_users,
+            "current_user_rank": current_user_rank,
+            "total_users_ranked": len(formatted_top_users),
+            "last_updated": datetime.utcnow().isoformat(),
+            "is_enabled": settings.is_enabled
+        }
+    
     @staticmethod
     def get_user_rank(user_id, timeframe=None):
         """
@@ -175,6 +225,20 @@ class LeaderboardController:
                 settings = LeaderboardSettings.query.first()
                 timeframe = settings.active_timeframe if settings else 'ALL_TIME'
             
+            # Exact live rank for any user, not only those in the cached top 500
+            rank_info = live_leaderboard.user_rank(user_id, timeframe)
+            if rank_info is not None:
+                user = User.query.get(user_id) if rank_info[0] else None
+                if not user:
+                    return None
+                return {
+                    "rank": rank_info[0],
+                    "total_xp": rank_info[1],
+                    "timeframe": timeframe,
+                    "user": LeaderboardController._format_user(user, get_user_highest_badge(user.id)),
+                    "last_updated": datetime.utcnow().isoformat()
+                }
+            
             user_entry = LeaderboardCache.query.filter_by(
                 timeframe=timeframe,
                 user_id=user_id
@@ -281,6 +345,7 @@ class LeaderboardController:
         """
         try:
             success = update_leaderboard_cache_job(current_app._get_current_object())
+            live_leaderboard.rebuild_live_leaderboard(force=True)
             
             if success:
                 return {
@@ -324,6 +389,7 @@ class LeaderboardController:
                 'last_refresh': settings.last_cache_refresh.isoformat() if settings and settings.last_cache_refresh else None,
                 'cache_counts': cache_counts,
                 'total_cached_entries': sum(cache_counts.values()),
+                'live_counts': {timeframe: live_leaderboard.ranked_count(timeframe) for timeframe in timeframes},
                 'active_timeframe': settings.active_timeframe if settings else 'ALL_TIME',
                 'is_enabled': settings.is_enabled if settings else True
             }
@@ -5,105 +5,144 @@ import datetime
 import json
 import csv
 import io
+import tempfile
 import openpyxl
 from flask import current_app
+from app.utils.analytics_engine import BULK_IN_CHUNK_SIZE
+
+# Submissions are streamed from the database in batches of this size; each
+# batch costs one extra query for its responses (an IN list, so it stays
+# below the bind-parameter limit).
+EXPORT_BATCH_SIZE = BULK_IN_CHUNK_SIZE
+# Number of CSV rows buffered before a chunk is handed to the WSGI server.
+CSV_FLUSH_ROWS = 500
+
+EXPORT_HEADERS = [
+    "Submission ID", "Submitted At", "Duration (s)", "Completion (%)",
+    "Email", "Age", "Gender", "Location", "Education", "Company",
+    "Device Type", "Browser Info", "Link ID", "Link Label"
+]
+
+MULTI_VALUE_QUESTION_TYPES = ['checkbox', 'multi-choice', 'ranking', 'multiple-image-select']
 
 class LiveResponsesController:
     @staticmethod
-    def get_live_responses(survey_id, filters, export_mode=False):
+    def _build_submission_query(survey_id, filters):
+        """Submission query for a survey with the live-responses filters applied (unordered)."""
+        # Eager load related data for efficiency, especially for export
+        query = Submission.query.options(
+            db.joinedload(Submission.user),       # Load User if user_id exists
+            db.joinedload(Submission.survey_link) # Load SurveyLink if survey_link_id exists
+        ).filter(Submission.survey_id == survey_id)
+
+        # --- Apply Filters (with optimized joins) ---
+        # Age filters
+        if filters.get('age_min'):
+            try: query = query.filter(Submission.age >= int(filters['age_min']))
+            except (ValueError, TypeError): pass # Ignore invalid input
+        if filters.get('age_max'):
+            try: query = query.filter(Submission.age <= int(filters['age_max']))
+            except (ValueError, TypeError): pass # Ignore invalid input
+
+        # Email Domain (requires User join - joinedload doesn't work for filtering)
+        if filters.get('email_domain'):
+            email_filter = filters['email_domain']
+            # Use left outer join to include submissions without users
+            query = query.outerjoin(User, Submission.user_id == User.id)
+            # Check both User.email and Submission.email (if user is None)
+            query = query.filter(
+                or_(
+                    User.email.ilike(f"%@{email_filter}"),
+                    and_(Submission.user_id.is_(None), Submission.email.ilike(f"%@{email_filter}"))
+                )
+             )
+
+        # Time-based filters
+        if filters.get('submitted_after'):
+            try:
+                # Handle ISO format with optional 'Z'
+                dt_str = filters['submitted_after'].replace('Z', '+00:00')
+                dt = datetime.datetime.fromisoformat(dt_str)
+                query = query.filter(Submission.submitted_at >= dt)
+            except (ValueError, TypeError): pass # Ignore invalid date formats
+        if filters.get('submitted_before'):
+            try:
+                dt_str = filters['submitted_before'].replace('Z', '+00:00')
+                dt = datetime.datetime.fromisoformat(dt_str)
+                query = query.filter(Submission.submitted_at <= dt)
+            except (ValueError, TypeError): pass # Ignore invalid date formats
+
+        # Other demographic/metadata filters
+        if filters.get('gender'): query = query.filter(Submission.gender == filters['gender'])
+        if filters.get('location'): query = query.filter(Submission.location.ilike(f"%{filters['location']}%"))
+        if filters.get('education'): query = query.filter(Submission.education == filters['education'])
+        if filters.get('company'): query = query.filter(Submission.company.ilike(f"%{filters['company']}%"))
+        if filters.get('device_type'): query = query.filter(Submission.device_type == filters['device_type'])
+        if filters.get('link_id'):
+             try: query = query.filter(Submission.survey_link_id == int(filters['link_id']))
+             except (ValueError, TypeError): pass # Ignore invalid link ID format
+
+        return query
+
+    @staticmethod
+    def _format_response_text(question_type, response_text):
+        """Flatten stored JSON answers (selections, uploads) into display/export text."""
+        formatted_response = response_text
+        if question_type in MULTI_VALUE_QUESTION_TYPES:
+            try:
+                parsed = json.loads(response_text)
+                if isinstance(parsed, list):
+                    # Join array elements into a comma-separated string for export/simple display
+                    formatted_response = ", ".join(map(str, parsed))
+                # Keep as is if not a list (e.g., single selection stored unexpectedly)
+            except (json.JSONDecodeError, TypeError): pass # Keep original text if parsing fails
+        elif question_type == 'document-upload':
+            try:
+                parsed = json.loads(response_text)
+                if isinstance(parsed, list) and parsed:
+                    # Extract filename if available
+                    filenames = [f.get('name', f.get('url', '').split('/')[-1]) for f in parsed if isinstance(f, dict)]
+                    formatted_response = ", ".join(filenames) if filenames else "[Uploaded File(s)]"
+                else: formatted_response = ""
+            except (json.JSONDecodeError, TypeError):
+                formatted_response = "[Upload Error]"
+        # Add formatting for other types if needed (e.g., grid)
+        return formatted_response
+
+    @staticmethod
+    def get_live_responses(survey_id, filters):
         """
-        Get live responses for a survey with optional filtering.
-        Can operate in normal paginated mode or export mode (all results).
+        Get one page of live responses for a survey with optional filtering.
+        Exports stream every matching submission through the export helpers instead.
 
         Args:
             survey_id: The ID of the survey to fetch responses for
             filters: Dictionary containing filter parameters...
-            export_mode (bool): If True, fetches all matching results without pagination.
 
         Returns:
-            tuple: (data, status_code) or (processed_data, questions_dict, status_code) if export_mode
+            tuple: (data, status_code)
                 - data: Dict with 'results' and 'pagination' keys
-                - processed_data: List of processed submission dicts for export
-                - questions_dict: Dict of survey questions {id: Question} for export
                 - status_code: HTTP status code
         """
         try:
-            current_app.logger.info(f"[LIVE_RESPONSES] Fetching live responses for survey {survey_id}, filters: {filters}, export_mode: {export_mode}")
+            current_app.logger.info(f"[LIVE_RESPONSES] Fetching live responses for survey {survey_id}, filters: {filters}")
             
             survey = Survey.query.get(survey_id)
             if not survey:
                 current_app.logger.warning(f"[LIVE_RESPONSES] Survey {survey_id} not found")
-                if export_mode:
-                     raise ValueError("Survey not found")
                 return {"error": "Survey not found"}, 404
 
-            # Eager load related data for efficiency, especially for export
-            query = Submission.query.options(
-                db.joinedload(Submission.user),       # Load User if user_id exists
-                db.joinedload(Submission.survey_link) # Load SurveyLink if survey_link_id exists
-            ).filter(Submission.survey_id == survey_id)
-
-            # --- Apply Filters (with optimized joins) ---
-            # Age filters
-            if filters.get('age_min'):
-                try: query = query.filter(Submission.age >= int(filters['age_min']))
-                except (ValueError, TypeError): pass # Ignore invalid input
-            if filters.get('age_max'):
-                try: query = query.filter(Submission.age <= int(filters['age_max']))
-                except (ValueError, TypeError): pass # Ignore invalid input
-
-            # Email Domain (requires User join - joinedload doesn't work for filtering)
-            if filters.get('email_domain'):
-                email_filter = filters['email_domain']
-                # Use left outer join to include submissions without users
-                query = query.outerjoin(User, Submission.user_id == User.id)
-                # Check both User.email and Submission.email (if user is None)
-                query = query.filter(
-                    or_(
-                        User.email.ilike(f"%@{email_filter}"),
-                        and_(Submission.user_id.is_(None), Submission.email.ilike(f"%@{email_filter}"))
-                    )
-                 )
-
-            # Time-based filters
-            if filters.get('submitted_after'):
-                try:
-                    # Handle ISO format with optional 'Z'
-                    dt_str = filters['submitted_after'].replace('Z', '+00:00')
-                    dt = datetime.datetime.fromisoformat(dt_str)
-                    query = query.filter(Submission.submitted_at >= dt)
-                except (ValueError, TypeError): pass # Ignore invalid date formats
-            if filters.get('submitted_before'):
-                try:
-                    dt_str = filters['submitted_before'].replace('Z', '+00:00')
-                    dt = datetime.datetime.fromisoformat(dt_str)
-                    query = query.filter(Submission.submitted_at <= dt)
-                except (ValueError, TypeError): pass # Ignore invalid date formats
-
-            # Other demographic/metadata filters
-            if filters.get('gender'): query = query.filter(Submission.gender == filters['gender'])
-            if filters.get('location'): query = query.filter(Submission.location.ilike(f"%{filters['location']}%"))
-            if filters.get('education'): query = query.filter(Submission.education == filters['education'])
-            if filters.get('company'): query = query.filter(Submission.company.ilike(f"%{filters['company']}%"))
-            if filters.get('device_type'): query = query.filter(Submission.device_type == filters['device_type'])
-            if filters.get('link_id'):
-                 try: query = query.filter(Submission.survey_link_id == int(filters['link_id']))
-                 except (ValueError, TypeError): pass # Ignore invalid link ID format
-
-
-            # --- Fetch Submissions (Paginated or All) ---
-            if export_mode:
-                submissions = query.order_by(Submission.submitted_at.desc()).all()
-                total_results = len(submissions) # Not needed for export return, but good to know
-            else:
-                page = int(filters.get('page', 1))
-                per_page = int(filters.get('per_page', 20))
-                paginated_query = query.order_by(Submission.submitted_at.desc()).paginate(
-                    page=page, per_page=per_page, error_out=False
-                )
-                total_results = paginated_query.total
-                total_pages = paginated_query.pages
-                submissions = paginated_query.items
+            query = LiveResponsesController._build_submission_query(survey_id, filters)
+
+            # --- Fetch one page of submissions ---
+            page = int(filters.get('page', 1))
+            per_page = int(filters.get('per_page', 20))
+            paginated_query = query.order_by(Submission.submitted_at.desc()).paginate(
+                page=page, per_page=per_page, error_out=False
+            )
+            total_results = paginated_query.total
+            total_pages = paginated_query.pages
+            submissions = paginated_query.items
 
             # --- Process Submissions & Responses ---
             processed_results = []
@@ -127,27 +166,7 @@ class LiveResponsesController:
                     question = survey_questions.get(r.question_id)
                     if not question: continue # Should not happen if data is consistent
 
-                    formatted_response = r.response_text
-                    # Format specific types for better display/export
-                    if question.question_type in ['checkbox', 'multi-choice', 'ranking', 'multiple-image-select']:
-                         try:
-                             parsed = json.loads(r.response_text)
-                             if isinstance(parsed, list):
-                                 # Join array elements into a comma-separated string for export/simple display
-                                 formatted_response = ", ".join(map(str, parsed))
-                             # Keep as is if not a list (e.g., single selection stored unexpectedly)
-                         except (json.JSONDecodeError, TypeError): pass # Keep original text if parsing fails
-                    elif question.question_type == 'document-upload':
-                          try:
-                              parsed = json.loads(r.response_text)
-                              if isinstance(parsed, list) and parsed:
-                                  # Extract filename if available
-                                  filenames = [f.get('name', f.get('url', '').split('/')[-1]) for f in parsed if isinstance(f, dict)]
-                                  formatted_response = ", ".join(filenames) if filenames else "[Uploaded File(s)]"
-                              else: formatted_response = ""
-                          except (json.JSONDecodeError, TypeError):
-                              formatted_response = "[Upload Error]"
-                    # Add formatting for other types if needed (e.g., grid)
+                    formatted_response = LiveResponsesController._format_response_text(question.question_type, r.response_text)
 
                     responses_list.append({
                         "question_id": r.question_id,
@@ -184,153 +203,191 @@ class LiveResponsesController:
                 }
                 processed_results.append(submission_data)
 
-            # --- Return based on mode ---
-            if export_mode:
-                current_app.logger.info(f"[LIVE_RESPONSES] Export mode: returning {len(processed_results)} processed results")
-                # Return the full list of processed data and the questions dict
-                return processed_results, survey_questions, 200
-            else:
-                current_app.logger.info(f"[LIVE_RESPONSES] Normal mode: returning {len(processed_results)} results, pagination: page {page}/{total_pages}, total: {total_results}")
-                # Return paginated results
-                return {
-                    "results": processed_results,
-                    "pagination": {
-                        "total_results": total_results,
-                        "total_pages": total_pages,
-                        "current_page": page,
-                        "per_page": per_page
-                    }
-                }, 200
+            current_app.logger.info(f"[LIVE_RESPONSES] Returning {len(processed_results)} results, pagination: page {page}/{total_pages}, total: {total_results}")
+            return {
+                "results": processed_results,
+                "pagination": {
+                    "total_results": total_results,
+                    "total_pages": total_pages,
+                    "current_page": page,
+                    "per_page": per_page
+                }
+            }, 200
 
         except ValueError as ve:
             current_app.logger.error(f"Value error retrieving live responses for survey {survey_id}: {ve}")
-            if export_mode: raise
             return {"error": str(ve)}, 404
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"Exception retrieving live responses for survey {survey_id}: {e}", exc_info=True)
-            if export_mode: raise
             return {"error": "Failed to retrieve live responses", "details": str(e)}, 500
 
+    @staticmethod
+    def _export_rows_for_batch(submissions, sorted_questions, required_question_ids):
+        """Yield one flat export row per submission, loading the batch's responses in one query."""
+        responses_by_submission_id = {sub.id: {} for sub in submissions}
+        answered_by_submission_id = {sub.id: set() for sub in submissions}
+        question_types = {q.id: q.question_type for q in sorted_questions}
+
+        response_rows = db.session.query(
+            Response.submission_id, Response.question_id, Response.response_text, Response.file_path
+        ).filter(Response.submission_id.in_(list(responses_by_submission_id))).order_by(Response.id)
+
+        for submission_id, question_id, response_text, file_path in response_rows:
+            if question_id not in question_types: continue # Should not happen if data is consistent
+            responses_by_submission_id[submission_id][question_id] = LiveResponsesController._format_response_text(
+                question_types[question_id], response_text
+            )
+            if response_text or file_path: # Same rule as Submission.get_completion_percentage
+                answered_by_submission_id[submission_id].add(question_id)
+
+        for sub in submissions:
+            if required_question_ids:
+                answered_required = required_question_ids.intersection(answered_by_submission_id[sub.id])
+                completion = len(answered_required) / len(required_question_ids) * 100
+            else:
+                completion = 100
+
+            responses_map = responses_by_submission_id[sub.id]
+            row = [
+                sub.id,
+                sub.submitted_at.isoformat() if sub.submitted_at else None,
+                sub.duration,
+                round(completion, 1),
+                sub.user.email if sub.user else getattr(sub, 'email', None),
+                getattr(sub, 'age', None),
+                sub.gender,
+                sub.location,
+                sub.education,
+                sub.company,
+                sub.device_type,
+                sub.browser_info,
+                sub.survey_link_id or "",
+                (sub.survey_link.label if sub.survey_link else None) if sub.survey_link_id else ""
+            ]
+            row.extend(responses_map.get(q.id, "") for q in sorted_questions)
+            yield row
+
+    @staticmethod
+    def iter_export_rows(survey_id, filters, sorted_questions):
+        """
+        Yield flat export rows for every matching submission, newest first.
+
+        Submissions are read with ``yield_per`` (a server-side cursor on
+        PostgreSQL) and processed in batches of EXPORT_BATCH_SIZE, so memory
+        use does not grow with the number of submissions.
+        """
+        required_question_ids = {q.id for q in sorted_questions if q.required}
+        query = LiveResponsesController._build_submission_query(survey_id, filters).order_by(
+            Submission.submitted_at.desc(), Submission.id.desc()
+        ).yield_per(EXPORT_BATCH_SIZE)
+
+        batch = []
+        for sub in query:
+            batch.append(sub)
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                yield from LiveResponsesController._export_rows_for_batch(batch, sorted_questions, required_question_ids)
+                batch = []
+        if batch:
+            yield from LiveResponsesController._export_rows_for_batch(batch, sorted_questions, required_question_ids)
+
+    @staticmethod
+    def _stream_csv(survey_id, headers, rows):
+        """Encode rows as CSV, handing the WSGI server one chunk per CSV_FLUSH_ROWS rows."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_MINIMAL) # Use minimal quoting
+        writer.writerow(headers)
+        row_count = 0
+        try:
+            for row in rows:
+                writer.writerow(row)
+                row_count += 1
+                if row_count % CSV_FLUSH_ROWS == 0:
+                    yield buffer.getvalue().encode('utf-8')
+                    buffer.seek(0)
+                    buffer.truncate(0)
+            if buffer.tell():
+                yield buffer.getvalue().encode('utf-8')
+            current_app.logger.info(f"[LIVE_RESPONSES] Streamed CSV export for survey {survey_id}: {row_count} rows")
+        except Exception as e:
+            # Headers are already sent; log and abort the transfer so the client sees a failed download.
+            current_app.logger.error(f"[LIVE_RESPONSES] CSV export for survey {survey_id} failed after {row_count} rows: {e}", exc_info=True)
+            raise
+
     @staticmethod
     def export_responses(survey_id, export_format, filters):
         """
         Exports survey responses to CSV or XLSX format.
 
+        CSV is returned as a generator of encoded chunks, to be wrapped in a
+        streaming response (with ``stream_with_context``, since rows are read
+        while the response is being sent). XLSX is built with openpyxl's
+        write-only mode into a temporary file, which is deleted when closed.
+
         Args:
             survey_id: ID of the survey.
             export_format: 'csv' or 'xlsx'.
             filters: Dictionary of filters applied to responses.
 
         Returns:
-            tuple: (file_stream, mimetype, filename) or (error_dict, status_code)
+            tuple: (stream, mimetype, filename) or (error_dict, status_code)
+                - stream: generator of bytes (csv) or open binary file (xlsx)
         """
         try:
-            # 1. Fetch all filtered data using the modified get_live_responses
-            # Note: This now returns (list_of_submission_dicts, questions_dict, status_code)
-            all_responses_data, survey_questions_dict, status = LiveResponsesController.get_live_responses(survey_id, filters, export_mode=True)
-
-            # Propagate error if fetching failed (status is already checked inside get_live_responses)
-            # Status here should always be 200 if no exception was raised by get_live_responses
+            survey = Survey.query.get(survey_id)
+            if not survey:
+                current_app.logger.warning(f"[LIVE_RESPONSES] Export requested for missing survey {survey_id}")
+                return {"error": "Survey not found"}, 404
 
-            if not all_responses_data:
-                 # Return tuple expected by route handler for error
+            # Check up front so an empty export still gets a JSON 404 instead of an empty file
+            has_submissions = LiveResponsesController._build_submission_query(survey_id, filters).with_entities(Submission.id).first()
+            if not has_submissions:
                  return {"error": "No responses found matching the filters."}, 404
 
-            # 2. Prepare Headers
-            sorted_questions = sorted(survey_questions_dict.values(), key=lambda q: q.sequence_number or float('inf'))
+            # Prepare Headers
+            sorted_questions = sorted(
+                Question.query.filter_by(survey_id=survey_id).all(),
+                key=lambda q: q.sequence_number or float('inf')
+            )
+            headers = list(EXPORT_HEADERS)
+            # Append question headers ("Q#: Text") in the correct sequence
+            headers.extend(f"Q{q.sequence_number}: {q.question_text}" for q in sorted_questions)
+
+            rows = LiveResponsesController.iter_export_rows(survey_id, filters, sorted_questions)
+            timestamp = datetime.datetime.utcnow().strftime('%Y%m%d_%H%M%S')
 
-            # Define standard headers
-            headers = [
-                "Submission ID", "Submitted At", "Duration (s)", "Completion (%)",
-                "Email", "Age", "Gender", "Location", "Education", "Company",
-                "Device Type", "Browser Info", "Link ID", "Link Label"
-            ]
-            # Create question headers map {question_id: "Q#: Text"}
-            question_headers = {q.id: f"Q{q.sequence_number}: {q.question_text}" for q in sorted_questions}
-            # Append question headers in the correct sequence
-            headers.extend([question_headers[q.id] for q in sorted_questions])
-
-            # 3. Prepare Rows (Flatten data)
-            rows = []
-            for submission_data in all_responses_data:
-                row_dict = {h: '' for h in headers} # Initialize row with empty strings based on headers
-
-                # Populate standard submission fields
-                row_dict["Submission ID"] = submission_data.get("submission_id", "")
-                row_dict["Submitted At"] = submission_data.get("submitted_at", "")
-                row_dict["Duration (s)"] = submission_data.get("duration", "")
-                row_dict["Completion (%)"] = round(submission_data.get("completion_percentage", 0), 1) # Format percentage
-                row_dict["Email"] = submission_data.get("email", "")
-                row_dict["Age"] = submission_data.get("age", "")
-                row_dict["Gender"] = submission_data.get("gender", "")
-                row_dict["Location"] = submission_data.get("location", "")
-                row_dict["Education"] = submission_data.get("education", "")
-                row_dict["Company"] = submission_data.get("company", "")
-                row_dict["Device Type"] = submission_data.get("device_type", "")
-                row_dict["Browser Info"] = submission_data.get("browser_info", "")
-                row_dict["Link ID"] = submission_data.get("distribution_link", {}).get("id", "") if submission_data.get("distribution_link") else ""
-                row_dict["Link Label"] = submission_data.get("distribution_link", {}).get("label", "") if submission_data.get("distribution_link") else ""
-
-
-                # Create a map of {question_id: response_text} for this submission
-                responses_map = {r['question_id']: r['response_text'] for r in submission_data.get('responses', [])}
-
-                # Populate question response columns using the map and sorted questions
-                for q in sorted_questions:
-                    q_header = question_headers.get(q.id)
-                    if q_header:
-                        # Find the response text for this question ID in the map
-                        row_dict[q_header] = responses_map.get(q.id, "") # Use empty string if no response found
-
-                # Append the list of values in the correct header order
-                rows.append(list(row_dict.values()))
-
-            # 4. Generate File Stream
             if export_format == 'csv':
-                output = io.StringIO()
-                writer = csv.writer(output, quoting=csv.QUOTE_MINIMAL) # Use minimal quoting
-                writer.writerow(headers)
-                writer.writerows(rows)
-                output.seek(0)
                 mimetype = 'text/csv'
-                filename = f"survey_{survey_id}_responses_{datetime.datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
-                # Return tuple expected by route handler
-                return output, mimetype, filename
+                filename = f"survey_{survey_id}_responses_{timestamp}.csv"
+                return LiveResponsesController._stream_csv(survey_id, headers, rows), mimetype, filename
 
             elif export_format == 'xlsx':
-                output = io.BytesIO()
-                workbook = openpyxl.Workbook()
-                sheet = workbook.active
-                sheet.title = "Responses"
+                # Write-only workbooks spool rows to disk as they are appended
+                workbook = openpyxl.Workbook(write_only=True)
+                sheet = workbook.create_sheet(title="Responses")
                 sheet.append(headers) # Write header row
+                row_count = 0
                 for row_data in rows:
-                    # Append data row - openpyxl handles basic types
                     sheet.append(row_data)
+                    row_count += 1
 
-                # Auto-adjust column widths (optional, can be slow for large files)
-                # for col_idx, header in enumerate(headers, 1):
-                #     column_letter = openpyxl.utils.get_column_letter(col_idx)
-                #     # Simple width based on header length + buffer
-                #     sheet.column_dimensions[column_letter].width = len(str(header)) + 5
-
-
-                workbook.save(output)
+                output = tempfile.TemporaryFile(suffix='.xlsx')
+                try:
+                    workbook.save(output)
+                except Exception:
+                    output.close()
+                    raise
                 output.seek(0)
+                current_app.logger.info(f"[LIVE_RESPONSES] Built XLSX export for survey {survey_id}: {row_count} rows")
                 mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                filename = f"survey_{survey_id}_responses_{datetime.datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.xlsx"
-                 # Return tuple expected by route handler
+                filename = f"survey_{survey_id}_responses_{timestamp}.xlsx"
                 return output, mimetype, filename
 
             else:
                  # Should not happen due to check in route, but good practice
                  return {"error": "Unsupported export format specified."}, 400
 
-        except ValueError as ve: # Catch specific errors like "Survey not found" from get_live_responses
-            current_app.logger.error(f"Value error during export for survey {survey_id}: {ve}")
-            return {"error": str(ve)}, 404 # Return error dict and status
         except Exception as e:
-            # db.session.rollback() # Rollback not needed for read operations
             current_app.logger.error(f"Exception exporting responses for survey {survey_id}: {e}", exc_info=True)
             # Return error dict and status
             return {"error": "Failed to export responses", "details": str(e)}, 500
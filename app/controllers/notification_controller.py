@@ -13,6 +13,9 @@ from datetime import datetime
 from sqlalchemy import and_, func, or_
 from sqlalchemy.exc import IntegrityError
 import logging
+from app.services.notification_fanout_service import (
+    normalize_audience, count_audience, fan_out_notification, BULK_NOTIFICATION_SYNC_LIMIT
+)
 
 logger = logging.getLogger(__name__)
 
@@ -311,55 +314,61 @@ def send_custom_notification(admin_id, target_user_id, title, message, notificat
         logger.error(f"Error sending custom notification: {e}")
         return {'error': str(e)}, 500
 
-def send_bulk_notification(admin_id, user_ids, title, message, notification_type=None):
+def send_bulk_notification(admin_id, user_ids, title, message, notification_type=None, audience=None):
     """
     Send a notification to multiple users (Admin only)
     
     Args:
         admin_id: ID of admin sending notifications
-        user_ids: List of user IDs to receive notification
+        user_ids: List of user IDs to receive notification (ignored when audience is given)
         title: Notification title
         message: Notification message
         notification_type: Optional notification type
+        audience: Optional segment resolved in SQL: {'type': 'all'},
+                  {'type': 'tag', 'tag_ids': [...]} or {'type': 'business', 'business_id': id}
         
     Returns:
-        dict: Success/error response
+        dict: Success/error response; 202 with a task_id when the fan-out runs in Celery
     """
     try:
-        # Verify users exist
-        users = User.query.filter(User.id.in_(user_ids)).all()
-        if len(users) != len(user_ids):
+        try:
+            audience = normalize_audience(audience, user_ids)
+        except ValueError as ve:
+            return {'error': str(ve)}, 400
+
+        recipient_count = count_audience(audience)
+        if audience['type'] == 'users' and recipient_count != len(audience['user_ids']):
             return {'error': 'Some target users not found'}, 404
-        
-        # Create notifications for all users
-        notifications = []
-        for user_id in user_ids:
-            notification = Notification(
-                user_id=user_id,
-                title=title,
-                message=message,
-                notification_type=notification_type or NotificationType.GENERAL_ANNOUNCEMENT.value,
-                sent_by_admin_id=admin_id
-            )
-            notifications.append(notification)
-        
-        db.session.add_all(notifications)
-        db.session.commit()
-        
-        # Emit real-time notifications via WebSocket
-        if WEBSOCKET_AVAILABLE:
-            for notification in notifications:
-                try:
-                    notification_data = notification.to_dict()
-                    emit_notification(notification.user_id, notification_data)
-                except Exception as ws_error:
-                    logger.error(f"Failed to emit WebSocket notification for user {notification.user_id}: {ws_error}")
-            logger.info(f"Real-time notifications emitted to {len(notifications)} users")
+        if recipient_count == 0:
+            return {'error': 'No users match the selected audience'}, 404
+
+        if recipient_count > BULK_NOTIFICATION_SYNC_LIMIT:
+            try:
+                from app.tasks.notification_tasks import send_bulk_notification_task
+                task = send_bulk_notification_task.delay(
+                    admin_id=admin_id,
+                    audience=audience,
+                    title=title,
+                    message=message,
+                    notification_type=notification_type
+                )
+                return {
+                    'success': True,
+                    'message': f'Sending notification to {recipient_count} users in the background',
+                    'notification_count': recipient_count,
+                    'task_id': task.id,
+                    'status': 'processing',
+                    'status_url': f'/api/admin/notification/send-bulk/{task.id}'
+                }, 202
+            except Exception as queue_error:
+                logger.warning(f"Could not queue bulk notification, sending inline: {queue_error}")
+
+        result = fan_out_notification(admin_id, audience, title, message, notification_type)
         
         return {
             'success': True,
-            'message': f'Notification sent to {len(notifications)} users',
-            'notification_count': len(notifications)
+            'message': f'Notification sent to {result["notification_count"]} users',
+            'notification_count': result['notification_count']
         }, 200
         
     except Exception as e:
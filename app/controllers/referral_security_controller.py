@@ -11,13 +11,19 @@ from ..models.referral_security_models import (
     ReferralRewardQueue, 
     ReferralRateLimit
 )
+from ..utils.rate_limiter import check_rate_limit as check_shared_rate_limit
 from datetime import datetime, timedelta
 import hashlib
+import os
 import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Short-term burst limit on top of the daily/weekly quotas in ReferralRateLimit
+REFERRAL_BURST_LIMIT = int(os.environ.get('REFERRAL_BURST_LIMIT', 5))
+REFERRAL_BURST_WINDOW_SECONDS = int(os.environ.get('REFERRAL_BURST_WINDOW_SECONDS', 600))
+
 # List of common disposable email domains
 DISPOSABLE_EMAIL_DOMAINS = [
     'tempmail.com', 'guerrillamail.com', 'mailinator.com', '10minutemail.com',
@@ -61,7 +67,16 @@ class ReferralSecurityController:
         """
         Check if user has exceeded referral rate limits.
         Returns (can_refer: bool, error_message: str or None)
+
+        The burst window is checked in the shared Redis limiter first, so a
+        flood of signups is rejected without touching the database.
         """
+        burst = check_shared_rate_limit(
+            f"referral:burst:{user_id}", REFERRAL_BURST_LIMIT, REFERRAL_BURST_WINDOW_SECONDS
+        )
+        if not burst.allowed:
+            return False, "Too many referrals in a short period"
+
         rate_limit = ReferralRateLimit.query.filter_by(user_id=user_id).first()
         
         if not rate_limit:
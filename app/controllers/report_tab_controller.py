@@ -1,19 +1,25 @@
 # app/controllers/report_tab_controller.py
 from flask import current_app, jsonify
-from sqlalchemy import func, case
+from sqlalchemy import func, case, literal
 from sqlalchemy.orm import joinedload, aliased
 from app.models import (
     Survey, Question, Submission, Response, ReportSetting,
     User, SurveyLink, db # Keep User import if needed for data processing
 )
 from .response_controller import ResponseController
+from .response_aggregate_controller import ResponseAggregateController
+from app.utils.report_cache import report_data_cache
+from app.utils.analytics_engine import BULK_IN_CHUNK_SIZE
+from app.utils.submission_dimensions import DEMOGRAPHIC_CATEGORIES, COMPARISON_DIMENSIONS
 from datetime import datetime, date
 from collections import Counter, defaultdict
 import json
+import os
 import statistics
+import time
 import re
 import openpyxl # Ensure openpyxl is installed: pip install openpyxl
-from io import BytesIO
+import tempfile
 from .response_controller import (
     process_star_rating_grid_responses, # Keep if used internally by process_grid_responses_for_analytics
     process_radio_grid_responses,       # Keep if used internally by process_grid_responses_for_analytics
@@ -92,6 +98,13 @@ def _calculate_summary_metrics(submissions):
         "completion_rate": completion_rate
     }
 
+# Submissions per yield_per batch in the Excel export (one response query per batch).
+EXCEL_EXPORT_BATCH_SIZE = BULK_IN_CHUNK_SIZE
+
+# Background exports are named after their Celery task id and kept this long.
+_EXPORT_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+REPORT_EXPORT_RETENTION_HOURS = int(os.environ.get('REPORT_EXPORT_RETENTION_HOURS', 24))
+
 def _calculate_demographics(submissions):
     """Calculates demographic breakdown for a list of submissions."""
     if not submissions:
@@ -99,13 +112,16 @@ def _calculate_demographics(submissions):
 
     total_count = len(submissions)
     demographics = defaultdict(lambda: defaultdict(int))
-    categories = ['age_group', 'gender', 'location', 'education', 'company', 'cohort_tag']
 
     for sub in submissions:
-        for category in categories:
+        for category in DEMOGRAPHIC_CATEGORIES:
             value = getattr(sub, category, None) or "Unknown"
             demographics[category][value] += 1
 
+    return _format_demographics(demographics, total_count)
+
+def _format_demographics(demographics, total_count):
+    """Turns {category: {value: count}} into the count/percentage breakdown returned to clients."""
     demo_results = {}
     for category, counts in demographics.items():
         cat_results = {}
@@ -957,6 +973,162 @@ def _process_single_question_analytics(question, filtered_responses):
     return result
 
 
+def _grouped_submission_metrics(survey_id, filters, dimension=None, segments=None):
+    """
+    Summary metrics and demographics per segment from one GROUP BY query.
+
+    Returns {segment_value: {"summary_metrics": ..., "demographics": ...}};
+    the key is None when no dimension is given.
+    """
+    seg_col = getattr(Submission, dimension) if dimension else None
+    group_cols = ([seg_col] if seg_col is not None else []) + \
+        [getattr(Submission, c) for c in DEMOGRAPHIC_CATEGORIES] + [Submission.is_complete]
+    query = db.session.query(
+        *group_cols,
+        func.count(Submission.id),
+        func.sum(case((Submission.duration > 0, Submission.duration), else_=0)),
+        func.count(case((Submission.duration > 0, 1)))
+    ).filter(Submission.survey_id == survey_id)
+    query = _apply_filters_to_query(query, filters)
+    if seg_col is not None:
+        query = query.filter(seg_col.in_(segments))
+    rows = query.group_by(*group_cols).all()
+
+    offset = 1 if seg_col is not None else 0
+    totals = defaultdict(lambda: {"count": 0, "complete": 0, "duration_sum": 0, "duration_count": 0,
+                                  "demographics": defaultdict(lambda: defaultdict(int))})
+    for row in rows:
+        segment = row[0] if seg_col is not None else None
+        demo_values = row[offset:offset + len(DEMOGRAPHIC_CATEGORIES)]
+        is_complete = row[offset + len(DEMOGRAPHIC_CATEGORIES)]
+        count, duration_sum, duration_count = row[-3:]
+        bucket = totals[segment]
+        bucket["count"] += count
+        bucket["complete"] += count if is_complete else 0
+        bucket["duration_sum"] += duration_sum or 0
+        bucket["duration_count"] += duration_count or 0
+        for category, value in zip(DEMOGRAPHIC_CATEGORIES, demo_values):
+            bucket["demographics"][category][value or "Unknown"] += count
+
+    results = {}
+    for segment, bucket in totals.items():
+        total = bucket["count"]
+        results[segment] = {
+            "summary_metrics": {
+                "total_responses": total,
+                "average_duration": round(bucket["duration_sum"] / bucket["duration_count"], 1) if bucket["duration_count"] else 0,
+                "completion_rate": round((bucket["complete"] / total) * 100, 1) if total else 0
+            },
+            "demographics": _format_demographics(bucket["demographics"], total)
+        }
+    return results
+
+def _aggregate_submission_metrics(survey_id):
+    """
+    The unfiltered ``_grouped_submission_metrics`` result read from the survey
+    aggregate buckets, or None when the survey has no current aggregates.
+    """
+    bucket_rows = ResponseAggregateController.current_bucket_aggregates(survey_id)
+    if bucket_rows is None:
+        return None
+    overall = bucket_rows[0]
+    total = overall.submission_count
+
+    demographics = {category: defaultdict(int) for category in DEMOGRAPHIC_CATEGORIES}
+    for row in bucket_rows[1:]:
+        if row.bucket_dimension in demographics:
+            demographics[row.bucket_dimension][row.bucket_value] += row.submission_count
+    for counts in demographics.values():
+        counts["Unknown"] = total - sum(counts.values())
+
+    return {None: {
+        "summary_metrics": {
+            "total_responses": total,
+            "average_duration": round(overall.duration_sum / overall.duration_count, 1) if overall.duration_count else 0,
+            "completion_rate": round((overall.complete_count / total) * 100, 1) if total else 0
+        },
+        "demographics": _format_demographics(demographics, total)
+    }}
+
+def _grouped_question_responses(survey_id, filters, open_ended_ids, dimension=None, segments=None):
+    """
+    Response rows per (segment, question) without loading ORM objects.
+
+    Closed questions are aggregated in SQL by
+    GROUP BY segment, question_id, response_text, is_not_applicable and each
+    distinct row is repeated ``count`` times (by reference). Open-ended
+    questions keep one row per response so their timestamps stay exact.
+    """
+    seg_col = getattr(Submission, dimension) if dimension else None
+    seg_select = [seg_col] if seg_col is not None else []
+
+    def scoped(query):
+        query = query.join(Submission, Response.submission_id == Submission.id).filter(Submission.survey_id == survey_id)
+        query = _apply_filters_to_query(query, filters)
+        if seg_col is not None:
+            query = query.filter(seg_col.in_(segments))
+        return query
+
+    grouped_cols = seg_select + [Response.question_id, Response.response_text, Response.is_not_applicable]
+    grouped = scoped(db.session.query(
+        *grouped_cols,
+        func.count(Response.id).label('count'),
+        func.min(Response.id).label('id'),
+        func.max(Response.created_at).label('created_at')
+    ))
+    if open_ended_ids:
+        grouped = grouped.filter(Response.question_id.notin_(open_ended_ids))
+    rows = grouped.group_by(*grouped_cols).all()
+
+    if open_ended_ids:
+        rows += scoped(db.session.query(
+            *seg_select,
+            Response.question_id, Response.response_text, Response.is_not_applicable,
+            literal(1).label('count'), Response.id, Response.created_at
+        )).filter(Response.question_id.in_(open_ended_ids)).all()
+
+    responses = defaultdict(lambda: defaultdict(list))
+    for row in rows:
+        segment = row[0] if seg_col is not None else None
+        responses[segment][row.question_id].extend([row] * row.count)
+    return responses
+
+def _grouped_report_analytics(survey, filters, dimension=None, segments=None):
+    """
+    Report analytics for every segment of ``dimension`` (or the whole filtered
+    set when no dimension is given) in a constant number of queries.
+
+    Unfiltered summary metrics come from the response aggregates when current.
+
+    Returns {segment_value: analytics dict}; segments without submissions
+    get the same empty payload the per-segment path returned.
+    """
+    questions = survey.questions.all()
+    open_ended_ids = [q.id for q in questions if q.question_type == "open-ended"]
+
+    metrics = None
+    if not filters and dimension is None:
+        metrics = _aggregate_submission_metrics(survey.id)
+    if metrics is None:
+        metrics = _grouped_submission_metrics(survey.id, filters, dimension, segments)
+    responses = _grouped_question_responses(survey.id, filters, open_ended_ids, dimension, segments)
+
+    results = {}
+    for segment, segment_metrics in metrics.items():
+        segment_responses = responses.get(segment, {})
+        question_stats = {}
+        for q in questions:
+            try:
+                question_stats[str(q.id)] = _process_single_question_analytics(q, segment_responses.get(q.id, []))
+            except Exception as q_err:
+                current_app.logger.error(f"Error processing analytics for Q{q.id}: {q_err}", exc_info=True)
+                question_stats[str(q.id)] = {"error": str(q_err), "sequence_number": q.sequence_number, "question_text": q.question_text}
+        results[segment] = {**segment_metrics, "question_stats": question_stats}
+    return results
+
+def _empty_report_analytics():
+    return {"summary_metrics": _calculate_summary_metrics([]), "demographics": {}, "question_stats": {}}
+
 
 class ReportTabController:
 
@@ -992,54 +1164,32 @@ class ReportTabController:
             survey = Survey.query.get(survey_id)
             if not survey: return {"error": "Survey not found"}, 404
 
-            def get_analytics_for_filters(current_filters):
-                query = Submission.query.filter(Submission.survey_id == survey_id)
-                query = _apply_filters_to_query(query, current_filters)
-                filtered_submissions = query.all()
-
-                if not filtered_submissions:
-                    return {"summary_metrics": _calculate_summary_metrics([]), "demographics": {}, "question_stats": {}}
-
-                submission_ids = [s.id for s in filtered_submissions]
-                all_relevant_responses = Response.query.filter(Response.submission_id.in_(submission_ids)).all()
-                responses_by_question = defaultdict(list)
-                for r in all_relevant_responses: responses_by_question[r.question_id].append(r)
-
-                question_stats = {}
-                for q in survey.questions.all():
-                    q_responses = responses_by_question.get(q.id, [])
-                    try:
-                        q_analytics = _process_single_question_analytics(q, q_responses)
-                        question_stats[str(q.id)] = q_analytics
-                    except Exception as q_err:
-                        current_app.logger.error(f"Error processing analytics for Q{q.id}: {q_err}", exc_info=True)
-                        question_stats[str(q.id)] = {"error": str(q_err), "sequence_number": q.sequence_number, "question_text": q.question_text}
-
-                return {
-                    "summary_metrics": _calculate_summary_metrics(filtered_submissions),
-                    "demographics": _calculate_demographics(filtered_submissions),
-                    "question_stats": question_stats
-                }
+            cached = report_data_cache.get(survey_id, filters, comparison)
+            if cached is not None:
+                return cached, 200
 
             base_filters = filters or {}
-            report_data = {"group1": None, "group2": None}
 
             if not comparison or comparison.get("type") == "No Comparison" or comparison.get("dimension") is None:
-                report_data["group1"] = get_analytics_for_filters(base_filters)
+                groups = _grouped_report_analytics(survey, base_filters)
+                report_data = {"group1": groups.get(None) or _empty_report_analytics(), "group2": None}
             else:
                 dimension = comparison.get("dimension")
                 segments = comparison.get("segments", [])
-                if not dimension or not hasattr(Submission, dimension): return {"error": f"Invalid comparison dimension: {dimension}"}, 400
+                if dimension not in COMPARISON_DIMENSIONS: return {"error": f"Invalid comparison dimension: {dimension}"}, 400
                 if len(segments) < 2: return {"error": "Need at least two segments to compare"}, 400
 
-                filters_g1 = base_filters.copy()
-                filters_g1[dimension] = [segments[0]] # Assume list for IN clause, adjust if direct match needed
-                report_data["group1"] = get_analytics_for_filters(filters_g1)
+                # The segment values replace any base filter on the comparison dimension
+                segment_filters = {k: v for k, v in base_filters.items() if k != dimension}
+                groups = _grouped_report_analytics(survey, segment_filters, dimension, segments)
+                groups_by_key = {str(k): v for k, v in groups.items()}
 
-                filters_g2 = base_filters.copy()
-                filters_g2[dimension] = [segments[1]]
-                report_data["group2"] = get_analytics_for_filters(filters_g2)
+                report_data = {}
+                for idx, segment in enumerate(segments):
+                    report_data[f"group{idx + 1}"] = groups_by_key.get(str(segment)) or _empty_report_analytics()
+                report_data["segments"] = [{"group": f"group{idx + 1}", "value": segment} for idx, segment in enumerate(segments)]
 
+            report_data_cache.set(survey_id, filters, comparison, report_data)
             return report_data, 200
         except AttributeError as ae:
              current_app.logger.error(f"Invalid dimension attribute for comparison: {ae}")
@@ -1048,6 +1198,11 @@ class ReportTabController:
             current_app.logger.error(f"Error in get_report_data: {e}", exc_info=True)
             return {"error": "Failed to retrieve report analytics data"}, 500
 
+    @staticmethod
+    def get_report_cache_stats():
+        """Hit/miss counters of the report-data cache."""
+        return report_data_cache.stats(), 200
+
     @staticmethod
     def get_filtered_count(survey_id, filters=None):
         try:
@@ -1147,101 +1302,132 @@ class ReportTabController:
 
     # --- Export Method ---
     @staticmethod
-    def export_excel_report(survey_id, filters=None):
-        """Generates and returns an Excel file stream with filtered raw data."""
-        try:
-            survey = Survey.query.get(survey_id)
-            if not survey: raise ValueError("Survey not found")
+    def _format_excel_response_value(question_type, response_text, file_path):
+        """Flatten a stored answer into the cell value used by the Excel export."""
+        if question_type == 'signature':
+            is_signed = bool(response_text and response_text.strip() not in ['{}', 'null', ''])
+            return "Yes" if is_signed else "No"
+        if question_type == 'document-upload':
+            try:
+                file_info_list = json.loads(response_text or '[]') # Handle null text
+                if isinstance(file_info_list, list) and file_info_list:
+                    filenames = [f.get('name', f.get('url', '').split('/')[-1]) for f in file_info_list if isinstance(f, dict)]
+                    return ", ".join(filenames)
+                return ''
+            except (json.JSONDecodeError, TypeError):
+                return file_path.split('/')[-1] if file_path else '[Upload Error]'
+        if question_type in ['checkbox', 'multi-choice', 'multiple-image-select', 'ranking', 'radio-grid', 'checkbox-grid', 'star-rating-grid']:
+            try:
+                parsed = json.loads(response_text or 'null') # Handle null text
+                if isinstance(parsed, list): return ", ".join(map(str, parsed))
+                elif isinstance(parsed, dict): return "; ".join(f"{k}: {v}" for k, v in parsed.items())
+                else: return str(parsed)
+            except (json.JSONDecodeError, TypeError): return response_text
+        return response_text
+
+    @staticmethod
+    def _excel_rows_for_batch(survey, submissions, sorted_questions):
+        """Build export rows for a batch of submissions with a single response query."""
+        question_types = {q.id: q.question_type for q in sorted_questions}
+        values_by_submission = {sub.id: {} for sub in submissions}
+        response_rows = db.session.query(
+            Response.submission_id, Response.question_id, Response.response_text, Response.file_path
+        ).filter(Response.submission_id.in_(list(values_by_submission))).order_by(Response.id)
+        for submission_id, question_id, response_text, file_path in response_rows:
+            if question_id in question_types:
+                values_by_submission[submission_id][question_id] = ReportTabController._format_excel_response_value(
+                    question_types[question_id], response_text, file_path
+                )
+
+        for sub in submissions:
+            values = values_by_submission[sub.id]
+            row = [
+                survey.id,
+                survey.title or '',
+                sub.submitted_at.isoformat() if sub.submitted_at else '',
+                sub.duration if sub.duration is not None else '',
+                sub.age_group or '',
+                sub.gender or '',
+                sub.location or '',
+                sub.education or '',
+                sub.company or ''
+            ]
+            for q in sorted_questions:
+                item = values.get(q.id, '')
+                if isinstance(item, (datetime, date)): item = item.isoformat()
+                row.append('' if item is None else item)
+            yield row
+
+    @staticmethod
+    def write_excel_report(survey_id, filters, output, progress_callback=None):
+        """
+        Writes the filtered raw-data Excel export to ``output`` (a path or binary file).
 
-            # Build query without joinedload for responses to avoid SQLAlchemy error
-            query = Submission.query.filter(Submission.survey_id == survey_id)
-            query = _apply_filters_to_query(query, filters) # Apply filters
-            submissions = query.order_by(Submission.submitted_at).all() 
+        Submissions are read with ``yield_per`` in batches of EXCEL_EXPORT_BATCH_SIZE
+        and rows go to an openpyxl write-only sheet, so memory does not grow with
+        survey size. ``progress_callback(processed, total)`` is called after each batch.
 
-            output = BytesIO()
-            workbook = openpyxl.Workbook()
-            sheet = workbook.active
-            sheet.title = "Responses"
+        Returns the number of submission rows written.
+        """
+        survey = Survey.query.get(survey_id)
+        if not survey: raise ValueError("Survey not found")
 
-            if not submissions:
-                sheet.cell(row=1, column=1, value="No responses found matching the selected filters.")
-            else:
-                # --- Prepare Headers ---
-                sorted_questions = sorted(survey.questions.all(), key=lambda q: q.sequence_number if q.sequence_number is not None else float('inf'))
-                headers = ["Survey ID", "Survey Name", "Submitted At", "Duration (s)", "Age Group", "Gender", "Location", "Education", "Company"]
-                question_headers_map = {q.id: f"Q{q.sequence_number}: {q.question_text}" for q in sorted_questions}
-                headers.extend([question_headers_map[q.id] for q in sorted_questions])
-                sheet.append(headers)
-
-                # Fetch all responses for these submissions in a separate query
-                submission_ids = [sub.id for sub in submissions]
-                responses = Response.query.filter(Response.submission_id.in_(submission_ids)).all()
-                
-                # Group responses by submission_id for efficient lookup
-                responses_by_submission = defaultdict(list)
-                for response in responses:
-                    responses_by_submission[response.submission_id].append(response)
-
-                # --- Prepare Rows ---
-                for sub in submissions:
-                    submission_responses = responses_by_submission.get(sub.id, [])
-                    responses_map = {r.question_id: r for r in submission_responses}
-                    row_dict = {h: '' for h in headers}
-
-                    # Populate survey, submission timing, and demographic fields only
-                    row_dict["Survey ID"] = survey_id
-                    row_dict["Survey Name"] = survey.title or ''
-                    row_dict["Submitted At"] = sub.submitted_at.isoformat() if sub.submitted_at else ''
-                    row_dict["Duration (s)"] = sub.duration if sub.duration is not None else ''
-                    row_dict["Age Group"] = sub.age_group or ''
-                    row_dict["Gender"] = sub.gender or ''
-                    row_dict["Location"] = sub.location or ''
-                    row_dict["Education"] = sub.education or ''
-                    row_dict["Company"] = sub.company or ''
-
-                    # Populate question responses
-                    for q in sorted_questions:
-                        header_key = question_headers_map.get(q.id)
-                        if not header_key: continue
-
-                        response = responses_map.get(q.id)
-                        response_value = ''
-                        if response:
-                            if q.question_type == 'signature':
-                                is_signed = bool(response.response_text and response.response_text.strip() not in ['{}', 'null', ''])
-                                response_value = "Yes" if is_signed else "No"
-                            elif q.question_type == 'document-upload':
-                                try:
-                                    file_info_list = json.loads(response.response_text or '[]') # Handle null text
-                                    if isinstance(file_info_list, list) and file_info_list:
-                                        filenames = [f.get('name', f.get('url', '').split('/')[-1]) for f in file_info_list if isinstance(f, dict)]
-                                        response_value = ", ".join(filenames)
-                                except (json.JSONDecodeError, TypeError):
-                                    response_value = response.file_path.split('/')[-1] if response.file_path else '[Upload Error]'
-                            elif q.question_type in ['checkbox', 'multi-choice', 'multiple-image-select', 'ranking', 'radio-grid', 'checkbox-grid', 'star-rating-grid']:
-                                try:
-                                    parsed = json.loads(response.response_text or 'null') # Handle null text
-                                    if isinstance(parsed, list): response_value = ", ".join(map(str, parsed))
-                                    elif isinstance(parsed, dict): response_value = "; ".join(f"{k}: {v}" for k, v in parsed.items())
-                                    else: response_value = str(parsed)
-                                except (json.JSONDecodeError, TypeError): response_value = response.response_text
-                            else: response_value = response.response_text
-
-                        row_dict[header_key] = response_value if response_value is not None else ''
-
-                    # Append row to sheet
-                    safe_row = []
-                    for item in list(row_dict.values()):
-                        if isinstance(item, (datetime, date)): safe_row.append(item.isoformat())
-                        elif item is None: safe_row.append('')
-                        else: safe_row.append(item)
-                    sheet.append(safe_row)
-
-            # --- Finalize Excel ---
-            workbook.save(output)
+        query = Submission.query.filter(Submission.survey_id == survey_id)
+        query = _apply_filters_to_query(query, filters) # Apply filters
+        total = query.count()
+
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet(title="Responses")
+        processed = 0
+
+        if not total:
+            sheet.append(["No responses found matching the selected filters."])
+        else:
+            # --- Prepare Headers ---
+            sorted_questions = sorted(survey.questions.all(), key=lambda q: q.sequence_number if q.sequence_number is not None else float('inf'))
+            headers = ["Survey ID", "Survey Name", "Submitted At", "Duration (s)", "Age Group", "Gender", "Location", "Education", "Company"]
+            headers.extend(f"Q{q.sequence_number}: {q.question_text}" for q in sorted_questions)
+            sheet.append(headers)
+
+            # --- Stream Rows ---
+            batch = []
+            submissions = query.order_by(Submission.submitted_at, Submission.id).yield_per(EXCEL_EXPORT_BATCH_SIZE)
+            for sub in submissions:
+                batch.append(sub)
+                if len(batch) < EXCEL_EXPORT_BATCH_SIZE:
+                    continue
+                for row in ReportTabController._excel_rows_for_batch(survey, batch, sorted_questions):
+                    sheet.append(row)
+                processed += len(batch)
+                batch = []
+                if progress_callback: progress_callback(processed, total)
+            if batch:
+                for row in ReportTabController._excel_rows_for_batch(survey, batch, sorted_questions):
+                    sheet.append(row)
+                processed += len(batch)
+
+        # --- Finalize Excel ---
+        workbook.save(output)
+        if progress_callback: progress_callback(processed, total)
+        return processed
+
+    @staticmethod
+    def export_excel_filename(survey_id):
+        return f"survey_{survey_id}_responses_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.xlsx"
+
+    @staticmethod
+    def export_excel_report(survey_id, filters=None):
+        """Generates and returns an Excel file stream with filtered raw data (synchronously)."""
+        try:
+            output = tempfile.TemporaryFile(suffix='.xlsx') # Deleted when send_file closes it
+            try:
+                ReportTabController.write_excel_report(survey_id, filters, output)
+            except Exception:
+                output.close()
+                raise
             output.seek(0)
             mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            filename = f"survey_{survey_id}_responses_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.xlsx"
+            filename = ReportTabController.export_excel_filename(survey_id)
 
             return output, mimetype, filename
 
@@ -1249,4 +1435,61 @@ class ReportTabController:
              raise ve # Re-raise for the route to handle as 404/other error
         except Exception as e:
             current_app.logger.error(f"Error exporting Excel for survey {survey_id}: {e}", exc_info=True)
-            raise # Re-raise for the route to handle as 500
\ No newline at end of file
+            raise # Re-raise for the route to handle as 500
+
+    # --- Background Excel Exports (see app/tasks/export_tasks.py) ---
+
+    @staticmethod
+    def get_export_dir():
+        """Directory holding finished background exports (UPLOAD_FOLDER/exports)."""
+        export_dir = os.path.join(current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'exports')
+        os.makedirs(export_dir, exist_ok=True)
+        return export_dir
+
+    @staticmethod
+    def get_export_path(export_id):
+        """File path of a background export; export ids are Celery task ids."""
+        if not export_id or not _EXPORT_ID_PATTERN.match(export_id):
+            raise ValueError("Invalid export id")
+        return os.path.join(ReportTabController.get_export_dir(), f"{export_id}.xlsx")
+
+    @staticmethod
+    def build_excel_export_file(export_id, survey_id, filters=None, progress_callback=None):
+        """
+        Writes the Excel export for a background job to UPLOAD_FOLDER/exports.
+
+        The file is written under a temporary name and renamed when complete,
+        so a download never sees a partially written workbook.
+        """
+        final_path = ReportTabController.get_export_path(export_id)
+        partial_path = f"{final_path}.part"
+        try:
+            row_count = ReportTabController.write_excel_report(survey_id, filters, partial_path, progress_callback)
+            os.replace(partial_path, final_path)
+        except Exception:
+            if os.path.exists(partial_path): os.remove(partial_path)
+            raise
+        current_app.logger.info(f"[EXCEL_EXPORT] Export {export_id} for survey {survey_id} written: {row_count} rows")
+        return {
+            "export_id": export_id,
+            "survey_id": survey_id,
+            "row_count": row_count,
+            "filename": ReportTabController.export_excel_filename(survey_id),
+            "size_bytes": os.path.getsize(final_path)
+        }
+
+    @staticmethod
+    def cleanup_expired_exports(max_age_hours=None):
+        """Deletes background export files older than REPORT_EXPORT_RETENTION_HOURS."""
+        max_age_hours = max_age_hours or REPORT_EXPORT_RETENTION_HOURS
+        cutoff = time.time() - max_age_hours * 3600
+        removed = 0
+        export_dir = ReportTabController.get_export_dir()
+        for entry in os.scandir(export_dir):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except OSError as e:
+                    current_app.logger.warning(f"[EXCEL_EXPORT] Could not remove expired export {entry.path}: {e}")
+        return removed
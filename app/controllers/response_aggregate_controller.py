@@ -0,0 +1,513 @@
+# controllers/response_aggregate_controller.py
+"""
+Response Aggregate Controller
+Maintains the pre-aggregated QuestionAggregate / SurveyAggregate tables.
+Submissions fold their responses into the aggregates inside the submitting
+transaction; unfiltered dashboards read them back in O(questions) and fall
+back to the raw responses while a survey's aggregates are missing or stale.
+"""
+
+import json
+import logging
+import math
+import os
+import uuid
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app.models import db, Survey, Submission, Response
+from app.utils.redis_client import get_redis
+from app.models.analytics_models import (
+    QuestionAggregate, SurveyAggregate,
+    ALL_BUCKET_DIMENSION, ALL_BUCKET_VALUE, AGGREGATE_DEMOGRAPHIC_DIMENSIONS
+)
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_QUESTION_TYPES = {'numerical-input', 'rating', 'rating-scale', 'nps', 'star-rating', 'slider'}
+SINGLE_CHOICE_QUESTION_TYPES = {'multiple-choice', 'dropdown', 'single-choice', 'scale', 'single-image-select'}
+MULTI_CHOICE_QUESTION_TYPES = {'checkbox', 'multi-choice', 'multiple-image-select'}
+GRID_QUESTION_TYPES = {'radio-grid', 'checkbox-grid', 'star-rating-grid'}
+RANKING_QUESTION_TYPES = {'interactive-ranking'}
+
+# Submissions replayed per batch when rebuilding a survey.
+REBUILD_BATCH_SIZE = 500
+
+# Retries when a concurrent submission creates the same new aggregate row first.
+AGGREGATE_INSERT_RETRIES = 3
+
+# A rebuild holds the survey's Redis lock at most this long.
+AGGREGATE_REBUILD_LOCK_SECONDS = int(os.environ.get('AGGREGATE_REBUILD_LOCK_SECONDS', 1800))
+_REBUILD_LOCK_KEY = "aggregates:rebuild_lock:{survey_id}"
+
+_BUCKET_VALUE_MAX_LEN = 150
+
+
+def _parse_answer(resp_text):
+    try:
+        return json.loads(resp_text)
+    except (TypeError, ValueError):
+        return resp_text
+
+
+def _number_key(value):
+    """Stable option key for a numeric answer (5.0 -> '5')."""
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def _grid_cells(question_type, parsed):
+    """Flatten a grid answer into "row|col" (or "row|col|rating") cell keys."""
+    cells = []
+    if isinstance(parsed, dict):
+        for row, selection in parsed.items():
+            if question_type == 'star-rating-grid' and isinstance(selection, dict):
+                for col, rating in selection.items():
+                    if rating in (None, '', 'N/A'):
+                        continue
+                    cells.append(f"{row}|{col}|{rating}")
+            elif isinstance(selection, list):
+                cells.extend(f"{row}|{col}" for col in selection)
+            elif selection not in (None, ''):
+                cells.append(f"{row}|{selection}")
+    elif isinstance(parsed, list):
+        for item in parsed:
+            if isinstance(item, str) and ':' in item:
+                row, col = item.split(':', 1)
+                cells.append(f"{row}|{col}")
+    elif isinstance(parsed, str) and ':' in parsed:
+        row, col = parsed.split(':', 1)
+        cells.append(f"{row}|{col}")
+    return cells
+
+
+def response_contribution(question, response_text, is_not_applicable=False):
+    """
+    Describe what one response adds to its question's aggregate.
+
+    Returns a dict with ``na`` (bool), ``numeric`` (float or None),
+    ``options`` (list of option keys) and ``cells`` (list of cell keys).
+    """
+    contribution = {'na': False, 'numeric': None, 'options': [], 'cells': []}
+    na_text = (question.not_applicable_text or "Not Applicable").strip().lower()
+    parsed = _parse_answer(response_text)
+
+    if is_not_applicable or (isinstance(parsed, str) and parsed.strip().lower() == na_text):
+        contribution['na'] = True
+        return contribution
+
+    qtype = question.question_type
+    if qtype in NUMERIC_QUESTION_TYPES:
+        try:
+            value = float(parsed)
+        except (TypeError, ValueError):
+            return contribution
+        if not math.isfinite(value):
+            return contribution
+        contribution['numeric'] = value
+        contribution['options'] = [_number_key(value)]
+    elif qtype in SINGLE_CHOICE_QUESTION_TYPES:
+        if parsed is not None:
+            label = parsed.get('text') if isinstance(parsed, dict) and 'text' in parsed else parsed
+            contribution['options'] = [str(label)]
+    elif qtype in MULTI_CHOICE_QUESTION_TYPES:
+        if isinstance(parsed, list):
+            contribution['options'] = [str(item) for item in parsed]
+        elif parsed is not None:
+            contribution['options'] = [str(parsed)]
+    elif qtype in RANKING_QUESTION_TYPES:
+        if isinstance(parsed, dict):
+            contribution['cells'] = [f"{item}|{rank}" for item, rank in parsed.items()]
+    elif qtype in GRID_QUESTION_TYPES:
+        contribution['cells'] = _grid_cells(qtype, parsed)
+    return contribution
+
+
+def submission_buckets(submission):
+    """(dimension, value) buckets a submission contributes to."""
+    buckets = [(ALL_BUCKET_DIMENSION, ALL_BUCKET_VALUE)]
+    for dimension in AGGREGATE_DEMOGRAPHIC_DIMENSIONS:
+        value = getattr(submission, dimension, None)
+        if value:
+            buckets.append((dimension, str(value)[:_BUCKET_VALUE_MAX_LEN]))
+    return buckets
+
+
+class _AggregateAccumulator:
+    """In-memory working set of aggregate rows for one survey."""
+
+    def __init__(self, survey_id, question_rows=(), survey_rows=()):
+        self.survey_id = survey_id
+        self.question_rows = {(r.question_id, r.bucket_dimension, r.bucket_value): r for r in question_rows}
+        self.survey_rows = {(r.bucket_dimension, r.bucket_value): r for r in survey_rows}
+        # JSON columns are not mutation-tracked; work on copies and assign back in flush().
+        self._option_counts = {}
+        self._cell_counts = {}
+
+    def _question_row(self, question_id, bucket):
+        key = (question_id, bucket[0], bucket[1])
+        row = self.question_rows.get(key)
+        if row is None:
+            row = QuestionAggregate(
+                survey_id=self.survey_id, question_id=question_id,
+                bucket_dimension=bucket[0], bucket_value=bucket[1],
+                response_count=0, na_count=0,
+                numeric_count=0, numeric_sum=0.0, numeric_sum_sq=0.0,
+                option_counts={}, cell_counts={}
+            )
+            self.question_rows[key] = row
+        return row
+
+    def _survey_row(self, bucket):
+        row = self.survey_rows.get(bucket)
+        if row is None:
+            row = SurveyAggregate(
+                survey_id=self.survey_id, bucket_dimension=bucket[0], bucket_value=bucket[1],
+                submission_count=0, complete_count=0, duration_count=0, duration_sum=0.0
+            )
+            self.survey_rows[bucket] = row
+        return row
+
+    def _counts(self, cache, row, attr):
+        if id(row) not in cache:
+            cache[id(row)] = (row, dict(getattr(row, attr) or {}))
+        return cache[id(row)][1]
+
+    def add_submission(self, submission, question_responses):
+        """Fold one submission and its (question, response) pairs into the working set."""
+        buckets = submission_buckets(submission)
+
+        for bucket in buckets:
+            row = self._survey_row(bucket)
+            row.submission_count += 1
+            if submission.is_complete:
+                row.complete_count += 1
+            if submission.duration and submission.duration > 0:
+                row.duration_count += 1
+                row.duration_sum += submission.duration
+
+        for question, response in question_responses:
+            contribution = response_contribution(question, response.response_text, response.is_not_applicable)
+            for bucket in buckets:
+                row = self._question_row(question.id, bucket)
+                row.response_count += 1
+                if contribution['na']:
+                    row.na_count += 1
+                    continue
+                value = contribution['numeric']
+                if value is not None:
+                    row.numeric_count += 1
+                    row.numeric_sum += value
+                    row.numeric_sum_sq += value * value
+                    row.numeric_min = value if row.numeric_min is None else min(row.numeric_min, value)
+                    row.numeric_max = value if row.numeric_max is None else max(row.numeric_max, value)
+                if contribution['options']:
+                    counts = self._counts(self._option_counts, row, 'option_counts')
+                    for option in contribution['options']:
+                        counts[option] = counts.get(option, 0) + 1
+                if contribution['cells']:
+                    counts = self._counts(self._cell_counts, row, 'cell_counts')
+                    for cell in contribution['cells']:
+                        counts[cell] = counts.get(cell, 0) + 1
+
+    def flush(self):
+        """Write the JSON counters back and stage every row on the session."""
+        for row, counts in self._option_counts.values():
+            row.option_counts = counts
+        for row, counts in self._cell_counts.values():
+            row.cell_counts = counts
+        self._option_counts.clear()
+        self._cell_counts.clear()
+        db.session.add_all(list(self.question_rows.values()))
+        db.session.add_all(list(self.survey_rows.values()))
+
+
+class ResponseAggregateController:
+    """Controller for the incremental response aggregate store."""
+
+    @staticmethod
+    def record_submission_no_commit(submission, question_responses):
+        """
+        Fold a new submission into the aggregates without committing.
+
+        Runs inside a SAVEPOINT so a failure here never loses the submission
+        itself; the survey can be repaired later with a rebuild.
+
+        Args:
+            submission: The flushed Submission being recorded
+            question_responses: List of (Question, Response) pairs for it
+
+        Returns:
+            bool: True if the aggregates were updated
+        """
+        return ResponseAggregateController.record_submissions_no_commit(
+            submission.survey_id, [(submission, question_responses)]
+        )
+
+    @staticmethod
+    def record_submissions_no_commit(survey_id, entries):
+        """
+        Fold a batch of new submissions of one survey into the aggregates without committing.
+
+        The affected aggregate rows are locked and read once for the whole
+        batch, inside a single SAVEPOINT. If a concurrent submission inserts a
+        bucket row this batch also creates, the batch is re-read and retried.
+
+        Args:
+            survey_id: Survey the submissions belong to
+            entries: List of (flushed Submission, [(Question, Response), ...]) pairs
+
+        Returns:
+            bool: True if the aggregates were updated
+        """
+        if not entries:
+            return True
+        for attempt in range(AGGREGATE_INSERT_RETRIES + 1):
+            try:
+                with db.session.begin_nested():
+                    ResponseAggregateController._fold_entries(survey_id, entries)
+                return True
+            except IntegrityError as e:
+                # FOR UPDATE cannot lock a bucket row that does not exist yet, so a concurrent
+                # first submission may have inserted it; the SAVEPOINT is gone, re-read and retry.
+                if attempt < AGGREGATE_INSERT_RETRIES:
+                    logger.info(f"[AGGREGATES] Aggregate row created concurrently for survey {survey_id}, retrying")
+                    continue
+                error = e
+            except Exception as e:
+                error = e
+            submission_ids = [submission.id for submission, _ in entries]
+            logger.error(f"[AGGREGATES] Failed to record submissions {submission_ids} for survey {survey_id}: {error}", exc_info=True)
+            return False
+
+    @staticmethod
+    def _fold_entries(survey_id, entries):
+        """Lock, update and stage the aggregate rows touched by ``entries`` (caller opens the SAVEPOINT)."""
+        bucket_set = set()
+        question_ids = set()
+        for submission, question_responses in entries:
+            bucket_set.update(submission_buckets(submission))
+            question_ids.update(q.id for q, _ in question_responses)
+        dimensions = {b[0] for b in bucket_set}
+        values = {b[1] for b in bucket_set}
+
+        question_rows = []
+        if question_ids:
+            question_rows = QuestionAggregate.query.filter(
+                QuestionAggregate.survey_id == survey_id,
+                QuestionAggregate.question_id.in_(question_ids),
+                QuestionAggregate.bucket_dimension.in_(dimensions),
+                QuestionAggregate.bucket_value.in_(values)
+            ).with_for_update().all()
+        survey_rows = SurveyAggregate.query.filter(
+            SurveyAggregate.survey_id == survey_id,
+            SurveyAggregate.bucket_dimension.in_(dimensions),
+            SurveyAggregate.bucket_value.in_(values)
+        ).with_for_update().all()
+
+        accumulator = _AggregateAccumulator(
+            survey_id,
+            [r for r in question_rows if (r.bucket_dimension, r.bucket_value) in bucket_set],
+            [r for r in survey_rows if (r.bucket_dimension, r.bucket_value) in bucket_set]
+        )
+        for submission, question_responses in entries:
+            accumulator.add_submission(submission, question_responses)
+        accumulator.flush()
+
+    @staticmethod
+    def _acquire_rebuild_lock(survey_id):
+        """
+        Token for the survey's rebuild lock, '' when Redis is unavailable, or None when another rebuild holds it.
+        Without Redis the rebuild serializes on a row lock of the survey instead.
+        """
+        redis_client = get_redis()
+        if redis_client is None:
+            return ''
+        token = uuid.uuid4().hex
+        try:
+            if redis_client.set(_REBUILD_LOCK_KEY.format(survey_id=survey_id), token, nx=True, ex=AGGREGATE_REBUILD_LOCK_SECONDS):
+                return token
+            return None
+        except Exception as e:
+            logger.warning(f"[AGGREGATES] Redis rebuild lock unavailable for survey {survey_id}, using a row lock: {e}")
+            return ''
+
+    @staticmethod
+    def _release_rebuild_lock(survey_id, token):
+        if not token:
+            return
+        redis_client = get_redis()
+        lock_key = _REBUILD_LOCK_KEY.format(survey_id=survey_id)
+        try:
+            # Only release our own lock; an expired one may already belong to another rebuild
+            if redis_client is not None and redis_client.get(lock_key) == token:
+                redis_client.delete(lock_key)
+        except Exception as e:
+            logger.warning(f"[AGGREGATES] Failed to release rebuild lock for survey {survey_id}: {e}")
+
+    @staticmethod
+    def rebuild_survey_aggregates(survey_id):
+        """
+        Recompute every aggregate row of a survey from its raw responses.
+
+        Rebuilds of one survey never run concurrently: they hold a Redis lock
+        (a second rebuild gets 409) or, without Redis, a row lock on the survey.
+
+        Returns:
+            tuple: (result dict, status code)
+        """
+        lock_token = ResponseAggregateController._acquire_rebuild_lock(survey_id)
+        if lock_token is None:
+            logger.info(f"[AGGREGATES] Rebuild of survey {survey_id} already running, skipping")
+            return {"error": "Aggregate rebuild already in progress for this survey"}, 409
+        try:
+            return ResponseAggregateController._rebuild_survey_aggregates(survey_id, row_lock=not lock_token)
+        finally:
+            ResponseAggregateController._release_rebuild_lock(survey_id, lock_token)
+
+    @staticmethod
+    def _rebuild_survey_aggregates(survey_id, row_lock):
+        try:
+            survey_query = Survey.query.filter_by(id=survey_id)
+            if row_lock:
+                survey_query = survey_query.with_for_update()
+            survey = survey_query.first()
+            if not survey:
+                return {"error": "Survey not found"}, 404
+
+            questions_by_id = {q.id: q for q in survey.questions.all()}
+
+            QuestionAggregate.query.filter_by(survey_id=survey_id).delete(synchronize_session=False)
+            SurveyAggregate.query.filter_by(survey_id=survey_id).delete(synchronize_session=False)
+
+            accumulator = _AggregateAccumulator(survey_id)
+            submission_count = 0
+            batch = []
+            submissions = Submission.query.filter_by(survey_id=survey_id).order_by(Submission.id).yield_per(REBUILD_BATCH_SIZE)
+
+            def replay(batch_submissions):
+                responses = Response.query.filter(
+                    Response.submission_id.in_([s.id for s in batch_submissions])
+                ).all()
+                by_submission = defaultdict(list)
+                for r in responses:
+                    question = questions_by_id.get(r.question_id)
+                    if question is not None:
+                        by_submission[r.submission_id].append((question, r))
+                for s in batch_submissions:
+                    accumulator.add_submission(s, by_submission.get(s.id, []))
+
+            for submission in submissions:
+                batch.append(submission)
+                submission_count += 1
+                if len(batch) >= REBUILD_BATCH_SIZE:
+                    replay(batch)
+                    batch = []
+            if batch:
+                replay(batch)
+
+            accumulator.flush()
+            db.session.commit()
+
+            logger.info(f"[AGGREGATES] Rebuilt aggregates for survey {survey_id} from {submission_count} submissions")
+            return {
+                "survey_id": survey_id,
+                "submissions_processed": submission_count,
+                "question_rows": len(accumulator.question_rows),
+                "bucket_rows": len(accumulator.survey_rows)
+            }, 200
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"[AGGREGATES] Error rebuilding aggregates for survey {survey_id}: {e}", exc_info=True)
+            return {"error": str(e)}, 500
+
+    @staticmethod
+    def _current_survey_row(survey_id):
+        """The survey's 'all' bucket row, or None when missing or out of step with its submissions."""
+        survey_row = SurveyAggregate.query.filter_by(
+            survey_id=survey_id, bucket_dimension=ALL_BUCKET_DIMENSION, bucket_value=ALL_BUCKET_VALUE
+        ).first()
+        if survey_row is None:
+            return None
+        submission_count = Submission.query.filter_by(survey_id=survey_id).count()
+        if survey_row.submission_count != submission_count:
+            # A recording failed or submissions were deleted; rebuild_survey_aggregates repairs it
+            logger.info(
+                f"[AGGREGATES] Aggregates of survey {survey_id} are stale "
+                f"({survey_row.submission_count} vs {submission_count} submissions), using raw responses"
+            )
+            return None
+        return survey_row
+
+    @staticmethod
+    def current_question_aggregates(survey_id):
+        """
+        Whole-survey aggregates for readers that fall back to the raw responses.
+
+        Returns:
+            tuple: (SurveyAggregate, {question_id: QuestionAggregate}) for the
+            'all' bucket, or None when the survey has no current aggregates
+        """
+        survey_row = ResponseAggregateController._current_survey_row(survey_id)
+        if survey_row is None:
+            return None
+        question_rows = QuestionAggregate.query.filter_by(
+            survey_id=survey_id, bucket_dimension=ALL_BUCKET_DIMENSION, bucket_value=ALL_BUCKET_VALUE
+        ).all()
+        return survey_row, {row.question_id: row for row in question_rows}
+
+    @staticmethod
+    def current_bucket_aggregates(survey_id):
+        """
+        Every SurveyAggregate bucket row of a survey (the 'all' row first), or
+        None when the survey has no current aggregates.
+        """
+        survey_row = ResponseAggregateController._current_survey_row(survey_id)
+        if survey_row is None:
+            return None
+        bucket_rows = SurveyAggregate.query.filter(
+            SurveyAggregate.survey_id == survey_id,
+            SurveyAggregate.bucket_dimension != ALL_BUCKET_DIMENSION
+        ).all()
+        return [survey_row] + bucket_rows
+
+    @staticmethod
+    def get_survey_aggregates(survey_id, dimension=ALL_BUCKET_DIMENSION, value=None):
+        """
+        Read pre-aggregated analytics for a survey.
+
+        Args:
+            survey_id: Survey to read
+            dimension: 'all' or one of AGGREGATE_DEMOGRAPHIC_DIMENSIONS
+            value: Bucket value; None returns every bucket of ``dimension``
+
+        Returns:
+            tuple: (result dict, status code)
+        """
+        try:
+            if dimension != ALL_BUCKET_DIMENSION and dimension not in AGGREGATE_DEMOGRAPHIC_DIMENSIONS:
+                return {"error": f"Invalid aggregate dimension: {dimension}"}, 400
+            if dimension == ALL_BUCKET_DIMENSION:
+                value = ALL_BUCKET_VALUE
+
+            survey_query = SurveyAggregate.query.filter_by(survey_id=survey_id, bucket_dimension=dimension)
+            question_query = QuestionAggregate.query.filter_by(survey_id=survey_id, bucket_dimension=dimension)
+            if value is not None:
+                survey_query = survey_query.filter_by(bucket_value=value)
+                question_query = question_query.filter_by(bucket_value=value)
+
+            buckets = {}
+            for row in survey_query.all():
+                buckets[row.bucket_value] = {"summary": row.to_dict(), "question_stats": {}}
+            for row in question_query.all():
+                bucket = buckets.setdefault(row.bucket_value, {"summary": None, "question_stats": {}})
+                bucket["question_stats"][str(row.question_id)] = row.to_dict()
+
+            if dimension == ALL_BUCKET_DIMENSION:
+                bucket = buckets.get(ALL_BUCKET_VALUE, {"summary": None, "question_stats": {}})
+                return {"survey_id": survey_id, **bucket}, 200
+            return {"survey_id": survey_id, "dimension": dimension, "buckets": buckets}, 200
+        except Exception as e:
+            current_app.logger.error(f"[AGGREGATES] Error reading aggregates for survey {survey_id}: {e}", exc_info=True)
+            return {"error": str(e)}, 500
@@ -5,14 +5,23 @@ import datetime
 import os
 from collections import defaultdict
 from collections import Counter
-from sqlalchemy import or_, and_, func
+from sqlalchemy import or_, and_, func, case, literal
 from app.models import Survey, Question, Submission, Response, User, SurveyLink, db, PointsLog, Badge, UserBadge
 from pprint import pformat  
 from flask import current_app, g
 import ast
 import logging
 from app.controllers.xp_badge_controller import award_xp # Import for awarding XP
+from app.controllers.response_aggregate_controller import ResponseAggregateController
 import random
+import numpy as np
+from app.utils.analytics_engine import (
+    ResponseColumns, numeric_summary, nps_breakdown, histogram, option_counts, mean_positive, values_from_counts
+)
+from app.utils import time_buckets
+
+# Generated (AI) submissions are inserted and committed this many at a time
+GENERATED_SUBMISSION_BATCH_SIZE = 100
 
 
 def process_star_rating_grid_responses(responses, grid_data, grid_rows, grid_columns):
@@ -266,8 +275,211 @@ def map_age_to_group(age):
     except (ValueError, TypeError):
         return None
 
+def _should_skip_question(question, responses, questions):
+    """True when the question's conditional logic hides it for these answers."""
+    rules = question.conditional_logic_rules
+    if not rules:
+        return False
+    if isinstance(rules, str):
+        try:
+            rules = json.loads(rules)
+        except Exception:
+            return False
+    base_seq = rules.get('baseQuestionSequence')
+    if base_seq is None:
+        return False
+    base_response = responses.get(str(base_seq))
+    if base_response is None or base_response == '' or (isinstance(base_response, list) and len(base_response) == 0):
+        return True
+    base_question = next((q for q in questions if q.sequence_number == base_seq), None)
+    if not base_question:
+        return False
+    cond_val = rules.get('conditionValue')
+    cond_type = rules.get('conditionType') or 'equals'
+    try:
+        if cond_type == 'not_equals':
+            return base_response == cond_val
+        # default equals
+        if isinstance(base_response, list):
+            return cond_val not in base_response
+        return base_response != cond_val
+    except Exception:
+        return False
+
+
+def _first_unanswered_required(questions, responses):
+    """Sequence number (str) of the first visible required question without an answer, else None."""
+    for q in questions:
+        if not q.required:
+            continue
+        if q.conditional_logic_rules and _should_skip_question(q, responses, questions):
+            continue
+        seq_str = str(q.sequence_number)
+        if seq_str not in responses or not responses[seq_str]:
+            return seq_str
+    return None
+
+
+def _apply_generated_demographics(submission):
+    """Randomized demographics for AI-generated submissions."""
+    submission.age_group = map_age_to_group(random.randint(18, 70))
+    submission.gender = random.choice(['Male', 'Female', 'Other', 'Prefer not to say'])
+    submission.location = random.choice(['USA', 'Canada', 'UK', 'Australia', 'Germany', 'France', 'India', 'Other'])
+    submission.education = random.choice(['High School', 'Bachelor\'s Degree', 'Master\'s Degree', 'PhD', 'Other'])
+    submission.company = "AI Generated Company"
+
+
 class ResponseController:
 
+    @staticmethod
+    def build_response_fields(question, answer_payload):
+        """Response column values (text, file, N/A and "other" flags) for one submitted answer."""
+        answer_text = None; file_path = None; file_type = None
+        is_na = False; is_other = False; other_text_val = None
+
+        if answer_payload is not None:
+            q_type = question.question_type
+            # Handle response format based on type
+            if q_type in ['checkbox', 'multi-choice', 'multiple-image-select']:
+                if isinstance(answer_payload, list):
+                    answer_text = json.dumps(answer_payload)
+                else:
+                    answer_text = json.dumps([str(answer_payload)])
+
+            elif q_type == 'interactive-ranking':
+                # If we already got a dict, JSON‑encode it
+                if isinstance(answer_payload, dict):
+                    answer_text = json.dumps(answer_payload)
+                    current_app.logger.debug(f"[SUBMIT_PROCESSING] Q {question.sequence_number} (Ranking): Stored JSON string: {answer_text}")
+
+                # If it came in as a one‑item list of a dict‑string, unwrap and parse
+                elif isinstance(answer_payload, list) and len(answer_payload) == 1 and isinstance(answer_payload[0], str):
+                    import ast
+                    try:
+                        dict_payload = ast.literal_eval(answer_payload[0])
+                        if isinstance(dict_payload, dict):
+                            answer_text = json.dumps(dict_payload)
+                            current_app.logger.debug(f"[SUBMIT_PROCESSING] Q {question.sequence_number} (Ranking): Unwrapped and stored: {answer_text}")
+                        else:
+                            raise ValueError("Not a dict after literal_eval")
+                    except Exception as e:
+                        current_app.logger.error(f"[SUBMIT_PROCESSING] Q {question.sequence_number} (Ranking): Failed to parse wrapped string: {e}")
+                        answer_text = answer_payload[0]
+
+                # Anything else is unexpected—log and store raw
+                else:
+                    current_app.logger.error(
+                        f"[SUBMIT_PROCESSING] Q {question.sequence_number} (Ranking): Unexpected payload type {type(answer_payload)}. Storing raw."
+                    )
+                    answer_text = str(answer_payload)
+
+            elif q_type == 'single-image-select':
+                # Stores the single hidden_label directly
+                answer_text = str(answer_payload)
+            elif q_type == 'star-rating-grid':
+                answer_text = json.dumps(answer_payload) if isinstance(answer_payload, dict) else str(answer_payload)
+                # REMOVED: debug_answers.append(...) - this was causing the linter error
+
+            elif q_type == 'document-upload':
+                if isinstance(answer_payload, list) and answer_payload:
+                    answer_text = json.dumps(answer_payload)
+                    file_path = answer_payload[0].get('url'); file_type = answer_payload[0].get('type')
+                else: answer_text = '[]'
+            else: # Single choice, rating, text, etc.
+                answer_text = str(answer_payload)
+
+            # ... (N/A and Other checks remain the same) ...
+            na_text = question.not_applicable_text or "Not Applicable"
+            if isinstance(answer_text, str) and answer_text.strip().lower() == na_text.strip().lower():
+                is_na = True; answer_text = na_text
+            if question.has_other_option and isinstance(answer_text, str) and answer_text.startswith('other:'):
+                is_other = True; other_text_val = answer_text[6:]; answer_text = "Other"
+
+        return {
+            'response_text': answer_text, 'file_path': file_path, 'file_type': file_type,
+            'is_not_applicable': is_na, 'is_other': is_other, 'other_text': other_text_val
+        }
+
+    @staticmethod
+    def create_generated_submissions(survey_id, respondents, batch_size=GENERATED_SUBMISSION_BATCH_SIZE):
+        """
+        Bulk-insert AI-generated submissions.
+
+        Each batch is one flush of Submission rows, one flush of their
+        Response rows, one aggregate update and one commit. Generated
+        respondents have no user, so the XP and duplicate checks of
+        submit_responses do not apply.
+
+        Args:
+            survey_id: Survey being answered
+            respondents: List of dicts with 'responses' ({sequence number: answer}),
+                and optional 'duration', 'response_times' and 'user_agent'
+
+        Returns:
+            tuple: ({"submission_ids": [...]} aligned with the committed respondents, status code)
+        """
+        survey = Survey.query.get(survey_id)
+        if not survey:
+            return {"error": "Survey not found"}, 404
+        questions = survey.questions.all()
+
+        submission_ids = []
+        try:
+            for start in range(0, len(respondents), batch_size):
+                batch = respondents[start:start + batch_size]
+
+                submissions = []
+                for respondent in batch:
+                    answers = respondent.get('responses') or {}
+                    user_agent = respondent.get('user_agent') or {}
+                    submission = Submission(
+                        survey_id=survey_id,
+                        duration=respondent.get('duration'),
+                        user_agent=user_agent.get('userAgent'),
+                        device_type=user_agent.get('deviceType'),
+                        browser_info=user_agent.get('browserInfo'),
+                        is_ai_generated=True,
+                        is_complete=_first_unanswered_required(questions, answers) is None
+                    )
+                    _apply_generated_demographics(submission)
+                    submissions.append(submission)
+                db.session.add_all(submissions)
+                db.session.flush()
+
+                entries = []
+                new_responses = []
+                for submission, respondent in zip(submissions, batch):
+                    answers = respondent.get('responses') or {}
+                    response_times = respondent.get('response_times') or {}
+                    question_responses = []
+                    for question in questions:
+                        seq_num_str = str(question.sequence_number)
+                        if seq_num_str not in answers or answers[seq_num_str] is None:
+                            continue
+                        resp = Response(
+                            submission_id=submission.id, question_id=question.id,
+                            response_time=response_times.get(seq_num_str),
+                            **ResponseController.build_response_fields(question, answers[seq_num_str])
+                        )
+                        new_responses.append(resp)
+                        question_responses.append((question, resp))
+                    entries.append((submission, question_responses))
+                db.session.add_all(new_responses)
+                db.session.flush()
+
+                ResponseAggregateController.record_submissions_no_commit(survey_id, entries)
+                db.session.commit()
+                submission_ids.extend(submission.id for submission in submissions)
+                current_app.logger.info(
+                    f"[SUBMIT_GENERATED] Inserted {len(submissions)} generated submissions ({len(new_responses)} responses) for survey {survey_id}"
+                )
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"[SUBMIT_GENERATED] Bulk insert failed for survey {survey_id}: {e}", exc_info=True)
+            return {"error": str(e), "submission_ids": submission_ids}, 500
+
+        return {"submission_ids": submission_ids}, 201
+
     @staticmethod
     def submit_responses(data):
         # [DEBUG] Comprehensive debugging for XP and survey completion tracking, now using g.current_user
@@ -308,36 +520,6 @@ class ResponseController:
             
             return state
 
-        def should_skip_question(question, responses, survey):
-            rules = question.conditional_logic_rules
-            if not rules:
-                return False
-            if isinstance(rules, str):
-                try:
-                    rules = json.loads(rules)
-                except Exception:
-                    return False
-            base_seq = rules.get('baseQuestionSequence')
-            if base_seq is None:
-                return False
-            base_response = responses.get(str(base_seq))
-            if base_response is None or base_response == '' or (isinstance(base_response, list) and len(base_response) == 0):
-                return True
-            base_question = next((q for q in survey.questions if q.sequence_number == base_seq), None)
-            if not base_question:
-                return False
-            cond_val = rules.get('conditionValue')
-            cond_type = rules.get('conditionType') or 'equals'
-            try:
-                if cond_type == 'not_equals':
-                    return base_response == cond_val
-                # default equals
-                if isinstance(base_response, list):
-                    return cond_val not in base_response
-                return base_response != cond_val
-            except Exception:
-                return False
-
         try:
             # ... (existing setup: survey_id, responses_data, etc.) ...
             current_app.logger.info(
@@ -437,11 +619,7 @@ class ResponseController:
             if is_ai_generated:
                 # For AI-generated responses, create random demographic data
                 current_app.logger.info(f"[SUBMIT-CTRL] Populating randomized demographics for AI-generated submission for survey {survey_id}")
-                submission.age_group = map_age_to_group(random.randint(18, 70))
-                submission.gender = random.choice(['Male', 'Female', 'Other', 'Prefer not to say'])
-                submission.location = random.choice(['USA', 'Canada', 'UK', 'Australia', 'Germany', 'France', 'India', 'Other'])
-                submission.education = random.choice(['High School', 'Bachelor\'s Degree', 'Master\'s Degree', 'PhD', 'Other'])
-                submission.company = "AI Generated Company"
+                _apply_generated_demographics(submission)
             elif is_admin_user:
                 # For Admin users, use random demographic data if missing from submission metadata
                 current_app.logger.info(f"[SUBMIT-CTRL] Populating randomized demographics for Admin submission for survey {survey_id}")
@@ -469,19 +647,13 @@ class ResponseController:
 
             # Check if submission is complete
             # A submission is complete if all 'required' questions have a response
-            all_required_questions_answered = True
-            for q in survey.questions:
-                if not q.required:
-                    continue
-                if q.conditional_logic_rules and should_skip_question(q, responses_data, survey):
-                    continue
-                seq_str = str(q.sequence_number)
-                if seq_str not in responses_data or not responses_data[seq_str]:
-                    all_required_questions_answered = False
-                    current_app.logger.warning(
-                        f"[SUBMIT_VALIDATION] Required question {seq_str} is missing a response for submission on survey {survey_id}."
-                    )
-                    break
+            survey_questions = survey.questions.all()
+            missing_seq = _first_unanswered_required(survey_questions, responses_data)
+            all_required_questions_answered = missing_seq is None
+            if missing_seq is not None:
+                current_app.logger.warning(
+                    f"[SUBMIT_VALIDATION] Required question {missing_seq} is missing a response for submission on survey {survey_id}."
+                )
             
             submission.is_complete = all_required_questions_answered
             
@@ -540,78 +712,20 @@ class ResponseController:
             else:
                 current_app.logger.info(f"[SUBMIT-CTRL] Skipping XP and user stat updates for {'AI-generated submission' if is_ai_generated else 'Admin user' if is_admin_user else 'unknown reason'}.")
 
-            for question in survey.questions:
+            question_responses = []  # (question, response) pairs for the aggregate store
+            for question in survey_questions:
                 seq_num_str = str(question.sequence_number)
-                if seq_num_str in data['responses']:
-                    answer_payload = data['responses'][seq_num_str]
-                    answer_text = None; file_path = None; file_type = None
-                    is_na = False; is_other = False; other_text_val = None
-
-                    if answer_payload is not None:
-                        q_type = question.question_type
-                        # Handle response format based on type
-                        if q_type in ['checkbox', 'multi-choice', 'multiple-image-select']:
-                            if isinstance(answer_payload, list):
-                                answer_text = json.dumps(answer_payload)
-                            else:
-                                answer_text = json.dumps([str(answer_payload)])
-
-                        elif q_type == 'interactive-ranking':
-                            # If we already got a dict, JSON‑encode it
-                            if isinstance(answer_payload, dict):
-                                answer_text = json.dumps(answer_payload)
-                                current_app.logger.debug(f"[SUBMIT_PROCESSING] Q {seq_num_str} (Ranking): Stored JSON string: {answer_text}")
+                if seq_num_str in data['responses'] and data['responses'][seq_num_str] is not None:
+                    resp = Response(
+                        submission_id=submission.id, question_id=question.id,
+                        response_time=response_times.get(str(seq_num_str)),
+                        **ResponseController.build_response_fields(question, data['responses'][seq_num_str])
+                    )
+                    db.session.add(resp)
+                    question_responses.append((question, resp))
 
-                            # If it came in as a one‑item list of a dict‑string, unwrap and parse
-                            elif isinstance(answer_payload, list) and len(answer_payload) == 1 and isinstance(answer_payload[0], str):
-                                import ast
-                                try:
-                                    dict_payload = ast.literal_eval(answer_payload[0])
-                                    if isinstance(dict_payload, dict):
-                                        answer_text = json.dumps(dict_payload)
-                                        current_app.logger.debug(f"[SUBMIT_PROCESSING] Q {seq_num_str} (Ranking): Unwrapped and stored: {answer_text}")
-                                    else:
-                                        raise ValueError("Not a dict after literal_eval")
-                                except Exception as e:
-                                    current_app.logger.error(f"[SUBMIT_PROCESSING] Q {seq_num_str} (Ranking): Failed to parse wrapped string: {e}")
-                                    answer_text = answer_payload[0]
-
-                            # Anything else is unexpected—log and store raw
-                            else:
-                                current_app.logger.error(
-                                    f"[SUBMIT_PROCESSING] Q {seq_num_str} (Ranking): Unexpected payload type {type(answer_payload)}. Storing raw."
-                                )
-                                answer_text = str(answer_payload)
-
-                        elif q_type == 'single-image-select':
-                             # Stores the single hidden_label directly
-                             answer_text = str(answer_payload)
-                        elif q_type == 'star-rating-grid':
-                            answer_text = json.dumps(answer_payload) if isinstance(answer_payload, dict) else str(answer_payload)
-                            # REMOVED: debug_answers.append(...) - this was causing the linter error
-                            
-                        elif q_type == 'document-upload':
-                            if isinstance(answer_payload, list) and answer_payload:
-                                answer_text = json.dumps(answer_payload)
-                                file_path = answer_payload[0].get('url'); file_type = answer_payload[0].get('type')
-                            else: answer_text = '[]'
-                        else: # Single choice, rating, text, etc.
-                            answer_text = str(answer_payload)
-
-                        # ... (N/A and Other checks remain the same) ...
-                        na_text = question.not_applicable_text or "Not Applicable"
-                        if isinstance(answer_text, str) and answer_text.strip().lower() == na_text.strip().lower():
-                            is_na = True; answer_text = na_text
-                        if question.has_other_option and isinstance(answer_text, str) and answer_text.startswith('other:'):
-                            is_other = True; other_text_val = answer_text[6:]; answer_text = "Other"
-
-                        resp = Response(
-                            submission_id=submission.id, question_id=question.id,
-                            response_text=answer_text, response_time=response_times.get(str(seq_num_str)),
-                            file_path=file_path, file_type=file_type, is_not_applicable=is_na,
-                            is_other=is_other, other_text=other_text_val
-                        )
-                        db.session.add(resp)
+            # Fold the new answers into the pre-aggregated analytics in this transaction
+            ResponseAggregateController.record_submission_no_commit(submission, question_responses)
 
             # [DEBUG] Log state before XP awarding (only for User objects)
             if not is_ai_generated and not is_admin_user and hasattr(user, 'surveys_completed_count'):
@@ -795,14 +909,15 @@ class ResponseController:
     @staticmethod
     def get_analytics(survey_id):
         """
-        Compute overall analytics for a survey.
+        Compute overall analytics for a survey, from the response aggregates where current.
         """
         try:
             survey = Survey.query.get(survey_id)
             if not survey:
                 return {"error": "Survey not found"}, 404
             submissions = Submission.query.filter_by(survey_id=survey_id).all()
-            analytics = compute_analytics(submissions, survey)
+            aggregates = ResponseAggregateController.current_question_aggregates(survey_id)
+            analytics = compute_analytics(submissions, survey, aggregates=aggregates)
             return analytics, 200
         except Exception as e:
             return {"error": str(e)}, 500
@@ -1035,46 +1150,70 @@ class ResponseController:
         }, 200
 
     @staticmethod
-    def get_response_trends(survey_id, timeframe='daily'):
+    def get_response_trends(survey_id, timeframe='daily', since=None):
         """
         Get response submission trends over time.
+
+        Buckets (hourly/daily/weekly/monthly) are computed in the database with a
+        GROUP BY on the truncated submitted_at. ``since`` (ISO datetime, usually the
+        previous response's ``next_since``) limits the result to the bucket containing
+        it and later ones; cumulative counts still start from the first submission.
         """
         survey = Survey.query.get(survey_id)
         if not survey:
             return {"error": "Survey not found"}, 404
-        submissions = Submission.query.filter_by(survey_id=survey_id).all()
-        if not submissions:
+
+        since_bucket = None
+        if since:
+            try:
+                since_bucket = time_buckets.truncate_datetime(time_buckets.parse_since(since), timeframe)
+            except (ValueError, TypeError):
+                return {"error": f"Invalid since value: {since}"}, 400
+
+        # Totals (and submissions before the cursor, for cumulative counts) in one pass
+        before_since = case((Submission.submitted_at < since_bucket, 1), else_=0) if since_bucket else literal(0)
+        total_submissions, prior_submissions = db.session.query(
+            func.count(Submission.id), func.coalesce(func.sum(before_since), 0)
+        ).filter(Submission.survey_id == survey_id).one()
+        if not total_submissions:
             return {"error": "No submissions found"}, 404
-        time_periods = {}
-        for sub in submissions:
-            if timeframe == 'daily':
-                period = sub.submitted_at.strftime('%Y-%m-%d')
-            elif timeframe == 'weekly':
-                period = f"{sub.submitted_at.isocalendar()[0]}-W{sub.submitted_at.isocalendar()[1]}"
-            elif timeframe == 'monthly':
-                period = sub.submitted_at.strftime('%Y-%m')
-            elif timeframe == 'hourly':
-                period = sub.submitted_at.strftime('%Y-%m-%d %H:00')
-            else:
-                period = sub.submitted_at.strftime('%Y-%m-%d')
-            if period not in time_periods:
-                time_periods[period] = 0
-            time_periods[period] += 1
-        sorted_periods = sorted(time_periods.items())
-        trend_data = [{"period": period, "count": count} for period, count in sorted_periods]
-        cumulative = 0
-        for item in trend_data:
-            cumulative += item["count"]
-            item["cumulative"] = cumulative
+
+        dated = [Submission.survey_id == survey_id, Submission.submitted_at.isnot(None)]
+        if since_bucket:
+            dated.append(Submission.submitted_at >= since_bucket)
+        bucket = time_buckets.bucket_expression(Submission.submitted_at, timeframe, db.engine.dialect.name)
+        if bucket is not None:
+            rows = db.session.query(bucket, func.count(Submission.id)).filter(*dated).group_by(bucket).order_by(bucket).all()
+            buckets = [(time_buckets.to_datetime(start), count) for start, count in rows]
+        else:
+            # No SQL truncation for this dialect; still only the timestamp column is loaded
+            counts = Counter(
+                time_buckets.truncate_datetime(submitted_at, timeframe)
+                for (submitted_at,) in db.session.query(Submission.submitted_at).filter(*dated)
+            )
+            buckets = sorted(counts.items())
+
+        trend_data = []
+        cumulative = int(prior_submissions)
+        for start, count in buckets:
+            cumulative += count
+            trend_data.append({
+                "period": time_buckets.format_period(start, timeframe),
+                "period_start": start.isoformat(),
+                "count": count,
+                "cumulative": cumulative
+            })
         peak_period = max(trend_data, key=lambda x: x["count"]) if trend_data else None
         avg_submissions = sum(item["count"] for item in trend_data) / len(trend_data) if trend_data else 0
         return {
             "survey_id": survey_id,
             "timeframe": timeframe,
-            "total_submissions": len(submissions),
+            "total_submissions": total_submissions,
             "trend_data": trend_data,
             "peak_period": peak_period,
-            "average_submissions_per_period": round(avg_submissions, 2)
+            "average_submissions_per_period": round(avg_submissions, 2),
+            # The last bucket may still be filling up, so the next poll starts from it
+            "next_since": trend_data[-1]["period_start"] if trend_data else (since_bucket.isoformat() if since_bucket else None)
         }, 200
 
     @staticmethod
@@ -3400,9 +3539,32 @@ def prepare_grid_cells(grid_data, question_type):
                     "column_percentage": round(column_percentage, 2)
                 })
 
-def compute_analytics(submissions, survey, skip_problematic_responses=False):
+# Question types whose compute_analytics stats can be read from the response aggregates
+AGGREGATE_NUMERIC_ANALYTICS_TYPES = ['numerical-input', 'rating-scale', 'rating', 'nps']
+AGGREGATE_CHOICE_ANALYTICS_TYPES = ['multiple-choice', 'checkbox', 'dropdown', 'single-choice', 'multi-choice']
+
+
+def _aggregate_option_counts(question, aggregate_row):
+    """Choice counts from a question aggregate, with N/A answers under the question's N/A label."""
+    if aggregate_row is None:
+        return {}
+    counts = dict(aggregate_row.option_counts or {})
+    if aggregate_row.na_count:
+        na_label = question.not_applicable_text or "Not Applicable"
+        counts[na_label] = counts.get(na_label, 0) + aggregate_row.na_count
+    return counts
+
+
+def compute_analytics(submissions, survey, skip_problematic_responses=False, aggregates=None):
     """
     Compute analytics for a set of submissions.
+    All responses are bulk-loaded once and grouped per question by the
+    columnar analytics engine, so the cost is one pass over the responses
+    instead of one query per submission per question.
+    When ``aggregates`` (from ResponseAggregateController.current_question_aggregates)
+    is given, ``submissions`` must be all of the survey's submissions; numeric and
+    choice questions are then read from the aggregate rows and only the other
+    questions' responses are loaded.
     If skip_problematic_responses is True, will continue processing even if some grid responses have errors.
     """
     analytics = {}
@@ -3410,14 +3572,25 @@ def compute_analytics(submissions, survey, skip_problematic_responses=False):
     
     # Calculate average duration (only valid durations)
     try:
-        durations = [sub.duration for sub in submissions if sub.duration and sub.duration > 0]
-        analytics['average_time'] = sum(durations) / len(durations) if durations else 0
+        analytics['average_time'] = mean_positive(sub.duration for sub in submissions)
     except Exception as e:
         print(f"Error calculating average duration: {e}")
         analytics['average_time'] = 0
 
+    questions = list(survey.questions) if survey.questions else []
+    question_aggregates = aggregates[1] if aggregates else {}
+    aggregated_ids = set()
+    if aggregates:
+        aggregated_ids = {
+            q.id for q in questions
+            if q.question_type in AGGREGATE_NUMERIC_ANALYTICS_TYPES + AGGREGATE_CHOICE_ANALYTICS_TYPES
+        }
+        columns = ResponseColumns.load(submissions, [q.id for q in questions if q.id not in aggregated_ids])
+    else:
+        columns = ResponseColumns.load(submissions)
+
     # Calculate completion rate and question response counts
-    total_questions = len(survey.questions) if survey.questions else 0
+    total_questions = len(questions)
     answered_questions = 0
     questions_with_no_data = []
     question_response_counts = {}
@@ -3434,18 +3607,14 @@ def compute_analytics(submissions, survey, skip_problematic_responses=False):
     }
     
     # Process each question with error handling
-    for question in survey.questions:
+    for question in questions:
         try:
-            response_count = 0
-            for sub in submissions:
-                has_response = False
-                for r in sub.responses:
-                    if r.question_id == question.id and r.response_text:
-                        has_response = True
-                        response_count += 1
-                        break
-                if has_response:
-                    answered_questions += 1
+            if question.id in aggregated_ids:
+                aggregate_row = question_aggregates.get(question.id)
+                response_count = aggregate_row.response_count if aggregate_row else 0
+            else:
+                response_count = columns.column(question.id).answered_submission_count()
+            answered_questions += response_count
             question_response_counts[question.id] = response_count
             if response_count == 0:
                 questions_with_no_data.append(question.id)
@@ -3473,66 +3642,34 @@ def compute_analytics(submissions, survey, skip_problematic_responses=False):
     grid_stats = {}
 
     # Process each question for advanced stats with error handling
-    for question in survey.questions:
+    for question in questions:
         question_id = question.id
         question_type = question.question_type
+        column = columns.column(question_id)
         
         try:
             # For numerical input, rating-scale, and NPS questions
             if question_type in ['numerical-input', "rating-scale","rating", 'nps']:
-                question_values = []
-                for sub in submissions:
-                    for r in sub.responses:
-                        if r.question_id == question_id:
-                            try:
-                                value = float(r.response_text)
-                                question_values.append(value)
-                            except (ValueError, TypeError):
-                                continue
-                if question_values:
+                if question_id in aggregated_ids:
+                    aggregate_row = question_aggregates.get(question_id)
+                    question_values = values_from_counts((aggregate_row.option_counts or {}) if aggregate_row else {})
+                else:
+                    question_values = column.numeric_values()
+                if question_values.size:
                     try:
-                        mean_val = sum(question_values) / len(question_values)
-                        
-                        import statistics
-                        try:
-                            median_val = statistics.median(question_values)
-                        except statistics.StatisticsError:
-                            median_val = None
-                        try:
-                            mode_val = statistics.mode(question_values)
-                        except statistics.StatisticsError:
-                            mode_val = None
-                        try:
-                            std_dev = statistics.stdev(question_values)
-                        except statistics.StatisticsError:
-                            std_dev = None
-                            
                         numerical_stats[question_id] = {
                             "question_text": question.question_text,
-                            "mean": mean_val,
-                            "median": median_val,
-                            "mode": mode_val,
-                            "standard_deviation": std_dev,
-                            "min": min(question_values),
-                            "max": max(question_values),
-                            "values": question_values  # Raw values for histograms
+                            **numeric_summary(question_values),
+                            "values": question_values.tolist(),  # Raw values for histograms
+                            "histogram": histogram(question_values)
                         }
                         
                         # Calculate NPS segments if this is an NPS question
                         if question_type == 'nps':
-                            promoters = sum(1 for v in question_values if v >= 9)
-                            passives = sum(1 for v in question_values if 7 <= v <= 8)
-                            detractors = sum(1 for v in question_values if v <= 6)
-                            total_nps = promoters + passives + detractors
-                            
-                            if total_nps > 0:
-                                nps_score = (promoters - detractors) * 100 / total_nps
-                                numerical_stats[question_id]["nps_segments"] = {
-                                    "promoters": promoters,
-                                    "passives": passives,
-                                    "detractors": detractors
-                                }
-                                numerical_stats[question_id]["nps_score"] = nps_score
+                            nps = nps_breakdown(question_values)
+                            if nps:
+                                numerical_stats[question_id]["nps_segments"] = nps["segments"]
+                                numerical_stats[question_id]["nps_score"] = nps["score"]
                     except Exception as e:
                         print(f"Error calculating numerical stats for question {question_id}: {e}")
                         if skip_problematic_responses:
@@ -3543,19 +3680,10 @@ def compute_analytics(submissions, survey, skip_problematic_responses=False):
             # For multiple-choice, checkbox, dropdown, radio-grid, checkbox-grid questions
             elif question_type in ['multiple-choice', 'checkbox', 'dropdown', 'radio-grid', 'checkbox-grid','single-choice','multi-choice']:
                 try:
-                    answer_counts = {}
-                    for sub in submissions:
-                        for r in sub.responses:
-                            if r.question_id == question_id:
-                                try:
-                                    answers = json.loads(r.response_text)
-                                    if isinstance(answers, list):
-                                        for answer in answers:
-                                            answer_counts[str(answer)] = answer_counts.get(str(answer), 0) + 1
-                                    else:
-                                        answer_counts[r.response_text] = answer_counts.get(r.response_text, 0) + 1
-                                except json.JSONDecodeError:
-                                    answer_counts[r.response_text] = answer_counts.get(r.response_text, 0) + 1
+                    if question_id in aggregated_ids:
+                        answer_counts = _aggregate_option_counts(question, question_aggregates.get(question_id))
+                    else:
+                        answer_counts = option_counts(column.texts)
                     
                     if answer_counts:
                         most_selected = max(answer_counts, key=answer_counts.get) if answer_counts else None
@@ -3574,18 +3702,19 @@ def compute_analytics(submissions, survey, skip_problematic_responses=False):
                         
                         # If options have numeric reporting values, calculate average score
                         if question.options and isinstance(question.options, list):
-                            numeric_values = []
+                            weighted_sum = 0.0
+                            weighted_count = 0
                             for option in question.options:
                                 if isinstance(option, dict) and 'value' in option:
                                     try:
                                         value = float(option['value'])
-                                        text = option.get('text', '')
-                                        count = answer_counts.get(text, 0)
-                                        numeric_values.extend([value] * count)
+                                        count = answer_counts.get(option.get('text', ''), 0)
+                                        weighted_sum += value * count
+                                        weighted_count += count
                                     except (ValueError, TypeError):
                                         pass
-                            if numeric_values:
-                                mcq_stats[question_id]["average_value"] = sum(numeric_values) / len(numeric_values)
+                            if weighted_count:
+                                mcq_stats[question_id]["average_value"] = weighted_sum / weighted_count
                 except Exception as e:
                     print(f"Error calculating MCQ stats for question {question_id}: {e}")
                     if skip_problematic_responses:
@@ -3596,41 +3725,32 @@ def compute_analytics(submissions, survey, skip_problematic_responses=False):
             # For open-ended text questions
             elif question_type == 'open-ended':
                 try:
-                    response_texts = []
-                    response_lengths = []
-                    for sub in submissions:
-                        for r in sub.responses:
-                            if r.question_id == question_id and r.response_text:
-                                response_texts.append({
-                                    "text": r.response_text,
-                                    "created_at": r.created_at.isoformat() if hasattr(r.created_at, 'isoformat') else str(r.created_at)
-                                })
-                                response_lengths.append(len(r.response_text))
+                    answered = [r for r in column.rows if r.response_text]
                     
-                    if response_texts:
-                        avg_length = sum(response_lengths) / len(response_lengths)
-                        all_words = []
-                        
-                        for item in response_texts:
-                            text = item["text"]
-                            import re
-                            words = re.findall(r'\b\w+\b', text.lower())
-                            stopwords = {'the', 'a', 'an', 'in', 'and', 'to', 'of', 'is', 'that', 'it', 
-                                        'with', 'for', 'on', 'at', 'this', 'my', 'was', 'but', 'be', 'are'}
-                            words = [word for word in words if word not in stopwords and len(word) > 1]
-                            all_words.extend(words)
-                        
-                        from collections import Counter
-                        word_counts = Counter(all_words)
+                    if answered:
+                        response_texts = [{
+                            "text": r.response_text,
+                            "created_at": r.created_at.isoformat() if hasattr(r.created_at, 'isoformat') else str(r.created_at)
+                        } for r in answered]
+                        response_lengths = np.fromiter((len(r.response_text) for r in answered), dtype=np.int64, count=len(answered))
+
+                        stopwords = {'the', 'a', 'an', 'in', 'and', 'to', 'of', 'is', 'that', 'it', 
+                                    'with', 'for', 'on', 'at', 'this', 'my', 'was', 'but', 'be', 'are'}
+                        word_counts = Counter()
+                        for r in answered:
+                            word_counts.update(
+                                word for word in re.findall(r'\b\w+\b', r.response_text.lower())
+                                if word not in stopwords and len(word) > 1
+                            )
                         common_words = word_counts.most_common(50)
                         sorted_responses = sorted(response_texts, key=lambda x: x["created_at"], reverse=True)
                         
                         text_stats[question_id] = {
                             "question_text": question.question_text,
                             "response_count": len(response_texts),
-                            "average_length": avg_length,
-                            "longest_response": max(response_lengths) if response_lengths else 0,
-                            "shortest_response": min(response_lengths) if response_lengths else 0,
+                            "average_length": float(response_lengths.mean()),
+                            "longest_response": int(response_lengths.max()),
+                            "shortest_response": int(response_lengths.min()),
                             "word_frequencies": common_words,
                             "latest_responses": sorted_responses[:10]
                         }
@@ -3657,11 +3777,7 @@ def compute_analytics(submissions, survey, skip_problematic_responses=False):
                         "column_averages": [0] * len(grid_columns)
                     }
                     
-                    question_responses = []
-                    for sub in submissions:
-                        for r in sub.responses:
-                            if r.question_id == question_id:
-                                question_responses.append(r)
+                    question_responses = column.rows
                     
                     # Process grid responses based on question type
                     if question_type == 'radio-grid':
@@ -18,6 +18,9 @@ from ..models.season_pass_models import (
 )
 from ..controllers.xp_badge_controller import award_xp_no_commit
 from ..controllers.marketplace_controller import MarketplaceController
+from ..utils.live_leaderboard import record_xp_gain
+from ..utils.season_progression_cache import season_progression_cache
+from ..utils import season_analytics
 
 logger = logging.getLogger(__name__)
 
@@ -26,8 +29,9 @@ class SeasonPassController:
     
     @staticmethod
     def get_active_season():
-        """Get the currently active season"""
-        return Season.query.filter_by(is_active=True).first()
+        """Get the currently active season (its id is cached process-wide)"""
+        active = season_progression_cache.active_season()
+        return db.session.get(Season, active.id) if active else None
     
     @staticmethod
     def get_user_season_state(user_id):
@@ -103,6 +107,7 @@ class SeasonPassController:
         levels = SeasonLevel.query.filter_by(season_id=season_id).order_by(SeasonLevel.level_number).all()
         unlocked_levels = progress.get_unlocked_levels()
         claimed_rewards = progress.claimed_rewards or []
+        level_table = season_progression_cache.level_table(season_id)
         
         levels_data = []
         for level in levels:
@@ -120,7 +125,7 @@ class SeasonPassController:
             level_data = {
                 "level_number": level.level_number,
                 "xp_required_for_level": level.xp_required_for_level,
-                "cumulative_xp_required": level.get_cumulative_xp_required(),
+                "cumulative_xp_required": level_table.cumulative_for_level(level.level_number),
                 "is_unlocked": level.level_number in unlocked_levels,
                 "lunar_reward": None,
                 "totality_reward": None
@@ -158,110 +163,99 @@ class SeasonPassController:
     def process_xp_gain(user_id, base_xp_amount, activity_type, related_item_id=None, business_id=None):
         """
         Process XP gain for season pass with multiplier application
-        This should be called from the main XP awarding system
+        This should be called from the main XP awarding system; changes join the
+        caller's transaction (inside a SAVEPOINT) and are committed by the caller
         """
         try:
-            active_season = SeasonPassController.get_active_season()
+            active_season = season_progression_cache.active_season()
             if not active_season:
                 return  # No active season, no season pass progression
             
-            # Get user's season pass
-            user_pass = UserSeasonPass.query.filter_by(
-                user_id=user_id,
-                season_id=active_season.id
-            ).first()
-            
-            # Determine multiplier
-            # NOTE: Multiplier only applies to XP earned AFTER pass activation
-            # The purchased_at timestamp ensures existing XP is not retroactively multiplied
-            multiplier = 1.0
-            if user_pass:
-                # The pass exists and was purchased before this XP gain
-                # So the multiplier applies to this new XP
-                if user_pass.tier_type == PassTierType.LUNAR.value:
-                    multiplier = active_season.lunar_xp_multiplier
-                elif user_pass.tier_type == PassTierType.TOTALITY.value:
-                    multiplier = active_season.totality_xp_multiplier
-            
-            # Calculate final XP amount
-            final_xp_amount = int(base_xp_amount * multiplier)
-            
-            # Create transaction record
-            transaction = SeasonPassTransaction(
-                user_id=user_id,
-                season_id=active_season.id,
-                base_xp_amount=base_xp_amount,
-                multiplier_applied=multiplier,
-                final_xp_amount=final_xp_amount,
-                activity_type=activity_type,
-                related_item_id=related_item_id,
-                business_id=business_id
-            )
-            db.session.add(transaction)
-            
-            # Get or create user progress
-            progress = UserSeasonProgress.query.filter_by(
-                user_id=user_id,
-                season_id=active_season.id
-            ).first()
+            # A SAVEPOINT keeps a failure here from poisoning the caller's transaction
+            with db.session.begin_nested():
+                # Get user's season pass
+                user_pass = UserSeasonPass.query.filter_by(
+                    user_id=user_id,
+                    season_id=active_season.id
+                ).first()
             
-            if not progress:
-                progress = UserSeasonProgress(
+                # Determine multiplier
+                # NOTE: Multiplier only applies to XP earned AFTER pass activation
+                # The purchased_at timestamp ensures existing XP is not retroactively multiplied
+                multiplier = 1.0
+                if user_pass:
+                    # The pass exists and was purchased before this XP gain
+                    # So the multiplier applies to this new XP
+                    if user_pass.tier_type == PassTierType.LUNAR.value:
+                        multiplier = active_season.lunar_xp_multiplier
+                    elif user_pass.tier_type == PassTierType.TOTALITY.value:
+                        multiplier = active_season.totality_xp_multiplier
+            
+                # Calculate final XP amount
+                final_xp_amount = int(base_xp_amount * multiplier)
+            
+                # Create transaction record
+                transaction = SeasonPassTransaction(
                     user_id=user_id,
                     season_id=active_season.id,
-                    current_xp_in_season=0,
-                    current_level=0,
-                    claimed_rewards=[]
+                    base_xp_amount=base_xp_amount,
+                    multiplier_applied=multiplier,
+                    final_xp_amount=final_xp_amount,
+                    activity_type=activity_type,
+                    related_item_id=related_item_id,
+                    business_id=business_id
                 )
-                db.session.add(progress)
-            
-            # Add XP to progress
-            old_xp = progress.current_xp_in_season
-            progress.current_xp_in_season += final_xp_amount
+                db.session.add(transaction)
             
-            # Check for level ups
-            old_level = progress.current_level
-            new_level = SeasonPassController._calculate_new_level(
-                progress.current_xp_in_season, 
-                active_season.id
-            )
-            progress.current_level = new_level
+                # Get or create user progress
+                progress = UserSeasonProgress.query.filter_by(
+                    user_id=user_id,
+                    season_id=active_season.id
+                ).first()
             
-            db.session.commit()
+                if not progress:
+                    progress = UserSeasonProgress(
+                        user_id=user_id,
+                        season_id=active_season.id,
+                        current_xp_in_season=0,
+                        current_level=0,
+                        claimed_rewards=[]
+                    )
+                    db.session.add(progress)
             
-            # Log level up if it occurred
-            if new_level > old_level:
-                logger.info(f"User {user_id} leveled up from {old_level} to {new_level} in season {active_season.id}")
+                # Add XP to progress
+                old_xp = progress.current_xp_in_season
+                progress.current_xp_in_season += final_xp_amount
             
-            return {
-                "xp_gained": final_xp_amount,
-                "multiplier": multiplier,
-                "old_level": old_level,
-                "new_level": new_level,
-                "total_season_xp": progress.current_xp_in_season
-            }
+                # Check for level ups
+                old_level = progress.current_level
+                new_level = SeasonPassController._calculate_new_level(
+                    progress.current_xp_in_season, 
+                    active_season.id
+                )
+                progress.current_level = new_level
+            
+                # Log level up if it occurred
+                if new_level > old_level:
+                    logger.info(f"User {user_id} leveled up from {old_level} to {new_level} in season {active_season.id}")
+            
+                return {
+                    "xp_gained": final_xp_amount,
+                    "multiplier": multiplier,
+                    "old_level": old_level,
+                    "new_level": new_level,
+                    "total_season_xp": progress.current_xp_in_season
+                }
             
         except Exception as e:
+            # Only the SAVEPOINT was rolled back; the caller's XP award carries on without season progress
             logger.error(f"Error processing season pass XP gain: {str(e)}")
-            db.session.rollback()
             return None
     
     @staticmethod
     def _calculate_new_level(current_xp, season_id):
         """Calculate what level the user should be at with given XP"""
-        levels = SeasonLevel.query.filter_by(season_id=season_id).order_by(SeasonLevel.level_number).all()
-        
-        cumulative_xp = 0
-        current_level = 0
-        
-        for level in levels:
-            cumulative_xp += level.xp_required_for_level
-            if current_xp >= cumulative_xp:
-                current_level = level.level_number
-            else:
-                break
-        
-        return current_level
+        return season_progression_cache.level_table(season_id).level_for_xp(current_xp)
     
     @staticmethod
     def claim_reward(user_id, season_reward_id):
@@ -346,6 +340,7 @@ class SeasonPassController:
                         points_awarded=reward.xp_amount
                     )
                     db.session.add(points_log)
+                    record_xp_gain(user_id, reward.xp_amount)
                     
                     return {"xp_awarded": reward.xp_amount}
             
@@ -592,44 +587,21 @@ class SeasonPassAdminController:
     def get_season_analytics(season_id):
         """Get analytics for a specific season"""
         try:
-            season = Season.query.get(season_id)
+            season = db.session.get(Season, season_id)
             if not season:
                 return {"error": "Season not found"}
-            
-            # Count passes purchased
-            total_passes = UserSeasonPass.query.filter_by(season_id=season_id).count()
-            lunar_passes = UserSeasonPass.query.filter_by(
-                season_id=season_id, 
-                tier_type=PassTierType.LUNAR.value
-            ).count()
-            totality_passes = UserSeasonPass.query.filter_by(
-                season_id=season_id, 
-                tier_type=PassTierType.TOTALITY.value
-            ).count()
-            
-            # Get revenue
-            pass_purchases = UserSeasonPass.query.filter_by(season_id=season_id).all()
-            total_revenue = sum(p.purchase_price for p in pass_purchases)
-            
-            # Get average progress
-            avg_progress = db.session.query(
-                func.avg(UserSeasonProgress.current_level),
-                func.avg(UserSeasonProgress.current_xp_in_season)
-            ).filter_by(season_id=season_id).first()
-            
-            # Get level distribution
-            level_distribution = db.session.query(
-                UserSeasonProgress.current_level,
-                func.count(UserSeasonProgress.id)
-            ).filter_by(season_id=season_id).group_by(UserSeasonProgress.current_level).all()
-            
+
+            snapshot = season_analytics.season_snapshots(Season.query.all(), [season_id])[season_id]
+            total_passes = snapshot["subscribers"]["total"]
+            total_revenue = snapshot["revenue_cents"]["total"]
+
             return {
                 "season": season.to_dict(),
                 "pass_purchases": {
                     "total": total_passes,
-                    "lunar": lunar_passes,
-                    "totality": totality_passes,
-                    "conversion_rate": (total_passes / max(1, UserSeasonProgress.query.filter_by(season_id=season_id).count())) * 100
+                    "lunar": snapshot["subscribers"].get(PassTierType.LUNAR.value, 0),
+                    "totality": snapshot["subscribers"].get(PassTierType.TOTALITY.value, 0),
+                    "conversion_rate": (total_passes / max(1, snapshot["active_users"])) * 100
                 },
                 "revenue": {
                     "total_cents": total_revenue,
@@ -637,9 +609,9 @@ class SeasonPassAdminController:
                     "average_per_user": total_revenue / max(1, total_passes)
                 },
                 "progression": {
-                    "average_level": float(avg_progress[0] or 0),
-                    "average_xp": float(avg_progress[1] or 0),
-                    "level_distribution": {str(level): count for level, count in level_distribution}
+                    "average_level": snapshot["avg_level"],
+                    "average_xp": snapshot["avg_xp"],
+                    "level_distribution": snapshot["level_distribution"]
                 }
             }
             
@@ -648,330 +620,50 @@ class SeasonPassAdminController:
             return {"error": "Failed to get season analytics"}
     
     @staticmethod
-    def _analyze_season_subscriptions(season, all_seasons):
+    def _analyze_season_subscriptions(season, all_seasons, snapshots=None):
         """Analyze subscription patterns for a specific season"""
         try:
-            from datetime import timedelta
-            
-            # Basic season metrics
-            season_passes = UserSeasonPass.query.filter_by(season_id=season.id).all()
-            total_subscribers = len(season_passes)
-            lunar_subscribers = len([p for p in season_passes if p.tier_type == PassTierType.LUNAR.value])
-            totality_subscribers = len([p for p in season_passes if p.tier_type == PassTierType.TOTALITY.value])
-            
-            # Revenue metrics
-            total_revenue = sum(p.purchase_price for p in season_passes)
-            avg_revenue_per_user = total_revenue / max(1, total_subscribers)
-            
-            # Find previous season for comparison
-            previous_season = None
-            for i, s in enumerate(all_seasons):
-                if s.id == season.id and i < len(all_seasons) - 1:
-                    previous_season = all_seasons[i + 1]
-                    break
-            
-            # Calculate retention and churn for this season
-            returning_subscribers = 0
-            new_subscribers = 0
-            churned_from_previous = 0
-            
-            if previous_season:
-                previous_subscribers = set(
-                    p.user_id for p in UserSeasonPass.query.filter_by(season_id=previous_season.id).all()
-                )
-                current_subscribers = set(p.user_id for p in season_passes)
-                
-                returning_subscribers = len(current_subscribers.intersection(previous_subscribers))
-                new_subscribers = len(current_subscribers - previous_subscribers)
-                churned_from_previous = len(previous_subscribers - current_subscribers)
-            else:
-                new_subscribers = total_subscribers
-            
-            # Calculate engagement metrics
-            active_users = UserSeasonProgress.query.filter_by(season_id=season.id).count()
-            avg_level = db.session.query(func.avg(UserSeasonProgress.current_level)).filter_by(season_id=season.id).scalar() or 0
-            avg_xp = db.session.query(func.avg(UserSeasonProgress.current_xp_in_season)).filter_by(season_id=season.id).scalar() or 0
-            
-            return {
-                "season": {
-                    "id": season.id,
-                    "name": season.name,
-                    "start_date": season.start_date.isoformat() if season.start_date else None,
-                    "end_date": season.end_date.isoformat() if season.end_date else None,
-                    "is_active": season.is_active
-                },
-                "subscription_metrics": {
-                    "total_subscribers": total_subscribers,
-                    "lunar_subscribers": lunar_subscribers,
-                    "totality_subscribers": totality_subscribers,
-                    "tier_distribution": {
-                        "lunar_percentage": (lunar_subscribers / max(1, total_subscribers)) * 100,
-                        "totality_percentage": (totality_subscribers / max(1, total_subscribers)) * 100
-                    }
-                },
-                "revenue_metrics": {
-                    "total_revenue_cents": total_revenue,
-                    "total_revenue_dollars": total_revenue / 100,
-                    "avg_revenue_per_user": avg_revenue_per_user / 100,
-                    "lunar_revenue": sum(p.purchase_price for p in season_passes if p.tier_type == PassTierType.LUNAR.value) / 100,
-                    "totality_revenue": sum(p.purchase_price for p in season_passes if p.tier_type == PassTierType.TOTALITY.value) / 100
-                },
-                "user_behavior": {
-                    "returning_subscribers": returning_subscribers,
-                    "new_subscribers": new_subscribers,
-                    "churned_from_previous": churned_from_previous,
-                    "retention_rate": (returning_subscribers / max(1, returning_subscribers + churned_from_previous)) * 100 if previous_season else 0,
-                    "churn_rate": (churned_from_previous / max(1, returning_subscribers + churned_from_previous)) * 100 if previous_season else 0
-                },
-                "engagement_metrics": {
-                    "active_users": active_users,
-                    "conversion_rate": (total_subscribers / max(1, active_users)) * 100,
-                    "avg_level_reached": float(avg_level),
-                    "avg_xp_earned": float(avg_xp)
-                }
-            }
+            snapshots = snapshots or season_analytics.season_snapshots(all_seasons, [season.id])
+            return season_analytics.season_summary(season, snapshots[season.id])
             
         except Exception as e:
             logger.error(f"Error analyzing season subscriptions: {str(e)}")
             return {"error": "Failed to analyze season subscriptions"}
     
     @staticmethod
-    def _calculate_retention_metrics(all_seasons):
+    def _calculate_retention_metrics(all_seasons, snapshots=None):
         """Calculate overall retention metrics across seasons"""
         try:
             if len(all_seasons) < 2:
                 return {"error": "Need at least 2 seasons for retention analysis"}
             
-            # Sort seasons by start date
-            sorted_seasons = sorted(all_seasons, key=lambda x: x.start_date or datetime.min)
-            
-            retention_data = {
-                "season_to_season_retention": [],
-                "overall_retention_rate": 0,
-                "loyal_subscribers": 0,  # Users who subscribed to 3+ seasons
-            }
-            
-            # Calculate season-to-season retention
-            for i in range(len(sorted_seasons) - 1):
-                current_season = sorted_seasons[i]
-                next_season = sorted_seasons[i + 1]
-                
-                current_subscribers = set(
-                    p.user_id for p in UserSeasonPass.query.filter_by(season_id=current_season.id).all()
-                )
-                next_subscribers = set(
-                    p.user_id for p in UserSeasonPass.query.filter_by(season_id=next_season.id).all()
-                )
-                
-                retained_users = current_subscribers.intersection(next_subscribers)
-                retention_rate = (len(retained_users) / max(1, len(current_subscribers))) * 100
-                
-                retention_data["season_to_season_retention"].append({
-                    "from_season": {"id": current_season.id, "name": current_season.name},
-                    "to_season": {"id": next_season.id, "name": next_season.name},
-                    "subscribers_retained": len(retained_users),
-                    "total_previous_subscribers": len(current_subscribers),
-                    "retention_rate": retention_rate
-                })
-            
-            # Calculate overall retention rate
-            if retention_data["season_to_season_retention"]:
-                retention_data["overall_retention_rate"] = sum(
-                    r["retention_rate"] for r in retention_data["season_to_season_retention"]
-                ) / len(retention_data["season_to_season_retention"])
-            
-            # Find loyal subscribers (3+ seasons)
-            user_season_counts = db.session.query(
-                UserSeasonPass.user_id,
-                func.count(UserSeasonPass.season_id).label('season_count')
-            ).group_by(UserSeasonPass.user_id).all()
-            
-            retention_data["loyal_subscribers"] = len([
-                u for u in user_season_counts if u.season_count >= 3
-            ])
-            
-            return retention_data
+            snapshots = snapshots or season_analytics.season_snapshots(all_seasons)
+            return season_analytics.retention_metrics(all_seasons, snapshots, season_analytics.subscriber_overview())
             
         except Exception as e:
             logger.error(f"Error calculating retention metrics: {str(e)}")
             return {"error": "Failed to calculate retention metrics"}
     
     @staticmethod
-    def _calculate_churn_metrics(all_seasons):
+    def _calculate_churn_metrics(all_seasons, snapshots=None):
         """Calculate churn analysis across seasons"""
         try:
             if len(all_seasons) < 2:
                 return {"error": "Need at least 2 seasons for churn analysis"}
             
-            sorted_seasons = sorted(all_seasons, key=lambda x: x.start_date or datetime.min)
-            
-            churn_data = {
-                "season_to_season_churn": [],
-                "overall_churn_rate": 0,
-                "churn_analysis": {
-                    "never_returned": 0,  # Users who only bought 1 season pass ever
-                    "tier_downgrades": 0,  # Users who went from Totality to Lunar
-                    "tier_upgrades": 0     # Users who went from Lunar to Totality
-                }
-            }
-            
-            # Calculate season-to-season churn
-            for i in range(len(sorted_seasons) - 1):
-                current_season = sorted_seasons[i]
-                next_season = sorted_seasons[i + 1]
-                
-                current_subscribers = UserSeasonPass.query.filter_by(season_id=current_season.id).all()
-                next_subscribers = set(
-                    p.user_id for p in UserSeasonPass.query.filter_by(season_id=next_season.id).all()
-                )
-                
-                churned_users = []
-                tier_changes = {"upgrades": 0, "downgrades": 0}
-                
-                for pass_obj in current_subscribers:
-                    if pass_obj.user_id not in next_subscribers:
-                        churned_users.append(pass_obj.user_id)
-                    else:
-                        # Check for tier changes
-                        next_pass = UserSeasonPass.query.filter_by(
-                            user_id=pass_obj.user_id,
-                            season_id=next_season.id
-                        ).first()
-                        
-                        if next_pass:
-                            if (pass_obj.tier_type == PassTierType.LUNAR.value and 
-                                next_pass.tier_type == PassTierType.TOTALITY.value):
-                                tier_changes["upgrades"] += 1
-                            elif (pass_obj.tier_type == PassTierType.TOTALITY.value and 
-                                  next_pass.tier_type == PassTierType.LUNAR.value):
-                                tier_changes["downgrades"] += 1
-                
-                churn_rate = (len(churned_users) / max(1, len(current_subscribers))) * 100
-                
-                churn_data["season_to_season_churn"].append({
-                    "from_season": {"id": current_season.id, "name": current_season.name},
-                    "to_season": {"id": next_season.id, "name": next_season.name},
-                    "churned_users": len(churned_users),
-                    "total_previous_subscribers": len(current_subscribers),
-                    "churn_rate": churn_rate,
-                    "tier_changes": tier_changes
-                })
-                
-                # Add to overall tier change counters
-                churn_data["churn_analysis"]["tier_upgrades"] += tier_changes["upgrades"]
-                churn_data["churn_analysis"]["tier_downgrades"] += tier_changes["downgrades"]
-            
-            # Calculate overall churn rate
-            if churn_data["season_to_season_churn"]:
-                churn_data["overall_churn_rate"] = sum(
-                    c["churn_rate"] for c in churn_data["season_to_season_churn"]
-                ) / len(churn_data["season_to_season_churn"])
-            
-            # Analyze single-season users
-            all_subscribers = db.session.query(UserSeasonPass.user_id).distinct().all()
-            single_season_users = 0
-            
-            for user_tuple in all_subscribers:
-                user_id = user_tuple[0]
-                user_seasons = UserSeasonPass.query.filter_by(user_id=user_id).count()
-                if user_seasons == 1:
-                    single_season_users += 1
-            
-            churn_data["churn_analysis"]["never_returned"] = single_season_users
-            
-            return churn_data
+            snapshots = snapshots or season_analytics.season_snapshots(all_seasons)
+            return season_analytics.churn_metrics(all_seasons, snapshots, season_analytics.subscriber_overview())
             
         except Exception as e:
             logger.error(f"Error calculating churn metrics: {str(e)}")
             return {"error": "Failed to calculate churn metrics"}
     
     @staticmethod
-    def _calculate_growth_metrics(all_seasons):
+    def _calculate_growth_metrics(all_seasons, snapshots=None):
         """Calculate growth metrics across seasons"""
         try:
-            sorted_seasons = sorted(all_seasons, key=lambda x: x.start_date or datetime.min)
-            
-            growth_data = {
-                "subscriber_growth": [],
-                "revenue_growth": [],
-                "growth_trends": {
-                    "avg_subscriber_growth_rate": 0,
-                    "avg_revenue_growth_rate": 0,
-                    "fastest_growing_season": None,
-                    "highest_revenue_season": None
-                }
-            }
-            
-            previous_subscribers = 0
-            previous_revenue = 0
-            max_growth_rate = 0
-            max_revenue = 0
-            fastest_season = None
-            highest_revenue_season = None
-            
-            for i, season in enumerate(sorted_seasons):
-                season_passes = UserSeasonPass.query.filter_by(season_id=season.id).all()
-                current_subscribers = len(season_passes)
-                current_revenue = sum(p.purchase_price for p in season_passes) / 100  # Convert to dollars
-                
-                if i > 0:  # Skip first season for growth calculation
-                    subscriber_growth_rate = ((current_subscribers - previous_subscribers) / max(1, previous_subscribers)) * 100
-                    revenue_growth_rate = ((current_revenue - previous_revenue) / max(1, previous_revenue)) * 100
-                    
-                    growth_data["subscriber_growth"].append({
-                        "season": {"id": season.id, "name": season.name},
-                        "subscribers": current_subscribers,
-                        "previous_subscribers": previous_subscribers,
-                        "growth_rate": subscriber_growth_rate,
-                        "net_growth": current_subscribers - previous_subscribers
-                    })
-                    
-                    growth_data["revenue_growth"].append({
-                        "season": {"id": season.id, "name": season.name},
-                        "revenue": current_revenue,
-                        "previous_revenue": previous_revenue,
-                        "growth_rate": revenue_growth_rate,
-                        "net_growth": current_revenue - previous_revenue
-                    })
-                    
-                    # Track fastest growing season
-                    if subscriber_growth_rate > max_growth_rate:
-                        max_growth_rate = subscriber_growth_rate
-                        fastest_season = season
-                
-                # Track highest revenue season
-                if current_revenue > max_revenue:
-                    max_revenue = current_revenue
-                    highest_revenue_season = season
-                
-                previous_subscribers = current_subscribers
-                previous_revenue = current_revenue
-            
-            # Calculate average growth rates
-            if len(growth_data["subscriber_growth"]) > 0:
-                growth_data["growth_trends"]["avg_subscriber_growth_rate"] = sum(
-                    g["growth_rate"] for g in growth_data["subscriber_growth"]
-                ) / len(growth_data["subscriber_growth"])
-                
-                growth_data["growth_trends"]["avg_revenue_growth_rate"] = sum(
-                    g["growth_rate"] for g in growth_data["revenue_growth"]
-                ) / len(growth_data["revenue_growth"])
-            
-            if fastest_season:
-                growth_data["growth_trends"]["fastest_growing_season"] = {
-                    "id": fastest_season.id,
-                    "name": fastest_season.name,
-                    "growth_rate": max_growth_rate
-                }
-            
-            if highest_revenue_season:
-                growth_data["growth_trends"]["highest_revenue_season"] = {
-                    "id": highest_revenue_season.id,
-                    "name": highest_revenue_season.name,
-                    "revenue": max_revenue
-                }
-            
-            return growth_data
+            snapshots = snapshots or season_analytics.season_snapshots(all_seasons)
+            return season_analytics.growth_metrics(all_seasons, snapshots)
             
         except Exception as e:
             logger.error(f"Error calculating growth metrics: {str(e)}")
@@ -988,48 +680,39 @@ class SeasonPassAdminController:
             all_seasons = Season.query.order_by(Season.start_date.desc()).all()
             
             if season_id:
-                target_seasons = [Season.query.get(season_id)]
-                if not target_seasons[0]:
+                target_seasons = [season for season in all_seasons if season.id == season_id]
+                if not target_seasons:
                     return {"error": "Season not found"}
             else:
                 target_seasons = all_seasons[:5]  # Last 5 seasons for overview
             
+            # Every season's snapshot is needed for the cross-season metrics; cached ones are reused
+            snapshots = season_analytics.season_snapshots(all_seasons)
+            overview = season_analytics.subscriber_overview()
+            current_active_season = next((season for season in all_seasons if season.is_active), None)
+            
             analytics_data = {
-                "overview": {},
-                "season_comparisons": [],
+                "overview": {
+                    "total_unique_subscribers": overview["total_unique_subscribers"],
+                    "current_active_subscribers": (
+                        snapshots[current_active_season.id]["subscribers"]["total"] if current_active_season else 0
+                    ),
+                    "total_seasons": len(all_seasons),
+                    "active_season_id": current_active_season.id if current_active_season else None
+                },
+                "season_comparisons": [
+                    SeasonPassAdminController._analyze_season_subscriptions(season, all_seasons, snapshots)
+                    for season in target_seasons
+                ],
                 "retention_analysis": {},
-                "churn_analysis": {},
-                "growth_metrics": {}
-            }
-            
-            # Calculate overall metrics
-            total_unique_subscribers = db.session.query(UserSeasonPass.user_id).distinct().count()
-            current_active_season = Season.query.filter_by(is_active=True).first()
-            current_subscribers = 0
-            if current_active_season:
-                current_subscribers = UserSeasonPass.query.filter_by(season_id=current_active_season.id).count()
-            
-            analytics_data["overview"] = {
-                "total_unique_subscribers": total_unique_subscribers,
-                "current_active_subscribers": current_subscribers,
-                "total_seasons": len(all_seasons),
-                "active_season_id": current_active_season.id if current_active_season else None
+                "churn_analysis": SeasonPassAdminController._calculate_churn_metrics(all_seasons, snapshots),
+                "growth_metrics": SeasonPassAdminController._calculate_growth_metrics(all_seasons, snapshots),
+                "cohort_matrix": season_analytics.cohort_matrix(all_seasons, snapshots)
             }
             
-            # Analyze each season
-            for season in target_seasons:
-                season_data = SeasonPassAdminController._analyze_season_subscriptions(season, all_seasons)
-                analytics_data["season_comparisons"].append(season_data)
-            
             # Calculate retention analysis (users who subscribed to multiple seasons)
             if len(all_seasons) >= 2:
-                analytics_data["retention_analysis"] = SeasonPassAdminController._calculate_retention_metrics(all_seasons)
-            
-            # Calculate churn analysis
-            analytics_data["churn_analysis"] = SeasonPassAdminController._calculate_churn_metrics(all_seasons)
-            
-            # Calculate growth metrics
-            analytics_data["growth_metrics"] = SeasonPassAdminController._calculate_growth_metrics(all_seasons)
+                analytics_data["retention_analysis"] = SeasonPassAdminController._calculate_retention_metrics(all_seasons, snapshots)
             
             return analytics_data
             
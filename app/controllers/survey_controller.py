@@ -12,13 +12,68 @@ import secrets
 from ..models import db, Survey, Question, Response, Submission, SurveyLink, ChatThread, SurveyThread, AnalyticsThread, QuestionBank, Business, User, BusinessActivity, ActivityType, SurveyAudience, BusinessAudience, SurveyDiscordRole, DiscordServerMembership
 from datetime import datetime, timedelta
 from sqlalchemy.orm import joinedload
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, func
 from flask import Blueprint
 import pandas as pd
 import io
 import re
 
 from flask import jsonify
+from app.utils.json_sql import json_array_contains_any
+
+
+def _anonymous_feed_access(survey):
+    """Feed visibility for anonymous users (relations preloaded by BusinessController.preload_survey_access)."""
+    audience = survey.audience_settings
+    if survey.business_id is None: # Globally public, unlinked survey
+        if not survey.is_restricted:
+            return True
+        if not audience: # Restricted but no audience settings (should not happen, but safer)
+            return False
+        # Restricted: only allowed when no rule requires authentication
+        return not (audience.required_tags or audience.specific_email_whitelist or audience.email_domain_whitelist)
+
+    # Survey belongs to a business
+    business = survey.business
+    if not (business and business.is_active and business.is_approved and business.audience_type == 'PUBLIC'):
+        return False
+    if not survey.is_restricted: # Survey not restricted within a public business
+        return True
+    if not audience: # Restricted but no specific settings, safer to deny for anonymous
+        return False
+    if audience.access_type == 'SPECIFIC_RULES':
+        # Email whitelists and required tags cannot be satisfied anonymously
+        return not (audience.specific_email_whitelist or audience.email_domain_whitelist or audience.required_tags)
+    return not audience.required_tags
+
+
+def _feed_survey_stats(survey_ids, completion_user=None):
+    """
+    Question counts, completed-response counts and the surveys ``completion_user``
+    has completed, for a page of surveys: three grouped/IN queries in total.
+    """
+    if not survey_ids:
+        return {}, {}, set()
+    question_counts = dict(
+        db.session.query(Question.survey_id, func.count(Question.id))
+        .filter(Question.survey_id.in_(survey_ids)).group_by(Question.survey_id).all()
+    )
+    response_counts = dict(
+        db.session.query(Submission.survey_id, func.count(Submission.id))
+        .filter(Submission.survey_id.in_(survey_ids), Submission.is_complete == True)
+        .group_by(Submission.survey_id).all()
+    )
+    completed_ids = set()
+    if completion_user is not None:
+        completed_ids = {
+            survey_id for (survey_id,) in db.session.query(Submission.survey_id).filter(
+                Submission.user_id == completion_user.id,
+                Submission.is_complete == True,
+                Submission.survey_id.in_(survey_ids)
+            ).distinct()
+        }
+    return question_counts, response_counts, completed_ids
+
 
 class SurveyController:
 
@@ -1505,7 +1560,6 @@ class SurveyController:
 
     @staticmethod
     def get_public_survey_feed(args):
-        from app.models import Business # Local import
         from app.controllers.business_controller import BusinessController # Local import
 
         current_user = g.get('current_user', None)
@@ -1526,135 +1580,63 @@ class SurveyController:
         if filter_tags_str:
             filter_tags = [tag.strip().lower() for tag in filter_tags_str.split(',') if tag.strip()]
             if filter_tags:
-                # This requires Survey.tags to be a JSON array of strings (tag names/IDs)
-                # and the database/SQLAlchemy setup to support JSON operations.
-                # For simplicity, this example might filter in Python if direct SQL JSON querying is complex.
-                # A more robust solution would use DB specific JSON functions.
-                # Example for PostgreSQL: base_query = base_query.filter(Survey.tags.contains(filter_tags)) # if tags are structured for this
-                # Python-based filtering (less efficient for large datasets but works generally):
-                all_surveys_for_tag_filtering = base_query.all()
-                surveys_matching_tags = []
-                for survey in all_surveys_for_tag_filtering:
-                    if survey.tags and isinstance(survey.tags, list):
-                        survey_tags_lower = [str(tag).lower() for tag in survey.tags]
-                        if any(ft in survey_tags_lower for ft in filter_tags):
-                            surveys_matching_tags.append(survey.id)
-                if not surveys_matching_tags: # No surveys match the tags
-                     return {'surveys': [], 'total': 0, 'page': page, 'per_page': per_page, 'total_pages': 0}, 200
-                base_query = Survey.query.filter(Survey.id.in_(surveys_matching_tags), Survey.published==True, Survey.is_archived==False)
-
-
-        # Sort surveys: if authenticated and has interests, try to put those matching interests first.
-        # This is a simple sort, more complex relevance scoring could be added.
-        # This sorting is applied BEFORE pagination to ensure relevant items are on earlier pages.
-        if current_user and hasattr(current_user, 'interests') and current_user.interests:
-            user_interest_tags = set([str(t).lower() for t in current_user.interests])
-            # This is a Python sort. For DB sort, would need complex case statements or full-text search.
-            # surveys_to_sort = base_query.all() # Fetch all then sort
-            # sorted_surveys = sorted(
-            #     surveys_to_sort,
-            #     key=lambda s: -len(user_interest_tags.intersection(set(str(t).lower() for t in s.tags))) if s.tags else 0,
-            # )
-            # # Then apply pagination to sorted_surveys (this is memory inefficient)
-            # # For now, we'll paginate first, then sort the page if needed by frontend, or skip DB sort for simplicity.
-            # current_app.logger.debug(f"User has interests, potential for sorting. User interests: {user_interest_tags}")
-            # For DB level sorting (example, might need adjustment based on DB)
-            # from sqlalchemy import case
-            # sort_logic = case(
-            #    [(Survey.tags.comparator.contains(user_interest_tag), 1) for user_interest_tag in user_interest_tags], # This is pseudo-code for matching
-            #    else_=0
-            # ).desc()
-            # base_query = base_query.order_by(sort_logic, Survey.created_at.desc())
-            # Simpler: order by creation date for now. Client can re-sort small pages.
-            base_query = base_query.order_by(Survey.created_at.desc())
-
-        else:
-            base_query = base_query.order_by(Survey.created_at.desc())
+                # Survey.tags is a JSON array of tag names/IDs; match any of them case-insensitively
+                tag_predicate = json_array_contains_any(Survey.tags, filter_tags, lowercase=True)
+                if tag_predicate is None:
+                    # No JSON array functions for this dialect: scan only the (id, tags) columns
+                    matching_ids = [
+                        survey_id for survey_id, tags in base_query.with_entities(Survey.id, Survey.tags)
+                        if isinstance(tags, list) and any(str(tag).lower() in filter_tags for tag in tags)
+                    ]
+                    tag_predicate = Survey.id.in_(matching_ids)
+                base_query = base_query.filter(tag_predicate)
+
+        # Newest first. Interest-based ordering is left to the client, which re-sorts small pages.
+        base_query = base_query.order_by(Survey.created_at.desc())
 
         pagination_obj = base_query.paginate(page=page, per_page=per_page, error_out=False)
         surveys_on_page = pagination_obj.items
-        
+        survey_ids = [survey.id for survey in surveys_on_page]
+
+        # --- Access: evaluated for the whole page in a constant number of queries ---
+        user_role = getattr(current_user, 'role', 'user') if current_user else None
+        if user_role == 'super_admin':
+            accessible_ids = set(survey_ids)
+        elif current_user:
+            access_results = BusinessController.check_survey_access_batch(current_user, survey_ids)
+            accessible_ids = {
+                survey.id for survey in surveys_on_page
+                if (user_role == 'business_admin' and current_user.business_id == survey.business_id)
+                or access_results[survey.id][0]
+            }
+        else:
+            BusinessController.preload_survey_access(survey_ids)
+            accessible_ids = {survey.id for survey in surveys_on_page if _anonymous_feed_access(survey)}
+
+        # --- Per-survey numbers: one grouped query each ---
+        question_counts, response_counts, completed_ids = _feed_survey_stats(
+            [survey_id for survey_id in survey_ids if survey_id in accessible_ids],
+            # For admin users, we don't mark surveys as completed to allow multiple responses
+            current_user if current_user and user_role not in ['super_admin', 'business_admin'] else None
+        )
+
+        from app.utils.xp_calculator import calculate_survey_xp, calculate_survey_time
+
         accessible_surveys_dicts = []
         for survey in surveys_on_page:
-            can_access = False
-            if current_user:
-                user_role = getattr(current_user, 'role', 'user')
-                if user_role == 'super_admin':
-                    can_access = True
-                elif user_role == 'business_admin' and current_user.business_id == survey.business_id:
-                    can_access = True
-                else:
-                    has_access, reason = BusinessController.check_survey_access(current_user, survey.id)
-                    can_access = has_access
-            else: # Anonymous user
-                if survey.business_id is None: # Globally public, unlinked survey
-                    if survey.is_restricted:
-                        if survey.audience_settings:
-                            if survey.audience_settings.required_tags or \
-                               survey.audience_settings.specific_email_whitelist or \
-                               survey.audience_settings.email_domain_whitelist:
-                                can_access = False 
-                            else: # Restricted but no specific auth-requiring rules
-                                can_access = True
-                        else: # Restricted but no audience settings (should not happen, but safer)
-                            can_access = False
-                    else: # Not restricted
-                        can_access = True
-                else: # Survey belongs to a business
-                    business = Business.query.get(survey.business_id)
-                    if business and business.is_active and business.is_approved and business.audience_type == 'PUBLIC':
-                        if survey.is_restricted:
-                            if survey.audience_settings:
-                                if survey.audience_settings.access_type == 'SPECIFIC_RULES' and \
-                                   (survey.audience_settings.specific_email_whitelist or \
-                                    survey.audience_settings.email_domain_whitelist or \
-                                    survey.audience_settings.required_tags):
-                                    can_access = False
-                                elif survey.audience_settings.required_tags and not (survey.audience_settings.access_type == 'SPECIFIC_RULES'): # if tags are required but not part of specific rules check already done
-                                     can_access = False
-                                else: # Public business, survey restricted but not in a way that blocks anonymous or already covered by SPECIFIC_RULES and passed
-                                    # If it reached here, means SPECIFIC_RULES with auth did not block, or no such rules applied.
-                                    # If required_tags were the only SPECIFIC_RULES and were met, it would be true from check_survey_access. This path is tricky for anonymous.
-                                    # Let's simplify: if restricted, and SPECIFIC_RULES don't explicitly block anon, and no required_tags, then allow.
-                                    if survey.audience_settings.access_type == 'SPECIFIC_RULES' and \
-                                       not (survey.audience_settings.specific_email_whitelist or survey.audience_settings.email_domain_whitelist or survey.audience_settings.required_tags):
-                                        can_access = True
-                                    elif not survey.audience_settings.required_tags: # If not specific rules and no tags, allow
-                                        can_access = True
-                                    else: # Otherwise, default to false if specific checks didn't grant access
-                                        can_access = False
-                            else: # Restricted but no specific settings, safer to deny for anonymous
-                                can_access = False
-                        else: # Survey not restricted within a public business
-                            can_access = True
-            
-            if can_access:
-                # Check if survey is completed by current user
-                completed = False
-                if current_user:
-                    try:
-                        # For admin users, we don't mark surveys as completed to allow multiple responses
-                        user_role = getattr(current_user, 'role', 'user')
-                        if user_role in ['super_admin', 'business_admin']:
-                            completed = False  # Always allow admin access regardless of completion
-                        else:
-                            completed = Submission.query.filter_by(
-                                survey_id=survey.id,
-                                user_id=current_user.id,
-                                is_complete=True
-                            ).first() is not None
-                    except Exception:
-                        completed = False
-                
-                from app.utils.xp_calculator import calculate_survey_xp, calculate_survey_time
-                
-                survey_dict = survey.to_dict(include_questions=False) # Avoid sending all questions in list view
-                question_count = survey.questions.count()
-                survey_dict['question_count'] = question_count
-                survey_dict['xp_reward'] = calculate_survey_xp(question_count)  # Dynamic XP calculation
-                survey_dict['estimated_time'] = calculate_survey_time(question_count)  # Dynamic time calculation
-                survey_dict['completed_by_user'] = completed
-                accessible_surveys_dicts.append(survey_dict)
+            if survey.id not in accessible_ids:
+                continue
+            question_count = question_counts.get(survey.id, 0)
+            survey_dict = survey.to_dict(
+                include_questions=False, # Avoid sending all questions in list view
+                question_count=question_count,
+                response_count=response_counts.get(survey.id, 0)
+            )
+            survey_dict['question_count'] = question_count
+            survey_dict['xp_reward'] = calculate_survey_xp(question_count)  # Dynamic XP calculation
+            survey_dict['estimated_time'] = calculate_survey_time(question_count)  # Dynamic time calculation
+            survey_dict['completed_by_user'] = survey.id in completed_ids
+            accessible_surveys_dicts.append(survey_dict)
 
         return {
             'surveys': accessible_surveys_dicts,
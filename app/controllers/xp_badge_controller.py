@@ -6,7 +6,9 @@ Handles XP awarding, badge checking, and gamification logic
 from flask import request, jsonify
 from ..models import db, User, Badge, UserBadge, PointsLog, MarketplaceItem, UserRewardLog, RewardStatus
 from datetime import datetime
-from sqlalchemy import func
+from sqlalchemy import func, insert
+from ..utils.live_leaderboard import record_xp_gain
+from ..utils.badge_index import badge_index
 
 def award_xp_no_commit(user_id, points, activity_type, related_item_id=None, business_id=None):
     """
@@ -34,22 +36,10 @@ def award_xp_no_commit(user_id, points, activity_type, related_item_id=None, bus
         if not user:
             return {'error': 'User not found'}
         
-        # Create PointsLog entry
-        points_log = PointsLog(
-            user_id=user_id,
-            business_id=business_id,
-            survey_id=related_item_id if activity_type.startswith('SURVEY') else None,
-            item_id=related_item_id if activity_type in ['BUG_REPORTED', 'FEATURE_REQUESTED'] else None,
-            activity_type=activity_type,
-            points_awarded=points
-        )
-        db.session.add(points_log)
+        previous_total_xp = user.total_xp_earned or 0
         
-        # Update user XP
-        user.xp_balance += points
-        user.total_xp_earned += points
-        
-        # Process Season Pass XP gain FIRST (to get the correct multiplier)
+        # Process Season Pass XP gain FIRST (to get the correct multiplier); its queries
+        # run before this award touches the session, so the award flushes once at commit
         season_pass_result = None
         actual_xp_awarded = points
         try:
@@ -69,15 +59,26 @@ def award_xp_no_commit(user_id, points, activity_type, related_item_id=None, bus
             import logging
             logging.getLogger(__name__).warning(f"Season Pass XP processing failed: {str(e)}")
         
-        # Update PointsLog with actual XP awarded (including multiplier)
-        points_log.points_awarded = actual_xp_awarded
+        # Create PointsLog entry with the actual XP awarded (including multiplier)
+        points_log = PointsLog(
+            user_id=user_id,
+            business_id=business_id,
+            survey_id=related_item_id if activity_type.startswith('SURVEY') else None,
+            item_id=related_item_id if activity_type in ['BUG_REPORTED', 'FEATURE_REQUESTED'] else None,
+            activity_type=activity_type,
+            points_awarded=actual_xp_awarded
+        )
+        db.session.add(points_log)
+        
+        # Update user XP
+        user.xp_balance += actual_xp_awarded
+        user.total_xp_earned += actual_xp_awarded
         
-        # Update user XP with actual amount (including Season Pass multiplier)
-        user.xp_balance = user.xp_balance - points + actual_xp_awarded  # Adjust for the difference
-        user.total_xp_earned = user.total_xp_earned - points + actual_xp_awarded
+        # Live leaderboard sorted sets are updated once this transaction commits
+        record_xp_gain(user_id, actual_xp_awarded)
         
-        # Check for new badges (without committing)
-        new_badges = check_and_award_badges_no_commit(user_id)
+        # Check for badges crossed by this award (without committing)
+        new_badges = check_and_award_badges_no_commit(user_id, previous_xp=previous_total_xp, user=user)
         
         return {
             'points_awarded': actual_xp_awarded,
@@ -127,80 +128,91 @@ def award_xp(user_id, points, activity_type, related_item_id=None, business_id=N
         db.session.rollback()
         return {'error': str(e)}
 
-def check_and_award_badges_no_commit(user_id):
+def check_and_award_badges_no_commit(user_id, previous_xp=None, user=None):
     """
     Check if user has earned any new badges and award them (without committing)
     
     Args:
         user_id: ID of user to check
+        previous_xp: total_xp_earned before the current award; only badges crossed since then
+                     are checked. None checks every badge the user is eligible for.
+        user: Optional already-loaded User
         
     Returns:
         list: List of newly awarded badge dictionaries
     """
     try:
-        user = User.query.get(user_id)
+        user = user or User.query.get(user_id)
         if not user:
             return []
         
-        # Get all badges user is eligible for
-        eligible_badges = Badge.query.filter(
-            Badge.xp_threshold <= user.total_xp_earned
-        ).all()
+        # Candidate badges come from the in-memory threshold index, no query needed
+        if previous_xp is None:
+            candidates = badge_index.eligible(user.total_xp_earned)
+        else:
+            candidates = badge_index.crossed(previous_xp, user.total_xp_earned)
+        if not candidates:
+            return []
         
-        # Get badges user already has
-        existing_badge_ids = {ub.badge_id for ub in UserBadge.query.filter_by(user_id=user_id).all()}
-        
-        # Award new badges
-        new_badges = []
-        for badge in eligible_badges:
-            if badge.id not in existing_badge_ids:
-                user_badge = UserBadge(
-                    user_id=user_id,
-                    badge_id=badge.id
-                )
-                db.session.add(user_badge)
-                
-                badge_dict = badge.to_dict()
+        # Skip badges the user already has (e.g. granted as a season pass reward)
+        candidate_ids = [badge['id'] for badge in candidates]
+        existing_badge_ids = {
+            badge_id for (badge_id,) in db.session.query(UserBadge.badge_id).filter(
+                UserBadge.user_id == user_id,
+                UserBadge.badge_id.in_(candidate_ids)
+            )
+        }
+        new_badges = [badge for badge in candidates if badge['id'] not in existing_badge_ids]
+        if not new_badges:
+            return []
+        
+        # Award new badges in a single insert
+        earned_at = datetime.utcnow()
+        db.session.execute(insert(UserBadge), [
+            {'user_id': user_id, 'badge_id': badge['id'], 'earned_at': earned_at} for badge in new_badges
+        ])
+        
+        # Add share prompt data for newly earned badges
+        try:
+            from .share_controller import ShareController
+            from ..models import ShareType, SystemConfiguration, UserShare
+            
+            # Check if share-to-earn feature is enabled
+            if SystemConfiguration.get_config('share_to_earn_enabled', True):
+                # Badges the user has already shared, in one query
+                shared_badge_ids = {
+                    related_id for (related_id,) in db.session.query(UserShare.related_object_id).filter(
+                        UserShare.user_id == user_id,
+                        UserShare.share_type == ShareType.BADGE_SHARE.value,
+                        UserShare.related_object_id.in_([badge['id'] for badge in new_badges])
+                    )
+                }
+                xp_reward = SystemConfiguration.get_config('xp_reward_badge_share', 50)
                 
-                # Add share prompt data for newly earned badges
-                try:
-                    from .share_controller import ShareController
-                    from ..models import ShareType, SystemConfiguration
+                for badge_dict in new_badges:
+                    if badge_dict['id'] in shared_badge_ids:
+                        continue
+                    # Generate share URL for this badge
+                    share_url_result = ShareController.generate_share_url(
+                        ShareType.BADGE_SHARE.value, 
+                        badge_dict['id'], 
+                        user_id
+                    )
                     
-                    # Check if share-to-earn feature is enabled
-                    if SystemConfiguration.get_config('share_to_earn_enabled', True):
-                        # Check if user hasn't already shared this badge
-                        from ..models import UserShare
-                        existing_share = UserShare.query.filter(
-                            UserShare.user_id == user_id,
-                            UserShare.share_type == ShareType.BADGE_SHARE.value,
-                            UserShare.related_object_id == badge.id
-                        ).first()
-                        
-                        if not existing_share:
-                            # Generate share URL for this badge
-                            share_url_result = ShareController.generate_share_url(
-                                ShareType.BADGE_SHARE.value, 
-                                badge.id, 
-                                user_id
-                            )
-                            
-                            if 'error' not in share_url_result:
-                                badge_dict['share_prompt'] = {
-                                    'eligible_for_share': True,
-                                    'share_type': ShareType.BADGE_SHARE.value,
-                                    'related_object_id': badge.id,
-                                    'share_url': share_url_result['share_url'],
-                                    'share_text': share_url_result['share_text'],
-                                    'xp_reward': SystemConfiguration.get_config('xp_reward_badge_share', 50)
-                                }
-                        
-                except Exception as e:
-                    # Don't fail badge awarding if share prompt fails
-                    import logging
-                    logging.getLogger(__name__).error(f"Error generating share prompt for badge {badge.id}: {e}")
+                    if 'error' not in share_url_result:
+                        badge_dict['share_prompt'] = {
+                            'eligible_for_share': True,
+                            'share_type': ShareType.BADGE_SHARE.value,
+                            'related_object_id': badge_dict['id'],
+                            'share_url': share_url_result['share_url'],
+                            'share_text': share_url_result['share_text'],
+                            'xp_reward': xp_reward
+                        }
                 
-                new_badges.append(badge_dict)
+        except Exception as e:
+            # Don't fail badge awarding if share prompt fails
+            import logging
+            logging.getLogger(__name__).error(f"Error generating share prompts for user {user_id}: {e}")
         
         return new_badges
         
@@ -262,15 +274,13 @@ def get_user_xp_summary(user_id):
         badges = get_user_badges(user_id)
         
         # Get next badge threshold
-        next_badge = Badge.query.filter(
-            Badge.xp_threshold > user.total_xp_earned
-        ).order_by(Badge.xp_threshold.asc()).first()
+        next_badge = badge_index.next_badge(user.total_xp_earned)
         
         return {
             'xp_balance': user.xp_balance,
             'total_xp_earned': user.total_xp_earned,
             'badges': badges if not isinstance(badges, dict) else [],
-            'next_badge': next_badge.to_dict() if next_badge else None,
+            'next_badge': next_badge,
             'recent_activities': [activity.to_dict() for activity in recent_activities]
         }
         
@@ -0,0 +1,66 @@
+# jobs/analytics_aggregate_job.py
+"""
+Response Aggregate Rebuild Job
+Backfills the pre-aggregated analytics tables from raw responses.
+Run once after deploying the aggregate tables, or whenever a survey's
+aggregates need repairing.
+"""
+
+import logging
+import click
+from app.models import Survey
+
+logger = logging.getLogger(__name__)
+
+
+def rebuild_response_aggregates_job(app=None, survey_id=None):
+    """
+    Rebuilds response aggregates for one survey or for every survey.
+    
+    Args:
+        app: Flask application instance (required for app context)
+        survey_id: Optional survey to rebuild; all surveys when omitted
+        
+    Returns:
+        tuple: (surveys rebuilt, surveys failed)
+    """
+    if app is None:
+        logger.error("Flask app instance required for response aggregate rebuild job")
+        return 0, 0
+
+    from app.controllers.response_aggregate_controller import ResponseAggregateController
+
+    with app.app_context():
+        if survey_id is not None:
+            survey_ids = [survey_id]
+        else:
+            survey_ids = [row.id for row in Survey.query.with_entities(Survey.id).order_by(Survey.id).all()]
+
+        rebuilt, failed = 0, 0
+        for sid in survey_ids:
+            result, status = ResponseAggregateController.rebuild_survey_aggregates(sid)
+            if status == 200:
+                rebuilt += 1
+                logger.info(f"Rebuilt aggregates for survey {sid}: {result['submissions_processed']} submissions")
+            else:
+                failed += 1
+                logger.error(f"Failed to rebuild aggregates for survey {sid}: {result.get('error')}")
+
+        return rebuilt, failed
+
+
+def create_response_aggregate_cli_command(app):
+    """
+    Create a CLI command for backfilling the response aggregates.
+    
+    Args:
+        app: Flask application instance
+    """
+    @app.cli.command('rebuild-response-aggregates')
+    @click.option('--survey-id', type=int, default=None, help='Only rebuild this survey.')
+    def rebuild_response_aggregates_command(survey_id):
+        """Rebuild pre-aggregated response analytics."""
+        rebuilt, failed = rebuild_response_aggregates_job(app, survey_id)
+        print(f"Rebuilt response aggregates for {rebuilt} survey(s), {failed} failed.")
+
+    return rebuild_response_aggregates_command
@@ -0,0 +1,277 @@
+# jobs/hot_path_index_job.py
+"""
+Hot-Path Index Jobs
+Creates the composite Submission/Response indexes declared on the models in
+databases that predate them, and benchmarks the analytics and feed queries
+those indexes are designed for against a throwaway database.
+
+Index set (see ``__table_args__`` on Submission and Response):
+    submissions (survey_id, submitted_at)          survey scans, trends, ordered exports
+    submissions (survey_id, is_complete)           completed-response counts
+    submissions (user_id, survey_id, is_complete)  duplicate / completion checks, feed
+    submissions (survey_id, survey_link_id)        per-link quota counts
+    responses   (question_id)                      per-question analytics
+    responses   (submission_id, question_id)       batch loads by submission
+    submissions (survey_id, <dimension>)           comparison GROUP BYs, one per
+                                                   COMPARISON_INDEXED_DIMENSIONS column
+"""
+
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import create_engine, inspect, select, func, and_, text
+
+from app.models import db, User, Survey, Question, SurveyLink, Submission, Response
+from app.utils.submission_dimensions import COMPARISON_INDEXED_DIMENSIONS, comparison_index_name
+
+logger = logging.getLogger(__name__)
+
+HOT_PATH_INDEX_NAMES = [
+    'idx_submission_survey_submitted',
+    'idx_submission_survey_complete',
+    'idx_submission_user_survey_complete',
+    'idx_submission_survey_link',
+    'idx_response_question',
+    'idx_response_submission_question',
+] + [comparison_index_name(dimension) for dimension in COMPARISON_INDEXED_DIMENSIONS]
+
+SEED_INSERT_CHUNK = 5000
+
+
+def get_hot_path_indexes():
+    """Index objects from the Submission/Response table definitions, in HOT_PATH_INDEX_NAMES order."""
+    indexes = {idx.name: idx for table in (Submission.__table__, Response.__table__) for idx in table.indexes}
+    return [indexes[name] for name in HOT_PATH_INDEX_NAMES]
+
+
+def ensure_hot_path_indexes_job(app=None):
+    """
+    Creates any missing hot-path index (CREATE INDEX only when absent).
+
+    Args:
+        app: Flask application instance (required for app context)
+
+    Returns:
+        list: names of the indexes that were created
+    """
+    if app is None:
+        logger.error("Flask app instance required for hot-path index job")
+        return []
+
+    with app.app_context():
+        created = []
+        for index in get_hot_path_indexes():
+            existing = {i['name'] for i in inspect(db.engine).get_indexes(index.table.name)}
+            if index.name in existing:
+                continue
+            index.create(bind=db.engine)
+            created.append(index.name)
+            logger.info(f"Created index {index.name} on {index.table.name}")
+        return created
+
+
+# --- Benchmark -------------------------------------------------------------------
+
+def _seed_benchmark_data(connection, surveys, submissions_per_survey, questions_per_survey=5, users=500):
+    """Inserts synthetic users, surveys, questions, links, submissions and responses."""
+    rnd = random.Random(42)
+    now = datetime.utcnow()
+
+    connection.execute(User.__table__.insert(), [
+        {'username': f'bench_user_{i}', 'email': f'bench_user_{i}@example.com', 'password_hash': 'x'}
+        for i in range(users)
+    ])
+    user_ids = list(connection.execute(select(User.__table__.c.id)).scalars())
+
+    connection.execute(Survey.__table__.insert(), [{'title': f'Benchmark {i}'} for i in range(surveys)])
+    survey_ids = list(connection.execute(select(Survey.__table__.c.id)).scalars())
+
+    connection.execute(Question.__table__.insert(), [
+        {'survey_id': sid, 'question_text': f'Q{n}', 'question_type': 'rating' if n % 2 else 'multiple-choice', 'sequence_number': n}
+        for sid in survey_ids for n in range(1, questions_per_survey + 1)
+    ])
+    connection.execute(SurveyLink.__table__.insert(), [
+        {'survey_id': sid, 'label': f'Link {n}'} for sid in survey_ids for n in range(2)
+    ])
+    questions_by_survey, links_by_survey = {}, {}
+    for qid, sid in connection.execute(select(Question.__table__.c.id, Question.__table__.c.survey_id)):
+        questions_by_survey.setdefault(sid, []).append(qid)
+    for lid, sid in connection.execute(select(SurveyLink.__table__.c.id, SurveyLink.__table__.c.survey_id)):
+        links_by_survey.setdefault(sid, []).append(lid)
+
+    submission_rows = []
+    for sid in survey_ids:
+        for _ in range(submissions_per_survey):
+            submission_rows.append({
+                'survey_id': sid,
+                'user_id': rnd.choice(user_ids) if rnd.random() < 0.8 else None,
+                'survey_link_id': rnd.choice(links_by_survey[sid]),
+                'submitted_at': now - timedelta(minutes=rnd.randint(0, 90 * 24 * 60)),
+                'duration': rnd.randint(20, 900),
+                'gender': rnd.choice(['Male', 'Female', 'Other', None]),
+                'age_group': rnd.choice(['18-24', '25-34', '35-44', '45+']),
+                'is_complete': rnd.random() < 0.85,
+            })
+    for start in range(0, len(submission_rows), SEED_INSERT_CHUNK):
+        connection.execute(Submission.__table__.insert(), submission_rows[start:start + SEED_INSERT_CHUNK])
+
+    response_rows = []
+    submissions = connection.execute(select(Submission.__table__.c.id, Submission.__table__.c.survey_id))
+    for sub_id, sid in submissions:
+        for qid in questions_by_survey[sid]:
+            response_rows.append({'submission_id': sub_id, 'question_id': qid, 'response_text': str(rnd.randint(1, 5))})
+            if len(response_rows) >= SEED_INSERT_CHUNK:
+                connection.execute(Response.__table__.insert(), response_rows)
+                response_rows = []
+    if response_rows:
+        connection.execute(Response.__table__.insert(), response_rows)
+
+    return survey_ids, questions_by_survey, links_by_survey
+
+
+def _benchmark_queries(connection, survey_ids, questions_by_survey, links_by_survey):
+    """The 15 analytics/feed queries, as (name, statement) pairs with representative parameters."""
+    s, r = Submission.__table__.c, Response.__table__.c
+    survey_id = survey_ids[len(survey_ids) // 2]
+    question_id = questions_by_survey[survey_id][0]
+    link_id = links_by_survey[survey_id][0]
+    user_id = connection.execute(
+        select(s.user_id).where(s.survey_id == survey_id, s.user_id.isnot(None)).limit(1)
+    ).scalar()
+    submission_ids = list(connection.execute(
+        select(s.id).where(s.survey_id == survey_id).order_by(s.submitted_at.desc()).limit(900)
+    ).scalars())
+    since = datetime.utcnow() - timedelta(days=7)
+    joined = Response.__table__.join(Submission.__table__, r.submission_id == s.id)
+
+    return [
+        ('completed count (survey feed)', select(func.count()).where(s.survey_id == survey_id, s.is_complete.is_(True))),
+        ('user completed survey (duplicate check)', select(s.id).where(s.user_id == user_id, s.survey_id == survey_id, s.is_complete.is_(True)).limit(1)),
+        ('user completed count', select(func.count()).where(s.user_id == user_id, s.survey_id == survey_id, s.is_complete.is_(True))),
+        ('user completed surveys (feed)', select(s.survey_id).where(s.user_id == user_id, s.survey_id.in_(survey_ids), s.is_complete.is_(True)).distinct()),
+        ('survey submission count', select(func.count()).where(s.survey_id == survey_id)),
+        ('link submission count (quota)', select(func.count()).where(s.survey_id == survey_id, s.survey_link_id == link_id)),
+        ('latest submissions page', select(s.id, s.submitted_at).where(s.survey_id == survey_id).order_by(s.submitted_at.desc()).limit(20)),
+        ('submissions since (trends)', select(s.submitted_at).where(s.survey_id == survey_id, s.submitted_at >= since)),
+        ('daily counts (trends)', select(func.date(s.submitted_at), func.count()).where(s.survey_id == survey_id).group_by(func.date(s.submitted_at))),
+        ('responses for question', select(r.response_text).where(r.question_id == question_id)),
+        ('response count for question', select(func.count()).where(r.question_id == question_id)),
+        ('responses for submission batch', select(r.submission_id, r.question_id, r.response_text).where(r.submission_id.in_(submission_ids))),
+        ('response for submission+question', select(r.response_text).where(r.submission_id == submission_ids[0], r.question_id == question_id)),
+        ('answer distribution (report)', select(r.question_id, r.response_text, func.count()).select_from(joined).where(s.survey_id == survey_id).group_by(r.question_id, r.response_text)),
+        ('comparison by gender', select(r.question_id, r.response_text, s.gender, func.count()).select_from(joined).where(and_(s.survey_id == survey_id, s.is_complete.is_(True))).group_by(r.question_id, r.response_text, s.gender)),
+    ]
+
+
+def _analyze(connection):
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        connection.execute(text('ANALYZE'))
+    elif dialect == 'postgresql':
+        connection.execute(text('ANALYZE submissions'))
+        connection.execute(text('ANALYZE responses'))
+
+
+def _time_queries(connection, queries, repeat):
+    """Median latency in milliseconds per query name."""
+    timings = {}
+    for name, statement in queries:
+        connection.execute(statement).fetchall()  # Warm up caches
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            connection.execute(statement).fetchall()
+            samples.append((time.perf_counter() - started) * 1000)
+        timings[name] = statistics.median(samples)
+    return timings
+
+
+def run_hot_query_benchmark(database_url, surveys=20, submissions_per_survey=2000, repeat=15, keep_data=False):
+    """
+    Seeds an empty database, times the hot queries without and with the hot-path
+    indexes and returns [(query name, before ms, after ms)].
+    """
+    engine = create_engine(database_url)
+    if inspect(engine).has_table(Submission.__tablename__):
+        raise click.ClickException(f"{database_url} already has a {Submission.__tablename__} table; use an empty database.")
+
+    hot_indexes = get_hot_path_indexes()
+    try:
+        db.metadata.create_all(engine)
+        with engine.begin() as connection:
+            for index in hot_indexes:
+                index.drop(bind=connection)
+            started = time.perf_counter()
+            seeded = _seed_benchmark_data(connection, surveys, submissions_per_survey)
+            logger.info(f"Seeded {surveys * submissions_per_survey} submissions in {time.perf_counter() - started:.1f}s")
+
+        with engine.connect() as connection:
+            _analyze(connection)
+            queries = _benchmark_queries(connection, *seeded)
+            before = _time_queries(connection, queries, repeat)
+            connection.commit()
+
+        with engine.begin() as connection:
+            for index in hot_indexes:
+                index.create(bind=connection)
+
+        with engine.connect() as connection:
+            _analyze(connection)
+            after = _time_queries(connection, queries, repeat)
+            connection.commit()
+
+        return [(name, before[name], after[name]) for name, _ in queries]
+    finally:
+        if not keep_data:
+            db.metadata.drop_all(engine)
+        engine.dispose()
+
+
+def create_hot_path_index_cli_commands(app):
+    """
+    Create CLI commands for creating and benchmarking the hot-path indexes.
+
+    Args:
+        app: Flask application instance
+    """
+    @app.cli.command('ensure-hot-path-indexes')
+    def ensure_hot_path_indexes_command():
+        """Create missing Submission/Response hot-path indexes."""
+        created = ensure_hot_path_indexes_job(app)
+        print(f"Created {len(created)} index(es): {', '.join(created) or 'none missing'}")
+
+    @app.cli.command('benchmark-hot-queries')
+    @click.option('--database-url', default=None, help='Empty database to seed (default: temporary SQLite file).')
+    @click.option('--surveys', type=int, default=20, show_default=True)
+    @click.option('--submissions', type=int, default=2000, show_default=True, help='Submissions per survey.')
+    @click.option('--repeat', type=int, default=15, show_default=True, help='Timed runs per query.')
+    @click.option('--keep-data', is_flag=True, help='Leave the seeded tables in place.')
+    def benchmark_hot_queries_command(database_url, surveys, submissions, repeat, keep_data):
+        """Time the top analytics/feed queries before and after the hot-path indexes."""
+        temp_path = None
+        if database_url is None:
+            fd, temp_path = tempfile.mkstemp(suffix='.db', prefix='hot_query_bench_')
+            os.close(fd)
+            database_url = f"sqlite:///{temp_path}"
+        elif database_url == app.config.get('SQLALCHEMY_DATABASE_URI'):
+            raise click.ClickException("Refusing to benchmark against the application database.")
+
+        try:
+            # A temporary database is simply deleted afterwards, no need to drop its tables
+            results = run_hot_query_benchmark(database_url, surveys, submissions, repeat, keep_data or temp_path is not None)
+        finally:
+            if temp_path and not keep_data:
+                os.remove(temp_path)
+
+        print(f"{'query':<42} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        for name, before_ms, after_ms in results:
+            speedup = before_ms / after_ms if after_ms else float('inf')
+            print(f"{name:<42} {before_ms:>10.2f} {after_ms:>10.2f} {speedup:>7.1f}x")
+
+    return ensure_hot_path_indexes_command, benchmark_hot_queries_command
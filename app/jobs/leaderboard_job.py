@@ -6,14 +6,91 @@ This job should be run periodically (e.g., every hour) via cron or task schedule
 """
 
 import logging
+import os
+import threading
+import uuid
 from datetime import datetime, timedelta
-from sqlalchemy import func, text
+from sqlalchemy import func, text, insert, update, delete
 from app.extensions import db
-from app.models import User, PointsLog, Badge, UserBadge
+from app.models import User, PointsLog
 from app.models.leaderboard_models import LeaderboardCache, LeaderboardSettings
+from app.utils.live_leaderboard import rebuild_live_leaderboard
+from app.utils.redis_client import get_redis
+from app.utils.badge_index import badge_index
 
 logger = logging.getLogger(__name__)
 
+LEADERBOARD_CACHE_SIZE = 500  # Cache more than we display
+LEADERBOARD_REFRESH_LOCK_SECONDS = int(os.environ.get('LEADERBOARD_REFRESH_LOCK_SECONDS', 600))
+_REFRESH_LOCK_KEY = "leaderboard:refresh_lock"
+_local_refresh_lock = threading.Lock()
+
+
+def _acquire_refresh_lock():
+    """
+    Token for the refresh lock, or None when another refresh holds it.
+    The lock lives in Redis so workers never rebuild in parallel; without Redis it is per process.
+    """
+    redis_client = get_redis()
+    if redis_client is not None:
+        token = uuid.uuid4().hex
+        try:
+            if redis_client.set(_REFRESH_LOCK_KEY, token, nx=True, ex=LEADERBOARD_REFRESH_LOCK_SECONDS):
+                return token
+            return None
+        except Exception as e:
+            logger.warning(f"Redis refresh lock unavailable, using process lock: {e}")
+    return 'local' if _local_refresh_lock.acquire(blocking=False) else None
+
+
+def _release_refresh_lock(token):
+    if token == 'local':
+        _local_refresh_lock.release()
+        return
+    redis_client = get_redis()
+    try:
+        # Only release our own lock; an expired one may already belong to another refresh
+        if redis_client is not None and redis_client.get(_REFRESH_LOCK_KEY) == token:
+            redis_client.delete(_REFRESH_LOCK_KEY)
+    except Exception as e:
+        logger.warning(f"Failed to release leaderboard refresh lock: {e}")
+
+
+def _sync_timeframe_cache(timeframe_name, results, generated_at):
+    """
+    Upsert the ranked ``results`` into LeaderboardCache for one timeframe, touching only rows
+    whose rank or XP changed and deleting users that dropped out.
+
+    Returns:
+        tuple: (inserted, updated, deleted)
+    """
+    existing = {
+        row.user_id: row for row in db.session.query(
+            LeaderboardCache.id, LeaderboardCache.user_id, LeaderboardCache.rank, LeaderboardCache.total_xp
+        ).filter(LeaderboardCache.timeframe == timeframe_name)
+    }
+
+    inserts, updates = [], []
+    for rank, result in enumerate(results, 1):
+        total_xp = int(result.total_xp)
+        row = existing.pop(result.user_id, None)
+        if row is None:
+            inserts.append({
+                'user_id': result.user_id, 'rank': rank, 'total_xp': total_xp,
+                'timeframe': timeframe_name, 'generated_at': generated_at
+            })
+        elif row.rank != rank or row.total_xp != total_xp:
+            updates.append({'id': row.id, 'rank': rank, 'total_xp': total_xp, 'generated_at': generated_at})
+
+    stale_ids = [row.id for row in existing.values()]
+    if stale_ids:
+        db.session.execute(delete(LeaderboardCache).where(LeaderboardCache.id.in_(stale_ids)))
+    if updates:
+        db.session.execute(update(LeaderboardCache), updates)
+    if inserts:
+        db.session.execute(insert(LeaderboardCache), inserts)
+    return len(inserts), len(updates), len(stale_ids)
+
 
 def update_leaderboard_cache_job(app=None):
     """
@@ -21,12 +98,20 @@ def update_leaderboard_cache_job(app=None):
     
     Args:
         app: Flask application instance (required for app context)
+        
+    Returns:
+        True on success, False on error, None when another refresh holds the lock
     """
     if app is None:
         logger.error("Flask app instance required for leaderboard cache job")
         return False
     
     with app.app_context():
+        lock_token = _acquire_refresh_lock()
+        if lock_token is None:
+            logger.info("Leaderboard cache refresh already running; skipping")
+            return None
+        
         try:
             logger.info("Starting leaderboard cache refresh job")
             
@@ -45,11 +130,8 @@ def update_leaderboard_cache_job(app=None):
                 'DAILY': datetime.utcnow() - timedelta(days=1)
             }
             
-            # Clear old cache entries
-            logger.info("Clearing old leaderboard cache")
-            LeaderboardCache.query.delete()
-            
-            total_entries_created = 0
+            generated_at = datetime.utcnow()
+            totals = {'inserted': 0, 'updated': 0, 'deleted': 0}
             
             for timeframe_name, start_date in timeframes.items():
                 logger.info(f"Processing timeframe: {timeframe_name}")
@@ -62,7 +144,7 @@ def update_leaderboard_cache_job(app=None):
                         User.total_xp_earned.label('total_xp')
                     ).filter(
                         User.total_xp_earned > 0  # Only include users with XP
-                    ).order_by(User.total_xp_earned.desc())
+                    ).order_by(User.total_xp_earned.desc(), User.id)
                 else:
                     # For time-limited periods, sum from PointsLog
                     query = db.session.query(
@@ -75,28 +157,16 @@ def update_leaderboard_cache_job(app=None):
                     
                     query = query.group_by(User.id).having(
                         func.coalesce(func.sum(PointsLog.points_awarded), 0) > 0
-                    ).order_by(func.sum(PointsLog.points_awarded).desc())
+                    ).order_by(func.sum(PointsLog.points_awarded).desc(), User.id)
                 
-                # Limit to top 500 users for performance (cache more than we display)
-                results = query.limit(500).all()
+                results = query.limit(LEADERBOARD_CACHE_SIZE).all()
                 
-                # Create cache entries
-                cache_entries = []
-                for rank, result in enumerate(results, 1):
-                    cache_entry = LeaderboardCache(
-                        user_id=result.user_id,
-                        rank=rank,
-                        total_xp=int(result.total_xp),
-                        timeframe=timeframe_name,
-                        generated_at=datetime.utcnow()
-                    )
-                    cache_entries.append(cache_entry)
-                
-                # Bulk insert for better performance
-                if cache_entries:
-                    db.session.bulk_save_objects(cache_entries)
-                    total_entries_created += len(cache_entries)
-                    logger.info(f"Created {len(cache_entries)} cache entries for {timeframe_name}")
+                # Diff against the cached ranks instead of clearing the table, so readers never see it empty
+                inserted, updated, deleted = _sync_timeframe_cache(timeframe_name, results, generated_at)
+                totals['inserted'] += inserted
+                totals['updated'] += updated
+                totals['deleted'] += deleted
+                logger.info(f"{timeframe_name}: {inserted} inserted, {updated} updated, {deleted} removed")
             
             # Update settings with last refresh time
             settings.last_cache_refresh = datetime.utcnow()
@@ -104,13 +174,29 @@ def update_leaderboard_cache_job(app=None):
             # Commit all changes
             db.session.commit()
             
-            logger.info(f"Leaderboard cache refresh completed successfully. Total entries: {total_entries_created}")
+            logger.info(f"Leaderboard cache refresh completed successfully. Changes: {totals}")
+            
+            # Seed the live Redis leaderboard if it is missing (e.g. after a Redis restart)
+            rebuild_live_leaderboard()
             return True
             
         except Exception as e:
             logger.error(f"Error updating leaderboard cache: {str(e)}", exc_info=True)
             db.session.rollback()
             return False
+        finally:
+            _release_refresh_lock(lock_token)
+
+
+def _badge_summary(badge):
+    if not badge:
+        return None
+    return {
+        'id': badge['id'],
+        'name': badge['name'],
+        'image_url': badge['image_url'],
+        'xp_threshold': badge['xp_threshold']
+    }
 
 
 def get_user_highest_badge(user_id):
@@ -129,26 +215,32 @@ def get_user_highest_badge(user_id):
         if not user:
             return None
         
-        # Find highest badge user is eligible for
-        highest_badge = Badge.query.filter(
-            Badge.xp_threshold <= user.total_xp_earned
-        ).order_by(Badge.xp_threshold.desc()).first()
-        
-        if highest_badge:
-            return {
-                'id': highest_badge.id,
-                'name': highest_badge.name,
-                'image_url': highest_badge.image_url,
-                'xp_threshold': highest_badge.xp_threshold
-            }
-        
-        return None
+        # Find highest badge user is eligible for in the cached threshold table
+        return _badge_summary(badge_index.highest(user.total_xp_earned))
         
     except Exception as e:
         logger.error(f"Error getting highest badge for user {user_id}: {str(e)}")
         return None
 
 
+def get_highest_badges(users):
+    """
+    Highest badge of each user from the cached threshold table.
+    
+    Args:
+        users: iterable of User objects (only id and total_xp_earned are read)
+        
+    Returns:
+        dict: {user_id: badge info or None}
+    """
+    users = list(users)
+    try:
+        return {user.id: _badge_summary(badge_index.highest(user.total_xp_earned)) for user in users}
+    except Exception as e:
+        logger.error(f"Error getting highest badges for {len(users)} users: {str(e)}")
+        return {user.id: None for user in users}
+
+
 def create_leaderboard_cli_command(app):
     """
     Create a CLI command for running the leaderboard cache refresh.
@@ -163,6 +255,8 @@ def create_leaderboard_cli_command(app):
         success = update_leaderboard_cache_job(app)
         if success:
             print("Leaderboard cache refreshed successfully!")
+        elif success is None:
+            print("A leaderboard cache refresh is already running.")
         else:
             print("Failed to refresh leaderboard cache. Check logs for details.")
             
@@ -8,6 +8,7 @@ import json # For JSON type handling if needed
 from enum import Enum
 import random
 from .extensions import db
+from .utils.submission_dimensions import COMPARISON_INDEXED_DIMENSIONS, comparison_index_name
 import secrets
 
 # Activity types for business activities and points tracking
@@ -311,7 +312,8 @@ class Survey(db.Model):
             "average_completion_time": round(avg_duration, 2) # Renamed for clarity
         }
 
-    def to_dict(self, include_questions=False):
+    def to_dict(self, include_questions=False, question_count=None, response_count=None):
+        # Callers listing many surveys can pass precomputed (grouped) counts to skip the per-survey COUNTs
         data = {
             "id": self.id,
             "title": self.title,
@@ -328,8 +330,8 @@ class Survey(db.Model):
             "branding": self.branding,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "question_count": self.questions.count(),
-            "response_count": self.submissions.filter_by(is_complete=True).count(),
+            "question_count": self.questions.count() if question_count is None else question_count,
+            "response_count": self.submissions.filter_by(is_complete=True).count() if response_count is None else response_count,
             "is_featured": self.is_featured,
         }
         if include_questions:
@@ -592,6 +594,11 @@ class Response(db.Model):
     response_time = db.Column(db.Integer, nullable=True)  # Time to answer in seconds
     sequence_in_submission = db.Column(db.Integer, nullable=True)  # Order in which answered
 
+    __table_args__ = (
+        db.Index('idx_response_question', 'question_id'),  # Per-question analytics
+        db.Index('idx_response_submission_question', 'submission_id', 'question_id'),  # Batch loads by submission
+    )
+
 class Submission(db.Model):
     __tablename__ = 'submissions'
 
@@ -618,6 +625,15 @@ class Submission(db.Model):
 
     responses = db.relationship('Response', backref='submission', lazy='dynamic', cascade="all, delete-orphan")
 
+    __table_args__ = (
+        db.Index('idx_submission_survey_submitted', 'survey_id', 'submitted_at'),  # Survey scans, trends, ordered exports
+        db.Index('idx_submission_survey_complete', 'survey_id', 'is_complete'),  # Completed-response counts
+        db.Index('idx_submission_user_survey_complete', 'user_id', 'survey_id', 'is_complete'),  # Duplicate/completion checks
+        db.Index('idx_submission_survey_link', 'survey_id', 'survey_link_id'),  # Per-link quotas
+        # Comparison / segment GROUP BYs within one survey
+        *[db.Index(comparison_index_name(dimension), 'survey_id', dimension) for dimension in COMPARISON_INDEXED_DIMENSIONS],
+    )
+
     def get_completion_percentage(self):
         """Calculate percentage of required questions answered"""
         survey = Survey.query.get(self.survey_id)
@@ -2812,13 +2828,14 @@ class SystemConfiguration(db.Model):
     
     @staticmethod
     def get_config(key, default=None):
-        """Get a configuration value by key"""
-        config = SystemConfiguration.query.filter_by(config_key=key).first()
-        return config.get_typed_value() if config else default
+        """Get a configuration value by key (served from the in-memory config registry)"""
+        from app.utils.config_registry import config_registry
+        return config_registry.get(key, default)
     
     @staticmethod
     def set_config(key, value, config_type='string', description=None, category='general'):
-        """Set a configuration value"""
+        """Set a configuration value; the commit bumps the config registry version"""
+        from app.utils.config_registry import config_registry  # noqa: F401 - registers the invalidation listeners
         config = SystemConfiguration.query.filter_by(config_key=key).first()
         if config:
             config.set_typed_value(value)
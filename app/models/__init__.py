@@ -45,6 +45,7 @@ __all__ = sorted(set(_public_exports + [name for name in globals() if not name.s
 
 
 # Import supplementary model modules so that SQLAlchemy registers them
+from .analytics_models import *  # noqa: F401,F403
 from .daily_reward_models import *  # noqa: F401,F403
 from .leaderboard_models import *  # noqa: F401,F403
 from .referral_models import *  # noqa: F401,F403
@@ -0,0 +1,113 @@
+# models/analytics_models.py
+"""
+Analytics Aggregate Models
+Pre-aggregated per-question and per-survey response statistics, kept up to
+date at submission time so unfiltered dashboards can read them without
+scanning raw Response rows.
+"""
+
+import math
+from datetime import datetime
+
+from ..extensions import db
+
+# Bucket used for the unfiltered (whole survey) aggregate rows.
+ALL_BUCKET_DIMENSION = 'all'
+ALL_BUCKET_VALUE = ''
+
+# Submission columns that get their own demographic buckets.
+AGGREGATE_DEMOGRAPHIC_DIMENSIONS = ['age_group', 'gender', 'location', 'education', 'company', 'cohort_tag']
+
+
+class QuestionAggregate(db.Model):
+    """
+    Running totals for one question within one demographic bucket.
+
+    option_counts maps an answer (or selected option) to its count.
+    cell_counts maps "row|col" (grids), "row|col|rating" (star grids) or
+    "item|rank" (ranking) to its count.
+    """
+    __tablename__ = 'question_aggregates'
+
+    id = db.Column(db.Integer, primary_key=True)
+    survey_id = db.Column(db.Integer, db.ForeignKey('surveys.id', ondelete='CASCADE'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False)
+    bucket_dimension = db.Column(db.String(30), nullable=False, default=ALL_BUCKET_DIMENSION)
+    bucket_value = db.Column(db.String(150), nullable=False, default=ALL_BUCKET_VALUE)
+
+    response_count = db.Column(db.Integer, nullable=False, default=0)
+    na_count = db.Column(db.Integer, nullable=False, default=0)
+
+    numeric_count = db.Column(db.Integer, nullable=False, default=0)
+    numeric_sum = db.Column(db.Float, nullable=False, default=0.0)
+    numeric_sum_sq = db.Column(db.Float, nullable=False, default=0.0)
+    numeric_min = db.Column(db.Float, nullable=True)
+    numeric_max = db.Column(db.Float, nullable=True)
+
+    option_counts = db.Column(db.JSON, nullable=True)
+    cell_counts = db.Column(db.JSON, nullable=True)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('question_id', 'bucket_dimension', 'bucket_value', name='uq_question_aggregate_bucket'),
+        db.Index('idx_question_aggregate_survey_bucket', 'survey_id', 'bucket_dimension', 'bucket_value'),
+    )
+
+    def to_dict(self):
+        mean = self.numeric_sum / self.numeric_count if self.numeric_count else None
+        std_dev = None
+        if self.numeric_count > 1:
+            variance = (self.numeric_sum_sq - self.numeric_count * mean * mean) / (self.numeric_count - 1)
+            std_dev = math.sqrt(max(variance, 0.0))
+        return {
+            'question_id': self.question_id,
+            'bucket_dimension': self.bucket_dimension,
+            'bucket_value': self.bucket_value,
+            'response_count': self.response_count,
+            'na_count': self.na_count,
+            'numeric': {
+                'count': self.numeric_count,
+                'sum': self.numeric_sum,
+                'mean': mean,
+                'std_dev': std_dev,
+                'min': self.numeric_min,
+                'max': self.numeric_max
+            } if self.numeric_count else None,
+            'option_counts': self.option_counts or {},
+            'cell_counts': self.cell_counts or {},
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class SurveyAggregate(db.Model):
+    """Submission-level running totals for one survey within one demographic bucket."""
+    __tablename__ = 'survey_aggregates'
+
+    id = db.Column(db.Integer, primary_key=True)
+    survey_id = db.Column(db.Integer, db.ForeignKey('surveys.id', ondelete='CASCADE'), nullable=False)
+    bucket_dimension = db.Column(db.String(30), nullable=False, default=ALL_BUCKET_DIMENSION)
+    bucket_value = db.Column(db.String(150), nullable=False, default=ALL_BUCKET_VALUE)
+
+    submission_count = db.Column(db.Integer, nullable=False, default=0)
+    complete_count = db.Column(db.Integer, nullable=False, default=0)
+    duration_count = db.Column(db.Integer, nullable=False, default=0)
+    duration_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('survey_id', 'bucket_dimension', 'bucket_value', name='uq_survey_aggregate_bucket'),
+    )
+
+    def to_dict(self):
+        return {
+            'survey_id': self.survey_id,
+            'bucket_dimension': self.bucket_dimension,
+            'bucket_value': self.bucket_value,
+            'total_responses': self.submission_count,
+            'completed_responses': self.complete_count,
+            'completion_rate': round(self.complete_count / self.submission_count * 100, 1) if self.submission_count else 0,
+            'average_duration': round(self.duration_sum / self.duration_count, 1) if self.duration_count else 0,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
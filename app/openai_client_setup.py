@@ -1,8 +1,14 @@
 import os
+import time
+import logging
+import threading
+from collections import namedtuple
 from openai import OpenAI
 import pathlib
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 # Instead of going three parents up, go two parents up.
 project_root = pathlib.Path(__file__).parent.parent  # This should point to 'backend/'
 env_path = project_root / '.env'
@@ -29,7 +35,8 @@ def initialize_openai_client():
     
     try:
         # Initialize the OpenAI client with the API key.
-        openai_client = OpenAI(api_key=OPENAI_API_KEY)
+        # OPENAI_BASE_URL (e.g. a local stub server) overrides the API endpoint.
+        openai_client = OpenAI(api_key=OPENAI_API_KEY, base_url=os.getenv("OPENAI_BASE_URL") or None)
         # Silently initialized - no console output
         return True
     except Exception as e:
@@ -77,4 +84,208 @@ assistant_env_vars = {
 for key, env_var in assistant_env_vars.items():
     if not essential_ids.get(key):
         # Silently skip - assistant IDs can be configured later
-        pass
\ No newline at end of file
+        pass
+
+
+# --- Shared call API for AI controllers ---------------------------------------------
+# Assistant runs are streamed, so a run finishes as soon as its last event
+# arrives instead of on the next fixed poll tick; when streaming is unavailable
+# the run is polled with exponential backoff. Blocking happens in socket reads
+# and time.sleep, which yield the greenlet under eventlet/gevent.
+
+AI_RUN_TIMEOUT = float(os.getenv("AI_RUN_TIMEOUT", 150))
+AI_POLL_INITIAL_INTERVAL = float(os.getenv("AI_POLL_INITIAL_INTERVAL", 0.25))
+AI_POLL_MAX_INTERVAL = float(os.getenv("AI_POLL_MAX_INTERVAL", 2.0))
+AI_USE_STREAMING = os.getenv("AI_USE_STREAMING", "true").lower() in ("1", "true", "yes")
+
+RUN_PENDING_STATUSES = ("queued", "in_progress", "cancelling")
+
+AIResult = namedtuple("AIResult", ["text", "latency", "input_tokens", "output_tokens", "mode", "call_id", "model"])
+
+
+class AIRunError(Exception):
+    """An assistant run ended in a non-completed state or no client is available."""
+    pass
+
+
+def require_openai_client():
+    """Get the OpenAI client or raise AIRunError when it cannot be initialized."""
+    client = get_openai_client()
+    if client is None:
+        raise AIRunError("Failed to get OpenAI client - API key may be missing")
+    return client
+
+
+def _usage_tokens(obj):
+    usage = getattr(obj, "usage", None)
+    if not usage:
+        return None, None
+    return getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)
+
+
+def _message_text(message):
+    content = getattr(message, "content", None)
+    if not content or not hasattr(content[0], "text") or not content[0].text.value:
+        return None
+    return content[0].text.value
+
+
+def _check_run(run):
+    if run.status == "completed":
+        return run
+    details = getattr(run, "last_error", None) or "No details provided."
+    logger.error(f"[AI CLIENT] Run {run.id} ended with status: {run.status}. Details: {details}")
+    if run.status == "requires_action":
+        raise AIRunError(f"Run requires action (Tool Call): {run.id}. Action details: {run.required_action}")
+    raise AIRunError(f"Run ended with status: {run.status}. Details: {details}")
+
+
+def _cancel_run(client, thread_id, run_id):
+    try:
+        client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+        logger.warning(f"[AI CLIENT] Cancelled timed-out run {run_id}")
+    except Exception as e:
+        logger.warning(f"[AI CLIENT] Could not cancel timed-out run {run_id}: {e}")
+
+
+def poll_run(thread_id, run_id, timeout=None):
+    """Wait for a run with exponential-backoff polling and return it once completed."""
+    client = require_openai_client()
+    timeout = timeout or AI_RUN_TIMEOUT
+    deadline = time.monotonic() + timeout
+    interval = AI_POLL_INITIAL_INTERVAL
+    while True:
+        run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
+        if run.status not in RUN_PENDING_STATUSES:
+            return _check_run(run)
+        if time.monotonic() + interval > deadline:
+            _cancel_run(client, thread_id, run_id)
+            raise TimeoutError(f"Run timed out after {timeout:.0f} seconds")
+        time.sleep(interval)
+        interval = min(interval * 2, AI_POLL_MAX_INTERVAL)
+
+
+def _stream_run(client, thread_id, assistant_id, deadline, run_kwargs, started_run):
+    """
+    Stream a run to completion; ``started_run`` receives the run id once the run exists.
+
+    The deadline is checked on every event, and a watchdog closes the stream when it
+    passes so a stream that stalls between events cannot outlive the timeout either.
+    """
+    remaining = max(1.0, deadline - time.monotonic())
+    timed_out = threading.Event()
+
+    def timeout_error():
+        if "id" in started_run:
+            _cancel_run(client, thread_id, started_run["id"])
+        return TimeoutError("Run timed out while streaming")
+
+    with client.beta.threads.runs.stream(
+        thread_id=thread_id, assistant_id=assistant_id, timeout=remaining, **run_kwargs
+    ) as stream:
+        def expire():
+            timed_out.set()
+            stream.close()
+
+        watchdog = threading.Timer(remaining, expire)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            for _event in stream:
+                if stream.current_run is not None:
+                    started_run["id"] = stream.current_run.id
+                if time.monotonic() > deadline:
+                    raise timeout_error()
+            if timed_out.is_set():
+                raise timeout_error()
+            run = stream.get_final_run()
+            messages = stream.get_final_messages()
+        except TimeoutError:
+            raise
+        except Exception:
+            if timed_out.is_set():
+                raise timeout_error()
+            raise
+        finally:
+            watchdog.cancel()
+    _check_run(run)
+    texts = [_message_text(m) for m in messages if getattr(m, "role", None) == "assistant"]
+    return run, next((t for t in reversed(texts) if t), None)
+
+
+def latest_assistant_text(thread_id):
+    """Text of the newest message on a thread if it is from the assistant, else None."""
+    client = require_openai_client()
+    msgs = client.beta.threads.messages.list(thread_id=thread_id, order="desc", limit=1)
+    if not msgs.data or msgs.data[0].role != "assistant":
+        return None
+    return _message_text(msgs.data[0])
+
+
+def run_assistant(thread_id, assistant_id, instructions=None, user_message=None, timeout=None):
+    """
+    Optionally post ``user_message``, run ``assistant_id`` on the thread and return its reply.
+
+    Returns:
+        AIResult: text is None when the assistant produced no text message.
+
+    Raises:
+        AIRunError: the run failed, was cancelled/expired or needs a tool call
+        TimeoutError: the run did not finish within ``timeout`` seconds (it is cancelled)
+    """
+    client = require_openai_client()
+    if user_message is not None:
+        client.beta.threads.messages.create(thread_id=thread_id, role="user", content=user_message)
+
+    run_kwargs = {"instructions": instructions} if instructions else {}
+    timeout = timeout or AI_RUN_TIMEOUT
+    started = time.monotonic()
+    deadline = started + timeout
+    run, text, mode = None, None, "stream"
+
+    if AI_USE_STREAMING:
+        started_run = {}
+        try:
+            run, text = _stream_run(client, thread_id, assistant_id, deadline, run_kwargs, started_run)
+        except (AIRunError, TimeoutError):
+            raise
+        except Exception as e:
+            logger.warning(f"[AI CLIENT] Streaming run failed on thread {thread_id}, falling back to polling: {e}")
+            if "id" in started_run:
+                # The run exists; keep waiting for it rather than starting a second one
+                mode = "poll"
+                run = poll_run(thread_id, started_run["id"], timeout=max(1.0, deadline - time.monotonic()))
+
+    if run is None:
+        mode = "poll"
+        run = client.beta.threads.runs.create(thread_id=thread_id, assistant_id=assistant_id, **run_kwargs)
+        run = poll_run(thread_id, run.id, timeout=max(1.0, deadline - time.monotonic()))
+
+    if text is None:
+        text = latest_assistant_text(thread_id)
+
+    latency = time.monotonic() - started
+    input_tokens, output_tokens = _usage_tokens(run)
+    logger.info(f"[AI CLIENT] Run {run.id} on thread {thread_id} completed in {latency:.2f}s via {mode}")
+    return AIResult(text, latency, input_tokens, output_tokens, mode, run.id, getattr(run, "model", None))
+
+
+def complete_chat(messages, model, client=None, timeout=None, **kwargs):
+    """
+    One chat completion through the shared client (the SDK retries transient errors with backoff).
+
+    Returns:
+        AIResult with the first choice's content.
+    """
+    client = client or require_openai_client()
+    started = time.monotonic()
+    completion = client.chat.completions.create(
+        model=model, messages=messages, timeout=timeout or AI_RUN_TIMEOUT, **kwargs
+    )
+    latency = time.monotonic() - started
+    input_tokens, output_tokens = _usage_tokens(completion)
+    logger.debug(f"[AI CLIENT] Chat completion {completion.id} ({model}) took {latency:.2f}s")
+    return AIResult(
+        completion.choices[0].message.content, latency, input_tokens, output_tokens,
+        "chat", completion.id, getattr(completion, "model", model)
+    )
@@ -16,21 +16,35 @@ from app.controllers.ai_controller import (
     quick_generate_survey_ai,
     guided_generate_survey_ai,
     generate_ai_report_insights,
+    get_cached_report_insights,
     get_eligible_questions_for_ai,
     auto_generate_survey_responses_ai,
     # --- END NEW IMPORTS ---
 )
 from app.controllers.auth_controller import token_required, admin_required, check_business_ai_points, get_points_for_response_generation, get_points_for_survey_creation, get_points_for_ai_chat_edit, get_points_for_ai_insights
 from app.controllers.business_controller import BusinessController
+from app.utils.rate_limiter import rate_limit, TOKEN_BUCKET
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
 ai_bp = Blueprint('ai_bp', __name__)
 
+# Per-user token bucket for endpoints that call the model: a short burst, then a steady per-minute rate
+AI_RATE_LIMIT_PER_MINUTE = int(os.environ.get('AI_RATE_LIMIT_PER_MINUTE', 10))
+AI_RATE_LIMIT_BURST = int(os.environ.get('AI_RATE_LIMIT_BURST', 5))
+
+ai_rate_limit = rate_limit(
+    max_attempts=AI_RATE_LIMIT_PER_MINUTE, window_minutes=1, key_prefix='ai',
+    algorithm=TOKEN_BUCKET, burst=AI_RATE_LIMIT_BURST,
+    error_message='Too many AI requests. Please wait a moment and try again.'
+)
+
 # --- Existing chat routes remain ---
 @ai_bp.route("/chat", methods=["POST"])
 @token_required
+@ai_rate_limit
 def chat_route():
     data = request.get_json() or {}
     result, status = chat_controller(data)
@@ -51,6 +65,7 @@ def create_new_chat_thread_route():
 # --- ADD NEW Survey Builder Routes ---
 @ai_bp.route("/quick_generate_survey", methods=["POST"])
 @token_required
+@ai_rate_limit
 @check_business_ai_points(get_points_for_survey_creation)
 def quick_generate_survey_route():
     """Quick survey generation using Celery async task"""
@@ -110,6 +125,7 @@ def quick_generate_survey_route():
 
 @ai_bp.route("/guided_generate_survey", methods=["POST"])
 @token_required
+@ai_rate_limit
 @check_business_ai_points(get_points_for_survey_creation)
 def guided_generate_survey_route():
     """Guided survey generation using Celery async task"""
@@ -190,6 +206,7 @@ def guided_generate_survey_route():
 # --- Existing Edit/Regenerate Routes ---
 @ai_bp.route("/edit_survey_ai", methods=["POST"])
 @token_required
+@ai_rate_limit
 def edit_survey_ai_route():
     data = request.get_json() or {}
     result, status = edit_survey_ai_controller(data)
@@ -197,6 +214,7 @@ def edit_survey_ai_route():
 
 @ai_bp.route("/ai_edit_question", methods=["POST"])
 @token_required
+@ai_rate_limit
 def ai_edit_question_route():
     data = request.get_json() or {}
     result, status = ai_edit_question_controller(data)
@@ -204,6 +222,7 @@ def ai_edit_question_route():
 
 @ai_bp.route("/continue_survey_conversation", methods=["POST"])
 @token_required
+@ai_rate_limit
 @check_business_ai_points(get_points_for_ai_chat_edit)
 def continue_survey_conversation_route():
     data = request.get_json() or {}
@@ -226,6 +245,7 @@ def continue_survey_conversation_route():
 
 @ai_bp.route("/regenerate_survey", methods=["POST"])
 @token_required
+@ai_rate_limit
 def regenerate_survey_route():
     data = request.get_json() or {}
     result, status = regenerate_survey_controller(data)
@@ -242,6 +262,7 @@ def ai_summary_route():
 
 @ai_bp.route("/converse_ai_summary", methods=["POST"])
 @token_required
+@ai_rate_limit
 def converse_ai_summary_route():
     data = request.get_json() or {}
     result, status = converse_ai_summary_controller(data)
@@ -260,6 +281,7 @@ def create_analytics_thread_route():
 # --- ADD NEW AI Insights Routes ---
 @ai_bp.route("/generate_report_insights", methods=["POST"])
 @token_required
+@ai_rate_limit
 @check_business_ai_points(get_points_for_ai_insights)
 def generate_report_insights_route():
     """AI insights generation using Celery async task"""
@@ -275,6 +297,11 @@ def generate_report_insights_route():
     
     if not survey_id or not selected_question_ids:
         return jsonify({"error": "survey_id and selected_question_ids are required"}), 400
+
+    # Same questions, filters and responses as an earlier report: answer directly, no task and no points
+    cached_report = get_cached_report_insights(survey_id, selected_question_ids, filters, comparison_settings)
+    if cached_report is not None:
+        return jsonify({**cached_report, 'cached': True}), 200
     
     # Create AI usage log
     log = create_ai_usage_log(
@@ -329,6 +356,7 @@ def get_eligible_questions_route(survey_id):
 
 @ai_bp.route("/surveys/<int:survey_id>/auto_generate_responses", methods=["POST"])
 @token_required
+@ai_rate_limit
 @check_business_ai_points(get_points_for_response_generation)
 def auto_generate_responses_route(survey_id):
     """
@@ -5,13 +5,29 @@ from ..controllers.auth_controller import AuthController, token_required, admin_
 from ..models import db, Business, BusinessAudience, SurveyAudience, Survey, User, Admin
 from datetime import datetime, timedelta
 import uuid
+import hashlib
 from functools import wraps
 import logging
 from ..controllers.business_controller import BusinessController, _check_audience_rules
+from ..utils.rate_limiter import rate_limit
 
 auth_bp = Blueprint('auth', __name__)
 logger = logging.getLogger(__name__)
 
+def _login_attempt_identity():
+    """Client IP plus the submitted login identifier, so clients behind one proxy address don't share a bucket."""
+    data = request.get_json(silent=True) or {}
+    identifier = str(data.get('username') or data.get('email') or '').strip().lower()
+    return f"ip:{request.remote_addr}:login:" + hashlib.sha256(identifier.encode('utf-8')).hexdigest()[:16]
+
+
+# Brute-force protection for the credential endpoints, per client IP and account
+# (set PROXY_FIX_X_FOR behind a proxy so remote_addr is the real client)
+login_rate_limit = rate_limit(
+    max_attempts=20, window_minutes=15, key_prefix='auth_login', key_by=_login_attempt_identity,
+    error_message='Too many login attempts. Please try again later.'
+)
+
 # ===== AUTHENTICATION ROUTES =====
 
 @auth_bp.route('/register', methods=['POST'])
@@ -73,6 +89,7 @@ def register_admin_route():
     return jsonify(result), status
 
 @auth_bp.route('/login', methods=['POST'])
+@login_rate_limit
 def login():
     data = request.json
     if not data:
@@ -82,6 +99,7 @@ def login():
     return jsonify(result), status
 
 @auth_bp.route('/login-passkey', methods=['POST'])
+@login_rate_limit
 def login_passkey_route():
     data = request.json
     if not data or 'email' not in data or 'passkey' not in data:
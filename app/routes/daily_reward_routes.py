@@ -69,7 +69,8 @@ def get_daily_reward_state():
 
 @daily_reward_bp.route('/daily-rewards/claim', methods=['POST'])
 @token_required
-@rate_limit(max_attempts=10, window_minutes=60)  # SECURITY: Max 10 attempts per hour
+@rate_limit(max_attempts=10, window_minutes=60, key_prefix='daily_reward',
+            error_message='Too many claim attempts. Please try again in a few minutes.')  # SECURITY: Max 10 attempts per hour
 def claim_daily_reward():
     """
     Claim the reward for the current day.
@@ -1,9 +1,8 @@
 # live_responses_bp.py
-from flask import Blueprint, request, jsonify, send_file, current_app # Added current_app
+from flask import Blueprint, Response, request, jsonify, send_file, current_app, stream_with_context
 from app.controllers.live_responses_controller import LiveResponsesController
 from flask_cors import cross_origin
 from app.routes.auth import token_required
-import io
 
 live_responses_bp = Blueprint('live_responses', __name__)
 
@@ -104,26 +103,20 @@ def export_responses(survey_id):
         elif isinstance(result, tuple) and len(result) == 3:
             file_stream, mimetype, filename = result
 
-            # Ensure the stream is BytesIO for send_file
-            if isinstance(file_stream, io.StringIO):
-                # Encode StringIO to BytesIO
-                output_bytes = io.BytesIO(file_stream.getvalue().encode('utf-8'))
-                file_stream.close() # Close the original StringIO
-                file_stream_to_send = output_bytes
-            elif isinstance(file_stream, io.BytesIO):
-                file_stream_to_send = file_stream
-            else:
-                 current_app.logger.error(f"Export for survey {survey_id} returned unexpected stream type: {type(file_stream)}")
-                 return jsonify({"error": "Internal server error generating file stream."}), 500
-
-            # Ensure stream position is at the beginning
-            file_stream_to_send.seek(0)
-
-            return send_file(
-                file_stream_to_send,
+            if hasattr(file_stream, 'read'):
+                # Spooled file (xlsx); send_file closes it, which deletes the temp file
+                return send_file(
+                    file_stream,
+                    mimetype=mimetype,
+                    as_attachment=True,
+                    download_name=filename # Use attachment_filename for Flask < 2.0
+                )
+
+            # Generator (csv): rows are queried while streaming, so keep the request context alive
+            return Response(
+                stream_with_context(file_stream),
                 mimetype=mimetype,
-                as_attachment=True,
-                download_name=filename # Use attachment_filename for Flask < 2.0
+                headers={"Content-Disposition": f'attachment; filename="{filename}"'}
             )
         else:
             # Handle unexpected return format from controller
@@ -179,21 +179,25 @@ def admin_send_bulk_notification():
             return jsonify({'error': 'Missing notification data.'}), 400
 
         # Validate required fields
-        required_fields = ['user_ids', 'title', 'message']
+        required_fields = ['title', 'message']
         for field in required_fields:
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
 
-        user_ids = data['user_ids']
+        # Either an explicit user_ids list or an audience segment resolved in SQL
+        user_ids = data.get('user_ids')
+        audience = data.get('audience')
         title = data['title']
         message = data['message']
         notification_type = data.get('notification_type')
 
-        if not isinstance(user_ids, list) or len(user_ids) == 0:
+        if audience is None and (not isinstance(user_ids, list) or len(user_ids) == 0):
             return jsonify({'error': 'user_ids must be a non-empty list'}), 400
+        if audience is not None and not isinstance(audience, dict):
+            return jsonify({'error': 'audience must be an object'}), 400
 
         result, status_code = send_bulk_notification(
-            current_admin.id, user_ids, title, message, notification_type
+            current_admin.id, user_ids, title, message, notification_type, audience=audience
         )
         return jsonify(result), status_code
         
@@ -201,6 +205,29 @@ def admin_send_bulk_notification():
         logger.error(f"Error sending bulk notification: {e}")
         return jsonify({'error': str(e)}), 500
 
+@admin_notification_bp.route('/send-bulk/<task_id>', methods=['GET'])
+@token_required
+@admin_required
+def admin_get_bulk_notification_status(task_id):
+    """Progress of a background bulk notification (Admin only)"""
+    try:
+        from celery.result import AsyncResult
+        from celery_config import celery_app
+
+        task_result = AsyncResult(task_id, app=celery_app)
+        response = {'task_id': task_id, 'status': task_result.state}
+        if task_result.state == 'PROGRESS':
+            response['progress'] = task_result.info
+        elif task_result.state == 'FAILURE':
+            response['error'] = str(task_result.info)
+        elif task_result.successful():
+            response['result'] = task_result.result
+        return jsonify(response), 200
+
+    except Exception as e:
+        logger.error(f"Error getting bulk notification status: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @admin_notification_bp.route('/stats', methods=['GET'])
 @token_required
 @admin_required
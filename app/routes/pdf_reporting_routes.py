@@ -1,6 +1,10 @@
 # app/routes/pdf_reporting_routes.py
-from flask import Blueprint, request, jsonify, send_file, current_app
+import os
+from flask import Blueprint, request, jsonify, send_file, current_app, g
 from app.controllers.report_tab_controller import ReportTabController
+from app.controllers.auth_controller import token_optional
+from app.models import Survey
+from app.controllers.response_aggregate_controller import ResponseAggregateController
 # Remove flask_login import
 # from flask_login import login_required
 
@@ -26,6 +30,13 @@ def get_report_data_route(survey_id):
     result, status = ReportTabController.get_report_data(survey_id, filters, comparison)
     return jsonify(result), status
 
+@pdf_reporting_bp.route('/report-cache/stats', methods=['GET'])
+# @login_required # Removed
+def get_report_cache_stats_route():
+    """Get hit/miss statistics of the report-data cache."""
+    result, status = ReportTabController.get_report_cache_stats()
+    return jsonify(result), status
+
 @pdf_reporting_bp.route('/surveys/<int:survey_id>/report/filtered-count', methods=['POST'])
 # @login_required # Removed
 def get_filtered_count_route(survey_id):
@@ -47,6 +58,15 @@ def get_segment_counts_route(survey_id):
     result, status = ReportTabController.get_segment_counts(survey_id, dimension, base_filters)
     return jsonify(result), status
 
+@pdf_reporting_bp.route('/surveys/<int:survey_id>/report/aggregates', methods=['GET'])
+# @login_required # Removed
+def get_report_aggregates_route(survey_id):
+    """Get pre-aggregated (unfiltered or per demographic bucket) analytics."""
+    dimension = request.args.get('dimension', 'all')
+    value = request.args.get('value')
+    result, status = ResponseAggregateController.get_survey_aggregates(survey_id, dimension, value)
+    return jsonify(result), status
+
 # --- Settings Routes (Default View - No Auth) ---
 
 @pdf_reporting_bp.route('/surveys/<int:survey_id>/report/settings', methods=['GET'])
@@ -106,10 +126,17 @@ def delete_view_route(survey_id, view_identifier):
 
 @pdf_reporting_bp.route('/surveys/<int:survey_id>/report/export-excel', methods=['POST'])
 # @login_required # Removed
+@token_optional
 def export_excel_route(survey_id):
-    """Export filtered raw data to Excel."""
+    """
+    Export filtered raw data to Excel.
+    With {"async": true} the export is queued as a Celery task and 202 is returned;
+    progress arrives on the task_status websocket channel.
+    """
     data = request.get_json() or {}
     filters = data.get('filters')
+    if data.get('async'):
+        return _enqueue_excel_export(survey_id, filters)
     try:
         file_stream, mimetype, filename = ReportTabController.export_excel_report(survey_id, filters)
         return send_file(
@@ -122,4 +149,91 @@ def export_excel_route(survey_id):
         return jsonify({"error": str(ve)}), 404
     except Exception as e:
         current_app.logger.error(f"Excel export route failed for survey {survey_id}: {e}", exc_info=True)
-        return jsonify({"error": "Failed to generate Excel export", "details": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to generate Excel export", "details": str(e)}), 500
+
+
+def _enqueue_excel_export(survey_id, filters):
+    from app.tasks.export_tasks import generate_report_excel_export_task, DOWNLOAD_URL_TEMPLATE
+
+    if not Survey.query.get(survey_id):
+        return jsonify({"error": "Survey not found"}), 404
+    current_user = getattr(g, 'current_user', None)
+    try:
+        task = generate_report_excel_export_task.delay(
+            survey_id=survey_id,
+            filters=filters,
+            user_id=current_user.id if current_user else None
+        )
+    except Exception as e:
+        current_app.logger.error(f"Failed to queue Excel export for survey {survey_id}: {e}", exc_info=True)
+        return jsonify({"error": "Failed to queue Excel export", "details": str(e)}), 503
+    return jsonify({
+        'task_id': task.id,
+        'status': 'processing',
+        'status_url': f"/pdf-reporting/report-exports/{task.id}",
+        'download_url': DOWNLOAD_URL_TEMPLATE.format(export_id=task.id),
+        'message': 'Excel export started. You will be notified when it is ready.'
+    }), 202
+
+
+def _export_task_result(export_id):
+    """Celery AsyncResult for an export, or None when the result backend is unavailable."""
+    try:
+        from celery.result import AsyncResult
+        from celery_config import celery_app
+        return AsyncResult(export_id, app=celery_app)
+    except Exception as e:
+        current_app.logger.warning(f"Could not load Celery result for export {export_id}: {e}")
+        return None
+
+
+@pdf_reporting_bp.route('/report-exports/<export_id>', methods=['GET'])
+# @login_required # Removed
+def get_excel_export_status_route(export_id):
+    """Status of a background Excel export."""
+    try:
+        file_path = ReportTabController.get_export_path(export_id)
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    response = {'task_id': export_id, 'ready': os.path.exists(file_path)}
+    task_result = _export_task_result(export_id)
+    if task_result is not None:
+        response['status'] = task_result.state
+        if task_result.state == 'PROGRESS':
+            response['progress'] = task_result.info
+        elif task_result.state == 'FAILURE':
+            response['error'] = str(task_result.info)
+        elif task_result.successful():
+            response['result'] = task_result.result
+    if response['ready']:
+        response['download_url'] = f"/pdf-reporting/report-exports/{export_id}/download"
+    return jsonify(response), 200
+
+
+@pdf_reporting_bp.route('/report-exports/<export_id>/download', methods=['GET'])
+# @login_required # Removed
+def download_excel_export_route(export_id):
+    """Serve a finished export; supports Range/If-Range so interrupted downloads can resume."""
+    try:
+        file_path = ReportTabController.get_export_path(export_id)
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    if not os.path.exists(file_path):
+        return jsonify({"error": "Export not found or not finished yet"}), 404
+
+    download_name = f"report_export_{export_id}.xlsx"
+    task_result = _export_task_result(export_id)
+    try:
+        if task_result is not None and task_result.successful():
+            download_name = task_result.result.get('filename') or download_name
+    except Exception:
+        pass # Result backend unavailable; keep the fallback name
+
+    return send_file(
+        file_path,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        as_attachment=True,
+        download_name=download_name,
+        conditional=True # Adds ETag/Last-Modified and answers Range requests with 206
+    )
\ No newline at end of file
@@ -398,7 +398,8 @@ def chart_data(survey_id, question_id):
 def get_response_trends(survey_id):
     """Get response submission trends over time"""
     timeframe = request.args.get('timeframe', 'daily') # daily, weekly, monthly, hourly
-    result, status = ResponseController.get_response_trends(survey_id, timeframe)
+    since = request.args.get('since') # Optional ISO cursor: only buckets from this one onward
+    result, status = ResponseController.get_response_trends(survey_id, timeframe, since)
     return jsonify(result), status
 
 # Question completion rate
@@ -0,0 +1,149 @@
+# app/services/insight_recovery_service.py
+"""
+Recovery of question insights missing from a truncated AI insights report.
+
+Missing questions are packed into batches that fit a prompt token budget and
+each batch is one stateless chat completion (assistant threads allow only
+one active run, so they cannot be used concurrently). Batches run on a
+bounded thread pool under an overall deadline; questions whose batch failed,
+timed out or came back incomplete are simply absent from the result and the
+caller falls back to its backend-only insight.
+"""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from app.openai_client_setup import complete_chat
+from app.utils.prompt_budget import compact_json, count_tokens
+
+logger = logging.getLogger(__name__)
+
+INSIGHT_RECOVERY_MODEL = os.getenv("AI_INSIGHT_RECOVERY_MODEL", "gpt-4o")
+INSIGHT_RECOVERY_BATCH_TOKENS = int(os.getenv("AI_INSIGHT_RECOVERY_BATCH_TOKENS", 6000))
+INSIGHT_RECOVERY_MAX_QUESTIONS = int(os.getenv("AI_INSIGHT_RECOVERY_MAX_QUESTIONS", 5))
+INSIGHT_RECOVERY_CONCURRENCY = int(os.getenv("AI_INSIGHT_RECOVERY_CONCURRENCY", 4))
+INSIGHT_RECOVERY_TIMEOUT = float(os.getenv("AI_INSIGHT_RECOVERY_TIMEOUT", 90))
+
+SYSTEM_PROMPT = (
+    "You are an expert survey data analyst. Use professional, business-appropriate language, "
+    "no emojis, and base every statement strictly on the data provided."
+)
+
+INSIGHT_FIELDS = (
+    "question_id, question_text, headline, summary, sample_size, "
+    "statistics { primary_metric, trend_direction, confidence_level }, "
+    "insights (array of strings), and chart_data { type, data[{category,value,percentage?}], title }"
+)
+
+
+def plan_batches(question_payloads, token_budget=None, max_questions=None, model=None):
+    """
+    Split ``[(qid, payload), ...]`` into batches whose serialized payloads fit ``token_budget``.
+    A question larger than the budget gets a batch of its own.
+    """
+    token_budget = token_budget or INSIGHT_RECOVERY_BATCH_TOKENS
+    max_questions = max_questions or INSIGHT_RECOVERY_MAX_QUESTIONS
+    model = model or INSIGHT_RECOVERY_MODEL
+    batches, current, current_tokens = [], [], 0
+    for qid, payload in question_payloads:
+        tokens = count_tokens(compact_json(payload), model)
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_questions):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append((qid, payload))
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_batch_messages(survey_title, global_sample_size, batch):
+    data = {
+        "survey_title": survey_title,
+        "global_sample_size": global_sample_size,
+        "questions": [payload for _, payload in batch],
+    }
+    user_prompt = (
+        "Analyze each of these survey questions separately. Return ONLY a JSON object of the form "
+        "{\"question_insights\": [...]} with one entry per question and these fields: "
+        f"{INSIGHT_FIELDS}.\n\n"
+        f"DATA:\n{compact_json(data)}"
+    )
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def _run_batch(client, survey_title, global_sample_size, batch, model, timeout):
+    result = complete_chat(
+        build_batch_messages(survey_title, global_sample_size, batch),
+        model,
+        client=client,
+        timeout=timeout,
+        response_format={"type": "json_object"},
+    )
+    data = json.loads(result.text or "{}")
+    entries = data.get("question_insights", []) if isinstance(data, dict) else []
+    wanted = {qid for qid, _ in batch}
+    insights = {}
+    for entry in entries:
+        if isinstance(entry, dict) and str(entry.get("question_id")) in wanted:
+            insights[str(entry["question_id"])] = entry
+    return insights, result
+
+
+def recover_missing_insights(client, survey_title, global_sample_size, question_payloads,
+                             model=None, concurrency=None, timeout=None):
+    """
+    Generate insights for ``[(qid, payload), ...]`` in concurrent, token-budgeted batches.
+
+    Returns:
+        tuple: ({qid: insight dict} for the questions that were recovered,
+                {'batches', 'failed_batches', 'input_tokens', 'output_tokens', 'elapsed'})
+    """
+    model = model or INSIGHT_RECOVERY_MODEL
+    timeout = timeout or INSIGHT_RECOVERY_TIMEOUT
+    batches = plan_batches(question_payloads, model=model)
+    recovered = {}
+    usage = {"batches": len(batches), "failed_batches": 0, "input_tokens": 0, "output_tokens": 0}
+    if not batches:
+        usage["elapsed"] = 0.0
+        return recovered, usage
+
+    started = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency or INSIGHT_RECOVERY_CONCURRENCY, len(batches))))
+    try:
+        futures = {
+            executor.submit(_run_batch, client, survey_title, global_sample_size, batch, model, timeout): batch
+            for batch in batches
+        }
+        done, not_done = wait(futures, timeout=timeout)
+        for future in done:
+            batch = futures[future]
+            try:
+                insights, result = future.result()
+            except Exception as e:
+                usage["failed_batches"] += 1
+                logger.warning(f"[AI INSIGHTS] Recovery batch {[qid for qid, _ in batch]} failed: {e}")
+                continue
+            recovered.update(insights)
+            usage["input_tokens"] += result.input_tokens or 0
+            usage["output_tokens"] += result.output_tokens or 0
+        for future in not_done:
+            future.cancel()
+            usage["failed_batches"] += 1
+            logger.warning(f"[AI INSIGHTS] Recovery batch {[qid for qid, _ in futures[future]]} missed the {timeout:.0f}s deadline")
+    finally:
+        # Do not wait for batches that missed the deadline; their results are discarded
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    usage["elapsed"] = round(time.monotonic() - started, 2)
+    logger.info(
+        f"[AI INSIGHTS] Recovered {len(recovered)}/{len(question_payloads)} missing insights in "
+        f"{len(batches)} batches ({usage['failed_batches']} failed) in {usage['elapsed']}s"
+    )
+    return recovered, usage
@@ -0,0 +1,181 @@
+# app/services/notification_fanout_service.py
+"""
+Bulk notification fan-out.
+
+The audience (explicit user ids, all active users, users with a profile tag or
+the users of a business) is resolved in SQL and walked in primary-key order one
+chunk at a time. Each chunk is written with a single executemany
+INSERT ... RETURNING and committed before its websocket events are emitted, so
+a broadcast never builds one ORM object per recipient or holds one huge
+transaction open.
+"""
+
+import logging
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import func, insert, or_, select
+
+from app.models import db, User, Notification, NotificationType, NotificationStatus
+from app.utils.json_sql import json_array_contains_any
+
+logger = logging.getLogger(__name__)
+
+BULK_NOTIFICATION_CHUNK_SIZE = int(os.environ.get('BULK_NOTIFICATION_CHUNK_SIZE', 1000))
+# Audiences up to this size are sent inside the request; larger ones go to Celery
+BULK_NOTIFICATION_SYNC_LIMIT = int(os.environ.get('BULK_NOTIFICATION_SYNC_LIMIT', 500))
+
+AUDIENCE_TYPES = ('users', 'all', 'tag', 'business')
+_TAG_COLUMNS = (User.interests, User.owned_devices, User.memberships)
+
+
+def normalize_audience(audience=None, user_ids=None):
+    """
+    Validated, JSON-serializable audience spec (it is passed to the Celery task as-is).
+
+    Accepts ``{'type': 'all'}``, ``{'type': 'tag', 'tag_ids': [...]}``,
+    ``{'type': 'business', 'business_id': id}`` or an explicit ``user_ids`` list.
+    Raises ValueError for anything else.
+    """
+    if not audience:
+        if not isinstance(user_ids, list) or not user_ids:
+            raise ValueError('user_ids must be a non-empty list')
+        audience = {'type': 'users', 'user_ids': user_ids}
+
+    audience_type = audience.get('type')
+    if audience_type not in AUDIENCE_TYPES:
+        raise ValueError(f"audience type must be one of: {', '.join(AUDIENCE_TYPES)}")
+    try:
+        if audience_type == 'users':
+            ids = sorted({int(uid) for uid in audience.get('user_ids') or []})
+            if not ids:
+                raise ValueError('user_ids must be a non-empty list')
+            return {'type': 'users', 'user_ids': ids}
+        if audience_type == 'tag':
+            tag_ids = sorted({int(tid) for tid in audience.get('tag_ids') or []})
+            if not tag_ids:
+                raise ValueError('tag_ids must be a non-empty list')
+            return {'type': 'tag', 'tag_ids': tag_ids}
+        if audience_type == 'business':
+            return {'type': 'business', 'business_id': int(audience['business_id'])}
+    except (TypeError, KeyError):
+        raise ValueError(f"Invalid '{audience_type}' audience")
+    return {'type': 'all'}
+
+
+def _tag_list_contains_any(column, tag_ids):
+    """SQL predicate: a JSON list of ProfileTag ids contains any of ``tag_ids``."""
+    predicate = json_array_contains_any(column, tag_ids)
+    if predicate is None:
+        raise ValueError(f"Tag audiences are not supported on {db.engine.dialect.name}")
+    return predicate
+
+
+def audience_predicate(audience):
+    """WHERE clause on users for a normalized non-explicit audience."""
+    conditions = [User.is_active == True]  # noqa: E712
+    if audience['type'] == 'tag':
+        conditions.append(or_(*[_tag_list_contains_any(column, audience['tag_ids']) for column in _TAG_COLUMNS]))
+    elif audience['type'] == 'business':
+        conditions.append(User.business_id == audience['business_id'])
+    return conditions
+
+
+def count_audience(audience):
+    """Number of existing users the audience resolves to."""
+    if audience['type'] == 'users':
+        ids = audience['user_ids']
+        return sum(
+            db.session.execute(
+                select(func.count(User.id)).where(User.id.in_(ids[start:start + BULK_NOTIFICATION_CHUNK_SIZE]))
+            ).scalar() or 0
+            for start in range(0, len(ids), BULK_NOTIFICATION_CHUNK_SIZE)
+        )
+    return db.session.execute(select(func.count(User.id)).where(*audience_predicate(audience))).scalar() or 0
+
+
+def iter_audience_chunks(audience, chunk_size=None):
+    """Yield lists of existing user ids in id order, at most ``chunk_size`` at a time."""
+    chunk_size = chunk_size or BULK_NOTIFICATION_CHUNK_SIZE
+    if audience['type'] == 'users':
+        ids = audience['user_ids']
+        for start in range(0, len(ids), chunk_size):
+            existing = db.session.execute(
+                select(User.id).where(User.id.in_(ids[start:start + chunk_size])).order_by(User.id)
+            ).scalars().all()
+            if existing:
+                yield existing
+        return
+
+    # Keyset pagination keeps every page an index range scan, however far into the table
+    conditions = audience_predicate(audience)
+    last_id = 0
+    while True:
+        chunk = db.session.execute(
+            select(User.id).where(*conditions, User.id > last_id).order_by(User.id).limit(chunk_size)
+        ).scalars().all()
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1]
+
+
+def fan_out_notification(admin_id, audience, title, message, notification_type=None,
+                         chunk_size=None, progress=None):
+    """
+    Insert and emit one notification per audience member, chunk by chunk.
+
+    Args:
+        audience: spec from normalize_audience
+        progress: optional callable(sent, total) invoked after each committed chunk
+
+    Returns:
+        dict: {'notification_count', 'chunks', 'elapsed'}
+    """
+    started = time.monotonic()
+    total = count_audience(audience)
+    created_at = datetime.utcnow()
+    shared = {
+        'title': title,
+        'message': message,
+        'notification_type': notification_type or NotificationType.GENERAL_ANNOUNCEMENT.value,
+        'status': NotificationStatus.UNREAD.value,
+        'sent_by_admin_id': admin_id,
+        'created_at': created_at,
+    }
+    # Matches Notification.to_dict for every row of the broadcast
+    payload_template = {
+        **shared,
+        'marketplace_item_id': None,
+        'purchase_id': None,
+        'created_at': created_at.isoformat(),
+        'read_at': None,
+    }
+
+    emit_batch = None
+    try:
+        from app.websocket_manager import emit_notification_batch as emit_batch
+    except ImportError:
+        logger.warning("[BULK_NOTIFY] WebSocket manager not available. Real-time notifications disabled.")
+
+    sent, chunks = 0, 0
+    for user_ids in iter_audience_chunks(audience, chunk_size):
+        inserted = db.session.execute(
+            insert(Notification).returning(Notification.id, Notification.user_id),
+            [{**shared, 'user_id': user_id} for user_id in user_ids]
+        ).all()
+        db.session.commit()
+        sent += len(inserted)
+        chunks += 1
+
+        if emit_batch is not None:
+            emit_batch([{**payload_template, 'id': row.id, 'user_id': row.user_id} for row in inserted])
+        if progress is not None:
+            progress(sent, max(total, sent))
+
+    elapsed = round(time.monotonic() - started, 2)
+    logger.info(f"[BULK_NOTIFY] Sent '{title}' to {sent} users in {chunks} chunks in {elapsed}s")
+    return {'notification_count': sent, 'chunks': chunks, 'elapsed': elapsed}
@@ -0,0 +1,308 @@
+# app/services/respondent_generation_service.py
+"""
+Synthetic survey respondents for ``auto_generate_survey_responses_ai``.
+
+Every respondent is one chat completion that answers the whole survey as a
+JSON object keyed by question sequence number, and respondents are
+generated concurrently by a bounded thread pool. Answers that need no model
+(signatures, upload metadata, questions without options) are filled in
+locally. Setting OPENAI_BASE_URL points the client at a local stub server.
+"""
+
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from app.openai_client_setup import complete_chat
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_GENERATION_MODEL = os.getenv("AI_RESPONSE_GENERATION_MODEL", "gpt-4o-mini")
+RESPONSE_GENERATION_CONCURRENCY = int(os.getenv("AI_RESPONSE_GENERATION_CONCURRENCY", 5))
+RESPONSE_GENERATION_MAX_ATTEMPTS = int(os.getenv("AI_RESPONSE_GENERATION_MAX_ATTEMPTS", 2))
+RESPONSE_GENERATION_TIMEOUT = float(os.getenv("AI_RESPONSE_GENERATION_TIMEOUT", 60))
+
+CONTENT_QUESTION_TYPES = ("content-text", "content-media")
+LIST_ANSWER_TYPES = ("checkbox", "multi-choice", "multiple-image-select")
+# ResponseController.build_response_fields JSON-encodes dict answers of these types itself
+DICT_ANSWER_TYPES = ("interactive-ranking", "star-rating-grid")
+
+SYSTEM_PROMPT = (
+    "You simulate one survey respondent answering a whole survey. "
+    "Give varied, realistic answers as a distinct person with a plausible persona. "
+    "Follow each question's answer_format exactly. "
+    "Reply with a JSON object of the form {\"answers\": {\"<id>\": <answer>, ...}} "
+    "containing an answer for every question id and nothing else."
+)
+
+_DOCUMENT_MIME_TYPES = {
+    "pdf": "application/pdf", "doc": "application/msword",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "png": "image/png", "jpg": "image/jpeg", "txt": "text/plain",
+}
+_SIGNATURE_FONTS = ["Dancing Script", "Great Vibes", "Pacifico", "Satisfy", "Sacramento", "Allura"]
+
+
+def _option_texts(options):
+    texts = [opt.get("text") if isinstance(opt, dict) else str(opt) for opt in options or []]
+    return [t for t in texts if t]
+
+
+def _labels(items):
+    return [item.get("text") for item in items or [] if isinstance(item, dict) and item.get("text")]
+
+
+def _answer_format(question):
+    """
+    Instruction for one question, or ('fixed', value) when the answer does not need the model.
+    Mirrors the per-type rules of the original one-question-per-run prompts.
+    """
+    q_type = question.get("question_type")
+
+    if q_type in ("single-choice", "dropdown"):
+        options = _option_texts(question.get("options"))
+        if not options:
+            return "fixed", "AI: No options provided"
+        return "ai", f"Choose exactly one of {json.dumps(options)}; answer with the option text."
+
+    if q_type in ("multi-choice", "checkbox"):
+        options = _option_texts(question.get("options"))
+        if not options:
+            return "fixed", []
+        return "ai", f"Choose one or more of {json.dumps(options)}; answer with a JSON array of option texts ([] for none)."
+
+    if q_type == "open-ended":
+        return "ai", "Answer with a brief, realistic text."
+
+    if q_type in ("rating", "nps", "star-rating"):
+        min_val = question.get("rating_start", 0 if q_type == "nps" else 1)
+        max_val = question.get("rating_end", 10 if q_type == "nps" else 5)
+        return "ai", f"Answer with an integer rating between {min_val} and {max_val}."
+
+    if q_type == "numerical-input":
+        min_val = question.get("min_value", "-infinity")
+        max_val = question.get("max_value", "+infinity")
+        return "ai", f"Answer with a number. Min: {min_val}, Max: {max_val}."
+
+    if q_type == "email-input":
+        return "ai", "Answer with a realistic but fake email address at example.com."
+
+    if q_type == "date-picker":
+        return "ai", "Answer with a realistic date in YYYY-MM-DD format."
+
+    if q_type in ("single-image-select", "multiple-image-select"):
+        image_options = [opt for opt in question.get("image_options") or [] if isinstance(opt, dict) and opt.get("hidden_label")]
+        if not image_options:
+            return "fixed", "AI: No image options" if q_type == "single-image-select" else []
+        choices = {opt["hidden_label"]: opt.get("label", opt["hidden_label"]) for opt in image_options}
+        if q_type == "single-image-select":
+            return "ai", f"Image options as {{id: visible label}}: {json.dumps(choices)}. Choose one by its label; answer with its id."
+        return "ai", f"Image options as {{id: visible label}}: {json.dumps(choices)}. Choose one or more by label; answer with a JSON array of their ids."
+
+    if q_type == "interactive-ranking":
+        items = _labels(question.get("ranking_items"))
+        if not items:
+            return "fixed", {}
+        return "ai", (f"Rank all of {json.dumps(items)} from 1 (most preferred) to {len(items)}; "
+                      "answer with a JSON object mapping each item text to its integer rank.")
+
+    if q_type == "scale":
+        points = question.get("scale_points") or []
+        if not points:
+            return "fixed", "AI: No scale points provided"
+        return "ai", f"Choose one of {json.dumps(points)}; answer with the scale point text."
+
+    if q_type in ("radio-grid", "checkbox-grid"):
+        rows, cols = _labels(question.get("grid_rows")), _labels(question.get("grid_columns"))
+        if not rows or not cols:
+            return "fixed", {}
+        if q_type == "radio-grid":
+            return "ai", (f"Grid rows {json.dumps(rows)}, columns {json.dumps(cols)}. For each row choose one column; "
+                          "answer with a JSON object mapping row label to column label.")
+        return "ai", (f"Grid rows {json.dumps(rows)}, columns {json.dumps(cols)}. For each row choose one or more columns; "
+                      "answer with a JSON object mapping row label to a JSON array of column labels.")
+
+    if q_type == "star-rating-grid":
+        rows = _labels(question.get("grid_rows"))
+        if not rows:
+            return "fixed", {}
+        return "ai", (f"Rows {json.dumps(rows)}. Rate each row from 1 to 5 stars or 'N/A'; "
+                      "answer with a JSON object mapping row label to {\"Rating\": <number or 'N/A'>}.")
+
+    logger.warning(f"[AI AUTO-RESPONSE] Question type '{q_type}' not fully handled for AI generation. Using generic prompt.")
+    return "ai", "Answer with a plausible short string."
+
+
+def build_question_plan(questions):
+    """
+    Split survey questions (SurveyController.get_survey dicts) into model and local answers.
+
+    Returns:
+        list of dicts: {'seq', 'type', 'text', 'mode': 'ai'|'fixed'|'local', 'format' or 'value'}
+    """
+    plan = []
+    for idx, question in enumerate(questions):
+        q_type = question.get("question_type")
+        if q_type in CONTENT_QUESTION_TYPES:
+            continue
+        entry = {
+            "seq": str(question.get("sequence_number", idx + 1)),
+            "type": q_type,
+            "text": question.get("question_text", "N/A"),
+            "question": question,
+        }
+        if q_type in ("signature", "document-upload"):
+            entry["mode"] = "local"
+        else:
+            mode, detail = _answer_format(question)
+            entry["mode"] = mode
+            entry["format" if mode == "ai" else "value"] = detail
+        plan.append(entry)
+    return plan
+
+
+def _local_answer(entry):
+    """Randomized answers for question types the model is never asked about."""
+    question = entry["question"]
+    if entry["type"] == "signature":
+        return json.dumps({
+            "type": "typed",
+            "name": f"AI User {random.randint(100, 999)}",
+            "font": random.choice(_SIGNATURE_FONTS),
+        })
+
+    allowed_exts = question.get("allowed_types") or ["pdf", "doc", "png"]
+    if isinstance(allowed_exts, str):
+        allowed_exts = [ext.strip() for ext in allowed_exts.split(",")]
+    documents = []
+    for d_idx in range(random.randint(1, min(2, question.get("max_files", 1) or 1))):
+        ext = random.choice(allowed_exts) if allowed_exts else "dat"
+        documents.append({
+            "name": f"ai_gen_doc_{d_idx + 1}.{ext}",
+            "url": f"placeholder/uploads/ai_gen_doc_{d_idx + 1}_{uuid.uuid4().hex[:8]}.{ext}",
+            "type": _DOCUMENT_MIME_TYPES.get(ext, "application/octet-stream"),
+            "size": random.randint(50000, 5000000),
+        })
+    return documents
+
+
+def normalize_answer(q_type, value):
+    """Shape a model answer the way submit payloads carry it (lists/dicts stay native where expected)."""
+    if isinstance(value, str) and (q_type in LIST_ANSWER_TYPES or q_type in DICT_ANSWER_TYPES):
+        try:
+            value = json.loads(value)
+        except (TypeError, ValueError):
+            pass
+    if q_type in LIST_ANSWER_TYPES:
+        values = value if isinstance(value, list) else [value]
+        return [str(v) for v in values if v is not None]
+    if q_type in DICT_ANSWER_TYPES and isinstance(value, dict):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value).strip().strip("\"'")
+
+
+def build_messages(plan, respondent_number):
+    questions = [
+        {"id": entry["seq"], "type": entry["type"], "question": entry["text"], "answer_format": entry["format"]}
+        for entry in plan if entry["mode"] == "ai"
+    ]
+    user_content = (
+        f"You are survey respondent #{respondent_number}; answer differently from other respondents.\n"
+        f"Questions:\n{json.dumps(questions, separators=(',', ':'))}"
+    )
+    return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": user_content}]
+
+
+def generate_respondent(client, plan, respondent_number, model=None):
+    """
+    Generate one complete respondent with a single completion.
+
+    Returns:
+        tuple: (respondent dict for ResponseController.create_generated_submissions, usage dict)
+
+    Raises:
+        ValueError: when the model's JSON misses answers or cannot be parsed
+    """
+    answers = {}
+    usage = {"input_tokens": 0, "output_tokens": 0}
+
+    if any(entry["mode"] == "ai" for entry in plan):
+        result = complete_chat(
+            build_messages(plan, respondent_number),
+            model or RESPONSE_GENERATION_MODEL,
+            client=client,
+            timeout=RESPONSE_GENERATION_TIMEOUT,
+            response_format={"type": "json_object"},
+            temperature=1.0,
+        )
+        usage = {"input_tokens": result.input_tokens or 0, "output_tokens": result.output_tokens or 0}
+        data = json.loads(result.text or "{}")
+        model_answers = data.get("answers", data) if isinstance(data, dict) else {}
+        missing = [entry["seq"] for entry in plan if entry["mode"] == "ai" and entry["seq"] not in model_answers]
+        if missing:
+            raise ValueError(f"Model response is missing answers for questions {missing}")
+        for entry in plan:
+            if entry["mode"] == "ai":
+                answers[entry["seq"]] = normalize_answer(entry["type"], model_answers[entry["seq"]])
+
+    for entry in plan:
+        if entry["mode"] == "fixed":
+            answers[entry["seq"]] = entry["value"]
+        elif entry["mode"] == "local":
+            answers[entry["seq"]] = _local_answer(entry)
+
+    respondent = {
+        "responses": answers,
+        "duration": random.randint(60, 600),
+        "user_agent": {"userAgent": "AI Bot Survey Filler", "deviceType": "Desktop", "browserInfo": "Chrome"},
+        "response_times": {seq: random.randint(5, 30) for seq in answers},
+    }
+    return respondent, usage
+
+
+def _generate_with_retries(client, plan, respondent_number, model):
+    last_error = None
+    for attempt in range(1, RESPONSE_GENERATION_MAX_ATTEMPTS + 1):
+        started = time.time()
+        try:
+            respondent, usage = generate_respondent(client, plan, respondent_number, model)
+            return {"index": respondent_number, "respondent": respondent, "usage": usage,
+                    "latency": time.time() - started, "error": None}
+        except Exception as e:
+            last_error = e
+            logger.warning(f"[AI AUTO-RESPONSE] Respondent {respondent_number} attempt {attempt} failed: {e}")
+            if attempt < RESPONSE_GENERATION_MAX_ATTEMPTS:
+                time.sleep(min(8, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0))
+    return {"index": respondent_number, "respondent": None, "usage": None, "latency": None,
+            "error": str(last_error)[:200]}
+
+
+def generate_respondents(client, plan, count, model=None, concurrency=None, progress_callback=None):
+    """
+    Generate ``count`` respondents with at most ``concurrency`` requests in flight.
+
+    Args:
+        client: OpenAI client (or any object with the same chat.completions API)
+        plan: Output of build_question_plan
+        progress_callback: Optional callable(done, total) invoked as respondents finish
+
+    Returns:
+        list of dicts ordered by respondent number: {'index', 'respondent', 'usage', 'latency', 'error'}
+    """
+    if count <= 0:
+        return []
+    workers = max(1, min(concurrency or RESPONSE_GENERATION_CONCURRENCY, count))
+    results = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-respondent") as pool:
+        futures = [pool.submit(_generate_with_retries, client, plan, number, model) for number in range(1, count + 1)]
+        for future in as_completed(futures):
+            results.append(future.result())
+            if progress_callback:
+                progress_callback(len(results), count)
+    return sorted(results, key=lambda r: r["index"])
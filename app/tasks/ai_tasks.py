@@ -198,7 +198,10 @@ def generate_survey_responses_task(self, survey_id, num_responses, user_id=None,
         with current_app.app_context():
             from app.controllers.ai_controller import auto_generate_survey_responses_ai
             
-            result, status = auto_generate_survey_responses_ai(survey_id, num_responses)
+            def report_progress(processed, total):
+                self.update_state(state='PROGRESS', meta={'processed': processed, 'total': total})
+
+            result, status = auto_generate_survey_responses_ai(survey_id, num_responses, progress_callback=report_progress)
             
             if status == 200:
                 logger.info(f"[CELERY] Response generation completed successfully")
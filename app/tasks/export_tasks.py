@@ -0,0 +1,86 @@
+"""
+Celery Tasks for Report Exports
+Builds large report_tab Excel exports outside the HTTP request and reports
+progress over the websocket task_status channel.
+"""
+import logging
+from celery_config import celery_app
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_URL_TEMPLATE = '/pdf-reporting/report-exports/{export_id}/download'
+
+
+def _emit_export_status(user_id, payload):
+    if not user_id:
+        return
+    from app.websocket_manager import emit_task_status
+    emit_task_status(user_id, payload)
+
+
+@celery_app.task(bind=True, name='app.tasks.export_tasks.generate_report_excel_export')
+def generate_report_excel_export_task(self, survey_id, filters=None, user_id=None):
+    """
+    Celery task for the report_tab Excel export.
+    The task id doubles as the export id used by the download route.
+    """
+    export_id = self.request.id
+    logger.info(f"[CELERY] Starting Excel export task {export_id} for survey {survey_id}")
+
+    def report_progress(processed, total):
+        percent = round(processed / total * 100) if total else 100
+        self.update_state(state='PROGRESS', meta={'processed': processed, 'total': total, 'percent': percent})
+        _emit_export_status(user_id, {
+            'task_id': export_id,
+            'type': 'report_excel_export',
+            'status': 'processing',
+            'progress': percent,
+            'message': f'Exporting responses ({processed}/{total})...'
+        })
+
+    try:
+        with current_app.app_context():
+            from app.controllers.report_tab_controller import ReportTabController
+
+            result = ReportTabController.build_excel_export_file(export_id, survey_id, filters, report_progress)
+            result['download_url'] = DOWNLOAD_URL_TEMPLATE.format(export_id=export_id)
+
+            _emit_export_status(user_id, {
+                'task_id': export_id,
+                'type': 'report_excel_export',
+                'status': 'completed',
+                'progress': 100,
+                'message': 'Excel export is ready to download.',
+                'result': result
+            })
+            logger.info(f"[CELERY] Excel export task {export_id} completed ({result['row_count']} rows)")
+            return {'success': True, **result}
+
+    except Exception as e:
+        logger.error(f"[CELERY] Error in generate_report_excel_export_task: {e}", exc_info=True)
+        _emit_export_status(user_id, {
+            'task_id': export_id,
+            'type': 'report_excel_export',
+            'status': 'failed',
+            'message': f'Excel export failed: {str(e)}'
+        })
+        raise
+
+
+@celery_app.task(name='app.tasks.export_tasks.cleanup_expired_exports')
+def cleanup_expired_exports_task():
+    """
+    Periodic task removing finished exports older than REPORT_EXPORT_RETENTION_HOURS.
+    """
+    try:
+        with current_app.app_context():
+            from app.controllers.report_tab_controller import ReportTabController
+
+            removed = ReportTabController.cleanup_expired_exports()
+            logger.info(f"[CELERY] Removed {removed} expired report exports")
+            return {'success': True, 'deleted_count': removed}
+
+    except Exception as e:
+        logger.error(f"[CELERY] Error in cleanup_expired_exports_task: {e}", exc_info=True)
+        raise
@@ -0,0 +1,37 @@
+"""
+Celery Tasks for Notifications
+Fans admin bulk notifications out to large audiences outside the HTTP request.
+"""
+import logging
+from celery_config import celery_app
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True, name='app.tasks.notification_tasks.send_bulk_notification')
+def send_bulk_notification_task(self, admin_id, audience, title, message, notification_type=None):
+    """
+    Celery task inserting and emitting one notification per audience member.
+    ``audience`` is a spec from notification_fanout_service.normalize_audience.
+    """
+    task_id = self.request.id
+    logger.info(f"[CELERY] Starting bulk notification task {task_id} ({audience['type']} audience)")
+
+    def report_progress(sent, total):
+        percent = round(sent / total * 100) if total else 100
+        self.update_state(state='PROGRESS', meta={'sent': sent, 'total': total, 'percent': percent})
+
+    try:
+        with current_app.app_context():
+            from app.services.notification_fanout_service import fan_out_notification
+
+            result = fan_out_notification(
+                admin_id, audience, title, message, notification_type, progress=report_progress
+            )
+            logger.info(f"[CELERY] Bulk notification task {task_id} sent {result['notification_count']} notifications")
+            return {'success': True, **result}
+
+    except Exception as e:
+        logger.error(f"[CELERY] Error in send_bulk_notification_task: {e}", exc_info=True)
+        raise
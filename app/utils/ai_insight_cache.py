@@ -0,0 +1,170 @@
+# app/utils/ai_insight_cache.py
+"""
+Content-addressed cache for AI report insights and summaries.
+
+An entry is keyed by a SHA-256 of everything that determines the AI output:
+the prompt template version, the selected question ids, the canonicalized
+filters and comparison settings and the survey's response watermark
+(submission count, latest submission id, survey ``updated_at``). A new or
+deleted submission or an edited survey moves the watermark, so stale
+entries are never read and need no explicit invalidation; they age out via
+the TTL and the LRU bound. Degraded outputs can be stored with a shorter TTL.
+
+Entries are kept in an in-process LRU + TTL and, with a real Redis, as JSON
+with the same TTL so every worker (and the Celery insights task) shares them.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import func
+
+from app.models import db, Submission, Survey
+from app.utils.redis_client import get_redis
+from app.utils.report_cache import canonicalize_filters
+
+logger = logging.getLogger(__name__)
+
+AI_INSIGHT_CACHE_MAX_ENTRIES = int(os.environ.get('AI_INSIGHT_CACHE_MAX_ENTRIES', 128))
+AI_INSIGHT_CACHE_TTL_SECONDS = int(os.environ.get('AI_INSIGHT_CACHE_TTL_SECONDS', 24 * 3600))
+# Reports patched up with synthesized insights are kept briefly, then the AI is retried
+AI_INSIGHT_CACHE_PARTIAL_TTL_SECONDS = int(os.environ.get('AI_INSIGHT_CACHE_PARTIAL_TTL_SECONDS', 600))
+
+_REDIS_KEY = "ai_insight_cache:{digest}"
+
+
+def survey_response_watermark(survey_id):
+    """(submission count, max submission id, survey updated_at) in one round trip."""
+    count, max_id, updated_at = db.session.query(
+        db.select(func.count(Submission.id)).where(Submission.survey_id == survey_id).scalar_subquery(),
+        db.select(func.max(Submission.id)).where(Submission.survey_id == survey_id).scalar_subquery(),
+        db.select(Survey.updated_at).where(Survey.id == survey_id).scalar_subquery(),
+    ).one()
+    return [count or 0, max_id or 0, updated_at.isoformat() if updated_at else None]
+
+
+def canonicalize_comparison_settings(comparison_settings):
+    """Stable form of the insights comparison spec; every "no comparison" variant maps to ''."""
+    if (not comparison_settings or comparison_settings.get("type") == "No Comparison"
+            or len(comparison_settings.get("segments") or []) < 2):
+        return ''
+    # Segment order decides how the prompt lists segments, so it is kept as-is.
+    return json.dumps({
+        "type": comparison_settings.get("type"),
+        "segments": [str(s) for s in comparison_settings.get("segments")]
+    }, sort_keys=True, separators=(',', ':'))
+
+
+def insight_cache_key(kind, template_version, survey_id, question_ids=None, filters=None,
+                      comparison_settings=None, watermark=None):
+    """Hex digest identifying one AI output; ``watermark`` defaults to the survey's current one."""
+    if watermark is None:
+        watermark = survey_response_watermark(survey_id)
+    material = json.dumps({
+        "kind": kind,
+        "template": template_version,
+        "survey_id": int(survey_id),
+        "questions": sorted({int(qid) for qid in question_ids or []}),
+        "filters": canonicalize_filters(filters),
+        "comparison": canonicalize_comparison_settings(comparison_settings),
+        "watermark": watermark,
+    }, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class AIInsightCache:
+    """Thread-safe LRU + TTL of AI outputs by content digest, with a Redis second tier."""
+
+    def __init__(self, max_entries=AI_INSIGHT_CACHE_MAX_ENTRIES, ttl_seconds=AI_INSIGHT_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # digest -> (expires_at, payload json)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'redis_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def _local_set(self, digest, payload, ttl_seconds):
+        with self._lock:
+            self._entries[digest] = (time.monotonic() + ttl_seconds, payload)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def get(self, digest):
+        """Cached entry dict ({'value', 'cost_info', 'created_at'}) or None; callers get their own copy."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[0] <= now:
+                del self._entries[digest]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                self._stats['hits'] += 1
+                return json.loads(entry[1])
+
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                redis_key = _REDIS_KEY.format(digest=digest)
+                payload = redis_client.get(redis_key)
+                if payload is not None:
+                    payload = payload.decode('utf-8') if isinstance(payload, bytes) else payload
+                    remaining = redis_client.ttl(redis_key)
+                    self._local_set(digest, payload, min(self.ttl_seconds, remaining if remaining and remaining > 0 else self.ttl_seconds))
+                    with self._lock:
+                        self._stats['redis_hits'] += 1
+                    return json.loads(payload)
+            except Exception as e:
+                logger.warning(f"[AI_INSIGHT_CACHE] Redis lookup failed for {digest[:12]}: {e}")
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def set(self, digest, value, cost_info=None, ttl_seconds=None):
+        """
+        Store a JSON-serializable AI output together with the cost of producing it.
+
+        ``ttl_seconds`` overrides the cache TTL (capped by it) for this entry.
+        """
+        ttl_seconds = min(ttl_seconds, self.ttl_seconds) if ttl_seconds else self.ttl_seconds
+        payload = json.dumps({
+            "value": value,
+            "cost_info": cost_info or {},
+            "created_at": datetime.utcnow().isoformat(),
+        }, default=str)
+        self._local_set(digest, payload, ttl_seconds)
+        with self._lock:
+            self._stats['stores'] += 1
+
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                redis_client.set(_REDIS_KEY.format(digest=digest), payload, ex=ttl_seconds)
+            except Exception as e:
+                logger.warning(f"[AI_INSIGHT_CACHE] Redis store failed for {digest[:12]}: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['redis_hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': round((self._stats['hits'] + self._stats['redis_hits']) / lookups * 100, 1) if lookups else 0,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds
+            }
+
+
+ai_insight_cache = AIInsightCache()
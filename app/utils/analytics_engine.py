@@ -0,0 +1,226 @@
+# app/utils/analytics_engine.py
+"""
+Columnar analytics engine for survey responses.
+
+Loads every Response row for a set of submissions with a single bulk query
+(chunked to stay under the database bind-parameter limit), groups the rows
+once into per-question columns and exposes vectorized helpers for the
+statistics used by the analytics endpoints.
+"""
+
+import json
+import logging
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from app.models import db, Response
+
+logger = logging.getLogger(__name__)
+
+# SQLite caps bound parameters at 999 on older builds, keep IN lists below that.
+BULK_IN_CHUNK_SIZE = 900
+
+DEFAULT_HISTOGRAM_BINS = 10
+
+
+class QuestionColumn:
+    """All responses to one question, stored as parallel arrays."""
+
+    __slots__ = ('question_id', 'rows', 'submission_ids', 'texts')
+
+    def __init__(self, question_id, rows):
+        self.question_id = question_id
+        self.rows = rows
+        self.submission_ids = np.fromiter((r.submission_id for r in rows), dtype=np.int64, count=len(rows))
+        self.texts = np.array([r.response_text for r in rows], dtype=object)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def answered_mask(self):
+        """Boolean mask of rows that carry a non-empty response_text."""
+        if not len(self.rows):
+            return np.zeros(0, dtype=bool)
+        return np.fromiter((bool(t) for t in self.texts), dtype=bool, count=len(self.rows))
+
+    def answered_submission_count(self):
+        """Number of distinct submissions with a non-empty answer."""
+        mask = self.answered_mask()
+        if not mask.any():
+            return 0
+        return int(np.unique(self.submission_ids[mask]).size)
+
+    def numeric_values(self):
+        """
+        Float array of every response_text that parses as a finite number.
+
+        ``float()`` also accepts "nan" and "inf", which would poison the stats and
+        make ``np.histogram`` raise, so those answers are dropped like any other
+        non-numeric text:
+
+        >>> from types import SimpleNamespace as Row
+        >>> rows = [Row(submission_id=i, response_text=t) for i, t in enumerate(['4', 'nan', '-inf', 'x', '5'])]
+        >>> QuestionColumn(1, rows).numeric_values().tolist()
+        [4.0, 5.0]
+        """
+        values = []
+        for text in self.texts:
+            try:
+                values.append(float(text))
+            except (ValueError, TypeError):
+                continue
+        values = np.asarray(values, dtype=np.float64)
+        return values[np.isfinite(values)]
+
+
+class ResponseColumns:
+    """Per-question columnar view over the responses of many submissions."""
+
+    _EMPTY = QuestionColumn(None, [])
+
+    def __init__(self, columns):
+        self._columns = columns
+
+    @classmethod
+    def load(cls, submissions, question_ids=None):
+        """
+        Bulk-load the responses of ``submissions`` and group them by question.
+
+        Rows keep the order of ``submissions`` (then response id) so results
+        match the order the old per-submission loops produced. ``question_ids``
+        limits the load to those questions.
+        """
+        position = {sub.id: idx for idx, sub in enumerate(submissions)}
+        submission_ids = list(position.keys())
+        if question_ids is not None and not question_ids:
+            return cls({})
+
+        rows = []
+        for start in range(0, len(submission_ids), BULK_IN_CHUNK_SIZE):
+            chunk = submission_ids[start:start + BULK_IN_CHUNK_SIZE]
+            query = db.session.query(
+                Response.id,
+                Response.submission_id,
+                Response.question_id,
+                Response.response_text,
+                Response.created_at,
+                Response.is_not_applicable,
+            ).filter(Response.submission_id.in_(chunk))
+            if question_ids is not None:
+                query = query.filter(Response.question_id.in_(list(question_ids)))
+            rows.extend(query.all())
+
+        rows.sort(key=lambda r: (position[r.submission_id], r.id))
+
+        grouped = defaultdict(list)
+        for row in rows:
+            grouped[row.question_id].append(row)
+
+        logger.debug(f"[ANALYTICS_ENGINE] Loaded {len(rows)} responses for {len(submission_ids)} submissions")
+        return cls({qid: QuestionColumn(qid, q_rows) for qid, q_rows in grouped.items()})
+
+    def column(self, question_id):
+        """Return the column for ``question_id`` (empty if nobody answered)."""
+        return self._columns.get(question_id, self._EMPTY)
+
+
+def numeric_summary(values):
+    """
+    Mean/median/mode/sample-stdev/min/max for a float array.
+
+    ``mode`` follows ``statistics.mode`` semantics: ties resolve to the value
+    seen first. ``standard_deviation`` is None for fewer than two values.
+    """
+    if values.size == 0:
+        return None
+
+    uniques, first_index, counts = np.unique(values, return_index=True, return_counts=True)
+    tied = np.flatnonzero(counts == counts.max())
+    mode_val = float(uniques[tied[np.argmin(first_index[tied])]])
+
+    return {
+        "mean": float(values.mean()),
+        "median": float(np.median(values)),
+        "mode": mode_val,
+        "standard_deviation": float(values.std(ddof=1)) if values.size > 1 else None,
+        "min": float(values.min()),
+        "max": float(values.max()),
+    }
+
+
+def nps_breakdown(values):
+    """Promoter/passive/detractor counts and the NPS score, or None."""
+    promoters = int(np.count_nonzero(values >= 9))
+    passives = int(np.count_nonzero((values >= 7) & (values <= 8)))
+    detractors = int(np.count_nonzero(values <= 6))
+    total = promoters + passives + detractors
+    if total == 0:
+        return None
+    return {
+        "segments": {
+            "promoters": promoters,
+            "passives": passives,
+            "detractors": detractors
+        },
+        "score": (promoters - detractors) * 100 / total
+    }
+
+
+def histogram(values, bins=DEFAULT_HISTOGRAM_BINS):
+    """Histogram of a float array as plain lists (``edges`` has len(counts) + 1)."""
+    if values.size == 0:
+        return {"counts": [], "edges": []}
+    # Integer-valued scales (ratings, NPS) get one bin per value.
+    if np.all(np.mod(values, 1) == 0) and values.max() - values.min() < 50:
+        bins = np.arange(values.min(), values.max() + 2) - 0.5
+    counts, edges = np.histogram(values, bins=bins)
+    return {"counts": counts.tolist(), "edges": edges.tolist()}
+
+
+def values_from_counts(counts):
+    """
+    Float array holding each numeric key of ``counts`` repeated by its count,
+    e.g. the ``option_counts`` of a numeric question aggregate.
+
+    >>> values_from_counts({'4': 2, '5.5': 1, 'x': 3}).tolist()
+    [4.0, 4.0, 5.5]
+    """
+    keys, repeats = [], []
+    for key, count in counts.items():
+        try:
+            keys.append(float(key))
+        except (ValueError, TypeError):
+            continue
+        repeats.append(int(count))
+    values = np.repeat(np.asarray(keys, dtype=np.float64), np.asarray(repeats, dtype=np.int64))
+    return values[np.isfinite(values)]
+
+
+def option_counts(texts):
+    """
+    Count selected options for choice questions.
+
+    JSON list answers count each element; anything else counts the raw text.
+    """
+    counter = Counter()
+    for text in texts:
+        if text is None:
+            continue
+        try:
+            answers = json.loads(text)
+        except json.JSONDecodeError:
+            counter[text] += 1
+            continue
+        if isinstance(answers, list):
+            counter.update(str(answer) for answer in answers)
+        else:
+            counter[text] += 1
+    return dict(counter)
+
+
+def mean_positive(values):
+    """Mean of the strictly positive, non-null entries (0 if none)."""
+    arr = np.asarray([v for v in values if v], dtype=np.float64)
+    arr = arr[arr > 0]
+    return float(arr.mean()) if arr.size else 0
@@ -0,0 +1,64 @@
+# app/utils/badge_index.py
+"""
+Process-wide, threshold-sorted table of ``Badge`` definitions.
+
+Badges are loaded in one query and kept sorted by ``xp_threshold`` so the
+badges an XP change crosses, a user's highest badge and the next badge are
+all found by bisecting the thresholds instead of querying. Committed badge
+changes reload every worker through ``VersionedCache`` (within
+BADGE_INDEX_CHECK_SECONDS with Redis, BADGE_INDEX_LOCAL_TTL_SECONDS without).
+"""
+
+import bisect
+import copy
+import logging
+import os
+
+from app.models import Badge
+from app.utils.versioned_cache import VersionedCache
+
+logger = logging.getLogger(__name__)
+
+BADGE_INDEX_CHECK_SECONDS = float(os.environ.get('BADGE_INDEX_CHECK_SECONDS', 2))
+BADGE_INDEX_LOCAL_TTL_SECONDS = float(os.environ.get('BADGE_INDEX_LOCAL_TTL_SECONDS', 60))
+
+
+class BadgeIndex(VersionedCache):
+    """Snapshot of all badges sorted by XP threshold, refreshed on a version change."""
+
+    log_tag = 'BADGE_INDEX'
+
+    def __init__(self):
+        super().__init__('badges:version', [Badge], BADGE_INDEX_CHECK_SECONDS, BADGE_INDEX_LOCAL_TTL_SECONDS)
+
+    def load(self):
+        """(sorted xp thresholds, Badge.to_dict() in threshold order)."""
+        badges = [badge.to_dict() for badge in Badge.query.order_by(Badge.xp_threshold).all()]
+        logger.debug(f"[BADGE_INDEX] Loaded {len(badges)} badges")
+        return [badge['xp_threshold'] for badge in badges], badges
+
+    def crossed(self, old_xp, new_xp):
+        """Badges with ``old_xp < xp_threshold <= new_xp``, lowest first."""
+        thresholds, badges = self.snapshot()
+        start = bisect.bisect_right(thresholds, old_xp or 0)
+        end = bisect.bisect_right(thresholds, new_xp or 0)
+        return copy.deepcopy(badges[start:end])
+
+    def eligible(self, xp):
+        """Every badge with ``xp_threshold <= xp``, lowest first."""
+        return self.crossed(float('-inf'), xp)
+
+    def highest(self, xp):
+        """Highest badge reached with ``xp``, or None."""
+        thresholds, badges = self.snapshot()
+        index = bisect.bisect_right(thresholds, xp or 0) - 1
+        return dict(badges[index]) if index >= 0 else None
+
+    def next_badge(self, xp):
+        """Lowest badge not yet reached with ``xp``, or None."""
+        thresholds, badges = self.snapshot()
+        index = bisect.bisect_right(thresholds, xp or 0)
+        return dict(badges[index]) if index < len(badges) else None
+
+
+badge_index = BadgeIndex()
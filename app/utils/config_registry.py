@@ -0,0 +1,56 @@
+# app/utils/config_registry.py
+"""
+Process-wide registry of ``SystemConfiguration`` values.
+
+All rows are loaded in one query and served as typed values from memory,
+so ``SystemConfiguration.get_config`` can be called inside loops without
+touching the database. Committed configuration changes reload every
+worker through ``VersionedCache`` (within CONFIG_REGISTRY_CHECK_SECONDS
+with Redis, CONFIG_REGISTRY_LOCAL_TTL_SECONDS without).
+"""
+
+import copy
+import logging
+import os
+
+from app.models import SystemConfiguration
+from app.utils.versioned_cache import VersionedCache
+
+logger = logging.getLogger(__name__)
+
+CONFIG_REGISTRY_CHECK_SECONDS = float(os.environ.get('CONFIG_REGISTRY_CHECK_SECONDS', 2))
+CONFIG_REGISTRY_LOCAL_TTL_SECONDS = float(os.environ.get('CONFIG_REGISTRY_LOCAL_TTL_SECONDS', 30))
+
+
+class ConfigRegistry(VersionedCache):
+    """Snapshot of all configuration rows, refreshed on a version change."""
+
+    log_tag = 'CONFIG_REGISTRY'
+
+    def __init__(self):
+        super().__init__(
+            'system_config:version', [SystemConfiguration],
+            CONFIG_REGISTRY_CHECK_SECONDS, CONFIG_REGISTRY_LOCAL_TTL_SECONDS
+        )
+
+    def load(self):
+        """{config_key: typed value}."""
+        values = {}
+        for config in SystemConfiguration.query.all():
+            try:
+                values[config.config_key] = config.get_typed_value()
+            except (TypeError, ValueError) as e:
+                logger.warning(f"[CONFIG_REGISTRY] Ignoring '{config.config_key}': cannot read as {config.config_type}: {e}")
+        logger.debug(f"[CONFIG_REGISTRY] Loaded {len(values)} configuration values")
+        return values
+
+    def get(self, key, default=None):
+        """Typed value of ``key`` or ``default``; json values are returned as copies."""
+        values = self.snapshot()
+        if key not in values:
+            return default
+        value = values[key]
+        return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+
+config_registry = ConfigRegistry()
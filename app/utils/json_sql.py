@@ -0,0 +1,50 @@
+# app/utils/json_sql.py
+"""
+Dialect-aware SQL predicates over JSON columns.
+
+Used to filter on JSON list columns (survey tags, profile tag ids) in the
+database instead of loading the rows. Only JSON arrays ever match: a scalar or
+object stored in the column is treated as an empty array, so a stray ``'7'``
+never matches tag 7.
+"""
+
+from sqlalchemy import JSON, String, and_, case, cast, exists, func, literal, or_, select
+
+from app.models import db
+
+
+def json_array_contains_any(column, values, lowercase=False):
+    """
+    SQL predicate: the JSON array in ``column`` has an element equal to any of
+    ``values``, compared as text (``7`` and ``"7"`` both match ``'7'``).
+
+    With ``lowercase`` the elements are lowercased before comparing, so pass
+    ``values`` already lowercased. Returns None when the database has no JSON
+    array functions we know of (or cannot compare case-insensitively); callers
+    then filter in Python.
+    """
+    wanted = [str(value) for value in values]
+    dialect_name = db.engine.dialect.name
+
+    def any_element_in(elements, element):
+        if lowercase:
+            element = func.lower(element)
+        return exists(select(literal(1)).select_from(elements).where(element.in_(wanted)))
+
+    if dialect_name == 'postgresql':
+        json_array = case((func.json_typeof(column) == 'array', column), else_=cast('[]', JSON))
+        elements = func.json_array_elements_text(json_array).table_valued('value')
+        return any_element_in(elements, elements.c.value)
+    if dialect_name == 'sqlite':
+        # json_each over a scalar yields the scalar itself, hence the explicit array check
+        elements = func.json_each(column).table_valued('value')
+        return and_(func.json_type(column) == 'array', any_element_in(elements, cast(elements.c.value, String)))
+    if dialect_name == 'mysql' and not lowercase:
+        # JSON_CONTAINS also matches a scalar equal to the candidate, hence the type check
+        candidates = []
+        for value in wanted:
+            candidates.append(func.json_contains(column, func.json_quote(value)) == 1)
+            if value.lstrip('-').isdigit():
+                candidates.append(func.json_contains(column, value) == 1)
+        return and_(func.json_type(column) == 'ARRAY', or_(*candidates))
+    return None
@@ -0,0 +1,258 @@
+# app/utils/live_leaderboard.py
+"""
+Live XP leaderboard in Redis sorted sets.
+
+``leaderboard:all_time`` scores every user by ``total_xp_earned`` and
+``leaderboard:day:{YYYYMMDD}`` by the XP earned on that UTC day. XP awarded
+through ``award_xp_no_commit`` is collected on the session and applied with
+ZINCRBY once the transaction commits, so a rolled-back award never reaches the
+board. WEEKLY and MONTHLY are ZUNIONSTOREs of the last 7 / 30 day buckets,
+kept for LEADERBOARD_WINDOW_TTL_SECONDS; DAILY is today's bucket itself.
+
+Ranks come from ZREVRANK (O(log n)) for any user, not only the top 500. Every
+read returns None when there is no real Redis or the sets have not been
+seeded from SQL yet, and callers fall back to the ``LeaderboardCache`` table.
+"""
+
+import logging
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.models import db, User, PointsLog
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_WINDOW_TTL_SECONDS = int(os.environ.get('LEADERBOARD_WINDOW_TTL_SECONDS', 60))
+# Day buckets outlive the longest window so MONTHLY never reads an expired day
+LEADERBOARD_DAY_RETENTION_DAYS = 35
+TIMEFRAME_DAYS = {'DAILY': 1, 'WEEKLY': 7, 'MONTHLY': 30}
+
+_ALL_TIME_KEY = "leaderboard:all_time"
+_DAY_KEY = "leaderboard:day:{day}"
+_WINDOW_KEY = "leaderboard:window:{timeframe}:{day}"
+_READY_KEY = "leaderboard:ready"
+_SEED_LOCK_KEY = "leaderboard:seed_lock"
+_PENDING_XP_KEY = 'leaderboard_pending_xp'
+_SEED_BATCH_SIZE = 1000
+
+
+def _day(value):
+    return value.strftime('%Y%m%d')
+
+
+def _day_ttl_seconds():
+    return LEADERBOARD_DAY_RETENTION_DAYS * 86400
+
+
+# --- Writes -----------------------------------------------------------------------
+
+def record_xp_gain(user_id, points, session=None):
+    """Queue ``points`` of earned XP for ``user_id``; applied to Redis after the session commits."""
+    if not points or points <= 0:
+        return
+    session = session or db.session
+    pending = session.info.setdefault(_PENDING_XP_KEY, Counter())
+    pending[(int(user_id), _day(datetime.utcnow()))] += int(points)
+
+
+def apply_xp_gains(gains):
+    """ZINCRBY a {(user_id, day): points} mapping into the all-time and day sets."""
+    redis_client = get_redis()
+    if redis_client is None or not gains:
+        return
+    try:
+        pipe = redis_client.pipeline()
+        for (user_id, day), points in gains.items():
+            pipe.zincrby(_ALL_TIME_KEY, points, user_id)
+            day_key = _DAY_KEY.format(day=day)
+            pipe.zincrby(day_key, points, user_id)
+            pipe.expire(day_key, _day_ttl_seconds())
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"[LEADERBOARD] Live leaderboard update failed: {e}")
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_pending_xp(session):
+    if session.in_nested_transaction():
+        return  # SAVEPOINT release; wait for the outer commit
+    gains = session.info.pop(_PENDING_XP_KEY, None)
+    if gains:
+        apply_xp_gains(gains)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_pending_xp(session, previous_transaction):
+    if previous_transaction.parent is None and not previous_transaction.nested:
+        session.info.pop(_PENDING_XP_KEY, None)
+
+
+# --- Reads ------------------------------------------------------------------------
+
+def _ready_client():
+    redis_client = get_redis()
+    if redis_client is None:
+        return None
+    try:
+        return redis_client if redis_client.exists(_READY_KEY) else None
+    except Exception as e:
+        logger.warning(f"[LEADERBOARD] Redis unavailable for live leaderboard: {e}")
+        return None
+
+
+def _timeframe_key(redis_client, timeframe):
+    if timeframe == 'ALL_TIME':
+        return _ALL_TIME_KEY
+    days = TIMEFRAME_DAYS.get(timeframe)
+    if days is None:
+        raise ValueError(f"Unknown leaderboard timeframe: {timeframe}")
+    today = datetime.utcnow()
+    if days == 1:
+        return _DAY_KEY.format(day=_day(today))
+
+    window_key = _WINDOW_KEY.format(timeframe=timeframe, day=_day(today))
+    if not redis_client.exists(window_key):
+        day_keys = [_DAY_KEY.format(day=_day(today - timedelta(days=offset))) for offset in range(days)]
+        pipe = redis_client.pipeline()
+        pipe.zunionstore(window_key, day_keys)
+        pipe.expire(window_key, LEADERBOARD_WINDOW_TTL_SECONDS)
+        pipe.execute()
+    return window_key
+
+
+def top_entries(timeframe, limit):
+    """[(rank, user_id, total_xp), ...] for the top ``limit`` users, or None to use the SQL cache."""
+    redis_client = _ready_client()
+    if redis_client is None:
+        return None
+    try:
+        rows = redis_client.zrevrange(_timeframe_key(redis_client, timeframe), 0, limit - 1, withscores=True)
+    except Exception as e:
+        logger.warning(f"[LEADERBOARD] Live top-{limit} lookup failed for {timeframe}: {e}")
+        return None
+    return [(rank, int(member), int(score)) for rank, (member, score) in enumerate(rows, 1) if score > 0]
+
+
+def user_rank(user_id, timeframe):
+    """(rank, total_xp) for any user, (None, 0) when unranked, or None to use the SQL cache."""
+    redis_client = _ready_client()
+    if redis_client is None:
+        return None
+    try:
+        key = _timeframe_key(redis_client, timeframe)
+        pipe = redis_client.pipeline()
+        pipe.zrevrank(key, user_id)
+        pipe.zscore(key, user_id)
+        rank, score = pipe.execute()
+    except Exception as e:
+        logger.warning(f"[LEADERBOARD] Live rank lookup failed for user {user_id}: {e}")
+        return None
+    if rank is None or not score or score <= 0:
+        return (None, 0)
+    return (rank + 1, int(score))
+
+
+def ranked_count(timeframe):
+    """Number of users with XP in ``timeframe``, or None without the live leaderboard."""
+    redis_client = _ready_client()
+    if redis_client is None:
+        return None
+    try:
+        return redis_client.zcard(_timeframe_key(redis_client, timeframe))
+    except Exception as e:
+        logger.warning(f"[LEADERBOARD] Live count failed for {timeframe}: {e}")
+        return None
+
+
+# --- Seeding ----------------------------------------------------------------------
+
+def rebuild_live_leaderboard(force=False):
+    """
+    Seed the sorted sets from SQL (``User.total_xp_earned`` and positive ``PointsLog``
+    rows of the retained days). A no-op once seeded unless ``force``; sets are built
+    under temporary keys and renamed into place so readers never see a partial board.
+
+    Returns:
+        bool: True when the live leaderboard is ready
+    """
+    redis_client = get_redis()
+    if redis_client is None:
+        return False
+    try:
+        if not force and redis_client.exists(_READY_KEY):
+            return True
+        if not redis_client.set(_SEED_LOCK_KEY, '1', nx=True, ex=300):
+            logger.info("[LEADERBOARD] Live leaderboard seeding already in progress")
+            return False
+    except Exception as e:
+        logger.warning(f"[LEADERBOARD] Cannot seed live leaderboard: {e}")
+        return False
+
+    try:
+        staged = {}  # final key -> temporary key
+
+        def stage(final_key, mapping):
+            temp_key = f"{final_key}:rebuild"
+            if final_key not in staged:
+                redis_client.delete(temp_key)
+                staged[final_key] = temp_key
+            redis_client.zadd(temp_key, mapping)
+
+        all_time_rows = db.session.query(User.id, User.total_xp_earned).filter(
+            User.total_xp_earned > 0
+        ).yield_per(_SEED_BATCH_SIZE)
+        batch = {}
+        for user_id, total_xp in all_time_rows:
+            batch[user_id] = total_xp
+            if len(batch) >= _SEED_BATCH_SIZE:
+                stage(_ALL_TIME_KEY, batch)
+                batch = {}
+        if batch:
+            stage(_ALL_TIME_KEY, batch)
+
+        since = (datetime.utcnow() - timedelta(days=LEADERBOARD_DAY_RETENTION_DAYS)).replace(
+            hour=0, minute=0, second=0, microsecond=0)
+        day_column = func.date(PointsLog.created_at)
+        day_rows = db.session.query(
+            PointsLog.user_id, day_column, func.sum(PointsLog.points_awarded)
+        ).filter(
+            PointsLog.created_at >= since,
+            PointsLog.points_awarded > 0
+        ).group_by(PointsLog.user_id, day_column)
+        day_batches = {}
+        for user_id, day, points in day_rows:
+            day = day.replace('-', '') if isinstance(day, str) else _day(day)
+            day_batches.setdefault(_DAY_KEY.format(day=day), {})[user_id] = int(points)
+        for day_key, mapping in day_batches.items():
+            stage(day_key, mapping)
+
+        pipe = redis_client.pipeline()
+        today = datetime.utcnow()
+        retained_keys = [_ALL_TIME_KEY] + [
+            _DAY_KEY.format(day=_day(today - timedelta(days=offset)))
+            for offset in range(LEADERBOARD_DAY_RETENTION_DAYS + 1)
+        ]
+        for key in retained_keys:
+            if key not in staged:
+                pipe.delete(key)  # No XP in SQL for this set any more
+        for final_key, temp_key in staged.items():
+            pipe.rename(temp_key, final_key)
+            if final_key != _ALL_TIME_KEY:
+                pipe.expire(final_key, _day_ttl_seconds())
+        pipe.set(_READY_KEY, datetime.utcnow().isoformat())
+        pipe.execute()
+        logger.info(f"[LEADERBOARD] Seeded live leaderboard ({len(day_batches)} day buckets)")
+        return True
+    except Exception as e:
+        logger.error(f"[LEADERBOARD] Seeding live leaderboard failed: {e}", exc_info=True)
+        return False
+    finally:
+        try:
+            redis_client.delete(_SEED_LOCK_KEY)
+        except Exception:
+            pass
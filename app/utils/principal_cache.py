@@ -0,0 +1,253 @@
+# app/utils/principal_cache.py
+"""
+Authenticated principal cache for ``token_required`` / ``token_optional``.
+
+A principal is a compact snapshot of the authenticated User or Admin (id,
+role, business, permissions, Discord roles, username, email) kept in an
+in-process LRU with a short TTL, with a real Redis as a shared second tier.
+``g.current_user`` becomes a ``Principal`` that answers snapshot fields
+from memory and loads the ORM row only when a handler reads anything else
+or assigns to it, so most authenticated requests issue no user query.
+
+Committed changes to snapshot fields (and deletes) drop the cached entry
+locally and in Redis; other workers' local copies expire within
+PRINCIPAL_LOCAL_TTL_SECONDS.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.models import db, User, Admin
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_LOCAL_TTL_SECONDS = int(os.environ.get('PRINCIPAL_LOCAL_TTL_SECONDS', 15))
+PRINCIPAL_REDIS_TTL_SECONDS = int(os.environ.get('PRINCIPAL_REDIS_TTL_SECONDS', 300))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.environ.get('PRINCIPAL_CACHE_MAX_ENTRIES', 4096))
+
+PRINCIPAL_MODELS = {'user': User, 'admin': Admin}
+PRINCIPAL_FIELDS = {
+    'user': ('id', 'role', 'business_id', 'business_admin_permissions', 'discord_role_ids', 'username', 'email'),
+    'admin': ('id', 'username', 'email'),
+}
+
+_REDIS_KEY = "principal:{kind}:{principal_id}"
+_DIRTY_PRINCIPALS_KEY = 'principal_cache_dirty'
+
+
+class Principal:
+    """
+    Read-only snapshot of the authenticated account that loads the ORM row lazily.
+
+    Snapshot fields are served without a query until the row is loaded;
+    after that every attribute read and write goes to the ORM object, so
+    handlers that mutate ``g.current_user`` keep working unchanged.
+    """
+
+    __slots__ = ('_kind', '_fields', '_entity')
+
+    def __init__(self, kind, fields, entity=None):
+        object.__setattr__(self, '_kind', kind)
+        object.__setattr__(self, '_fields', fields)
+        object.__setattr__(self, '_entity', entity)
+
+    @property
+    def __class__(self):
+        # isinstance(g.current_user, User) keeps working without a load
+        return PRINCIPAL_MODELS[self._kind]
+
+    @property
+    def is_loaded(self):
+        return self._entity is not None
+
+    def get_entity(self):
+        """The ORM User/Admin, loaded (identity map first) on first use."""
+        if self._entity is None:
+            entity = db.session.get(PRINCIPAL_MODELS[self._kind], self._fields['id'])
+            if entity is None:
+                raise LookupError(f"{self._kind} {self._fields['id']} no longer exists")
+            object.__setattr__(self, '_entity', entity)
+        return self._entity
+
+    def __getattr__(self, name):
+        if self._entity is None and name in self._fields:
+            return self._fields[name]
+        return getattr(self.get_entity(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.get_entity(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self.get_entity(), name)
+
+    def __eq__(self, other):
+        if isinstance(other, Principal):
+            return self._kind == other._kind and self._fields['id'] == other._fields['id']
+        if self._entity is not None and other is self._entity:
+            return True
+        return isinstance(other, PRINCIPAL_MODELS[self._kind]) and getattr(other, 'id', None) == self._fields['id']
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((self._kind, self._fields['id']))
+
+    def __repr__(self):
+        if self._entity is not None:
+            return repr(self._entity)
+        return f"<{PRINCIPAL_MODELS[self._kind].__name__} {self._fields['id']} (cached)>"
+
+
+def _snapshot(kind, entity):
+    return {field: getattr(entity, field) for field in PRINCIPAL_FIELDS[kind]}
+
+
+class PrincipalCache:
+    """Thread-safe LRU + TTL of principal snapshots with a Redis second tier."""
+
+    def __init__(self, max_entries=PRINCIPAL_CACHE_MAX_ENTRIES, ttl_seconds=PRINCIPAL_LOCAL_TTL_SECONDS,
+                 redis_ttl_seconds=PRINCIPAL_REDIS_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self._entries = OrderedDict()  # (kind, id) -> (expires_at, snapshot json)
+        self._lock = threading.Lock()
+        self._stats = {'local_hits': 0, 'redis_hits': 0, 'db_loads': 0, 'invalidations': 0}
+
+    def _local_get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self._stats['local_hits'] += 1
+            return payload
+
+    def _local_set(self, key, payload):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _redis_get(self, kind, principal_id):
+        redis_client = get_redis()
+        if redis_client is None:
+            return None
+        try:
+            payload = redis_client.get(_REDIS_KEY.format(kind=kind, principal_id=principal_id))
+        except Exception as e:
+            logger.warning(f"[PRINCIPAL_CACHE] Redis lookup failed for {kind} {principal_id}: {e}")
+            return None
+        if payload is None:
+            return None
+        with self._lock:
+            self._stats['redis_hits'] += 1
+        return payload.decode('utf-8') if isinstance(payload, bytes) else payload
+
+    def _redis_set(self, kind, principal_id, payload):
+        redis_client = get_redis()
+        if redis_client is None:
+            return
+        try:
+            redis_client.set(_REDIS_KEY.format(kind=kind, principal_id=principal_id), payload, ex=self.redis_ttl_seconds)
+        except Exception as e:
+            logger.warning(f"[PRINCIPAL_CACHE] Redis store failed for {kind} {principal_id}: {e}")
+
+    def resolve(self, kind, principal_id):
+        """
+        Return the ``Principal`` for a decoded token id, or None when the account does not exist.
+        Each call gets its own decoded snapshot, so handlers cannot mutate the cached copy.
+        """
+        try:
+            principal_id = int(principal_id)
+        except (TypeError, ValueError):
+            return None
+        key = (kind, principal_id)
+
+        payload = self._local_get(key)
+        if payload is None:
+            payload = self._redis_get(kind, principal_id)
+            if payload is not None:
+                self._local_set(key, payload)
+        if payload is not None:
+            return Principal(kind, json.loads(payload))
+
+        entity = db.session.get(PRINCIPAL_MODELS[kind], principal_id)
+        if entity is None:
+            return None
+        fields = _snapshot(kind, entity)
+        payload = json.dumps(fields, default=str)
+        self._local_set(key, payload)
+        self._redis_set(kind, principal_id, payload)
+        with self._lock:
+            self._stats['db_loads'] += 1
+        return Principal(kind, fields, entity)
+
+    def invalidate(self, kind, principal_id):
+        """Drop the cached snapshot of one account (locally and in Redis)."""
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                redis_client.delete(_REDIS_KEY.format(kind=kind, principal_id=principal_id))
+            except Exception as e:
+                logger.warning(f"[PRINCIPAL_CACHE] Redis invalidation failed for {kind} {principal_id}: {e}")
+        with self._lock:
+            self._entries.pop((kind, principal_id), None)
+            self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'size': len(self._entries), 'ttl_seconds': self.ttl_seconds}
+
+
+principal_cache = PrincipalCache()
+
+
+# --- Invalidation on committed changes ---------------------------------------------
+# Same pattern as report_cache: collect on flush, invalidate after the commit.
+
+def _mark_dirty(target, kind, require_changes):
+    if require_changes:
+        attrs = inspect(target).attrs
+        if not any(attrs[field].history.has_changes() for field in PRINCIPAL_FIELDS[kind]):
+            return
+    session = object_session(target)
+    if session is not None and target.id is not None:
+        session.info.setdefault(_DIRTY_PRINCIPALS_KEY, set()).add((kind, target.id))
+
+
+for _kind, _model in PRINCIPAL_MODELS.items():
+    event.listen(_model, 'after_update', lambda mapper, connection, target, kind=_kind: _mark_dirty(target, kind, True))
+    event.listen(_model, 'after_delete', lambda mapper, connection, target, kind=_kind: _mark_dirty(target, kind, False))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_dirty_principals(session):
+    if session.in_nested_transaction():
+        return
+    for kind, principal_id in session.info.pop(_DIRTY_PRINCIPALS_KEY, ()):
+        principal_cache.invalidate(kind, principal_id)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_dirty_principals(session, previous_transaction):
+    if previous_transaction.parent is None and not previous_transaction.nested:
+        session.info.pop(_DIRTY_PRINCIPALS_KEY, None)
@@ -0,0 +1,236 @@
+# app/utils/prompt_budget.py
+"""
+Token-budgeted prompt assembly for the AI analytics prompts.
+
+Tokens are counted with tiktoken when it is installed (falling back to the
+~4 characters per token heuristic). ``fit_to_budget`` serializes the
+analytics payload compactly and, while the rendered prompt is over the
+model's budget, applies progressively stronger reductions: short keys
+(explained by a legend), top-k option/word lists, fewer and shorter
+open-ended samples, dropping derived context and finally dropping whole
+questions from the end. The returned ``PromptPlan`` records the predicted
+input tokens so callers can compare them with the usage OpenAI reports.
+"""
+
+import json
+import logging
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+from app.utils.openai_cost_calculator import OpenAICostCalculator
+
+logger = logging.getLogger(__name__)
+
+# Input tokens allowed for a whole analytics prompt, per model
+PROMPT_TOKEN_BUDGETS = {
+    'gpt-4o': 24000,
+    'gpt-4o-mini': 24000,
+    'gpt-4-turbo': 24000,
+    'gpt-4': 6000,
+    'gpt-3.5-turbo': 12000,
+}
+DEFAULT_PROMPT_TOKEN_BUDGET = int(os.getenv("AI_PROMPT_TOKEN_BUDGET", 0)) or None
+PROMPT_TOP_K = int(os.getenv("AI_PROMPT_TOP_K", 12))
+PROMPT_TEXT_SAMPLES = int(os.getenv("AI_PROMPT_TEXT_SAMPLES", 10))
+PROMPT_TEXT_MAX_CHARS = int(os.getenv("AI_PROMPT_TEXT_MAX_CHARS", 300))
+
+KEY_ALIASES = {
+    "question_id": "qid",
+    "question_text": "text",
+    "question_type": "type",
+    "sequence_number": "seq",
+    "sample_size": "n",
+    "analytics_data": "data",
+    "distribution": "dist",
+    "comparison_mode": "cmp",
+    "comparison_type": "cmp_type",
+    "segments": "seg",
+    "trend_metrics": "trend",
+    "statistical_context": "stats",
+    "word_frequencies": "words",
+    "frequency": "f",
+    "sampled_responses": "samples",
+    "has_text_responses": "has_text",
+    "total_text_responses": "n_text",
+    "nps_segments": "nps_seg",
+    "average_ranks": "avg_rank",
+    "rank_distribution": "rank_dist",
+    "ranking_items": "items",
+    "row_averages": "row_avg",
+    "column_averages": "col_avg",
+}
+# Keys whose values are user data (option labels, ranks), never aliased below them
+_DATA_KEYS = ("distribution", "average_ranks", "rank_distribution", "row_averages",
+              "column_averages", "nps_segments")
+# Maps from a user label (segment name) to a structured payload that is aliased as usual
+_LABEL_KEYED = ("segments",)
+# Derived context dropped first when even compact data does not fit
+_DERIVED_KEYS = ("trend_metrics", "statistical_context")
+
+PromptPlan = namedtuple("PromptPlan", ["prompt", "input_tokens", "budget", "level", "dropped_question_ids", "model"])
+
+
+@lru_cache(maxsize=8)
+def _encoding(model):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text, model="gpt-4o"):
+    """Number of tokens ``text`` encodes to for ``model`` (heuristic without tiktoken)."""
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def prompt_token_budget(model):
+    return DEFAULT_PROMPT_TOKEN_BUDGET or PROMPT_TOKEN_BUDGETS.get(model, PROMPT_TOKEN_BUDGETS['gpt-4o'])
+
+
+def compact_json(data):
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def predicted_cost(model, input_tokens, output_tokens):
+    """Same shape as estimate_openai_cost, from token counts."""
+    return {
+        'openai_cost_usd': OpenAICostCalculator.calculate_cost(model, input_tokens, output_tokens),
+        'input_tokens': input_tokens,
+        'output_tokens': output_tokens,
+        'model_used': model,
+        'estimated_tokens': input_tokens + output_tokens
+    }
+
+
+# --- reductions -------------------------------------------------------------------
+
+def _top_k_mapping(mapping, top_k):
+    """Keep the ``top_k`` largest numeric entries of a label -> count mapping, folding the rest into '(other)'."""
+    if len(mapping) <= top_k or not all(isinstance(v, (int, float)) for v in mapping.values()):
+        return mapping
+    ranked = sorted(mapping.items(), key=lambda item: item[1], reverse=True)
+    kept = dict(ranked[:top_k])
+    kept["(other)"] = sum(v for _, v in ranked[top_k:])
+    return kept
+
+
+def _truncate_text(value, max_chars):
+    value = str(value)
+    return value if len(value) <= max_chars else value[:max_chars].rstrip() + "…"
+
+
+def _reduce(data, top_k, samples, text_chars, drop_derived):
+    if isinstance(data, list):
+        return [_reduce(item, top_k, samples, text_chars, drop_derived) for item in data]
+    if not isinstance(data, dict):
+        return data
+    reduced = {}
+    for key, value in data.items():
+        if drop_derived and key in _DERIVED_KEYS:
+            continue
+        if key == "distribution" and isinstance(value, dict) and top_k:
+            value = _top_k_mapping(value, top_k)
+        elif key == "word_frequencies" and isinstance(value, list) and top_k:
+            value = value[:top_k]
+        elif key == "sampled_responses" and isinstance(value, list) and samples is not None:
+            # Evenly spaced sample, so the kept answers are not all from one end of the list
+            step = max(1, len(value) // samples) if samples else len(value) + 1
+            value = [_truncate_text(v, text_chars) for v in value[::step][:samples]]
+        reduced[key] = _reduce(value, top_k, samples, text_chars, drop_derived)
+    return reduced
+
+
+def shorten_keys(data, _inside_data=False):
+    """Replace verbose structural keys with KEY_ALIASES (labels inside data maps are left alone)."""
+    if isinstance(data, list):
+        return [shorten_keys(item, _inside_data) for item in data]
+    if not isinstance(data, dict):
+        return data
+    if _inside_data:
+        return {key: shorten_keys(value, True) for key, value in data.items()}
+    shortened = {}
+    for key, value in data.items():
+        if key in _LABEL_KEYED and isinstance(value, dict):
+            value = {label: shorten_keys(item) for label, item in value.items()}
+        else:
+            value = shorten_keys(value, key in _DATA_KEYS)
+        shortened[KEY_ALIASES.get(key, key)] = value
+    return shortened
+
+
+def key_legend():
+    return "KEY LEGEND: " + ", ".join(f"{short}={full}" for full, short in KEY_ALIASES.items())
+
+
+# Each level: (short keys, top_k, open-ended samples, sample chars, drop derived context)
+_LEVELS = (
+    (False, None, None, None, False),
+    (True, PROMPT_TOP_K, PROMPT_TEXT_SAMPLES, PROMPT_TEXT_MAX_CHARS, False),
+    (True, max(3, PROMPT_TOP_K // 2), max(1, PROMPT_TEXT_SAMPLES // 2), PROMPT_TEXT_MAX_CHARS // 2, False),
+    (True, max(3, PROMPT_TOP_K // 2), max(1, PROMPT_TEXT_SAMPLES // 2), PROMPT_TEXT_MAX_CHARS // 2, True),
+)
+
+
+def _render_level(data, render, level):
+    short, top_k, samples, text_chars, drop_derived = _LEVELS[level]
+    payload = _reduce(data, top_k, samples, text_chars, drop_derived) if level else data
+    if short:
+        return render(key_legend() + "\n" + compact_json(shorten_keys(payload)))
+    return render(compact_json(payload))
+
+
+def fit_to_budget(data, render, model="gpt-4o", budget=None, questions_key="questions"):
+    """
+    Render ``data`` into a prompt that fits ``budget`` input tokens.
+
+    Args:
+        data: JSON-serializable analytics payload (not modified)
+        render: callable taking the serialized data section and returning the full prompt
+        questions_key: list in ``data`` trimmed from the end as the last resort
+
+    Returns:
+        PromptPlan; ``dropped_question_ids`` lists questions that did not fit at all.
+    """
+    budget = budget or prompt_token_budget(model)
+    prompt, tokens, level = None, None, 0
+    for level in range(len(_LEVELS)):
+        prompt = _render_level(data, render, level)
+        tokens = count_tokens(prompt, model)
+        if tokens <= budget:
+            return PromptPlan(prompt, tokens, budget, level, [], model)
+
+    # Binary search for the longest prefix of questions that fits (at least one is always kept)
+    questions = list(data.get(questions_key) or [])
+    low, high = 1, len(questions) - 1
+    best = None
+    while low <= high:
+        keep = (low + high) // 2
+        candidate = _render_level({**data, questions_key: questions[:keep]}, render, level)
+        candidate_tokens = count_tokens(candidate, model)
+        if candidate_tokens <= budget:
+            best = (keep, candidate, candidate_tokens)
+            low = keep + 1
+        else:
+            high = keep - 1
+    if best is None:
+        keep = min(1, len(questions))
+        prompt = _render_level({**data, questions_key: questions[:keep]}, render, level)
+        tokens = count_tokens(prompt, model)
+        logger.warning(f"[PROMPT BUDGET] Prompt still uses {tokens} tokens (budget {budget}) after all reductions")
+    else:
+        keep, prompt, tokens = best
+    dropped = [str(q.get("question_id")) for q in questions[keep:]]
+    return PromptPlan(prompt, tokens, budget, level, dropped, model)
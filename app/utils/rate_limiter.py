@@ -1,99 +1,329 @@
 """
-Simple Rate Limiter for Daily Rewards
-Uses database-backed tracking without external dependencies
+Rate Limiter
+Sliding-window and token-bucket limits backed by the shared ``app.redis``
+connection, keyed by user, IP or API key plus the endpoint.
+
+With a real Redis each check is a single Lua script call, so limits hold
+across all workers. When only the MockRedis fallback is available (or Redis
+errors) the same algorithms run in-process, per worker.
 """
 
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque, namedtuple
+from datetime import datetime, timedelta
 from functools import wraps
+
 from flask import g, jsonify, request
-from datetime import datetime, timedelta
-from app.extensions import db
-import logging
+
+from app.utils.redis_client import get_redis
 
 logger = logging.getLogger(__name__)
 
+SLIDING_WINDOW = 'sliding_window'
+TOKEN_BUCKET = 'token_bucket'
+
+LOCAL_LIMITER_MAX_KEYS = int(os.environ.get('RATE_LIMIT_LOCAL_MAX_KEYS', 10000))
+
+RateLimitResult = namedtuple('RateLimitResult', ['allowed', 'limit', 'remaining', 'retry_after'])
+
+# KEYS[1] = zset key; ARGV = limit, window_ms, unique member.
+# Scores are Redis server time in ms, so worker clock skew does not matter.
+_SLIDING_WINDOW_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local limit = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window_ms)
+local count = redis.call('ZCARD', KEYS[1])
+if count < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], window_ms)
+    return {1, limit - count - 1, 0}
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {0, 0, window_ms - (now - tonumber(oldest[2]))}
+"""
+
+# KEYS[1] = hash key; ARGV = capacity, refill rate in tokens per ms.
+_TOKEN_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_ms = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_ms = math.ceil((1 - tokens) / rate)
+end
+redis.call('HMSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate))
+return {allowed, math.floor(tokens), retry_ms}
+"""
+
+
 class RateLimitExceeded(Exception):
     """Exception raised when rate limit is exceeded"""
-    pass
 
-def rate_limit(max_attempts=10, window_minutes=60, key_prefix='rate_limit'):
+    def __init__(self, message='Rate limit exceeded', retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Redis-backed limiter with an in-process fallback for MockRedis/no Redis."""
+
+    def __init__(self, max_local_keys=LOCAL_LIMITER_MAX_KEYS):
+        self.max_local_keys = max_local_keys
+        self._windows = OrderedDict()  # key -> deque of monotonic hit times
+        self._buckets = OrderedDict()  # key -> [tokens, last refill monotonic time]
+        self._lock = threading.Lock()
+        self._scripts = {}
+
+    # --- Redis ------------------------------------------------------------------
+
+    def _run_script(self, redis_client, name, source, key, *args):
+        script = self._scripts.get(name)
+        if script is None or script.registered_client is not redis_client:
+            script = redis_client.register_script(source)
+            self._scripts[name] = script
+        return script(keys=[key], args=list(args))
+
+    # --- in-process fallback ----------------------------------------------------
+
+    def _touch(self, store, key, default_factory):
+        entry = store.get(key)
+        if entry is None:
+            entry = default_factory()
+            store[key] = entry
+            while len(store) > self.max_local_keys:
+                store.popitem(last=False)
+        else:
+            store.move_to_end(key)
+        return entry
+
+    def _local_sliding_window(self, key, limit, window_seconds, record=True):
+        now = time.monotonic()
+        with self._lock:
+            hits = self._touch(self._windows, key, deque)
+            while hits and hits[0] <= now - window_seconds:
+                hits.popleft()
+            if len(hits) < limit:
+                if record:
+                    hits.append(now)
+                return RateLimitResult(True, limit, limit - len(hits), 0)
+            return RateLimitResult(False, limit, 0, max(0.0, hits[0] + window_seconds - now))
+
+    def _local_token_bucket(self, key, capacity, refill_per_second):
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._touch(self._buckets, key, lambda: [float(capacity), now])
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * refill_per_second)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return RateLimitResult(True, capacity, int(bucket[0]), 0)
+            bucket[0] = tokens
+            return RateLimitResult(False, capacity, 0, (1 - tokens) / refill_per_second)
+
+    # --- public API -------------------------------------------------------------
+
+    def hit(self, key, limit, window_seconds):
+        """Record one request against a sliding window of ``limit`` requests per ``window_seconds``."""
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                allowed, remaining, retry_ms = self._run_script(
+                    redis_client, SLIDING_WINDOW, _SLIDING_WINDOW_SCRIPT, key,
+                    limit, int(window_seconds * 1000), uuid.uuid4().hex
+                )
+                return RateLimitResult(bool(allowed), limit, int(remaining), int(retry_ms) / 1000)
+            except Exception as e:
+                logger.warning(f"[RATE_LIMIT] Redis sliding window failed for {key}, using local limiter: {e}")
+        return self._local_sliding_window(key, limit, window_seconds)
+
+    def consume(self, key, capacity, refill_per_second):
+        """Take one token from a bucket of ``capacity`` tokens refilled at ``refill_per_second``."""
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                allowed, remaining, retry_ms = self._run_script(
+                    redis_client, TOKEN_BUCKET, _TOKEN_BUCKET_SCRIPT, key,
+                    capacity, refill_per_second / 1000
+                )
+                return RateLimitResult(bool(allowed), capacity, int(remaining), int(retry_ms) / 1000)
+            except Exception as e:
+                logger.warning(f"[RATE_LIMIT] Redis token bucket failed for {key}, using local limiter: {e}")
+        return self._local_token_bucket(key, capacity, refill_per_second)
+
+    def peek(self, key, limit, window_seconds):
+        """Sliding-window status for ``key`` without recording a request."""
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                now_seconds, now_micros = redis_client.time()
+                now_ms = now_seconds * 1000 + now_micros // 1000
+                count = redis_client.zcount(key, now_ms - int(window_seconds * 1000) + 1, '+inf')
+                return RateLimitResult(count < limit, limit, max(0, limit - count), 0)
+            except Exception as e:
+                logger.warning(f"[RATE_LIMIT] Redis peek failed for {key}, using local limiter: {e}")
+        return self._local_sliding_window(key, limit, window_seconds, record=False)
+
+    def reset(self, key):
+        """Forget all recorded requests for ``key``."""
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                redis_client.delete(key)
+            except Exception as e:
+                logger.warning(f"[RATE_LIMIT] Redis reset failed for {key}: {e}")
+        with self._lock:
+            self._windows.pop(key, None)
+            self._buckets.pop(key, None)
+
+
+limiter = RateLimiter()
+
+
+def check_rate_limit(key, max_attempts, window_seconds, algorithm=SLIDING_WINDOW, burst=None):
+    """
+    Run one limiter check for an arbitrary key.
+
+    For ``token_bucket`` the bucket holds ``burst`` tokens (default
+    ``max_attempts``) and refills at ``max_attempts`` per ``window_seconds``.
+    """
+    if algorithm == TOKEN_BUCKET:
+        return limiter.consume(key, burst or max_attempts, max_attempts / window_seconds)
+    return limiter.hit(key, max_attempts, window_seconds)
+
+
+def rate_limit_key(key_prefix, endpoint, identity):
+    """Limiter key used by ``rate_limit`` for one endpoint and request identity."""
+    return f"{key_prefix}:{endpoint}:{identity}"
+
+
+# --- request identities ---------------------------------------------------------
+
+def _request_identity(key_by):
+    """Identity string for the current request, or None when it cannot be determined."""
+    if callable(key_by):
+        identity = key_by()
+        return str(identity) if identity is not None else None
+
+    user = getattr(g, 'current_user', None)
+    if key_by in ('user', 'user_or_ip') and user is not None:
+        return f"user:{user.id}"
+    if key_by in ('ip', 'user_or_ip'):
+        ip = request.remote_addr
+        return f"ip:{ip}" if ip else None
+    if key_by == 'api_key':
+        api_key = request.headers.get('X-API-Key') or request.headers.get('Authorization-Key')
+        if api_key:
+            return "key:" + hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:32]
+    return None
+
+
+def rate_limit(max_attempts=10, window_minutes=60, key_prefix='rate_limit', key_by='user',
+               algorithm=SLIDING_WINDOW, burst=None, error_message=None, window_seconds=None):
     """
-    Rate limiting decorator using database audit log.
-    
+    Rate limiting decorator.
+
     Args:
-        max_attempts: Maximum number of attempts allowed
-        window_minutes: Time window in minutes
+        max_attempts: Maximum number of requests allowed per window
+        window_minutes: Time window in minutes (``window_seconds`` overrides it)
         key_prefix: Prefix for the rate limit key
-        
+        key_by: 'user', 'ip', 'user_or_ip', 'api_key' or a callable returning the identity
+        algorithm: 'sliding_window' (hard cap) or 'token_bucket' (allows ``burst`` then a steady rate)
+        burst: Token bucket capacity, defaults to max_attempts
+        error_message: Message of the 429 response
+
+    Requests without an identity (e.g. ``key_by='user'`` and no logged in user)
+    are not limited.
+
     Usage:
         @rate_limit(max_attempts=10, window_minutes=60)
         def my_endpoint():
             ...
     """
+    window = window_seconds or window_minutes * 60
+
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # Get user from g (set by @token_required decorator)
-            user = getattr(g, 'current_user', None)
-            if not user:
-                # If no user context, skip rate limiting (shouldn't happen with @token_required)
+            identity = _request_identity(key_by)
+            if identity is None:
                 return f(*args, **kwargs)
-            
-            # Check rate limit using audit log table
+
+            key = rate_limit_key(key_prefix, request.endpoint or f.__name__, identity)
             try:
-                from app.models.daily_reward_models import DailyRewardClaimAttempt
-                
-                # Calculate the time window
-                window_start = datetime.utcnow() - timedelta(minutes=window_minutes)
-                
-                # Count attempts in the window
-                attempt_count = DailyRewardClaimAttempt.query.filter(
-                    DailyRewardClaimAttempt.user_id == user.id,
-                    DailyRewardClaimAttempt.attempt_timestamp >= window_start
-                ).count()
-                
-                if attempt_count >= max_attempts:
-                    logger.warning(
-                        f"Rate limit exceeded for user {user.id}: "
-                        f"{attempt_count} attempts in {window_minutes} minutes"
-                    )
-                    return jsonify({
-                        'error': f'Too many claim attempts. Please try again in a few minutes.',
-                        'rate_limit_exceeded': True
-                    }), 429
-                
+                result = check_rate_limit(key, max_attempts, window, algorithm, burst)
             except Exception as e:
                 logger.error(f"Rate limit check failed: {e}")
                 # On error, allow the request to proceed (fail open for availability)
-            
+                return f(*args, **kwargs)
+
+            if not result.allowed:
+                retry_after = max(1, int(result.retry_after + 0.999))
+                logger.warning(f"[RATE_LIMIT] Limit exceeded for {key}: {max_attempts} per {window}s")
+                response = jsonify({
+                    'error': error_message or 'Too many requests. Please try again in a few minutes.',
+                    'rate_limit_exceeded': True,
+                    'retry_after': retry_after
+                })
+                response.status_code = 429
+                response.headers['Retry-After'] = str(retry_after)
+                response.headers['X-RateLimit-Limit'] = str(result.limit)
+                response.headers['X-RateLimit-Remaining'] = '0'
+                return response
+
             return f(*args, **kwargs)
-        
+
         return decorated_function
     return decorator
 
 
-def get_rate_limit_status(user_id, window_minutes=60):
+def get_rate_limit_status(user_id, window_minutes=60, max_attempts=10, key_prefix='daily_reward',
+                          endpoint='daily_reward.claim_daily_reward'):
     """
-    Get the current rate limit status for a user.
-    
+    Get the daily reward claim attempt status for a user.
+
+    Reads the same sliding window the ``rate_limit`` decorator on the claim
+    endpoint enforces, without recording an attempt.
+
     Args:
         user_id: User ID to check
         window_minutes: Time window in minutes
-        
+        max_attempts: Attempts allowed per window (as configured on the endpoint)
+        key_prefix: Key prefix configured on the endpoint
+        endpoint: Flask endpoint name the limit is applied to
+
     Returns:
         dict: Status information
     """
     try:
-        from app.models.daily_reward_models import DailyRewardClaimAttempt
-        
         window_start = datetime.utcnow() - timedelta(minutes=window_minutes)
-        
-        attempt_count = DailyRewardClaimAttempt.query.filter(
-            DailyRewardClaimAttempt.user_id == user_id,
-            DailyRewardClaimAttempt.attempt_timestamp >= window_start
-        ).count()
-        
+        status = limiter.peek(
+            rate_limit_key(key_prefix, endpoint, f"user:{user_id}"), max_attempts, window_minutes * 60
+        )
         return {
-            'attempts': attempt_count,
+            'attempts': status.limit - status.remaining,
+            'limit': status.limit,
+            'remaining': status.remaining,
             'window_minutes': window_minutes,
             'window_start': window_start.isoformat()
         }
@@ -104,7 +334,3 @@ def get_rate_limit_status(user_id, window_minutes=60):
             'window_minutes': window_minutes,
             'error': str(e)
         }
-
-
-
-
@@ -0,0 +1,32 @@
+# app/utils/redis_client.py
+"""
+Helpers for the shared ``app.redis`` connection.
+
+``run.create_app`` attaches either a real redis-py client or a tiny
+``MockRedis`` (get/set/delete only) when no Redis server is reachable.
+Callers that need more than get/set use ``get_redis()`` and fall back to
+in-process state when it returns None.
+"""
+
+import logging
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+
+def get_app_redis():
+    """Return ``current_app.redis`` (real or MockRedis), or None outside an app context."""
+    if has_app_context():
+        return getattr(current_app, 'redis', None)
+    return None
+
+
+def is_real_redis(client):
+    """True when ``client`` is a real redis-py connection rather than the MockRedis fallback."""
+    return client is not None and type(client).__name__ != 'MockRedis' and hasattr(client, 'pipeline')
+
+
+def get_redis():
+    """Return the app's real Redis client, or None when only MockRedis (or nothing) is available."""
+    client = get_app_redis()
+    return client if is_real_redis(client) else None
@@ -0,0 +1,185 @@
+# app/utils/report_cache.py
+"""
+Filter-aware cache for report tab analytics.
+
+Results of ``ReportTabController.get_report_data`` are kept in an
+in-process LRU with a TTL, keyed on (survey_id, survey data version,
+canonicalized filters, canonicalized comparison). A new Submission bumps
+the survey's data version, which makes every cached entry for that survey
+unreachable. With a real Redis the version lives in Redis so a submission
+handled by one worker invalidates the caches of all workers.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.models import Submission
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_MAX_ENTRIES = int(os.environ.get('REPORT_CACHE_MAX_ENTRIES', 256))
+REPORT_CACHE_TTL_SECONDS = int(os.environ.get('REPORT_CACHE_TTL_SECONDS', 300))
+
+_VERSION_KEY = "report_cache:survey_version:{survey_id}"
+_DIRTY_SURVEYS_KEY = 'report_cache_dirty_surveys'
+
+
+def _canonical_value(value):
+    """Normalize a filter value: drop empties, sort list filters (they are IN sets)."""
+    if isinstance(value, dict):
+        return {k: _canonical_value(v) for k, v in value.items() if v not in (None, '', [], {})}
+    if isinstance(value, (list, tuple)):
+        items = [_canonical_value(v) for v in value if v not in (None, '')]
+        try:
+            return sorted(items)
+        except TypeError:
+            return sorted(items, key=lambda v: json.dumps(v, sort_keys=True, default=str))
+    return value
+
+
+def canonicalize_filters(filters):
+    """Stable JSON form of a report filter dict (equivalent filters map to the same string)."""
+    if not filters or not isinstance(filters, dict):
+        return '{}'
+    return json.dumps(_canonical_value(filters), sort_keys=True, separators=(',', ':'), default=str)
+
+
+def canonicalize_comparison(comparison):
+    """Stable JSON form of a comparison spec; all "no comparison" variants map to ''."""
+    if not comparison or comparison.get("type") == "No Comparison" or comparison.get("dimension") is None:
+        return ''
+    # Segment order decides which group is group1/group2, so it is kept as-is.
+    return json.dumps({
+        "dimension": comparison.get("dimension"),
+        "segments": list(comparison.get("segments") or [])
+    }, sort_keys=True, separators=(',', ':'), default=str)
+
+
+class ReportDataCache:
+    """Thread-safe in-process LRU + TTL cache with per-survey data versions."""
+
+    def __init__(self, max_entries=REPORT_CACHE_MAX_ENTRIES, ttl_seconds=REPORT_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._local_versions = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0, 'misses': 0, 'stores': 0,
+            'evictions': 0, 'expirations': 0, 'invalidations': 0
+        }
+
+    # --- survey data versions -------------------------------------------------
+
+    def _survey_version(self, survey_id):
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                return str(redis_client.get(_VERSION_KEY.format(survey_id=survey_id)) or 0)
+            except Exception as e:
+                logger.warning(f"[REPORT_CACHE] Redis version lookup failed for survey {survey_id}: {e}")
+        with self._lock:
+            return str(self._local_versions.get(survey_id, 0))
+
+    def invalidate_survey(self, survey_id):
+        """Make every cached report of ``survey_id`` stale (all workers when Redis is real)."""
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                redis_client.incr(_VERSION_KEY.format(survey_id=survey_id))
+            except Exception as e:
+                logger.warning(f"[REPORT_CACHE] Redis version bump failed for survey {survey_id}: {e}")
+        with self._lock:
+            self._local_versions[survey_id] = self._local_versions.get(survey_id, 0) + 1
+            for key in [k for k in self._entries if k[0] == survey_id]:
+                del self._entries[key]
+            self._stats['invalidations'] += 1
+
+    # --- get / set -------------------------------------------------------------
+
+    def _key(self, survey_id, filters, comparison):
+        return (survey_id, self._survey_version(survey_id), canonicalize_filters(filters), canonicalize_comparison(comparison))
+
+    def get(self, survey_id, filters=None, comparison=None):
+        """Return the cached report data or None on a miss."""
+        key = self._key(survey_id, filters, comparison)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, survey_id, filters, comparison, value):
+        """Store report data, evicting the least recently used entries beyond max_entries."""
+        key = self._key(survey_id, filters, comparison)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            self._stats['stores'] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters plus current size, for tuning max_entries and TTL."""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': round(self._stats['hits'] / lookups * 100, 1) if lookups else 0,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds
+            }
+
+
+report_data_cache = ReportDataCache()
+
+
+# --- Invalidation on new submissions ---------------------------------------------
+# Survey ids of inserted submissions are collected on the session and only
+# invalidated once the transaction commits, so a rolled-back submission
+# does not flush the cache.
+
+@event.listens_for(Submission, 'after_insert')
+def _mark_survey_dirty(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and target.survey_id is not None:
+        session.info.setdefault(_DIRTY_SURVEYS_KEY, set()).add(target.survey_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_dirty_surveys(session):
+    if session.in_nested_transaction():
+        return  # SAVEPOINT release; wait for the outer commit
+    for survey_id in session.info.pop(_DIRTY_SURVEYS_KEY, ()):
+        report_data_cache.invalidate_survey(survey_id)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_dirty_surveys(session, previous_transaction):
+    # A SAVEPOINT rollback leaves the outer submission intact; only a root rollback discards it.
+    if previous_transaction.parent is None and not previous_transaction.nested:
+        session.info.pop(_DIRTY_SURVEYS_KEY, None)
@@ -0,0 +1,463 @@
+# app/utils/season_analytics.py
+"""
+Season pass subscription analytics computed in SQL.
+
+Every season is summarized into a JSON-serializable snapshot: subscribers and
+revenue per tier, how many subscribers came straight back from the previous
+season (and whether they changed tier), the cohort each subscriber belongs to
+(the first season they ever bought) and level/XP progression. All snapshots a
+request needs come from two grouped queries - one over ``user_season_passes``
+using window functions (LAG over each user's seasons, FIRST_VALUE for the
+cohort), one over ``user_season_progress`` - instead of loading pass rows into
+Python.
+
+Snapshots of a season that is still open are cached for
+SEASON_ANALYTICS_TTL_SECONDS. Once a season has ended its snapshot is frozen:
+it is kept until the seasons ordered before it (or its own dates) change,
+which is folded into the cache key. With a real Redis snapshots are shared by
+all workers; otherwise they are cached per process.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import case, func, select
+
+from app.models import db
+from app.models.season_pass_models import Season, UserSeasonPass, UserSeasonProgress, PassTierType
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+SEASON_ANALYTICS_TTL_SECONDS = int(os.environ.get('SEASON_ANALYTICS_TTL_SECONDS', 300))
+# Frozen snapshots only go stale when the season list is edited, which changes their key
+SEASON_ANALYTICS_FROZEN_TTL_SECONDS = int(os.environ.get('SEASON_ANALYTICS_FROZEN_TTL_SECONDS', 30 * 86400))
+
+_SNAPSHOT_KEY = "season_analytics:season:{season_id}:{signature}"
+_OVERVIEW_KEY = "season_analytics:overview"
+_LUNAR = PassTierType.LUNAR.value
+_TOTALITY = PassTierType.TOTALITY.value
+
+_local_cache = {}  # key -> (expires_at, value)
+_local_lock = threading.Lock()
+
+
+def _percent(part, whole):
+    return (part / max(1, whole)) * 100
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else 0
+
+
+def sort_seasons(seasons):
+    """Seasons oldest first, ties broken by id (the order cohorts and transitions use)."""
+    return sorted(seasons, key=lambda s: (s.start_date or datetime.min, s.id))
+
+
+def is_frozen(season, now=None):
+    """True once a season has ended; its passes and progress no longer change."""
+    now = now or datetime.utcnow()
+    return bool(season.end_date and season.end_date <= now and not season.is_active)
+
+
+def _season_ref(season):
+    return {"id": season.id, "name": season.name}
+
+
+# --- Cache ------------------------------------------------------------------------
+
+def _cache_get_many(keys):
+    redis_client = get_redis()
+    if redis_client is not None:
+        try:
+            return {key: json.loads(raw) for key, raw in zip(keys, redis_client.mget(keys)) if raw}
+        except Exception as e:
+            logger.warning(f"[SEASON_ANALYTICS] Redis cache lookup failed: {e}")
+    now = time.monotonic()
+    with _local_lock:
+        found = {}
+        for key in keys:
+            entry = _local_cache.get(key)
+            if entry is not None and entry[0] > now:
+                found[key] = entry[1]
+        return found
+
+
+def _cache_set(key, value, ttl_seconds):
+    redis_client = get_redis()
+    if redis_client is not None:
+        try:
+            redis_client.set(key, json.dumps(value), ex=ttl_seconds)
+            return
+        except Exception as e:
+            logger.warning(f"[SEASON_ANALYTICS] Redis cache store failed: {e}")
+    with _local_lock:
+        now = time.monotonic()
+        for stale_key in [k for k, (expires_at, _) in _local_cache.items() if expires_at <= now]:
+            del _local_cache[stale_key]
+        _local_cache[key] = (now + ttl_seconds, value)
+
+
+def _snapshot_keys(ordered_seasons):
+    """Cache key per season id; each key covers the season and every season before it."""
+    keys = {}
+    digest = hashlib.sha1()
+    for season in ordered_seasons:
+        end_date = season.end_date.isoformat() if season.end_date else ''
+        digest.update(f"{season.id}:{season.start_date.isoformat() if season.start_date else ''}:{end_date};".encode())
+        keys[season.id] = _SNAPSHOT_KEY.format(season_id=season.id, signature=digest.hexdigest()[:16])
+    return keys
+
+
+# --- Snapshots --------------------------------------------------------------------
+
+def _empty_snapshot(previous_season_id):
+    return {
+        "subscribers": {"total": 0, _LUNAR: 0, _TOTALITY: 0},
+        "revenue_cents": {"total": 0, _LUNAR: 0, _TOTALITY: 0},
+        "previous_season_id": previous_season_id,
+        "previous_subscribers": 0,
+        "returning_subscribers": 0,
+        "tier_upgrades": 0,
+        "tier_downgrades": 0,
+        "cohorts": {},  # first season id (str) -> subscribers of this season from that cohort
+        "active_users": 0,
+        "avg_level": 0.0,
+        "avg_xp": 0.0,
+        "level_distribution": {},
+    }
+
+
+def _pass_rows(season_ids):
+    """
+    Grouped pass rows of ``season_ids``: (season_id, cohort_season_id, tier_type,
+    previous_tier, subscribers, revenue). ``previous_tier`` is the tier the user
+    held in the immediately preceding season, or NULL for new/returning-after-a-gap.
+    """
+    season_order = select(
+        Season.id.label('season_id'),
+        func.row_number().over(order_by=(Season.start_date, Season.id)).label('seq')
+    ).subquery()
+    user_window = {'partition_by': UserSeasonPass.user_id, 'order_by': season_order.c.seq}
+    passes = select(
+        UserSeasonPass.season_id,
+        UserSeasonPass.tier_type,
+        UserSeasonPass.purchase_price,
+        func.first_value(UserSeasonPass.season_id).over(**user_window).label('cohort_season_id'),
+        case(
+            (func.lag(season_order.c.seq).over(**user_window) == season_order.c.seq - 1,
+             func.lag(UserSeasonPass.tier_type).over(**user_window)),
+            else_=None
+        ).label('previous_tier'),
+    ).join(season_order, season_order.c.season_id == UserSeasonPass.season_id).subquery()
+
+    return db.session.execute(
+        select(
+            passes.c.season_id, passes.c.cohort_season_id, passes.c.tier_type, passes.c.previous_tier,
+            func.count(), func.coalesce(func.sum(passes.c.purchase_price), 0)
+        ).where(
+            passes.c.season_id.in_(season_ids)
+        ).group_by(
+            passes.c.season_id, passes.c.cohort_season_id, passes.c.tier_type, passes.c.previous_tier
+        )
+    ).all()
+
+
+def _progress_rows(season_ids):
+    """(season_id, level, users, xp) grouped by season and level."""
+    return db.session.execute(
+        select(
+            UserSeasonProgress.season_id, UserSeasonProgress.current_level,
+            func.count(), func.coalesce(func.sum(UserSeasonProgress.current_xp_in_season), 0)
+        ).where(
+            UserSeasonProgress.season_id.in_(season_ids)
+        ).group_by(UserSeasonProgress.season_id, UserSeasonProgress.current_level)
+    ).all()
+
+
+def _compute_snapshots(ordered_seasons, season_ids):
+    """Snapshots of ``season_ids`` (plus the totals of their previous seasons) in two queries."""
+    previous = {}
+    for index, season in enumerate(ordered_seasons):
+        previous[season.id] = ordered_seasons[index - 1].id if index else None
+
+    snapshots = {season_id: _empty_snapshot(previous[season_id]) for season_id in season_ids}
+    previous_ids = {previous[season_id] for season_id in season_ids if previous[season_id] is not None}
+    previous_totals = {}
+
+    for season_id, cohort_id, tier, previous_tier, count, revenue in _pass_rows(set(season_ids) | previous_ids):
+        previous_totals[season_id] = previous_totals.get(season_id, 0) + count
+        snapshot = snapshots.get(season_id)
+        if snapshot is None:
+            continue
+        snapshot["subscribers"]["total"] += count
+        snapshot["subscribers"][tier] = snapshot["subscribers"].get(tier, 0) + count
+        snapshot["revenue_cents"]["total"] += int(revenue)
+        snapshot["revenue_cents"][tier] = snapshot["revenue_cents"].get(tier, 0) + int(revenue)
+        cohort_key = str(cohort_id)
+        snapshot["cohorts"][cohort_key] = snapshot["cohorts"].get(cohort_key, 0) + count
+        if previous_tier is not None:
+            snapshot["returning_subscribers"] += count
+            if previous_tier == _LUNAR and tier == _TOTALITY:
+                snapshot["tier_upgrades"] += count
+            elif previous_tier == _TOTALITY and tier == _LUNAR:
+                snapshot["tier_downgrades"] += count
+
+    xp_totals = {}
+    for season_id, level, count, xp in _progress_rows(season_ids):
+        snapshot = snapshots[season_id]
+        snapshot["active_users"] += count
+        snapshot["level_distribution"][str(level)] = count
+        snapshot["avg_level"] += level * count
+        xp_totals[season_id] = xp_totals.get(season_id, 0) + int(xp)
+
+    for season_id, snapshot in snapshots.items():
+        if snapshot["previous_season_id"] is not None:
+            snapshot["previous_subscribers"] = previous_totals.get(snapshot["previous_season_id"], 0)
+        active_users = snapshot["active_users"]
+        snapshot["avg_level"] = snapshot["avg_level"] / active_users if active_users else 0.0
+        snapshot["avg_xp"] = xp_totals.get(season_id, 0) / active_users if active_users else 0.0
+    return snapshots
+
+
+def season_snapshots(seasons, season_ids=None):
+    """
+    {season_id: snapshot} for ``season_ids`` (default: every season in ``seasons``).
+
+    ``seasons`` must be the full season list; it decides each season's predecessor
+    and cohort. Cached snapshots are reused and the rest computed together.
+    """
+    ordered = sort_seasons(seasons)
+    wanted = [s for s in ordered if season_ids is None or s.id in season_ids]
+    keys = _snapshot_keys(ordered)
+    cached = _cache_get_many([keys[s.id] for s in wanted]) if wanted else {}
+
+    snapshots = {}
+    missing = []
+    for season in wanted:
+        snapshot = cached.get(keys[season.id])
+        if snapshot is None:
+            missing.append(season)
+        else:
+            snapshots[season.id] = snapshot
+
+    if missing:
+        started = time.monotonic()
+        computed = _compute_snapshots(ordered, [s.id for s in missing])
+        now = datetime.utcnow()
+        for season in missing:
+            frozen = is_frozen(season, now)
+            ttl = SEASON_ANALYTICS_FROZEN_TTL_SECONDS if frozen else SEASON_ANALYTICS_TTL_SECONDS
+            _cache_set(keys[season.id], computed[season.id], ttl)
+            snapshots[season.id] = computed[season.id]
+        logger.info(
+            f"[SEASON_ANALYTICS] Computed {len(missing)} season snapshots in "
+            f"{round(time.monotonic() - started, 3)}s ({len(wanted) - len(missing)} cached)"
+        )
+    return snapshots
+
+
+def subscriber_overview():
+    """Unique subscribers plus one-season and 3+-season subscriber counts, from one grouped query."""
+    cached = _cache_get_many([_OVERVIEW_KEY]).get(_OVERVIEW_KEY)
+    if cached is not None:
+        return cached
+
+    seasons_per_user = select(
+        UserSeasonPass.user_id, func.count().label('season_count')
+    ).group_by(UserSeasonPass.user_id).subquery()
+    rows = db.session.execute(
+        select(seasons_per_user.c.season_count, func.count()).group_by(seasons_per_user.c.season_count)
+    ).all()
+    overview = {
+        "total_unique_subscribers": sum(users for _, users in rows),
+        "single_season_subscribers": sum(users for seasons, users in rows if seasons == 1),
+        "loyal_subscribers": sum(users for seasons, users in rows if seasons >= 3),
+    }
+    _cache_set(_OVERVIEW_KEY, overview, SEASON_ANALYTICS_TTL_SECONDS)
+    return overview
+
+
+# --- Reports ----------------------------------------------------------------------
+
+def season_summary(season, snapshot):
+    """Subscription, revenue, behaviour and engagement metrics of one season."""
+    subscribers = snapshot["subscribers"]
+    revenue = snapshot["revenue_cents"]
+    total = subscribers["total"]
+    has_previous = snapshot["previous_season_id"] is not None
+    returning = snapshot["returning_subscribers"]
+    churned = snapshot["previous_subscribers"] - returning if has_previous else 0
+
+    return {
+        "season": {
+            "id": season.id,
+            "name": season.name,
+            "start_date": season.start_date.isoformat() if season.start_date else None,
+            "end_date": season.end_date.isoformat() if season.end_date else None,
+            "is_active": season.is_active
+        },
+        "subscription_metrics": {
+            "total_subscribers": total,
+            "lunar_subscribers": subscribers.get(_LUNAR, 0),
+            "totality_subscribers": subscribers.get(_TOTALITY, 0),
+            "tier_distribution": {
+                "lunar_percentage": _percent(subscribers.get(_LUNAR, 0), total),
+                "totality_percentage": _percent(subscribers.get(_TOTALITY, 0), total)
+            }
+        },
+        "revenue_metrics": {
+            "total_revenue_cents": revenue["total"],
+            "total_revenue_dollars": revenue["total"] / 100,
+            "avg_revenue_per_user": revenue["total"] / max(1, total) / 100,
+            "lunar_revenue": revenue.get(_LUNAR, 0) / 100,
+            "totality_revenue": revenue.get(_TOTALITY, 0) / 100
+        },
+        "user_behavior": {
+            "returning_subscribers": returning,
+            "new_subscribers": total - returning,
+            "churned_from_previous": churned,
+            "retention_rate": _percent(returning, returning + churned) if has_previous else 0,
+            "churn_rate": _percent(churned, returning + churned) if has_previous else 0
+        },
+        "engagement_metrics": {
+            "active_users": snapshot["active_users"],
+            "conversion_rate": _percent(total, snapshot["active_users"]),
+            "avg_level_reached": snapshot["avg_level"],
+            "avg_xp_earned": snapshot["avg_xp"]
+        }
+    }
+
+
+def _transitions(ordered, snapshots):
+    """(from_season, to_season, from_subscribers, retained, to_snapshot) for consecutive seasons."""
+    for current_season, next_season in zip(ordered, ordered[1:]):
+        next_snapshot = snapshots[next_season.id]
+        yield (current_season, next_season, snapshots[current_season.id]["subscribers"]["total"],
+               next_snapshot["returning_subscribers"], next_snapshot)
+
+
+def retention_metrics(seasons, snapshots, overview):
+    """Season-to-season retention, its average and the number of 3+-season subscribers."""
+    steps = [
+        {
+            "from_season": _season_ref(current_season),
+            "to_season": _season_ref(next_season),
+            "subscribers_retained": retained,
+            "total_previous_subscribers": previous_total,
+            "retention_rate": _percent(retained, previous_total)
+        }
+        for current_season, next_season, previous_total, retained, _ in _transitions(sort_seasons(seasons), snapshots)
+    ]
+    return {
+        "season_to_season_retention": steps,
+        "overall_retention_rate": _mean([step["retention_rate"] for step in steps]),
+        "loyal_subscribers": overview["loyal_subscribers"],
+    }
+
+
+def churn_metrics(seasons, snapshots, overview):
+    """Season-to-season churn and tier changes of the subscribers who stayed."""
+    steps = []
+    for current_season, next_season, previous_total, retained, next_snapshot in _transitions(sort_seasons(seasons), snapshots):
+        churned = previous_total - retained
+        steps.append({
+            "from_season": _season_ref(current_season),
+            "to_season": _season_ref(next_season),
+            "churned_users": churned,
+            "total_previous_subscribers": previous_total,
+            "churn_rate": _percent(churned, previous_total),
+            "tier_changes": {
+                "upgrades": next_snapshot["tier_upgrades"],
+                "downgrades": next_snapshot["tier_downgrades"]
+            }
+        })
+    return {
+        "season_to_season_churn": steps,
+        "overall_churn_rate": _mean([step["churn_rate"] for step in steps]),
+        "churn_analysis": {
+            "never_returned": overview["single_season_subscribers"],
+            "tier_downgrades": sum(step["tier_changes"]["downgrades"] for step in steps),
+            "tier_upgrades": sum(step["tier_changes"]["upgrades"] for step in steps)
+        }
+    }
+
+
+def growth_metrics(seasons, snapshots):
+    """Subscriber and revenue growth between consecutive seasons."""
+    growth_data = {
+        "subscriber_growth": [],
+        "revenue_growth": [],
+        "growth_trends": {
+            "avg_subscriber_growth_rate": 0,
+            "avg_revenue_growth_rate": 0,
+            "fastest_growing_season": None,
+            "highest_revenue_season": None
+        }
+    }
+    previous_subscribers = previous_revenue = 0
+    max_growth_rate = max_revenue = 0
+    for index, season in enumerate(sort_seasons(seasons)):
+        subscribers = snapshots[season.id]["subscribers"]["total"]
+        revenue = snapshots[season.id]["revenue_cents"]["total"] / 100
+        if index > 0:
+            subscriber_growth_rate = _percent(subscribers - previous_subscribers, previous_subscribers)
+            growth_data["subscriber_growth"].append({
+                "season": _season_ref(season),
+                "subscribers": subscribers,
+                "previous_subscribers": previous_subscribers,
+                "growth_rate": subscriber_growth_rate,
+                "net_growth": subscribers - previous_subscribers
+            })
+            growth_data["revenue_growth"].append({
+                "season": _season_ref(season),
+                "revenue": revenue,
+                "previous_revenue": previous_revenue,
+                "growth_rate": _percent(revenue - previous_revenue, previous_revenue),
+                "net_growth": revenue - previous_revenue
+            })
+            if subscriber_growth_rate > max_growth_rate:
+                max_growth_rate = subscriber_growth_rate
+                growth_data["growth_trends"]["fastest_growing_season"] = {
+                    **_season_ref(season), "growth_rate": subscriber_growth_rate
+                }
+        if revenue > max_revenue:
+            max_revenue = revenue
+            growth_data["growth_trends"]["highest_revenue_season"] = {**_season_ref(season), "revenue": revenue}
+        previous_subscribers, previous_revenue = subscribers, revenue
+
+    trends = growth_data["growth_trends"]
+    trends["avg_subscriber_growth_rate"] = _mean([g["growth_rate"] for g in growth_data["subscriber_growth"]])
+    trends["avg_revenue_growth_rate"] = _mean([g["growth_rate"] for g in growth_data["revenue_growth"]])
+    return growth_data
+
+
+def cohort_matrix(seasons, snapshots):
+    """
+    Retention/churn cohort matrix. A cohort is every user whose first pass was
+    bought in a season; each row lists how many of them held a pass in that
+    season and every later one, as counts and as a share of the cohort.
+    """
+    ordered = sort_seasons(seasons)
+    rows = []
+    for index, cohort_season in enumerate(ordered):
+        cohort_key = str(cohort_season.id)
+        retained = [snapshots[season.id]["cohorts"].get(cohort_key, 0) for season in ordered[index:]]
+        cohort_size = retained[0]
+        if not cohort_size:
+            continue
+        retention_rates = [_percent(count, cohort_size) for count in retained]
+        rows.append({
+            "cohort_season": _season_ref(cohort_season),
+            "cohort_size": cohort_size,
+            "subscribers": retained,
+            "retention_rates": retention_rates,
+            "churn_rates": [100 - rate for rate in retention_rates]
+        })
+    return {"seasons": [_season_ref(season) for season in ordered], "cohorts": rows}
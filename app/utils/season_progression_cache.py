@@ -0,0 +1,91 @@
+# app/utils/season_progression_cache.py
+"""
+Process-wide cache of season pass progression data.
+
+Holds the active season (as an ``ActiveSeason`` snapshot of the fields XP
+processing needs) and, per season, the prefix sums of ``SeasonLevel``
+requirements so a user's level is one binary search over cumulative XP.
+Any committed change to a ``Season`` or ``SeasonLevel`` row - activating a
+season, ``update_xp_requirements``, creating levels - reloads every worker
+through ``VersionedCache`` (within SEASON_CACHE_CHECK_SECONDS with Redis,
+SEASON_CACHE_LOCAL_TTL_SECONDS without).
+"""
+
+import bisect
+import os
+from collections import namedtuple
+
+from app.models.season_pass_models import Season, SeasonLevel
+from app.utils.versioned_cache import VersionedCache
+
+SEASON_CACHE_CHECK_SECONDS = float(os.environ.get('SEASON_CACHE_CHECK_SECONDS', 2))
+SEASON_CACHE_LOCAL_TTL_SECONDS = float(os.environ.get('SEASON_CACHE_LOCAL_TTL_SECONDS', 60))
+
+ActiveSeason = namedtuple('ActiveSeason', ['id', 'lunar_xp_multiplier', 'totality_xp_multiplier'])
+
+_ACTIVE = 'active'
+
+
+class LevelTable:
+    """Cumulative XP thresholds of one season's levels, in level order."""
+
+    def __init__(self, levels):
+        self.level_numbers = []
+        self.cumulative_xp = []
+        total = 0
+        for level_number, xp_required in levels:
+            total += xp_required
+            self.level_numbers.append(level_number)
+            self.cumulative_xp.append(total)
+
+    def level_for_xp(self, xp):
+        """Highest level whose cumulative requirement ``xp`` meets (0 before level one)."""
+        index = bisect.bisect_right(self.cumulative_xp, xp)
+        return self.level_numbers[index - 1] if index else 0
+
+    def cumulative_for_level(self, level_number):
+        """Total XP required to reach ``level_number``."""
+        index = bisect.bisect_right(self.level_numbers, level_number)
+        return self.cumulative_xp[index - 1] if index else 0
+
+
+class SeasonProgressionCache(VersionedCache):
+    """
+    Active season snapshot and per-season level tables. The snapshot is a dict
+    filled on first use of each entry and replaced wholesale on a version change.
+    """
+
+    log_tag = 'SEASON_CACHE'
+
+    def __init__(self):
+        super().__init__(
+            'season_pass:version', [Season, SeasonLevel],
+            SEASON_CACHE_CHECK_SECONDS, SEASON_CACHE_LOCAL_TTL_SECONDS
+        )
+
+    def load(self):
+        return {}
+
+    def active_season(self):
+        """ActiveSeason snapshot of the active season, or None when no season is active."""
+        entries = self.snapshot()
+        if _ACTIVE not in entries:
+            season = Season.query.filter_by(is_active=True).first()
+            entries[_ACTIVE] = ActiveSeason(
+                season.id, season.lunar_xp_multiplier, season.totality_xp_multiplier
+            ) if season else None
+        return entries[_ACTIVE]
+
+    def level_table(self, season_id):
+        """LevelTable for ``season_id``, built from one query on first use."""
+        entries = self.snapshot()
+        table = entries.get(season_id)
+        if table is None:
+            levels = SeasonLevel.query.with_entities(
+                SeasonLevel.level_number, SeasonLevel.xp_required_for_level
+            ).filter_by(season_id=season_id).order_by(SeasonLevel.level_number).all()
+            table = entries[season_id] = LevelTable(levels)
+        return table
+
+
+season_progression_cache = SeasonProgressionCache()
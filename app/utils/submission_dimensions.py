@@ -0,0 +1,20 @@
+# app/utils/submission_dimensions.py
+"""
+Submission columns that reports may segment and compare by.
+
+Kept free of model and controller imports so the models (which index these
+columns) and every controller that validates a dimension can share one list.
+"""
+
+DEMOGRAPHIC_CATEGORIES = ['age_group', 'gender', 'location', 'education', 'company', 'cohort_tag']
+
+# Whitelist of Submission columns a comparison may GROUP BY
+COMPARISON_DIMENSIONS = DEMOGRAPHIC_CATEGORIES + ['device_type', 'browser_info', 'survey_link_id']
+
+# (survey_id, survey_link_id) is already covered by idx_submission_survey_link
+COMPARISON_INDEXED_DIMENSIONS = [d for d in COMPARISON_DIMENSIONS if d != 'survey_link_id']
+
+
+def comparison_index_name(dimension):
+    """Name of the (survey_id, dimension) index on submissions."""
+    return f'idx_submission_survey_{dimension}'
@@ -0,0 +1,83 @@
+# app/utils/time_buckets.py
+"""
+SQL time bucketing helpers.
+
+``bucket_expression`` truncates a datetime column to the start of its
+hourly/daily/weekly (ISO, Monday)/monthly bucket inside the database, so
+trend queries can GROUP BY it and return one row per bucket. PostgreSQL
+uses ``date_trunc``; SQLite uses ``strftime``/``date`` modifiers. Other
+dialects get None and callers bucket in Python with ``truncate_datetime``.
+"""
+
+import datetime
+
+from sqlalchemy import func
+
+TIMEFRAMES = ('hourly', 'daily', 'weekly', 'monthly')
+DEFAULT_TIMEFRAME = 'daily'
+
+_PG_UNITS = {'hourly': 'hour', 'daily': 'day', 'weekly': 'week', 'monthly': 'month'}
+
+
+def normalize_timeframe(timeframe):
+    return timeframe if timeframe in TIMEFRAMES else DEFAULT_TIMEFRAME
+
+
+def bucket_expression(column, timeframe, dialect_name):
+    """SQL expression for the bucket start of ``column``, or None if the dialect is unsupported."""
+    timeframe = normalize_timeframe(timeframe)
+    if dialect_name == 'postgresql':
+        return func.date_trunc(_PG_UNITS[timeframe], column)
+    if dialect_name == 'sqlite':
+        if timeframe == 'hourly':
+            return func.strftime('%Y-%m-%d %H:00:00', column)
+        if timeframe == 'daily':
+            return func.date(column)
+        if timeframe == 'weekly':
+            # 'weekday 0' moves forward to Sunday (or stays), -6 days lands on the ISO Monday
+            return func.date(column, 'weekday 0', '-6 days')
+        return func.strftime('%Y-%m-01', column)
+    return None
+
+
+def truncate_datetime(value, timeframe):
+    """Python equivalent of ``bucket_expression`` for a single datetime."""
+    timeframe = normalize_timeframe(timeframe)
+    if timeframe == 'hourly':
+        return value.replace(minute=0, second=0, microsecond=0)
+    day_start = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if timeframe == 'daily':
+        return day_start
+    if timeframe == 'weekly':
+        return day_start - datetime.timedelta(days=day_start.weekday())
+    return day_start.replace(day=1)
+
+
+def to_datetime(value):
+    """Bucket values come back as datetimes (PostgreSQL) or ISO strings (SQLite)."""
+    if isinstance(value, datetime.datetime):
+        return value.replace(tzinfo=None) if value.tzinfo else value
+    if isinstance(value, datetime.date):
+        return datetime.datetime.combine(value, datetime.time.min)
+    return datetime.datetime.fromisoformat(str(value))
+
+
+def format_period(bucket_start, timeframe):
+    """Display label of a bucket (weekly labels are ISO year/week, e.g. '2024-W7')."""
+    timeframe = normalize_timeframe(timeframe)
+    if timeframe == 'hourly':
+        return bucket_start.strftime('%Y-%m-%d %H:00')
+    if timeframe == 'weekly':
+        iso_year, iso_week, _ = bucket_start.isocalendar()
+        return f"{iso_year}-W{iso_week}"
+    if timeframe == 'monthly':
+        return bucket_start.strftime('%Y-%m')
+    return bucket_start.strftime('%Y-%m-%d')
+
+
+def parse_since(value):
+    """Parse an ISO-8601 cursor into a naive UTC datetime; raises ValueError when invalid."""
+    parsed = datetime.datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed
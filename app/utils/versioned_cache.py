@@ -0,0 +1,124 @@
+# app/utils/versioned_cache.py
+"""
+Base class for process-wide snapshots of rarely changing tables.
+
+A subclass loads everything it serves into one snapshot object, which is
+swapped in with a single assignment so lock-free readers never see half of
+an old load and half of a new one. Any committed insert/update/delete of a
+watched model bumps the cache's version counter; with a real Redis the
+counter lives in Redis and every worker reloads within ``check_seconds`` of
+the change. Without Redis other workers reload after ``local_ttl_seconds``.
+Changes that are rolled back (or only released to a SAVEPOINT and then
+rolled back with the outer transaction) never invalidate anything.
+"""
+
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+_DIRTY_CACHES_KEY = 'versioned_caches_dirty'
+_caches = {}  # version key -> VersionedCache
+
+
+class VersionedCache:
+    """Thread-safe snapshot reloaded when its version counter moves on."""
+
+    log_tag = 'VERSIONED_CACHE'
+
+    def __init__(self, version_key, models, check_seconds, local_ttl_seconds):
+        self.version_key = version_key
+        self.check_seconds = check_seconds
+        self.local_ttl_seconds = local_ttl_seconds
+        self._snapshot = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        _caches[version_key] = self
+        for model in models:
+            for event_name in ('after_insert', 'after_update', 'after_delete'):
+                event.listen(model, event_name, self._mark_dirty)
+
+    def load(self):
+        """Build and return a new snapshot object. Implemented by subclasses."""
+        raise NotImplementedError
+
+    def _remote_version(self):
+        redis_client = get_redis()
+        if redis_client is None:
+            return None
+        try:
+            return str(redis_client.get(self.version_key) or 0)
+        except Exception as e:
+            logger.warning(f"[{self.log_tag}] Redis version lookup failed: {e}")
+            return None
+
+    def snapshot(self):
+        """Current snapshot, reloaded first when the version moved on."""
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and now - self._checked_at < self.check_seconds:
+            return snapshot
+        with self._lock:
+            if self._snapshot is not None:
+                if now - self._checked_at < self.check_seconds:
+                    return self._snapshot
+                version = self._remote_version()
+                if version is not None and version == self._version:
+                    self._checked_at = now
+                    return self._snapshot
+                if version is None and now - self._loaded_at < self.local_ttl_seconds:
+                    self._checked_at = now
+                    return self._snapshot
+            else:
+                version = self._remote_version()
+            try:
+                self._snapshot = self.load()
+                self._version = version
+                self._loaded_at = self._checked_at = time.monotonic()
+                logger.debug(f"[{self.log_tag}] Reloaded (version {version})")
+            except Exception as e:
+                if self._snapshot is None:
+                    raise
+                logger.warning(f"[{self.log_tag}] Reload failed, serving previous snapshot: {e}")
+                self._checked_at = now
+            return self._snapshot
+
+    def invalidate(self):
+        """Force a reload here and, with Redis, in every other worker."""
+        redis_client = get_redis()
+        if redis_client is not None:
+            try:
+                redis_client.incr(self.version_key)
+            except Exception as e:
+                logger.warning(f"[{self.log_tag}] Redis version bump failed: {e}")
+        with self._lock:
+            self._snapshot = None
+
+    def _mark_dirty(self, mapper, connection, target):
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault(_DIRTY_CACHES_KEY, set()).add(self.version_key)
+
+
+# --- Invalidation on commit ---------------------------------------------------------
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_dirty_caches(session):
+    if session.in_nested_transaction():
+        return  # SAVEPOINT release; wait for the outer commit
+    for version_key in session.info.pop(_DIRTY_CACHES_KEY, ()):
+        _caches[version_key].invalidate()
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_dirty_caches(session, previous_transaction):
+    if previous_transaction.parent is None and not previous_transaction.nested:
+        session.info.pop(_DIRTY_CACHES_KEY, None)
@@ -1,27 +1,175 @@
 """
 WebSocket Manager for Real-time Notifications
 Handles real-time communication for user and admin notifications
+
+With a real Redis the Socket.IO servers of every worker share a Redis message
+queue, so an emit from any process (including Celery workers) reaches clients
+connected anywhere. Presence is indexed in Redis sets: ``ws:sid:{sid}`` holds
+the owners a connection registered as ("user:5", "admin:3") and
+``ws:presence:{owner}`` holds the owner's connection sids, so a disconnect
+touches only its own keys. Each worker also keeps the index of its own
+connections in process and re-arms their Redis TTLs every
+PRESENCE_REFRESH_SECONDS, so a long-lived connection never drops out while
+the keys of a crashed worker still expire. Without Redis the in-process
+index is the only one.
 """
+import os
+import threading
 from flask_socketio import SocketIO, emit, join_room, leave_room
-from flask import request
+from flask import request, current_app, has_app_context
 import logging
 
+from app.utils.redis_client import get_redis, is_real_redis
+
 logger = logging.getLogger(__name__)
 
 # Initialize SocketIO with CORS support
 socketio = SocketIO(cors_allowed_origins="*", async_mode='eventlet')
 
-# Store active connections
-active_connections = {}
+# Presence keys expire so entries of a crashed worker do not linger; live workers keep re-arming them
+PRESENCE_TTL_SECONDS = int(os.environ.get('WEBSOCKET_PRESENCE_TTL_SECONDS', 300))
+PRESENCE_REFRESH_SECONDS = max(1, PRESENCE_TTL_SECONDS // 3)
+_SID_KEY = "ws:sid:{sid}"
+_PRESENCE_KEY = "ws:presence:{owner}"
+
+# This worker's connections; the only presence index when Redis is unavailable
+_local_sid_owners = {}  # sid -> set of owners
+_local_presence = {}  # owner -> set of sids
+_local_lock = threading.Lock()
+
+# Write-only emitter for processes that never called init_socketio (e.g. Celery workers)
+_external_socketio = None
+
+
+def _message_queue_url(app):
+    """Redis URL shared by all Socket.IO servers, or None to stay single-process."""
+    url = os.environ.get('SOCKETIO_MESSAGE_QUEUE') or app.config.get('SOCKETIO_MESSAGE_QUEUE')
+    if url:
+        return url
+    if is_real_redis(getattr(app, 'redis', None)):
+        return app.config.get('REDIS_URL', 'redis://localhost:6379/0')
+    return None
 
 
 def init_socketio(app):
     """Initialize SocketIO with Flask app"""
-    socketio.init_app(app, cors_allowed_origins="*", async_mode='eventlet', logger=False, engineio_logger=False)
-    # SocketIO initialized silently
+    message_queue = _message_queue_url(app)
+    socketio.init_app(app, cors_allowed_origins="*", async_mode='eventlet', logger=False, engineio_logger=False,
+                      message_queue=message_queue)
+    if message_queue:
+        logger.info("[WEBSOCKET] Using Redis message queue for cross-worker events")
+    if is_real_redis(getattr(app, 'redis', None)):
+        socketio.start_background_task(_refresh_presence_loop, app)
     return socketio
 
 
+def _emitter():
+    """The initialized server, or a write-only client publishing to the message queue."""
+    global _external_socketio
+    if socketio.server is not None:
+        return socketio
+    if _external_socketio is None and has_app_context():
+        message_queue = _message_queue_url(current_app)
+        if message_queue:
+            _external_socketio = SocketIO(message_queue=message_queue)
+    return _external_socketio or socketio
+
+
+# --- Presence index ---------------------------------------------------------------
+
+def _add_presence(sid, owner):
+    with _local_lock:
+        _local_sid_owners.setdefault(sid, set()).add(owner)
+        _local_presence.setdefault(owner, set()).add(sid)
+    redis_client = get_redis()
+    if redis_client is not None:
+        try:
+            sid_key, presence_key = _SID_KEY.format(sid=sid), _PRESENCE_KEY.format(owner=owner)
+            pipe = redis_client.pipeline()
+            pipe.sadd(sid_key, owner)
+            pipe.expire(sid_key, PRESENCE_TTL_SECONDS)
+            pipe.sadd(presence_key, sid)
+            pipe.expire(presence_key, PRESENCE_TTL_SECONDS)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"[WEBSOCKET] Redis presence update failed: {e}")
+
+
+def _remove_presence(sid, owner=None):
+    """Drop one owner of ``sid``, or every owner when ``owner`` is None (disconnect)."""
+    with _local_lock:
+        local_owners = [owner] if owner else _local_sid_owners.pop(sid, set())
+        for item in local_owners:
+            sids = _local_presence.get(item)
+            if sids is not None:
+                sids.discard(sid)
+                if not sids:
+                    del _local_presence[item]
+        if owner and sid in _local_sid_owners:
+            _local_sid_owners[sid].discard(owner)
+            if not _local_sid_owners[sid]:
+                del _local_sid_owners[sid]
+    redis_client = get_redis()
+    if redis_client is not None:
+        try:
+            sid_key = _SID_KEY.format(sid=sid)
+            owners = [owner] if owner else redis_client.smembers(sid_key)
+            pipe = redis_client.pipeline()
+            for item in owners:
+                pipe.srem(_PRESENCE_KEY.format(owner=item), sid)
+            if owner:
+                pipe.srem(sid_key, owner)
+            else:
+                pipe.delete(sid_key)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"[WEBSOCKET] Redis presence cleanup failed: {e}")
+
+
+def _refresh_presence():
+    """Re-arm the Redis TTLs of this worker's connections."""
+    redis_client = get_redis()
+    if redis_client is None:
+        return
+    with _local_lock:
+        connections = [(sid, list(owners)) for sid, owners in _local_sid_owners.items()]
+    if not connections:
+        return
+    try:
+        pipe = redis_client.pipeline()
+        for sid, owners in connections:
+            pipe.expire(_SID_KEY.format(sid=sid), PRESENCE_TTL_SECONDS)
+            for owner in owners:
+                pipe.expire(_PRESENCE_KEY.format(owner=owner), PRESENCE_TTL_SECONDS)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"[WEBSOCKET] Redis presence refresh failed: {e}")
+
+
+def _refresh_presence_loop(app):
+    while True:
+        socketio.sleep(PRESENCE_REFRESH_SECONDS)
+        with app.app_context():
+            _refresh_presence()
+
+
+def get_online_user_ids(user_ids):
+    """Subset of ``user_ids`` with at least one registered connection."""
+    user_ids = list(user_ids)
+    redis_client = get_redis()
+    if redis_client is not None:
+        try:
+            pipe = redis_client.pipeline()
+            for user_id in user_ids:
+                pipe.exists(_PRESENCE_KEY.format(owner=f"user:{user_id}"))
+            return {user_id for user_id, online in zip(user_ids, pipe.execute()) if online}
+        except Exception as e:
+            logger.warning(f"[WEBSOCKET] Redis presence lookup failed: {e}")
+            return set(user_ids)  # Unknown presence: emit to everyone rather than no one
+    with _local_lock:
+        return {user_id for user_id in user_ids if _local_presence.get(f"user:{user_id}")}
+
+
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
@@ -32,11 +180,8 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
-    # Silently handle disconnection
-    # Clean up user room associations
-    for user_id, sid in list(active_connections.items()):
-        if sid == request.sid:
-            del active_connections[user_id]
+    # Silently handle disconnection; only this connection's own presence keys are touched
+    _remove_presence(request.sid)
 
 
 @socketio.on('register_user')
@@ -51,7 +196,7 @@ def handle_register_user(data):
         # Join user-specific room
         room = f"user_{user_id}"
         join_room(room)
-        active_connections[user_id] = request.sid
+        _add_presence(request.sid, f"user:{user_id}")
         
         # Silently register user
         emit('registration_success', {'user_id': user_id, 'room': room})
@@ -70,8 +215,7 @@ def handle_unregister_user(data):
         
         room = f"user_{user_id}"
         leave_room(room)
-        if user_id in active_connections:
-            del active_connections[user_id]
+        _remove_presence(request.sid, f"user:{user_id}")
         
         # Silently unregister user
         emit('unregistration_success', {'user_id': user_id})
@@ -95,7 +239,7 @@ def handle_register_admin(data):
         # Also join general admin room
         join_room("admins")
         
-        active_connections[f"admin_{admin_id}"] = request.sid
+        _add_presence(request.sid, f"admin:{admin_id}")
         
         # Silently register admin
         emit('registration_success', {'admin_id': admin_id, 'rooms': [room, 'admins']})
@@ -108,17 +252,36 @@ def emit_notification(user_id, notification_data):
     """Emit notification to specific user"""
     try:
         room = f"user_{user_id}"
-        socketio.emit('new_notification', notification_data, room=room)
+        _emitter().emit('new_notification', notification_data, room=room)
         # Silently emit notification
     except Exception as e:
         logger.error(f"[WEBSOCKET] Error emitting notification to user {user_id}: {e}")
 
 
+def emit_notification_batch(notifications, yield_every=200):
+    """
+    Emit a batch of notifications (each carrying its user_id) to the users that are online.
+    Offline users load the stored notifications on their next visit, so they are skipped
+    instead of costing one message queue publish each.
+    """
+    online = get_online_user_ids({notification_data['user_id'] for notification_data in notifications})
+    emitter = _emitter()
+    emitted = 0
+    for notification_data in notifications:
+        if notification_data['user_id'] not in online:
+            continue
+        emit_notification(notification_data['user_id'], notification_data)
+        emitted += 1
+        if emitted % yield_every == 0 and emitter.server is not None:
+            emitter.sleep(0)
+    return emitted
+
+
 def emit_admin_notification(admin_id, notification_data):
     """Emit notification to specific admin"""
     try:
         room = f"admin_{admin_id}"
-        socketio.emit('new_admin_notification', notification_data, room=room)
+        _emitter().emit('new_admin_notification', notification_data, room=room)
         # Silently emit notification
     except Exception as e:
         logger.error(f"[WEBSOCKET] Error emitting notification to admin {admin_id}: {e}")
@@ -127,7 +290,7 @@ def emit_admin_notification(admin_id, notification_data):
 def emit_broadcast_notification(notification_data):
     """Emit notification to all admins"""
     try:
-        socketio.emit('new_admin_notification', notification_data, room='admins')
+        _emitter().emit('new_admin_notification', notification_data, room='admins')
         # Silently broadcast notification
     except Exception as e:
         logger.error(f"[WEBSOCKET] Error broadcasting notification: {e}")
@@ -137,7 +300,7 @@ def emit_task_status(user_id, task_data):
     """Emit AI task status update to user"""
     try:
         room = f"user_{user_id}"
-        socketio.emit('task_status', task_data, room=room)
+        _emitter().emit('task_status', task_data, room=room)
         # Silently emit task status
     except Exception as e:
         logger.error(f"[WEBSOCKET] Error emitting task status to user {user_id}: {e}")
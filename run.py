@@ -2,6 +2,7 @@ import os
 from flask import Flask,request, jsonify , send_from_directory
 from flask_cors import CORS
 from flask_migrate import Migrate  
+from werkzeug.middleware.proxy_fix import ProxyFix
 from app.routes.survey import survey_bp
 from app.routes.upload import upload_bp
 from app.routes.question_bank import question_bank_bp
@@ -31,6 +32,12 @@ load_dotenv()
 
 def create_app():
     app = Flask(__name__)
+
+    # Behind nginx/a load balancer request.remote_addr is the proxy; trust that many
+    # X-Forwarded-* hops so per-IP rate limits see the real client (0 = not proxied)
+    proxy_hops = int(os.environ.get('PROXY_FIX_X_FOR', 0))
+    if proxy_hops > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_hops, x_proto=proxy_hops, x_host=proxy_hops)
     frontend_origins_str = os.environ.get('FRONTEND_ORIGINS', 'http://98.86.84.2,http://localhost:3000,http://localhost:3002,http://172.16.110.39:3001')
     frontend_origins = [origin.strip() for origin in frontend_origins_str.split(',') if origin.strip()]
     
@@ -255,6 +262,10 @@ def create_app():
     # Register CLI commands
     from app.jobs.leaderboard_job import create_leaderboard_cli_command
     create_leaderboard_cli_command(app)
+    from app.jobs.analytics_aggregate_job import create_response_aggregate_cli_command
+    create_response_aggregate_cli_command(app)
+    from app.jobs.hot_path_index_job import create_hot_path_index_cli_commands
+    create_hot_path_index_cli_commands(app)
 
     return app, socketio
 